@@ -1,24 +1,75 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks, status
-from fastapi.responses import FileResponse
-from typing import List, Optional
-import uuid
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from typing import List, Optional, Tuple
+import asyncio
+import functools
 import os
-import json
+import uuid
 from datetime import datetime
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.services.model_generator import ModelGenerator
+from app.services.executor import render_executor, QueueFullError
+from app.services.scheduler import FREE_TIER, generation_scheduler
+from app.services.cancellation import job_registry
+from app.services.backends import backend_pool
+from app.services.progress import progress_broker, stream_status_events
+from app.services.storage import model_storage
+from app.services.lod import ensure_lod, parse_lod_levels
+from app.services.gltf import MEDIA_TYPE as GLB_MEDIA_TYPE, glb_exporter
+from app.services.bedrock import iter_bedrock_archive
+from app.services.result_cache import result_cache
+from app.services.renderer import preview_renderer
+from app.services.animated_preview import ANIMATED_FORMATS, animated_preview_renderer
+from app.services.archetypes import archetype_registry
+from app.services.importer import BBModelImportError, ImportLimitError, bbmodel_importer
+from app.services.prompt_analyzer import analyze_prompt, resolve_animation, resolve_archetype
+from app.services import serializer
 from app.services.auth import get_current_user
-from app.models.user import User
-from app.models.bbmodel import BBModelCreate, BBModel, BBModelResponse, ModelStatus, ModelType, AnimationType
+from app.models.user import User, UserRole
+from app.models.bbmodel import BBModelCreate, BBModel, BBModelResponse, BatchResponse, ImportResponse, ModelStatus, ModelType, AnimationType
 from app.models.social import VisibilityType
-from app.db.base import get_db
+from app.db.base import get_db, SessionLocal
 from app.db import crud
 
 router = APIRouter()
 model_generator = ModelGenerator()
 
+def calculate_token_cost(model_type: str, animation_type: Optional[str]) -> int:
+    """Calculate the token cost of one model based on complexity"""
+    token_cost = 1  # Base cost
+    
+    if animation_type:
+        token_cost += 1  # Additional cost for animations
+    
+    if model_type in ["environment", "vehicle"]:
+        token_cost += 1  # Additional cost for complex models
+    
+    return token_cost
+
+def calculate_edit_cost(aspect: str, animation_type: Optional[str]) -> int:
+    """Calculate the token cost of regenerating one aspect of a model"""
+    if aspect == "animations" and not animation_type:
+        return 0  # Removing animations generates nothing
+    return 1
+
+def subscription_tier(db: Session, user_id: str) -> str:
+    """Scheduling tier of a user: the tier of their active subscription, or free"""
+    user_subscription = crud.get_user_subscription(db, user_id)
+    if user_subscription is None or user_subscription.subscription is None:
+        return FREE_TIER
+    tier = user_subscription.subscription.tier
+    return getattr(tier, "value", tier)
+
+def resolve_request_types(prompt: str, model_type: str, animation_type: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Replace "auto" model and animation types with what the prompt asks for"""
+    features = analyze_prompt(prompt)
+    if model_type == "auto":
+        model_type = resolve_archetype(model_type, features, archetype_registry.templates)
+    return model_type, resolve_animation(animation_type, features)
+
 @router.post("/generate", response_model=BBModelResponse)
 async def generate_model(
     prompt: str = Form(...),
@@ -26,21 +77,18 @@ async def generate_model(
     animation_type: Optional[str] = Form(None),
     visibility: VisibilityType = Form(VisibilityType.PRIVATE),
     tags: List[str] = Form([]),
-    background_tasks: BackgroundTasks = None,
+    seed: Optional[int] = Form(None),
+    optimize: bool = Form(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Generate a new bbmodel based on the provided prompt
-    """
-    # Calculate token cost based on complexity
-    token_cost = 1  # Base cost
-    
-    if animation_type:
-        token_cost += 1  # Additional cost for animations
     
-    if model_type in ["environment", "vehicle"]:
-        token_cost += 1  # Additional cost for complex models
+    `model_type` and `animation_type` may be "auto" to pick them from the prompt
+    """
+    model_type, animation_type = resolve_request_types(prompt, model_type, animation_type)
+    token_cost = calculate_token_cost(model_type, animation_type)
     
     # Check if user has enough tokens
     if current_user.token_balance < token_cost:
@@ -67,17 +115,31 @@ async def generate_model(
     
     crud.create_model(db, model_data)
     
-    # Create a task to generate the model in the background
-    background_tasks.add_task(
-        model_generator.generate_model,
-        prompt=prompt,
-        model_id=model_id,
-        model_type=model_type,
-        animation_type=animation_type,
-        user_id=current_user.id,
-        db_session=db,
-        token_cost=token_cost
-    )
+    # Hand the job to the generation scheduler; the event loop only enqueues
+    job = job_registry.register(model_id, owner=current_user.id)
+    try:
+        job.future = generation_scheduler.submit_as(
+            current_user.id,
+            subscription_tier(db, current_user.id),
+            model_generator.generate_model,
+            prompt=prompt,
+            model_id=model_id,
+            model_type=model_type,
+            animation_type=animation_type,
+            user_id=current_user.id,
+            db_session_factory=SessionLocal,
+            token_cost=token_cost,
+            seed=seed,
+            optimize=optimize
+        )
+    except QueueFullError as e:
+        job_registry.discard(model_id, job)
+        # Nothing was charged; don't leave the row stuck in PROCESSING
+        crud.delete_models(db, [model_id])
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     
     return {
         "model_id": model_id,
@@ -86,6 +148,336 @@ async def generate_model(
         "token_cost": token_cost
     }
 
+@router.post("/generate/batch", response_model=BatchResponse)
+async def generate_batch(
+    prompt: Optional[str] = Form(None),
+    prompts: List[str] = Form([]),
+    count: int = Form(1),
+    model_type: str = Form("character"),
+    animation_type: Optional[str] = Form(None),
+    visibility: VisibilityType = Form(VisibilityType.PRIVATE),
+    tags: List[str] = Form([]),
+    seed: Optional[int] = Form(None),
+    optimize: bool = Form(False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Generate `count` variants of a prompt (or of each prompt in `prompts`) in one job
+    
+    `model_type` and `animation_type` may be "auto" to pick them per prompt
+    """
+    prompts = list(prompts) + ([prompt] if prompt else [])
+    if not prompts:
+        raise HTTPException(status_code=400, detail="A prompt or a list of prompts is required")
+    
+    total = len(prompts) * count
+    if count < 1 or total > settings.BATCH_MAX_VARIANTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch must contain between 1 and {settings.BATCH_MAX_VARIANTS} variants"
+        )
+    
+    # With "auto" types every prompt may resolve differently; charge the dearest
+    request_types = {
+        variant_prompt: resolve_request_types(variant_prompt, model_type, animation_type)
+        for variant_prompt in prompts
+    }
+    token_cost = max(calculate_token_cost(*types) for types in request_types.values())
+    if current_user.token_balance < token_cost * total:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=f"Insufficient tokens. Required: {token_cost * total}, Available: {current_user.token_balance}"
+        )
+    
+    batch_id = str(uuid.uuid4())
+    # Each variant carries its prompt's resolved types, as /generate would use them
+    variants = [
+        {
+            "model_id": str(uuid.uuid4()),
+            "prompt": variant_prompt,
+            "variant": index,
+            "model_type": request_types[variant_prompt][0],
+            "animation_type": request_types[variant_prompt][1]
+        }
+        for variant_prompt in prompts
+        for index in range(count)
+    ]
+    
+    # Insert every model row in one transaction
+    crud.create_models(db, [
+        {
+            "id": variant["model_id"],
+            "name": f"Model from: {variant['prompt'][:20]}...",
+            "prompt": variant["prompt"],
+            "user_id": current_user.id,
+            "status": ModelStatus.PROCESSING,
+            "model_type": variant["model_type"],
+            "animation_type": variant["animation_type"],
+            "visibility": visibility,
+            "tags": tags,
+            "token_cost": token_cost
+        }
+        for variant in variants
+    ])
+    
+    job = job_registry.register(
+        batch_id, owner=current_user.id, members=[variant["model_id"] for variant in variants]
+    )
+    try:
+        job.future = generation_scheduler.submit_as(
+            current_user.id,
+            subscription_tier(db, current_user.id),
+            model_generator.generate_batch,
+            batch_id=batch_id,
+            variants=variants,
+            model_type=model_type,
+            animation_type=animation_type,
+            user_id=current_user.id,
+            db_session_factory=SessionLocal,
+            token_cost=token_cost,
+            seed=seed,
+            optimize=optimize
+        )
+    except QueueFullError as e:
+        job_registry.discard(batch_id, job)
+        crud.delete_models(db, [variant["model_id"] for variant in variants])
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    return {
+        "batch_id": batch_id,
+        "status": ModelStatus.PROCESSING,
+        "message": "Batch generation started. Check the batch status endpoint for updates.",
+        "model_ids": [variant["model_id"] for variant in variants],
+        "total": total,
+        "token_cost": token_cost * total
+    }
+
+@router.post("/import", response_model=ImportResponse)
+async def import_model(
+    request: Request,
+    file: UploadFile = File(...),
+    visibility: VisibilityType = Form(VisibilityType.PRIVATE),
+    tags: List[str] = Form([]),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Import a Blockbench .bbmodel file
+    
+    The file is validated while it is parsed, so oversized or malformed
+    uploads are rejected at the first offending element without being loaded
+    into memory as a whole.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.IMPORT_MAX_BYTES + 64 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {settings.IMPORT_MAX_BYTES} bytes"
+        )
+    
+    model_id = str(uuid.uuid4())
+    try:
+        # Parsing is CPU-bound, so keep it off the event loop
+        summary = await run_in_threadpool(
+            bbmodel_importer.import_file, model_id, file.file, current_user.id, file.filename
+        )
+    except ImportLimitError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except BBModelImportError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    crud.create_model(db, {
+        "id": model_id,
+        "name": file.filename or f"Imported model {model_id[:8]}",
+        "prompt": "",
+        "user_id": current_user.id,
+        # Database enum columns look members up by name, not by value
+        "status": ModelStatus.COMPLETED.name,
+        "model_type": ModelType.CUSTOM.name,
+        "visibility": visibility.name,
+        "tags": tags,
+        "token_cost": 0
+    })
+    
+    return {
+        "model_id": model_id,
+        "status": ModelStatus.COMPLETED,
+        "message": "Model imported successfully",
+        "download_url": f"/api/models/{model_id}/download",
+        **{key: summary[key] for key in ("elements", "animations", "textures", "size")}
+    }
+
+@router.post("/{model_id}/edit", response_model=BBModelResponse)
+async def edit_model(
+    model_id: str,
+    aspect: str = Form(..., pattern="^(animations|textures|elements)$"),
+    prompt: Optional[str] = Form(None),
+    animation_type: Optional[str] = Form(None),
+    group: Optional[str] = Form(None),
+    seed: Optional[int] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Regenerate only the animations, the textures or one element group of a model
+    
+    `group` selects the elements to rebuild by name (e.g. "leg" or "head").
+    `prompt` defaults to the model's own prompt and steers colours, size and
+    "auto" animations. The rest of the stored model is kept as it is.
+    """
+    bbmodel = model_storage.load(model_id)
+    if bbmodel is None or bbmodel.get("metadata", {}).get("user_id", current_user.id) != current_user.id:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    
+    current = model_generator.get_model_status(model_id, current_user.id)
+    queued = job_registry.get(model_id) is not None
+    if queued or (current is not None and current["status"] == ModelStatus.PROCESSING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Model is still being generated or edited"
+        )
+    
+    if aspect == "textures" and not settings.TEXTURE_GENERATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Texture generation is disabled"
+        )
+    
+    if aspect == "elements":
+        if not group or not any(group in element.get("name", "") for element in bbmodel.get("elements", [])):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No element group named {group!r}"
+            )
+    
+    if animation_type == "auto":
+        features = analyze_prompt(prompt or bbmodel.get("metadata", {}).get("prompt", ""))
+        animation_type = resolve_animation(animation_type, features)
+    token_cost = calculate_edit_cost(aspect, animation_type)
+    if current_user.token_balance < token_cost:
+        raise HTTPException(
+            status_code=status.HTTP_402_PAYMENT_REQUIRED,
+            detail=f"Insufficient tokens. Required: {token_cost}, Available: {current_user.token_balance}"
+        )
+    
+    job = job_registry.register(model_id, owner=current_user.id)
+    try:
+        job.future = generation_scheduler.submit_as(
+            current_user.id,
+            subscription_tier(db, current_user.id),
+            model_generator.edit_model,
+            model_id=model_id,
+            aspect=aspect,
+            prompt=prompt,
+            animation_type=animation_type,
+            group=group,
+            user_id=current_user.id,
+            db_session_factory=SessionLocal,
+            token_cost=token_cost,
+            seed=seed
+        )
+    except QueueFullError as e:
+        job_registry.discard(model_id, job)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+    
+    return {
+        "model_id": model_id,
+        "status": ModelStatus.PROCESSING,
+        "message": f"Model {aspect} edit started. Check status endpoint for updates.",
+        "token_cost": token_cost
+    }
+
+@router.delete("/{model_id}/generation", response_model=BBModelResponse)
+async def cancel_generation(
+    model_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel the queued or running generation or edit of a model
+    
+    A queued job is dropped at once. A running job stops at its next
+    pipeline stage and its tokens are refunded; poll the status endpoint
+    for the final "cancelled" status. Cancelling a variant of a batch
+    cancels the whole batch.
+    """
+    model = crud.get_model(db, model_id)
+    if model is None or model.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    cancelled = model_generator.cancel(model_id)
+    if cancelled is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Model is not being generated or edited"
+        )
+    
+    return cancelled
+
+@router.delete("/batch/{batch_id}/generation", response_model=BatchResponse)
+async def cancel_batch(
+    batch_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a queued or running batch
+    
+    A queued batch is dropped at once. A running batch stops before its next
+    stage or variant, and the tokens of the variants it did not finish are
+    refunded; variants already stored are kept.
+    """
+    job = job_registry.get(batch_id)
+    if job is not None and job.members:
+        owner = job.owner
+    else:
+        # Finished or unknown here; the owner of its variants owns the batch
+        batch = model_generator.get_model_status(batch_id, current_user.id)
+        model = crud.get_model(db, batch["model_ids"][0]) if batch and batch.get("model_ids") else None
+        owner = model.user_id if model else None
+    if owner != current_user.id:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    cancelled = model_generator.cancel(batch_id)
+    if cancelled is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Batch is not being generated"
+        )
+    
+    cancelled["variants"] = [
+        variant
+        for variant in (model_generator.get_model_status(model_id, current_user.id) for model_id in cancelled.get("model_ids", []))
+        if variant is not None
+    ]
+    return cancelled
+
+@router.get("/batch/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(
+    batch_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of a batch and of each of its variants
+    """
+    batch = model_generator.get_model_status(batch_id, current_user.id)
+    if not batch or "batch_id" not in batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    batch["variants"] = [
+        variant
+        for variant in (model_generator.get_model_status(model_id, current_user.id) for model_id in batch["model_ids"])
+        if variant is not None
+    ]
+    return batch
+
 @router.get("/status/{model_id}", response_model=BBModelResponse)
 async def get_model_status(
     model_id: str,
@@ -100,25 +492,246 @@ async def get_model_status(
     
     return status
 
+@router.get("/status/{model_id}/stream")
+async def stream_model_status(
+    model_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream status changes of a model generation task as Server-Sent Events
+    """
+    if model_generator.get_model_status(model_id, current_user.id) is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    events = stream_status_events(
+        progress_broker,
+        model_id,
+        lambda: model_generator.get_model_status(model_id, current_user.id)
+    )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get hit/miss counters of the generation result cache
+    """
+    return result_cache.stats()
+
+@router.get("/backend/stats")
+async def get_backend_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get load times and inference latency of the generator backend pool
+    """
+    return backend_pool.stats()
+
+@router.get("/queue/stats")
+async def get_queue_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get queue depth, per-tier waits and per-user in-flight jobs of the generation scheduler
+    
+    Administrators see every user; everyone else only their own entry
+    """
+    is_admin = current_user.is_superuser or current_user.role == UserRole.ADMIN
+    return generation_scheduler.stats(user_id=current_user.id, all_users=is_admin)
+
 @router.get("/{model_id}/download")
 async def download_model(
     model_id: str,
+    request: Request,
+    lod: int = Query(0, ge=0),
     current_user: User = Depends(get_current_user)
 ):
     """
     Download the generated bbmodel file
+    
+    `lod` selects a reduced-detail copy (1 for the first of LOD_LEVELS, and
+    so on); copies that were not stored with the model are built from it on
+    first request.
     """
-    model_path = os.path.join(settings.MODELS_DIR, f"{model_id}.bbmodel")
+    key = model_id
+    filename = f"{model_id}.bbmodel"
+    if lod:
+        levels = parse_lod_levels(settings.LOD_LEVELS)
+        if lod > len(levels):
+            raise HTTPException(status_code=404, detail=f"LOD {lod} is not available; levels are 1-{len(levels)}")
+        # Simplifying is CPU-bound, so keep it off the event loop
+        key = await run_in_threadpool(ensure_lod, model_storage, model_id, lod, levels)
+        filename = f"{model_id}_lod{lod}.bbmodel"
+    
+    meta = model_storage.get_meta(key) if key else None
+    model_path = model_storage.path(key) if key else None
     
-    if not os.path.exists(model_path):
+    if meta is None or model_path is None:
         raise HTTPException(status_code=404, detail="Model file not found")
     
-    return FileResponse(
-        model_path,
+    encoding = meta["encoding"]
+    headers = {"Vary": "Accept-Encoding"}
+    
+    # Serve the stored bytes as-is when the client can decode them
+    if serializer.accepts_encoding(request.headers.get("accept-encoding"), encoding):
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return FileResponse(
+            model_path,
+            media_type="application/octet-stream",
+            filename=filename,
+            headers=headers
+        )
+    
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(
+        content=model_storage.load_bytes(key),
         media_type="application/octet-stream",
-        filename=f"{model_id}.bbmodel"
+        headers=headers
+    )
+
+@router.get("/{model_id}/export/glb")
+async def export_glb(
+    model_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download a model as binary glTF (GLB)
+    
+    Exports are cached under the content hash of the stored model; on a miss
+    the file is streamed while it is converted and cached once complete.
+    """
+    if not crud.get_accessible_models(db, [model_id], current_user.id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    content_hash = model_storage.content_hash(model_id)
+    if content_hash is None:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    
+    filename = f"{model_id}.glb"
+    path = glb_exporter.cached(content_hash)
+    if path is not None:
+        return FileResponse(path, media_type=GLB_MEDIA_TYPE, filename=filename)
+    
+    bbmodel = model_storage.load(model_id)
+    if bbmodel is None:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    # Starlette iterates the sync generator in a worker thread, off the event loop
+    return StreamingResponse(
+        glb_exporter.stream(bbmodel, content_hash),
+        media_type=GLB_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/export/bedrock")
+async def export_bedrock(
+    model_ids: List[str] = Form(...),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Export models as Minecraft Bedrock geometry and animation files in one zip
+    
+    The archive is laid out like a resource pack (models/entity, animations,
+    textures/entity) and streamed as the models are converted. Models deleted
+    while the export runs are listed as missing in its manifest.json.
+    """
+    model_ids = list(dict.fromkeys(model_ids))
+    if len(model_ids) > settings.BEDROCK_EXPORT_MAX_MODELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.BEDROCK_EXPORT_MAX_MODELS} models can be exported at once"
+        )
+    
+    accessible = {model.id for model in crud.get_accessible_models(db, model_ids, current_user.id)}
+    unavailable = [model_id for model_id in model_ids if model_id not in accessible]
+    if unavailable:
+        raise HTTPException(status_code=404, detail=f"Models not found: {', '.join(unavailable)}")
+    
+    models = ((model_id, functools.partial(model_storage.load, model_id)) for model_id in model_ids)
+    # Starlette iterates the sync generator in a worker thread, off the event loop
+    return StreamingResponse(
+        iter_bedrock_archive(models, settings.ANIMATION_INTERPOLATION),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="bedrock_models.zip"'}
     )
 
+@router.get("/{model_id}/preview")
+async def get_model_preview(
+    model_id: str,
+    size: Optional[int] = Query(None, ge=16, le=1024),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a PNG preview of a model, rendering it if it does not exist yet
+    """
+    if not crud.get_accessible_models(db, [model_id], current_user.id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    size = size or settings.PREVIEW_SIZE
+    preview_path = model_storage.preview_path(model_id)
+    if size == settings.PREVIEW_SIZE and os.path.exists(preview_path):
+        return FileResponse(preview_path, media_type="image/png")
+    
+    bbmodel = model_storage.load(model_id)
+    if bbmodel is None:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    
+    # Rendering is CPU-bound, so keep it off the event loop
+    png = await run_in_threadpool(preview_renderer.render, bbmodel, size)
+    if size == settings.PREVIEW_SIZE:
+        model_storage.save_preview(model_id, png)
+    return Response(content=png, media_type="image/png")
+
+@router.get("/{model_id}/preview/animated")
+async def get_animated_preview(
+    model_id: str,
+    animation: Optional[str] = None,
+    size: Optional[int] = Query(None, ge=16, le=512),
+    fps: Optional[float] = Query(None, gt=0, le=30),
+    image_format: Optional[str] = Query(None, alias="format", pattern="^(gif|apng)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get an animated GIF/APNG preview of one of a model's animations
+    (the first one unless `animation` names another)
+    """
+    if not crud.get_accessible_models(db, [model_id], current_user.id):
+        raise HTTPException(status_code=404, detail="Model not found")
+    
+    bbmodel = model_storage.load(model_id)
+    if bbmodel is None:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    
+    try:
+        path = animated_preview_renderer.path_for(bbmodel, animation, size, fps, image_format)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    # Render in the render pool unless a previous request already did
+    if not animated_preview_renderer.cached(path):
+        try:
+            future = render_executor.submit(
+                animated_preview_renderer.render, bbmodel, animation, size, fps, image_format
+            )
+        except QueueFullError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e)
+            )
+        path = await asyncio.wrap_future(future)
+    
+    media_type = ANIMATED_FORMATS[image_format or settings.ANIMATED_PREVIEW_FORMAT][2]
+    return FileResponse(path, media_type=media_type)
+
 @router.get("/", response_model=List[BBModel])
 async def list_models(
     current_user: User = Depends(get_current_user),
@@ -132,29 +745,26 @@ async def list_models(
     # For now, we'll scan the models directory
     models = []
     
-    for filename in os.listdir(settings.MODELS_DIR):
-        if filename.endswith(".bbmodel"):
-            model_id = filename.split(".")[0]
-            model_path = os.path.join(settings.MODELS_DIR, filename)
+    for model_id in model_storage.iter_model_ids():
+        try:
+            model_data = model_storage.load(model_id)
+            
+            # Extract metadata if available
+            metadata = model_data.get("metadata", {})
             
-            try:
-                with open(model_path, "r") as f:
-                    model_data = json.load(f)
-                    
-                    # Extract metadata if available
-                    metadata = model_data.get("metadata", {})
-                    
-                    models.append({
-                        "id": model_id,
-                        "name": metadata.get("name", f"Model {model_id[:8]}"),
-                        "prompt": metadata.get("prompt", ""),
-                        "created_at": metadata.get("created_at", datetime.now().isoformat()),
-                        "user_id": metadata.get("user_id", current_user.id),
-                        "status": "completed"
-                    })
-            except:
-                # If we can't read the file, skip it
-                continue
+            models.append({
+                "id": model_id,
+                "name": metadata.get("name", f"Model {model_id[:8]}"),
+                "prompt": metadata.get("prompt", ""),
+                "created_at": metadata.get("created_at", datetime.now().isoformat()),
+                "user_id": metadata.get("user_id", current_user.id),
+                "status": "completed",
+                "model_type": metadata.get("model_type") or ModelType.CUSTOM,
+                "animation_type": metadata.get("animation_type")
+            })
+        except:
+            # If we can't read the file, skip it
+            continue
     
     # Filter by user_id and apply pagination
     user_models = [m for m in models if m["user_id"] == current_user.id]
@@ -19,10 +19,115 @@ class Settings(BaseModel):
     # AI Model settings
     MODEL_CHECKPOINT: str = "stabilityai/stable-diffusion-2-1"
     DEVICE: str = "cuda" if os.getenv("USE_CUDA", "0") == "1" else "cpu"
+    # Backend behind generation: "mock", "local" or a "package.module:Class" path
+    GENERATOR_BACKEND: str = os.getenv("GENERATOR_BACKEND", "mock")
+    # Loaded instances shared by the generation workers
+    GENERATOR_BACKEND_POOL_SIZE: int = int(os.getenv("GENERATOR_BACKEND_POOL_SIZE", "1"))
+    # Load the pool when the worker starts instead of on the first generation
+    GENERATOR_BACKEND_PRELOAD: bool = os.getenv("GENERATOR_BACKEND_PRELOAD", "1") == "1"
     
     # Storage
     MODELS_DIR: str = "./static/models"
     TEXTURES_DIR: str = "./static/textures"
+    PREVIEWS_DIR: str = "./static/previews"
+    # Converted downloads (GLB, ...), cached under the content hash of the model they came from
+    EXPORTS_DIR: str = "./static/exports"
+    # "identity", "gzip" or "zstd" (zstd needs the zstandard package)
+    MODEL_STORAGE_ENCODING: str = os.getenv("MODEL_STORAGE_ENCODING", "identity")
+    MODEL_PRETTY_JSON: bool = os.getenv("MODEL_PRETTY_JSON", "0") == "1"
+    
+    # Generation workers
+    GENERATION_WORKERS: int = int(os.getenv("GENERATION_WORKERS", str(os.cpu_count() or 4)))
+    GENERATION_QUEUE_LIMIT: int = int(os.getenv("GENERATION_QUEUE_LIMIT", "1000"))
+    GENERATION_STAGE_DELAY: float = float(os.getenv("GENERATION_STAGE_DELAY", "1.0"))
+    BATCH_MAX_VARIANTS: int = int(os.getenv("BATCH_MAX_VARIANTS", "50"))
+    # Seconds a job may run before it is stopped at its next stage and refunded (0 disables)
+    GENERATION_TIMEOUT: float = float(os.getenv("GENERATION_TIMEOUT", "300"))
+    
+    # Generation scheduling: share of workers per subscription tier (users without one are "free")
+    SCHEDULER_TIER_WEIGHTS: str = os.getenv("SCHEDULER_TIER_WEIGHTS", "enterprise:8,pro:4,basic:2,free:1")
+    # Jobs a single user may have running, and waiting, at once
+    SCHEDULER_USER_CONCURRENCY: int = int(os.getenv("SCHEDULER_USER_CONCURRENCY", "2"))
+    SCHEDULER_USER_QUEUE_LIMIT: int = int(os.getenv("SCHEDULER_USER_QUEUE_LIMIT", "500"))
+    
+    # Job status store ("memory" is per-process, "sqlite" is shared by all workers)
+    STATUS_STORE_BACKEND: str = os.getenv("STATUS_STORE_BACKEND", "memory")
+    STATUS_STORE_PATH: str = os.getenv("STATUS_STORE_PATH", "./job_status.db")
+    STATUS_STORE_MAX_ENTRIES: int = int(os.getenv("STATUS_STORE_MAX_ENTRIES", "10000"))
+    STATUS_RETENTION_SECONDS: float = float(os.getenv("STATUS_RETENTION_SECONDS", "3600"))
+    PROGRESS_HEARTBEAT_SECONDS: float = float(os.getenv("PROGRESS_HEARTBEAT_SECONDS", "15"))
+    
+    # Bake generated animations to a key per frame (0 keeps sparse keyframes)
+    ANIMATION_BAKE_FPS: float = float(os.getenv("ANIMATION_BAKE_FPS", "0"))
+    # "linear", "catmullrom" or "step"
+    ANIMATION_INTERPOLATION: str = os.getenv("ANIMATION_INTERPOLATION", "linear")
+    # Upper bound on frames sampled when baking, so a huge imported length cannot exhaust memory
+    ANIMATION_MAX_FRAMES: int = int(os.getenv("ANIMATION_MAX_FRAMES", "2400"))
+    # Drop keyframes that interpolation reproduces within these tolerances
+    ANIMATION_SIMPLIFY: bool = os.getenv("ANIMATION_SIMPLIFY", "1") == "1"
+    ANIMATION_ROTATION_TOLERANCE: float = float(os.getenv("ANIMATION_ROTATION_TOLERANCE", "0.1"))
+    ANIMATION_POSITION_TOLERANCE: float = float(os.getenv("ANIMATION_POSITION_TOLERANCE", "0.01"))
+    ANIMATION_SCALE_TOLERANCE: float = float(os.getenv("ANIMATION_SCALE_TOLERANCE", "0.001"))
+    
+    # Pack face UVs into the smallest power-of-two atlas instead of the template layout
+    UV_PACKING: bool = os.getenv("UV_PACKING", "1") == "1"
+    UV_TEXEL_DENSITY: float = float(os.getenv("UV_TEXEL_DENSITY", "1.0"))
+    UV_PADDING: int = int(os.getenv("UV_PADDING", "0"))
+    
+    # Procedural atlas textures, embedded as data URIs or only linked from TEXTURES_DIR
+    TEXTURE_GENERATION: bool = os.getenv("TEXTURE_GENERATION", "1") == "1"
+    TEXTURE_EMBED: bool = os.getenv("TEXTURE_EMBED", "1") == "1"
+    # zlib level for atlas PNGs; noisy fills barely shrink above 1 but encode several times slower
+    TEXTURE_PNG_COMPRESSION: int = int(os.getenv("TEXTURE_PNG_COMPRESSION", "1"))
+    TEXTURE_CACHE_MAX_BYTES: int = int(os.getenv("TEXTURE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # Preview thumbnails rendered after generation and on demand
+    PREVIEW_RENDERING: bool = os.getenv("PREVIEW_RENDERING", "1") == "1"
+    PREVIEW_SIZE: int = int(os.getenv("PREVIEW_SIZE", "256"))
+    PREVIEW_CACHE_MAX_BYTES: int = int(os.getenv("PREVIEW_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # Animated previews ("gif" or "apng"), rendered by their own worker pool and kept in PREVIEWS_DIR
+    ANIMATED_PREVIEWS: bool = os.getenv("ANIMATED_PREVIEWS", "1") == "1"
+    ANIMATED_PREVIEW_FORMAT: str = os.getenv("ANIMATED_PREVIEW_FORMAT", "gif")
+    ANIMATED_PREVIEW_SIZE: int = int(os.getenv("ANIMATED_PREVIEW_SIZE", "128"))
+    ANIMATED_PREVIEW_FPS: float = float(os.getenv("ANIMATED_PREVIEW_FPS", "12"))
+    # Longer animations are rendered at a lower frame rate to stay within this many frames
+    ANIMATED_PREVIEW_MAX_FRAMES: int = int(os.getenv("ANIMATED_PREVIEW_MAX_FRAMES", "240"))
+    # Requested sizes and frame rates snap to the nearest of these, so clients cannot mint unbounded variants
+    ANIMATED_PREVIEW_SIZES: str = os.getenv("ANIMATED_PREVIEW_SIZES", "32,64,128,256,512")
+    ANIMATED_PREVIEW_FPS_STEPS: str = os.getenv("ANIMATED_PREVIEW_FPS_STEPS", "4,8,12,15,24,30")
+    # Disk space animated previews may take in PREVIEWS_DIR; least recently used files go first
+    ANIMATED_PREVIEW_CACHE_MAX_BYTES: int = int(os.getenv("ANIMATED_PREVIEW_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    RENDER_WORKERS: int = int(os.getenv("RENDER_WORKERS", "2"))
+    # Render in worker processes so CPU-bound preview rendering scales past the GIL
+    RENDER_PROCESSES: bool = os.getenv("RENDER_PROCESSES", "0") == "1"
+    RENDER_QUEUE_LIMIT: int = int(os.getenv("RENDER_QUEUE_LIMIT", "200"))
+    
+    # Reduced-detail copies stored next to each model, as element budget fractions of LOD 1, 2, ...
+    LOD_GENERATION: bool = os.getenv("LOD_GENERATION", "0") == "1"
+    LOD_LEVELS: str = os.getenv("LOD_LEVELS", "0.5,0.2")
+    
+    # Frame rate that smooth (Catmull-Rom) animation segments are sampled at for glTF export
+    GLTF_ANIMATION_FPS: float = float(os.getenv("GLTF_ANIMATION_FPS", "24"))
+    # Disk space GLB exports may take in EXPORTS_DIR; least recently used files go first
+    GLB_EXPORT_CACHE_MAX_BYTES: int = int(os.getenv("GLB_EXPORT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    
+    # Models per bulk Bedrock export request
+    BEDROCK_EXPORT_MAX_MODELS: int = int(os.getenv("BEDROCK_EXPORT_MAX_MODELS", "1000"))
+    
+    # Recent prompt analyses kept in memory
+    PROMPT_ANALYSIS_CACHE_SIZE: int = int(os.getenv("PROMPT_ANALYSIS_CACHE_SIZE", "4096"))
+    
+    # Limits for uploaded bbmodel files, enforced while the upload is parsed
+    IMPORT_MAX_BYTES: int = int(os.getenv("IMPORT_MAX_BYTES", str(512 * 1024 * 1024)))
+    IMPORT_MAX_ELEMENTS: int = int(os.getenv("IMPORT_MAX_ELEMENTS", "100000"))
+    IMPORT_MAX_ANIMATIONS: int = int(os.getenv("IMPORT_MAX_ANIMATIONS", "1000"))
+    # Largest single element, animation, texture or other top-level value
+    IMPORT_MAX_VALUE_BYTES: int = int(os.getenv("IMPORT_MAX_VALUE_BYTES", str(32 * 1024 * 1024)))
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", str(256 * 1024)))
+    
+    # Cache of generation results keyed by normalized prompt and options
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
     
     class Config:
         case_sensitive = True
@@ -7,7 +7,7 @@ from typing import Dict, List, Optional, Any
 from app.db.models import (
     User, UserProfile, Model, Tag, Subscription, UserSubscription, 
     TokenTransaction, Like, Comment, Follow, Notification,
-    VisibilityType, ModelStatus, NotificationType
+    VisibilityType, ModelStatus, NotificationType, model_tags
 )
 from app.utils.password import get_password_hash
 
@@ -96,8 +96,10 @@ def create_model(db: Session, model_data: Dict[str, Any]) -> Model:
     # Handle tags
     tags_data = model_data.pop("tags", [])
     
+    model_id = model_data.pop("id", None) or str(uuid.uuid4())
+    
     model = Model(
-        id=str(uuid.uuid4()),
+        id=model_id,
         **model_data
     )
     db.add(model)
@@ -119,10 +121,42 @@ def create_model(db: Session, model_data: Dict[str, Any]) -> Model:
     db.refresh(model)
     return model
 
+def create_models(db: Session, models_data: List[Dict[str, Any]]) -> List[Model]:
+    """Create several models in a single transaction"""
+    # Resolve every distinct tag once instead of once per model
+    tag_names = {tag_name for model_data in models_data for tag_name in model_data.get("tags", [])}
+    tags = {}
+    if tag_names:
+        tags = {tag.name: tag for tag in db.query(Tag).filter(Tag.name.in_(tag_names)).all()}
+        for tag_name in tag_names - set(tags):
+            tags[tag_name] = Tag(id=str(uuid.uuid4()), name=tag_name)
+            db.add(tags[tag_name])
+    
+    models = []
+    for model_data in models_data:
+        model_data = dict(model_data)
+        tags_data = model_data.pop("tags", [])
+        model_id = model_data.pop("id", None) or str(uuid.uuid4())
+        
+        model = Model(id=model_id, **model_data)
+        model.tags = [tags[tag_name] for tag_name in tags_data]
+        models.append(model)
+    
+    db.add_all(models)
+    db.commit()
+    return models
+
 def get_model(db: Session, model_id: str) -> Optional[Model]:
     """Get a model by ID"""
     return db.query(Model).filter(Model.id == model_id).first()
 
+def get_accessible_models(db: Session, model_ids: List[str], user_id: str) -> List[Model]:
+    """Get those of the given models that the user owns or that are not private"""
+    return db.query(Model).filter(
+        Model.id.in_(model_ids),
+        or_(Model.user_id == user_id, Model.visibility != VisibilityType.PRIVATE)
+    ).all()
+
 def get_models_by_user(db: Session, user_id: str, skip: int = 0, limit: int = 100) -> List[Model]:
     """Get models by user ID"""
     return db.query(Model).filter(Model.user_id == user_id).offset(skip).limit(limit).all()
@@ -183,6 +217,14 @@ def delete_model(db: Session, model_id: str) -> bool:
     db.commit()
     return True
 
+def delete_models(db: Session, model_ids: List[str]) -> int:
+    """Delete several models in a single transaction, returning how many were deleted"""
+    # Bulk deletes; the rows are never loaded
+    db.execute(model_tags.delete().where(model_tags.c.model_id.in_(model_ids)))
+    deleted = db.query(Model).filter(Model.id.in_(model_ids)).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
 def increment_model_view(db: Session, model_id: str) -> bool:
     """Increment model view count"""
     model = get_model(db, model_id)
@@ -1,11 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
 
 from app.api.routes import api_router
+from app.api.endpoints.models import model_generator
 from app.core.config import settings
+from app.services.executor import render_executor
+from app.services.scheduler import generation_scheduler
+from app.services.backends import backend_pool
+from app.services.metrics import CONTENT_TYPE, metrics_registry
 
 app = FastAPI(
     title="AI-Powered bbmodel Generator",
@@ -29,6 +35,26 @@ app.include_router(api_router, prefix="/api")
 os.makedirs("./static/models", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus scrapes this worker's stage timings and queue depth
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
+
+@app.on_event("startup")
+def load_generator_backend():
+    # Pay for model loading before the first request instead of during it
+    if settings.GENERATOR_BACKEND_PRELOAD:
+        backend_pool.warm()
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    # Let running generations finish before the worker exits. Queued ones have not been
+    # charged yet, so they are dropped and marked cancelled; previews can be rendered again
+    generation_scheduler.shutdown(wait=True, cancel_futures=True)
+    model_generator.cancel_dropped()
+    render_executor.shutdown(wait=False)
+    backend_pool.shutdown()
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app", 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from datetime import datetime
 from enum import Enum
 
@@ -24,6 +24,8 @@ class ModelStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
 
 class BBModelCreate(BaseModel):
     prompt: str
@@ -60,13 +62,39 @@ class BBModelResponse(BaseModel):
     status: ModelStatus
     message: Optional[str] = None
     preview_url: Optional[str] = None
+    animated_preview_url: Optional[str] = None
     download_url: Optional[str] = None
     token_cost: int = 1
+    refunded: int = 0
+    timings: Optional[Dict[str, float]] = None
     
     model_config = {
         "from_attributes": True
     }
 
+class BatchResponse(BaseModel):
+    batch_id: str
+    status: ModelStatus
+    message: Optional[str] = None
+    model_ids: List[str] = []
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    token_cost: int = 1
+    refunded: int = 0
+    timings: Optional[Dict[str, float]] = None
+    variants: List[BBModelResponse] = []
+
+class ImportResponse(BaseModel):
+    model_id: str
+    status: ModelStatus
+    message: Optional[str] = None
+    download_url: Optional[str] = None
+    elements: int = 0
+    animations: int = 0
+    textures: int = 0
+    size: int = 0
+
 class BBModelPublic(BaseModel):
     id: str
     name: str
@@ -89,12 +117,15 @@ class BBModelPublic(BaseModel):
 
 class BBModelElement(BaseModel):
     uuid: str
-    type: str
+    type: str = "cube"
     name: str
+    from_: Optional[List[float]] = Field(None, alias="from")
+    to: Optional[List[float]] = None
     origin: List[float] = [0, 0, 0]
     rotation: List[float] = [0, 0, 0]
-    vertices: Optional[List[List[float]]] = None
-    faces: Optional[List[List[int]]] = None
+    # Meshes key vertices and faces by id; cubes key faces by direction
+    vertices: Optional[Union[Dict[str, List[float]], List[List[float]]]] = None
+    faces: Optional[Union[Dict[str, Dict[str, Any]], List[List[int]]]] = None
     
     model_config = {
         "from_attributes": True
@@ -104,9 +135,9 @@ class BBModelAnimation(BaseModel):
     name: str
     uuid: str
     loop: str = "once"
-    length: float
+    length: float = Field(..., ge=0, allow_inf_nan=False)
     snapping: int = 24
-    animators: Dict[str, Any]
+    animators: Dict[str, Any] = {}
     
     model_config = {
         "from_attributes": True
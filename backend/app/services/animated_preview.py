@@ -0,0 +1,191 @@
+import hashlib
+import io
+import math
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.animation import ChannelSet, frame_times
+from app.services.renderer import RENDER_VERSION, VIEW_PITCH, VIEW_YAW, Scene, view_basis
+from app.services.storage import evict_lru, mark_used, write_atomic
+from app.services import serializer
+
+# Pillow format, file suffix and media type of each animated output
+ANIMATED_FORMATS = {
+    "gif": ("GIF", ".gif", "image/gif"),
+    "apng": ("PNG", ".png", "image/apng")
+}
+_SUFFIXES = tuple(suffix for _, suffix, _ in ANIMATED_FORMATS.values())
+
+
+def find_animation(bbmodel: Dict[str, Any], animation: Optional[str] = None) -> Dict[str, Any]:
+    """Pick an animation by name, or the first one"""
+    animations = bbmodel.get("animations") or []
+    for candidate in animations:
+        if animation is None or candidate.get("name") == animation:
+            return candidate
+    raise ValueError(f"Animation not found: {animation}" if animation else "Model has no animations")
+
+
+def snap(value: float, spec: str) -> float:
+    """The value in a comma-separated list ("4,8,12") closest to `value`, preferring the lower one"""
+    steps = sorted(float(part) for part in spec.split(",") if part.strip())
+    return min(steps, key=lambda step: abs(step - value))
+
+
+def preview_fps(animation: Dict[str, Any], fps: float) -> float:
+    """Frame rate to render at, lowered so that one cycle stays within ANIMATED_PREVIEW_MAX_FRAMES"""
+    length = float(animation.get("length") or 0)
+    if not math.isfinite(length):
+        raise ValueError(f"Animation length must be finite, got {length}")
+    if length > 0:
+        fps = min(fps, settings.ANIMATED_PREVIEW_MAX_FRAMES / length)
+    return fps
+
+
+def animation_times(animation: Dict[str, Any], fps: float) -> np.ndarray:
+    """Frame times over one cycle; looping animations skip the frame that repeats the first"""
+    length = float(animation.get("length") or 0)
+    if length <= 0:
+        return np.zeros(1)
+    times = frame_times(length, fps)
+    return times[:-1] if animation.get("loop") == "loop" else times
+
+
+def render_frames(
+    bbmodel: Dict[str, Any],
+    animation: Dict[str, Any],
+    size: int,
+    fps: float,
+    yaw: float = VIEW_YAW,
+    pitch: float = VIEW_PITCH
+) -> List[np.ndarray]:
+    """Render an animation as RGBA frames
+
+    The model's face buffers and textures are prepared once; each frame only
+    transforms the faces of animated cubes. All frames share one camera fit
+    so the model does not jump around as it moves.
+    """
+    scene = Scene(bbmodel)
+    times = animation_times(animation, fps)
+    channels = ChannelSet.from_animation(animation, settings.ANIMATION_INTERPOLATION)
+    values = channels.evaluate(times)
+
+    # Per-frame, per-cube transforms; cubes without channels stay at rest
+    count = len(scene.cubes)
+    transforms = {
+        "rotation": np.zeros((len(times), count, 3)),
+        "position": np.zeros((len(times), count, 3)),
+        "scale": np.ones((len(times), count, 3))
+    }
+    cube_index = {cube_uuid: index for index, cube_uuid in enumerate(scene.cubes.uuids)}
+    for channel_values, (target, channel) in zip(values, channels.targets):
+        index = cube_index.get(target)
+        if index is not None and channel in transforms:
+            transforms[channel][:, index] = channel_values
+
+    poses = [
+        scene.pose(transforms["rotation"][frame], transforms["position"][frame], transforms["scale"][frame])
+        for frame in range(len(times))
+    ]
+    basis = view_basis(yaw, pitch)
+    fit = scene.fit([corners for corners, _ in poses], size, basis)
+    return [scene.rasterize(corners, normals, size, basis, fit) for corners, normals in poses]
+
+
+def encode_animation(frames: List[np.ndarray], fps: float, image_format: str = "gif") -> bytes:
+    """Encode RGBA frames as a looping animated GIF or APNG"""
+    pillow_format = ANIMATED_FORMATS[image_format][0]
+    images = [Image.fromarray(frame, "RGBA") for frame in frames]
+    buffer = io.BytesIO()
+    # Clear each frame before the next so moving parts leave no trails
+    images[0].save(
+        buffer,
+        format=pillow_format,
+        save_all=True,
+        append_images=images[1:],
+        duration=int(round(1000 / fps)),
+        loop=0,
+        disposal=2 if image_format == "gif" else 1
+    )
+    return buffer.getvalue()
+
+
+class AnimatedPreviewRenderer:
+    """Renders animated previews and keeps them on disk under their content hash"""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self._directory = directory
+        self.max_bytes = max_bytes if max_bytes is not None else settings.ANIMATED_PREVIEW_CACHE_MAX_BYTES
+
+    @property
+    def directory(self) -> str:
+        directory = self._directory or settings.PREVIEWS_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _options(
+        self,
+        size: Optional[int],
+        fps: Optional[float],
+        image_format: Optional[str]
+    ) -> Tuple[int, float, str]:
+        image_format = image_format or settings.ANIMATED_PREVIEW_FORMAT
+        if image_format not in ANIMATED_FORMATS:
+            raise ValueError(f"Unsupported animation format: {image_format}")
+        size = int(snap(size or settings.ANIMATED_PREVIEW_SIZE, settings.ANIMATED_PREVIEW_SIZES))
+        fps = snap(fps or settings.ANIMATED_PREVIEW_FPS, settings.ANIMATED_PREVIEW_FPS_STEPS)
+        return size, fps, image_format
+
+    def path_for(
+        self,
+        bbmodel: Dict[str, Any],
+        animation: Optional[str] = None,
+        size: Optional[int] = None,
+        fps: Optional[float] = None,
+        image_format: Optional[str] = None
+    ) -> str:
+        """Where the preview of an animation is (or will be) stored"""
+        size, fps, image_format = self._options(size, fps, image_format)
+        content = {key: bbmodel.get(key) for key in ("elements", "textures", "resolution")}
+        content["animation"] = find_animation(bbmodel, animation)
+        fps = preview_fps(content["animation"], fps)
+        digest = hashlib.sha256(
+            f"{RENDER_VERSION}:{size}:{fps}:{image_format}:{settings.ANIMATION_INTERPOLATION}:".encode("utf-8")
+        )
+        digest.update(serializer.dumps(content))
+        return os.path.join(self.directory, digest.hexdigest() + ANIMATED_FORMATS[image_format][1])
+
+    def cached(self, path: str) -> bool:
+        """Whether a preview is on disk, marking it as recently used"""
+        return mark_used(path)
+
+    def render(
+        self,
+        bbmodel: Dict[str, Any],
+        animation: Optional[str] = None,
+        size: Optional[int] = None,
+        fps: Optional[float] = None,
+        image_format: Optional[str] = None
+    ) -> str:
+        """Render an animation unless it is already on disk, returning the file path
+
+        Each new file may push the least recently used previews out of the
+        directory, which is held to `max_bytes`; previews of models that
+        were edited or deleted are never requested again and age out.
+        """
+        path = self.path_for(bbmodel, animation, size, fps, image_format)
+        if not self.cached(path):
+            size, fps, image_format = self._options(size, fps, image_format)
+            selected = find_animation(bbmodel, animation)
+            fps = preview_fps(selected, fps)
+            frames = render_frames(bbmodel, selected, size, fps)
+            write_atomic(path, encode_animation(frames, fps, image_format))
+            evict_lru(self.directory, self.max_bytes, _SUFFIXES, keep=path)
+        return path
+
+
+animated_preview_renderer = AnimatedPreviewRenderer()
@@ -0,0 +1,432 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.geometry import json_numbers
+from app.services import serializer
+
+CHANNELS = ("rotation", "position", "scale")
+
+# Keyframe interpolation modes, stored per keyframe as small ints
+LINEAR = 0
+CATMULLROM = 1
+STEP = 2
+INTERPOLATION_MODES = {"linear": LINEAR, "catmullrom": CATMULLROM, "step": STEP}
+
+# Decimal places kept when writing baked values and times
+VALUE_PRECISION = 4
+TIME_PRECISION = 4
+
+
+def format_time(seconds: float) -> str:
+    """Format a keyframe time the way the generator writes it ("0", "0.25", "1")"""
+    text = f"{seconds:.{TIME_PRECISION}f}".rstrip("0").rstrip(".")
+    return text if text not in ("", "-0") else "0"
+
+
+def _vector(value: Any) -> List[float]:
+    """Read a keyframe value from a list or from Blockbench data points"""
+    if isinstance(value, dict):
+        value = [value.get(axis, 0) for axis in ("x", "y", "z")]
+    vector = []
+    for component in list(value)[:3]:
+        try:
+            vector.append(float(component))
+        except (TypeError, ValueError):
+            # Molang expressions cannot be evaluated server-side
+            vector.append(0.0)
+    return vector + [0.0] * (3 - len(vector))
+
+
+def _sparse_keys(keys: Dict[str, Any], interpolation: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert one `{"time": [x, y, z]}` channel to times, values and modes arrays"""
+    times = np.array([float(time) for time in keys])
+    try:
+        values = np.array(list(keys.values()), dtype=np.float64).reshape(len(times), 3)
+    except (TypeError, ValueError):
+        # Short vectors, data point dicts or Molang strings take the slow path
+        values = np.array([_vector(value) for value in keys.values()], dtype=np.float64).reshape(-1, 3)
+    return times, values, np.full(len(times), interpolation, dtype=np.int8)
+
+
+def _parse_animator(animator: Dict[str, Any], interpolation: int) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Collect sorted (times, values, modes) arrays per channel of one animator
+
+    Accepts the sparse `{"rotation": {"0.5": [x, y, z]}}` layout written by
+    the generator as well as Blockbench's `keyframes` list.
+    """
+    channels = {}
+    for channel in CHANNELS:
+        keys = animator.get(channel)
+        if isinstance(keys, dict) and keys:
+            channels[channel] = _sparse_keys(keys, interpolation)
+
+    listed: Dict[str, List[Tuple[float, List[float], int]]] = {}
+    for keyframe in animator.get("keyframes", []):
+        channel = keyframe.get("channel")
+        if channel not in CHANNELS:
+            continue
+        data_points = keyframe.get("data_points") or [{}]
+        mode = INTERPOLATION_MODES.get(keyframe.get("interpolation"), LINEAR)
+        listed.setdefault(channel, []).append((float(keyframe.get("time", 0)), _vector(data_points[0]), mode))
+    for channel, keys in listed.items():
+        channels[channel] = (
+            np.array([key[0] for key in keys]),
+            np.array([key[1] for key in keys], dtype=np.float64),
+            np.array([key[2] for key in keys], dtype=np.int8)
+        )
+
+    for channel, (times, values, modes) in channels.items():
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            order = np.argsort(times, kind="stable")
+            channels[channel] = (times[order], values[order], modes[order])
+    return channels
+
+
+class ChannelSet:
+    """Keyframes of every animated channel of an animation, padded into arrays
+
+    Channel `c` has `counts[c]` keys; times past the last key are padded with
+    +inf and values with the last key, so all channels evaluate in one pass.
+    """
+
+    def __init__(
+        self,
+        targets: List[Tuple[str, str]],
+        times: np.ndarray,
+        values: np.ndarray,
+        modes: np.ndarray,
+        counts: np.ndarray
+    ):
+        self.targets = targets
+        self.times = times
+        self.values = values
+        self.modes = modes
+        self.counts = counts
+
+    @classmethod
+    def from_animation(cls, animation: Dict[str, Any], interpolation: str = "linear") -> "ChannelSet":
+        """Collect the channels of an animation's animators"""
+        default_mode = INTERPOLATION_MODES[interpolation]
+        targets = []
+        channel_keys = []
+        for target, animator in animation.get("animators", {}).items():
+            for channel, keys in _parse_animator(animator, default_mode).items():
+                targets.append((target, channel))
+                channel_keys.append(keys)
+
+        width = max((len(keys[0]) for keys in channel_keys), default=1)
+        times = np.full((len(channel_keys), width), np.inf)
+        values = np.zeros((len(channel_keys), width, 3))
+        modes = np.zeros((len(channel_keys), width), dtype=np.int8)
+        counts = np.zeros(len(channel_keys), dtype=np.int64)
+        for c, (key_times, key_values, key_modes) in enumerate(channel_keys):
+            count = len(key_times)
+            counts[c] = count
+            times[c, :count] = key_times
+            values[c, :count] = key_values
+            values[c, count:] = key_values[-1]
+            modes[c, :count] = key_modes
+        return cls(targets, times, values, modes, counts)
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def evaluate(self, times: Sequence[float]) -> np.ndarray:
+        """Sample every channel at the given times, returning a (channels, times, 3) array
+
+        Follows Blockbench: values hold before the first and after the last
+        key, a segment is stepped if its first key is `step`, and uses
+        Catmull-Rom if either end is `catmullrom` (with the end keys repeated
+        as their own neighbours).
+        """
+        t = np.asarray(times, dtype=np.float64)
+        if not len(self.targets):
+            return np.zeros((0, len(t), 3))
+
+        last = (self.counts - 1)[:, None]
+        width = self.times.shape[1]
+        row = (np.arange(len(self.targets)) * width)[:, None]
+        # Index of the last key at or before each sample time (-1 if none)
+        index = (self.times[:, None, :] <= t[None, :, None]).sum(axis=2) - 1
+        i1 = np.clip(index, 0, last) + row
+        i2 = np.minimum(index + 1, last) + row
+
+        # Gather through flat indices, which is much cheaper than take_along_axis
+        flat_times = self.times.ravel()
+        flat_values = self.values.reshape(-1, 3)
+        flat_modes = self.modes.ravel()
+
+        t1 = flat_times[i1]
+        span = flat_times[i2] - t1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            alpha = np.where(span > 0, (t[None, :] - t1) / span, 0.0)
+        alpha = np.clip(alpha, 0.0, 1.0)[:, :, None]
+
+        # Offsets to the next key are zero past the last key thanks to the padding
+        deltas = np.diff(self.values, axis=1, append=self.values[:, -1:]).reshape(-1, 3)
+        p1 = flat_values[i1]
+        result = p1 + deltas[i1] * alpha
+
+        mode1 = flat_modes[i1]
+        smooth = (mode1 == CATMULLROM) | (flat_modes[i2] == CATMULLROM)
+        if smooth.any():
+            p0 = flat_values[np.maximum(i1 - 1 - row, 0) + row]
+            p2 = flat_values[i2]
+            p3 = flat_values[np.minimum(i2 + 1 - row, last) + row]
+            a2 = alpha * alpha
+            a3 = a2 * alpha
+            catmull = 0.5 * (
+                2 * p1
+                + (p2 - p0) * alpha
+                + (2 * p0 - 5 * p1 + 4 * p2 - p3) * a2
+                + (3 * p1 - p0 - 3 * p2 + p3) * a3
+            )
+            result = np.where(smooth[:, :, None], catmull, result)
+
+        step = mode1 == STEP
+        if step.any():
+            result = np.where(step[:, :, None], p1, result)
+        return result
+
+    def select(self, kept: np.ndarray) -> "ChannelSet":
+        """Get a channel set holding only the keys flagged in a (channels, width) mask"""
+        counts = kept.sum(axis=1)
+        width = max(int(counts.max(initial=0)), 1)
+        # Stable sort moves kept keys to the front while preserving their order
+        order = np.argsort(~kept, axis=1, kind="stable")[:, :width]
+        times = np.take_along_axis(self.times, order, axis=1)
+        values = np.take_along_axis(self.values, order[:, :, None], axis=1)
+        modes = np.take_along_axis(self.modes, order, axis=1)
+
+        padding = np.arange(width)[None, :] >= counts[:, None]
+        times[padding] = np.inf
+        last = np.take_along_axis(values, np.maximum(counts - 1, 0)[:, None, None], axis=1)
+        values = np.where(padding[:, :, None], last, values)
+        return ChannelSet(list(self.targets), times, values, modes, counts)
+
+    def to_animators(self, times: Optional[Sequence[float]] = None, values: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Write channels back as sparse generator-style animators
+
+        Without arguments the original keys are written; pass sample times and
+        the matching `evaluate` result to write baked keys instead.
+        """
+        animators: Dict[str, Dict[str, Any]] = {}
+        if times is None:
+            for c, (target, channel) in enumerate(self.targets):
+                count = self.counts[c]
+                keys = [format_time(time) for time in self.times[c, :count]]
+                rows = json_numbers(np.round(self.values[c, :count], VALUE_PRECISION))
+                animators.setdefault(target, {})[channel] = dict(zip(keys, rows))
+            return animators
+
+        keys = [format_time(time) for time in times]
+        rows = json_numbers(np.round(values, VALUE_PRECISION))
+        for (target, channel), channel_rows in zip(self.targets, rows):
+            animators.setdefault(target, {})[channel] = dict(zip(keys, channel_rows))
+        return animators
+
+
+def frame_times(length: float, fps: float, max_frames: Optional[int] = None) -> np.ndarray:
+    """Sample times covering [0, length] at `fps`, always including both ends
+
+    With `max_frames`, long animations are sampled more sparsely instead of
+    producing more than that many frames.
+    """
+    frames = length * fps
+    if not math.isfinite(frames):
+        raise ValueError(f"Cannot sample an animation of length {length} at {fps} fps")
+    frames = max(int(round(frames)), 1)
+    if max_frames:
+        frames = min(frames, max_frames)
+    return np.linspace(0.0, length, frames + 1)
+
+
+def sample(
+    animation: Dict[str, Any],
+    times: Sequence[float],
+    interpolation: str = "linear"
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Evaluate an animation, returning {animator: {channel: (times, 3) array}}"""
+    channels = ChannelSet.from_animation(animation, interpolation)
+    values = channels.evaluate(times)
+    result: Dict[str, Dict[str, np.ndarray]] = {}
+    for (target, channel), channel_values in zip(channels.targets, values):
+        result.setdefault(target, {})[channel] = channel_values
+    return result
+
+
+def _with_animators(animation: Dict[str, Any], animators: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy an animation with new channel keys, keeping whatever else each animator carries"""
+    result = dict(animation)
+    result["animators"] = {}
+    for target, animator in animation.get("animators", {}).items():
+        extra = {key: value for key, value in animator.items() if key not in CHANNELS and key != "keyframes"}
+        result["animators"][target] = {**extra, **animators.get(target, {})}
+    return result
+
+
+def bake_animation(
+    animation: Dict[str, Any],
+    fps: float,
+    interpolation: str = "linear",
+    max_frames: Optional[int] = None
+) -> Dict[str, Any]:
+    """Get a copy of an animation with a key on every frame of every channel"""
+    channels = ChannelSet.from_animation(animation, interpolation)
+    times = frame_times(float(animation.get("length", 0)), fps, max_frames)
+    baked = _with_animators(animation, channels.to_animators(times, channels.evaluate(times)))
+    baked["snapping"] = int(round(fps))
+    return baked
+
+
+def _bracket_error(
+    times: np.ndarray,
+    values: np.ndarray,
+    keys: np.ndarray,
+    before: np.ndarray,
+    after: np.ndarray
+) -> np.ndarray:
+    """Error of each key against the line between two other keys (flat indices)
+
+    Negative `before` or `after` marks a missing neighbour, which makes the
+    error infinite.
+    """
+    missing = (before < 0) | (after < 0)
+    before = np.where(missing, keys, before)
+    after = np.where(missing, keys, after)
+    t0 = times[before]
+    # Padding keys sit at +inf; their results are masked out by the caller
+    with np.errstate(invalid="ignore", divide="ignore"):
+        span = times[after] - t0
+        alpha = np.where(span > 0, (times[keys] - t0) / span, 0.0)
+    estimate = values[before] + (values[after] - values[before]) * alpha[..., None]
+    error = np.abs(estimate - values[keys]).max(axis=-1)
+    return np.where(missing, np.inf, error)
+
+
+def simplify_channels(channels: ChannelSet, tolerances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Find the keys that linear interpolation cannot reproduce within tolerance
+
+    Returns a (channels, width) mask of keys to keep and the resulting max
+    error per channel. Each pass computes, for every interior key of every
+    channel at once, the worst error over all original keys its removal
+    would cause, then drops the keys that stay within tolerance and are
+    cheaper to drop than both kept neighbours (so no two adjacent keys go in
+    the same pass). Only all-linear channels are simplified; Catmull-Rom and
+    step keys shape the curve between them and are kept as they are.
+    """
+    count, width = channels.times.shape
+    positions = np.arange(width)[None, :]
+    row = (np.arange(count) * width)[:, None]
+    flat_times = channels.times.ravel()
+    flat_values = channels.values.reshape(-1, 3)
+
+    valid = positions < channels.counts[:, None]
+    kept = valid.copy()
+    removable = valid & (positions > 0) & (positions < channels.counts[:, None] - 1)
+    removable &= (channels.modes == LINEAR).all(axis=1)[:, None]
+    tolerances = np.asarray(tolerances, dtype=np.float64)[:, None]
+
+    def neighbours(kept):
+        # Nearest kept key at or before / at or after every position (-1 if none)
+        at_or_before = np.maximum.accumulate(np.where(kept, positions, -1), axis=1)
+        at_or_after = np.minimum.accumulate(np.where(kept, positions, width)[:, ::-1], axis=1)[:, ::-1]
+        at_or_after = np.where(at_or_after == width, -1, at_or_after)
+        before = np.full_like(at_or_before, -1)
+        after = np.full_like(at_or_after, -1)
+        before[:, 1:] = at_or_before[:, :-1]
+        after[:, :-1] = at_or_after[:, 1:]
+        return before, after
+
+    def flat(index):
+        return np.where(index < 0, -1, index + row)
+
+    # Channels drop out once a pass leaves them unchanged, since nothing
+    # about their remaining candidates can have changed either
+    active = removable.any(axis=1)
+    while active.any():
+        before, after = neighbours(kept)
+        cost = np.full(count * width, np.inf)
+
+        # Removing a kept key makes its neighbours the new segment ends...
+        rows, cols = np.nonzero(kept & removable & active[:, None])
+        base = rows * width
+        keys = base + cols
+        cost[keys] = _bracket_error(
+            flat_times, flat_values, keys, before[rows, cols] + base, after[rows, cols] + base
+        )
+
+        # ...and widens the segments of the keys already dropped next to it
+        rows, cols = np.nonzero(valid & ~kept & active[:, None])
+        if len(rows):
+            base = rows * width
+            keys = base + cols
+            # Dropped keys always sit between two kept ones
+            left = before[rows, cols]
+            right = after[rows, cols]
+            outer_left = before[rows, left]
+            outer_right = after[rows, right]
+            error_left = _bracket_error(
+                flat_times, flat_values, keys,
+                np.where(outer_left < 0, -1, outer_left + base), right + base
+            )
+            error_right = _bracket_error(
+                flat_times, flat_values, keys,
+                left + base, np.where(outer_right < 0, -1, outer_right + base)
+            )
+            np.maximum.at(cost, left + base, error_left)
+            np.maximum.at(cost, right + base, error_right)
+
+        cost = cost.reshape(count, width)
+        candidate = kept & removable & (cost <= tolerances)
+
+        # Drop a candidate only if it is cheaper than both kept neighbours
+        def cheaper_than(neighbour):
+            index = np.maximum(neighbour, 0)
+            other = np.take_along_axis(cost, index, axis=1)
+            other_candidate = np.take_along_axis(candidate, index, axis=1) & (neighbour >= 0)
+            return ~other_candidate | (cost < other) | ((cost == other) & (positions < index))
+
+        drop = candidate & cheaper_than(before) & cheaper_than(after)
+        kept &= ~drop
+        active = drop.any(axis=1)
+
+    before, after = neighbours(kept)
+    error = _bracket_error(flat_times, flat_values, positions + row, flat(before), flat(after))
+    error = np.where(valid & ~kept, error, 0.0)
+    return kept, error.max(axis=1, initial=0.0)
+
+
+def simplify_animation(
+    animation: Dict[str, Any],
+    tolerances: Dict[str, float],
+    interpolation: str = "linear"
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Drop keyframes that interpolation reproduces within per-channel tolerances
+
+    `tolerances` maps channel names to the largest allowed deviation of any
+    component (degrees for rotation, units for position and scale). Returns
+    the simplified copy and a report of keys, bytes and max error per channel.
+    """
+    channels = ChannelSet.from_animation(animation, interpolation)
+    channel_tolerances = np.array([tolerances.get(channel, 0.0) for _, channel in channels.targets])
+    kept, error = simplify_channels(channels, channel_tolerances)
+    simplified = _with_animators(animation, channels.select(kept).to_animators())
+
+    bytes_before = len(serializer.dumps(animation.get("animators", {})))
+    bytes_after = len(serializer.dumps(simplified["animators"]))
+    max_error = {}
+    for (_, channel), channel_error in zip(channels.targets, error):
+        max_error[channel] = max(max_error.get(channel, 0.0), round(float(channel_error), VALUE_PRECISION))
+    report = {
+        "animation": animation.get("name"),
+        "keys_before": int(channels.counts.sum()),
+        "keys_after": int(kept.sum()),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "max_error": max_error
+    }
+    return simplified, report
@@ -0,0 +1,81 @@
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.geometry import CubeArray
+
+ARCHETYPES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "archetypes")
+
+# Archetype used when a model type has no template of its own
+DEFAULT_ARCHETYPE = "basic"
+
+_VARIANT_NIBBLES = "89ab89ab89ab89ab"
+
+
+def batch_uuid4(count: int) -> List[str]:
+    """Generate `count` random version 4 UUID strings from a single entropy read"""
+    digits = os.urandom(16 * count).hex()
+    uuids = []
+    for start in range(0, 32 * count, 32):
+        h = digits[start:start + 32]
+        uuids.append(
+            f"{h[0:8]}-{h[8:12]}-4{h[13:16]}-{_VARIANT_NIBBLES[int(h[16], 16)]}{h[17:20]}-{h[20:32]}"
+        )
+    return uuids
+
+
+class ArchetypeTemplate:
+    """A precompiled cube layout for one model archetype"""
+
+    def __init__(self, name: str, elements: List[Dict[str, Any]]):
+        self.name = name
+        self.cubes = CubeArray.from_elements(elements)
+        self.cubes.freeze_rows()
+
+    def instantiate(self, uuid_factory: Callable[[int], List[str]] = batch_uuid4) -> CubeArray:
+        """Clone the template's cubes and stamp them with fresh UUIDs"""
+        cubes = self.cubes.copy()
+        cubes.uuids = uuid_factory(len(cubes))
+        return cubes
+
+
+class ArchetypeRegistry:
+    """Loads archetype templates from data files once and hands out instances"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or ARCHETYPES_DIR
+        self._templates: Optional[Dict[str, ArchetypeTemplate]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, ArchetypeTemplate]:
+        templates = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(self.directory, filename), "r") as f:
+                data = json.load(f)
+            templates[data["name"]] = ArchetypeTemplate(data["name"], data["elements"])
+        return templates
+
+    @property
+    def templates(self) -> Dict[str, ArchetypeTemplate]:
+        if self._templates is None:
+            with self._lock:
+                if self._templates is None:
+                    self._templates = self._load()
+        return self._templates
+
+    def names(self) -> List[str]:
+        return list(self.templates)
+
+    def get(self, name: str) -> ArchetypeTemplate:
+        """Get the template for an archetype, falling back to the basic cube"""
+        templates = self.templates
+        return templates.get(name) or templates[DEFAULT_ARCHETYPE]
+
+    def instantiate(self, name: str, uuid_factory: Callable[[int], List[str]] = batch_uuid4) -> CubeArray:
+        return self.get(name).instantiate(uuid_factory)
+
+
+archetype_registry = ArchetypeRegistry()
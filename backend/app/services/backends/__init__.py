@@ -0,0 +1,172 @@
+import importlib
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Built-in backends, imported only when a pool first needs them so their
+# dependencies stay out of the API import path
+BACKENDS = {
+    "mock": "app.services.backends.mock:MockBackend",
+    "local": "app.services.backends.local:LocalModelBackend"
+}
+
+# Seconds spent importing each backend class, by backend name
+_import_seconds: Dict[str, float] = {}
+
+
+class GeneratorBackend:
+    """Model behind generation: turns prompts into hints that shape the generated model
+
+    Hints are a dict; "proportions" (per-axis scale of the archetype) is
+    the only key the generator applies so far. Backends are loaded once and
+    then reused by one generation worker at a time.
+    """
+
+    name = "base"
+
+    @classmethod
+    def cache_tag(cls) -> Optional[str]:
+        """Identifies the output of this backend in result cache keys; None when it changes nothing"""
+        return cls.name
+
+    def load(self):
+        """Load weights and warm up; called once before the first inference"""
+
+    def infer(self, prompt: str, model_type: str, seed: Optional[Any] = None) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def infer_batch(self, prompts: List[str], model_type: str, seed: Optional[Any] = None) -> List[Dict[str, Any]]:
+        return [self.infer(prompt, model_type, seed) for prompt in prompts]
+
+    def close(self):
+        """Release whatever load() acquired"""
+
+
+def backend_class(name: str) -> Type[GeneratorBackend]:
+    """Import a backend by name or by "package.module:Class" path"""
+    path = BACKENDS.get(name, name)
+    module_name, _, class_name = path.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown generator backend: {name}")
+    start = time.perf_counter()
+    cls = getattr(importlib.import_module(module_name), class_name)
+    _import_seconds.setdefault(name, time.perf_counter() - start)
+    return cls
+
+
+class BackendPool:
+    """Fixed number of loaded backend instances shared by the generation workers
+
+    Instances are created by warm() at startup or lazily, one per concurrent
+    caller, up to `size`; callers beyond that wait for an idle instance.
+    """
+
+    def __init__(self, name: Optional[str] = None, size: Optional[int] = None):
+        self.name = name or settings.GENERATOR_BACKEND
+        self.size = size or settings.GENERATOR_BACKEND_POOL_SIZE
+        self._idle: "queue.Queue[GeneratorBackend]" = queue.Queue()
+        self._instances: List[GeneratorBackend] = []
+        self._lock = threading.Lock()
+        self._created = 0
+        self._load_seconds: List[float] = []
+        self._startup_seconds: Optional[float] = None
+        self._first_inference_seconds: Optional[float] = None
+        self._inferences = 0
+        self._inference_seconds = 0.0
+
+    def cache_tag(self) -> Optional[str]:
+        return backend_class(self.name).cache_tag()
+
+    def _create(self) -> GeneratorBackend:
+        """Load one more instance; the caller has already reserved its slot"""
+        try:
+            start = time.perf_counter()
+            backend = backend_class(self.name)()
+            backend.load()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+        with self._lock:
+            self._instances.append(backend)
+            self._load_seconds.append(time.perf_counter() - start)
+        return backend
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._created >= self.size:
+                return False
+            self._created += 1
+            return True
+
+    def warm(self):
+        """Load every instance now instead of on first use"""
+        start = time.perf_counter()
+        while self._reserve():
+            self._idle.put(self._create())
+        self._startup_seconds = time.perf_counter() - start
+        logger.info("Loaded %d %s generator backend(s) in %.3fs", self.size, self.name, self._startup_seconds)
+
+    @contextmanager
+    def acquire(self) -> Iterator[GeneratorBackend]:
+        """Borrow an instance, loading one if none is idle and the pool is not full"""
+        try:
+            backend = self._idle.get_nowait()
+        except queue.Empty:
+            backend = self._create() if self._reserve() else self._idle.get()
+        try:
+            yield backend
+        finally:
+            self._idle.put(backend)
+
+    def _timed(self, method: str, *args) -> Any:
+        """Run an inference method, recording its latency (the first one includes any lazy load)"""
+        start = time.perf_counter()
+        with self.acquire() as backend:
+            result = getattr(backend, method)(*args)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if self._first_inference_seconds is None:
+                self._first_inference_seconds = elapsed
+            self._inferences += 1
+            self._inference_seconds += elapsed
+        return result
+
+    def infer(self, prompt: str, model_type: str, seed: Optional[Any] = None) -> Dict[str, Any]:
+        return self._timed("infer", prompt, model_type, seed)
+
+    def infer_batch(self, prompts: List[str], model_type: str, seed: Optional[Any] = None) -> List[Dict[str, Any]]:
+        return self._timed("infer_batch", prompts, model_type, seed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "size": self.size,
+                "loaded": len(self._instances),
+                "idle": self._idle.qsize(),
+                "import_seconds": _import_seconds.get(self.name),
+                "load_seconds": list(self._load_seconds),
+                "startup_seconds": self._startup_seconds,
+                "first_inference_seconds": self._first_inference_seconds,
+                "inferences": self._inferences,
+                "mean_inference_seconds": self._inference_seconds / self._inferences if self._inferences else None
+            }
+
+    def shutdown(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+            self._created = 0
+            self._idle = queue.Queue()
+        for backend in instances:
+            backend.close()
+
+
+backend_pool = BackendPool()
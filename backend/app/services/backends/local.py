@@ -0,0 +1,76 @@
+import hashlib
+import logging
+import os
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.backends import GeneratorBackend
+from app.services.prompt_analyzer import normalize
+
+logger = logging.getLogger(__name__)
+
+# Shape of the stand-in network: hashed token embeddings, one hidden layer,
+# and a per-axis output
+VOCAB_BUCKETS = 16384
+EMBEDDING_SIZE = 128
+HIDDEN_SIZE = 512
+
+# Largest relative change the model may make to each axis of the archetype
+PROPORTION_RANGE = 0.15
+
+
+class LocalModelBackend(GeneratorBackend):
+    """CPU stand-in for a learned model: a small MLP over hashed prompt tokens
+
+    It predicts per-axis proportions for the archetype. Weights are read
+    from MODEL_CHECKPOINT when that names an .npz file and are otherwise
+    initialized from a seed derived from it, so the backend is
+    deterministic and needs no download.
+    """
+
+    name = "local"
+
+    @classmethod
+    def cache_tag(cls) -> Optional[str]:
+        return f"{cls.name}:{settings.MODEL_CHECKPOINT}"
+
+    def __init__(self, checkpoint: Optional[str] = None):
+        self.checkpoint = checkpoint or settings.MODEL_CHECKPOINT
+        self.weights: Optional[Dict[str, np.ndarray]] = None
+        if settings.DEVICE != "cpu":
+            logger.warning("The local generator backend only runs on the CPU, ignoring DEVICE=%s", settings.DEVICE)
+
+    def load(self):
+        if self.checkpoint.endswith(".npz") and os.path.isfile(self.checkpoint):
+            with np.load(self.checkpoint) as checkpoint:
+                self.weights = {name: checkpoint[name].astype(np.float32) for name in ("embeddings", "hidden", "output")}
+        else:
+            seed = int(hashlib.sha256(self.checkpoint.encode("utf-8")).hexdigest()[:16], 16)
+            rng = np.random.default_rng(seed)
+            self.weights = {
+                "embeddings": rng.standard_normal((VOCAB_BUCKETS, EMBEDDING_SIZE), dtype=np.float32),
+                "hidden": rng.standard_normal((EMBEDDING_SIZE, HIDDEN_SIZE), dtype=np.float32) / np.sqrt(EMBEDDING_SIZE),
+                "output": rng.standard_normal((HIDDEN_SIZE, 3), dtype=np.float32) / np.sqrt(HIDDEN_SIZE)
+            }
+        # One pass so first-touch page faults are paid here, not by the first request
+        self.infer_batch(["warm up"], "character")
+
+    def _tokens(self, prompt: str) -> np.ndarray:
+        words = normalize(prompt).split() or [""]
+        return np.array([zlib.crc32(word.encode("utf-8")) % VOCAB_BUCKETS for word in words])
+
+    def infer(self, prompt: str, model_type: str, seed: Optional[Any] = None) -> Dict[str, Any]:
+        return self.infer_batch([prompt], model_type, seed)[0]
+
+    def infer_batch(self, prompts: List[str], model_type: str, seed: Optional[Any] = None) -> List[Dict[str, Any]]:
+        weights = self.weights
+        features = np.stack([weights["embeddings"][self._tokens(prompt)].mean(axis=0) for prompt in prompts])
+        hidden = np.maximum(features @ weights["hidden"], 0)
+        proportions = 1 + PROPORTION_RANGE * np.tanh(hidden @ weights["output"])
+        return [{"proportions": [round(float(value), 3) for value in row]} for row in proportions]
+
+    def close(self):
+        self.weights = None
@@ -0,0 +1,32 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.backends import GeneratorBackend
+
+
+class MockBackend(GeneratorBackend):
+    """Takes the time a model would without changing the archetype templates"""
+
+    name = "mock"
+
+    # Simulated inference time, in units of GENERATION_STAGE_DELAY
+    INFERENCE_UNITS = 2
+
+    @classmethod
+    def cache_tag(cls) -> Optional[str]:
+        return None
+
+    def _simulate(self):
+        delay = self.INFERENCE_UNITS * settings.GENERATION_STAGE_DELAY
+        if delay > 0:
+            time.sleep(delay)
+
+    def infer(self, prompt: str, model_type: str, seed: Optional[Any] = None) -> Dict[str, Any]:
+        self._simulate()
+        return {}
+
+    def infer_batch(self, prompts: List[str], model_type: str, seed: Optional[Any] = None) -> List[Dict[str, Any]]:
+        # One simulated pass for the whole batch, as a batched model call would be
+        self._simulate()
+        return [{} for _ in prompts]
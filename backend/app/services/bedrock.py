@@ -0,0 +1,362 @@
+import math
+import re
+import zipfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.services.animation import CHANNELS, format_time
+from app.services.geometry import FACE_NAMES, CubeArray, json_numbers
+from app.services.renderer import load_texture_bytes
+from app.services import serializer
+
+GEOMETRY_FORMAT_VERSION = "1.12.0"
+ANIMATION_FORMAT_VERSION = "1.8.0"
+
+# Bedrock mirrors the X axis relative to Blockbench
+_MIRROR_X = np.array([-1.0, 1.0, 1.0])
+_ROTATION_SIGN = np.array([-1.0, -1.0, 1.0])
+
+# Top and bottom faces are written with their UV rectangle flipped, as Blockbench does
+_FLIPPED_FACES = {FACE_NAMES.index("up"), FACE_NAMES.index("down")}
+
+_LOOP_MODES = {"loop": True, "hold": "hold_on_last_frame"}
+
+
+def identifier_slug(text: str) -> str:
+    """Lower-case Bedrock identifier part ("Red Knight-2" -> "red_knight_2")"""
+    return re.sub(r"[^a-z0-9_]+", "_", text.lower()).strip("_") or "model"
+
+
+def _unique_names(names: List[str]) -> List[str]:
+    """Suffix repeated names with _2, _3, ... skipping suffixed names that are already taken"""
+    taken = set(names)
+    used: Set[str] = set()
+    result = []
+    for name in names:
+        if name in used:
+            count = 2
+            while f"{name}_{count}" in taken:
+                count += 1
+            name = f"{name}_{count}"
+            taken.add(name)
+        used.add(name)
+        result.append(name)
+    return result
+
+
+def _bones(
+    entries: List[Any],
+    element_uuids: Set[str],
+    bones: List[Dict[str, Any]],
+    groups: Dict[str, int],
+    element_parents: Dict[str, int],
+    parent: int
+):
+    """Add a bone for every outliner group, depth first so parents come before children"""
+    for entry in entries:
+        entry_uuid = entry if isinstance(entry, str) else entry.get("uuid")
+        if isinstance(entry, str) or ("children" not in entry and entry_uuid in element_uuids):
+            element_parents.setdefault(entry_uuid, parent)
+            continue
+        bone: Dict[str, Any] = {"name": entry.get("name") or "bone", "parent": parent}
+        bone["pivot"] = json_numbers(np.asarray(entry.get("origin") or (0, 0, 0), dtype=np.float64) * _MIRROR_X)
+        rotation = np.asarray(entry.get("rotation") or (0, 0, 0), dtype=np.float64)
+        if rotation.any():
+            bone["rotation"] = json_numbers(rotation * _ROTATION_SIGN)
+        bones.append(bone)
+        if entry_uuid:
+            groups[entry_uuid] = len(bones) - 1
+        _bones(entry.get("children", []), element_uuids, bones, groups, element_parents, len(bones) - 1)
+
+
+def _cubes(cubes: CubeArray) -> List[Dict[str, Any]]:
+    """Bedrock cube definitions with per-face UVs, computed column-wise"""
+    data = cubes.data
+    low = data["from"]
+    high = data["to"]
+    origins = json_numbers(np.stack([-high[:, 0], low[:, 1], low[:, 2]], axis=1))
+    sizes = json_numbers(high - low)
+    pivots = json_numbers(data["origin"] * _MIRROR_X)
+    rotations = json_numbers(data["rotation"] * _ROTATION_SIGN)
+    rotated = data["rotation"].any(axis=1).tolist()
+
+    uv = data["uv"].copy()
+    flipped = list(_FLIPPED_FACES)
+    uv[:, flipped] = uv[:, flipped][:, :, [2, 3, 0, 1]]
+    starts = json_numbers(uv[:, :, :2].reshape(-1, 2))
+    uv_sizes = json_numbers((uv[:, :, 2:] - uv[:, :, :2]).reshape(-1, 2))
+    # Faces without a texture are left out, which hides them in game
+    textured = (data["has_face"] & (data["texture"] >= 0)).tolist()
+
+    result = []
+    for index in range(len(cubes)):
+        cube: Dict[str, Any] = {"origin": origins[index], "size": sizes[index]}
+        if rotated[index]:
+            cube["pivot"] = pivots[index]
+            cube["rotation"] = rotations[index]
+        extras = cubes.extras[index]
+        if extras and extras.get("inflate"):
+            cube["inflate"] = extras["inflate"]
+        row = index * len(FACE_NAMES)
+        cube["uv"] = {
+            face: {"uv": starts[row + f], "uv_size": uv_sizes[row + f]}
+            for f, face in enumerate(FACE_NAMES) if textured[index][f]
+        }
+        result.append(cube)
+    return result
+
+
+def to_bedrock_geometry(bbmodel: Dict[str, Any], identifier: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Convert a bbmodel to a Bedrock geo.json, returning it with the bone name of each animation target
+
+    Outliner groups become bones with their pivot and rotation. Bedrock
+    only animates bones, so every cube an animation targets gets a bone of
+    its own pivoting at the cube's origin; other cubes stay in their group's
+    bone, or in a "root" bone when they are in none.
+    """
+    cubes = CubeArray.from_elements(bbmodel.get("elements", []))
+    targets = {target for animation in bbmodel.get("animations", []) for target in animation.get("animators", {})}
+
+    bones: List[Dict[str, Any]] = []
+    groups: Dict[str, int] = {}
+    element_parents: Dict[str, int] = {}
+    _bones(bbmodel.get("outliner", []), set(cubes.uuids), bones, groups, element_parents, -1)
+    bone_of_target = dict(groups)
+
+    cube_bone = np.empty(len(cubes), dtype=np.int64)
+    pivots = json_numbers(cubes.data["origin"] * _MIRROR_X) if len(cubes) else []
+    root = -1
+    for index, cube_uuid in enumerate(cubes.uuids):
+        parent = element_parents.get(cube_uuid, -1)
+        if cube_uuid in targets:
+            bones.append({"name": cubes.names[index] or "cube", "parent": parent, "pivot": pivots[index]})
+            parent = bone_of_target[cube_uuid] = len(bones) - 1
+        elif parent < 0:
+            if root < 0:
+                bones.append({"name": "root", "parent": -1, "pivot": [0, 0, 0]})
+                root = len(bones) - 1
+            parent = root
+        cube_bone[index] = parent
+
+    # Bone names double as animation keys, so they must be unique
+    for bone, name in zip(bones, _unique_names([bone["name"] for bone in bones])):
+        bone["name"] = name
+    for index, cube in enumerate(_cubes(cubes)):
+        bones[cube_bone[index]].setdefault("cubes", []).append(cube)
+    for bone in bones:
+        parent = bone.pop("parent")
+        if parent >= 0:
+            bone["parent"] = bones[parent]["name"]
+
+    low, high = cubes.bounds()
+    resolution = bbmodel.get("resolution") or {}
+    description = {
+        "identifier": f"geometry.{identifier}",
+        "texture_width": resolution.get("width", 16) or 16,
+        "texture_height": resolution.get("height", 16) or 16,
+        # In blocks; generous enough that the model is not culled while visible
+        "visible_bounds_width": max(1, math.ceil(float(np.abs(np.r_[low[[0, 2]], high[[0, 2]]]).max()) * 2 / 16)),
+        "visible_bounds_height": max(1, math.ceil(float(high[1] - min(low[1], 0)) / 16)),
+        "visible_bounds_offset": [0, round(float(low[1] + high[1]) / 32, 4), 0]
+    }
+    geometry = {"format_version": GEOMETRY_FORMAT_VERSION, "minecraft:geometry": [{"description": description, "bones": bones}]}
+    return geometry, {target: bones[index]["name"] for target, index in bone_of_target.items()}
+
+
+def _number(value: Any) -> Any:
+    """Keyframe component as a number, or the Molang expression it holds"""
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _keyframe_time(time: Any) -> Optional[float]:
+    """Keyframe time in seconds, or None if it is not a finite number"""
+    try:
+        time = float(time)
+    except (TypeError, ValueError):
+        return None
+    return time if math.isfinite(time) else None
+
+
+def _channel_keys(
+    animator: Dict[str, Any],
+    interpolation: str,
+    skipped: Optional[List[str]] = None
+) -> Dict[str, List[Tuple[float, List[Any], str]]]:
+    """(time, value, interpolation) keys per channel, from sparse or Blockbench keyframes
+
+    Keys whose time is not a number or whose value is not a vector are
+    left out and, if `skipped` is given, described there.
+    """
+    channels: Dict[str, List[Tuple[float, List[Any], str]]] = {}
+    for channel in CHANNELS:
+        keys = animator.get(channel)
+        if isinstance(keys, dict):
+            for time, value in keys.items():
+                if isinstance(value, dict):
+                    value = [value.get(axis, 0) for axis in ("x", "y", "z")]
+                seconds = _keyframe_time(time)
+                if seconds is None or not isinstance(value, list):
+                    if skipped is not None:
+                        skipped.append(f"{channel} key at {time!r}")
+                    continue
+                channels.setdefault(channel, []).append((seconds, [_number(v) for v in value], interpolation))
+    for keyframe in animator.get("keyframes", []):
+        channel = keyframe.get("channel")
+        if channel in CHANNELS:
+            seconds = _keyframe_time(keyframe.get("time", 0))
+            if seconds is None:
+                if skipped is not None:
+                    skipped.append(f"{channel} keyframe at {keyframe.get('time')!r}")
+                continue
+            point = (keyframe.get("data_points") or [{}])[0]
+            value = [_number(point.get(axis, 0)) for axis in ("x", "y", "z")]
+            mode = keyframe.get("interpolation") or interpolation
+            channels.setdefault(channel, []).append((seconds, value, mode))
+    for keys in channels.values():
+        keys.sort(key=lambda key: key[0])
+    return channels
+
+
+def _channel(keys: List[Tuple[float, List[Any], str]]) -> Dict[str, Any]:
+    """Write keys the way Bedrock reads them: plain vectors, Catmull-Rom or pre/post jumps"""
+    result = {}
+    previous = None
+    for time, value, mode in keys:
+        if mode == "catmullrom":
+            result[format_time(time)] = {"post": value, "lerp_mode": "catmullrom"}
+        elif mode == "step" and previous is not None:
+            # Hold the previous value right up to the key, then jump
+            result[format_time(time)] = {"pre": previous, "post": value}
+        else:
+            result[format_time(time)] = value
+        previous = value
+    return result
+
+
+def to_bedrock_animations(
+    bbmodel: Dict[str, Any],
+    identifier: str,
+    bone_names: Dict[str, str],
+    interpolation: str = "linear",
+    skipped: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Convert a bbmodel's animations to a Bedrock animation.json (None if it has none)
+
+    Keyframe values already follow Bedrock's conventions and are copied
+    as they are, Molang expressions included. `interpolation` applies to
+    sparse keyframes that do not name their own. Unreadable keyframes are
+    dropped and, if `skipped` is given, described there. Animations whose
+    names slug to the same key get numbered suffixes.
+    """
+    source = bbmodel.get("animations", [])
+    keys = _unique_names([
+        f"animation.{identifier}.{identifier_slug(animation.get('name') or 'animation')}" for animation in source
+    ])
+    animations = {}
+    for key, animation in zip(keys, source):
+        bones = {}
+        for target, animator in animation.get("animators", {}).items():
+            bone = bone_names.get(target)
+            if bone is None:
+                continue
+            dropped: List[str] = []
+            channels = _channel_keys(animator, interpolation, dropped)
+            if skipped is not None:
+                skipped.extend(f"{key} {bone} {description}" for description in dropped)
+            if channels:
+                bones[bone] = {channel: _channel(keys) for channel, keys in channels.items()}
+        entry: Dict[str, Any] = {}
+        if animation.get("loop") in _LOOP_MODES:
+            entry["loop"] = _LOOP_MODES[animation["loop"]]
+        if animation.get("length"):
+            entry["animation_length"] = animation["length"]
+        if animation.get("override"):
+            entry["override_previous_animation"] = True
+        entry["bones"] = bones
+        animations[key] = entry
+    if not animations:
+        return None
+    return {"format_version": ANIMATION_FORMAT_VERSION, "animations": animations}
+
+
+def to_bedrock(
+    bbmodel: Dict[str, Any],
+    identifier: str,
+    interpolation: str = "linear",
+    skipped: Optional[List[str]] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Convert a bbmodel to Bedrock (geometry, animations)"""
+    geometry, bone_names = to_bedrock_geometry(bbmodel, identifier)
+    return geometry, to_bedrock_animations(bbmodel, identifier, bone_names, interpolation, skipped)
+
+
+class _ArchiveBuffer:
+    """Write-only file for zipfile whose contents are drained after each member"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def iter_bedrock_archive(
+    models: Iterable[Tuple[str, Callable[[], Optional[Dict[str, Any]]]]],
+    interpolation: str = "linear",
+    compresslevel: int = 6
+) -> Iterator[bytes]:
+    """Stream a zip laid out like a resource pack, converting one model at a time
+
+    `models` yields (model id, loader) pairs; only one model is held in
+    memory at once. Each model is named after its geometry name, or its id
+    when it has none, with the id appended if the name is already taken.
+    A manifest lists what was exported, any keyframes that had to be
+    skipped and which models could not be read.
+    """
+    buffer = _ArchiveBuffer()
+    exported, missing = [], []
+    names = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as archive:
+        for model_id, load in models:
+            bbmodel = load()
+            if bbmodel is None:
+                missing.append(model_id)
+                continue
+            name = identifier_slug(bbmodel.get("geometry_name") or model_id)
+            if name in names:
+                name = f"{name}_{identifier_slug(model_id)}"
+            names.add(name)
+
+            skipped: List[str] = []
+            geometry, animations = to_bedrock(bbmodel, name, interpolation, skipped)
+            entry = {"model_id": model_id, "geometry": f"models/entity/{name}.geo.json"}
+            if skipped:
+                entry["skipped_keyframes"] = skipped
+            archive.writestr(entry["geometry"], serializer.dumps(geometry))
+            if animations is not None:
+                entry["animations"] = f"animations/{name}.animation.json"
+                archive.writestr(entry["animations"], serializer.dumps(animations))
+            texture = next((data for data in load_texture_bytes(bbmodel) if data), None)
+            if texture is not None and texture.startswith(b"\x89PNG"):
+                entry["texture"] = f"textures/entity/{name}.png"
+                # PNGs are already compressed
+                archive.writestr(entry["texture"], texture, compress_type=zipfile.ZIP_STORED)
+            exported.append(entry)
+            yield buffer.drain()
+        archive.writestr("manifest.json", serializer.dumps({"models": exported, "missing": missing}, pretty=True))
+    yield buffer.drain()
@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional
+
+from app.core.config import settings
+
+CANCELLED = "cancelled"
+TIMED_OUT = "timed_out"
+
+
+class JobCancelled(Exception):
+    """A job was cancelled by its owner or ran past its deadline"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class JobHandle:
+    """Cancellation flag and deadline of one job, checked by the job between its stages"""
+
+    def __init__(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        owner: Optional[str] = None,
+        members: Iterable[str] = ()
+    ):
+        self.job_id = job_id
+        self.timeout = settings.GENERATION_TIMEOUT if timeout is None else timeout
+        # The user who submitted the job and, for a batch, the models it produces
+        self.owner = owner
+        self.members = tuple(members)
+        self.future: Optional[Future] = None
+        self.deadline: Optional[float] = None
+        self._cancelled = threading.Event()
+
+    def start(self):
+        """Start the deadline clock; time spent queued does not count"""
+        if self.deadline is None and self.timeout > 0:
+            self.deadline = time.monotonic() + self.timeout
+
+    def cancel(self) -> bool:
+        """Ask the job to stop, returning True if it had not started yet and never will"""
+        self._cancelled.set()
+        return self.future is not None and self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        """Raise JobCancelled if the job should stop"""
+        if self._cancelled.is_set():
+            raise JobCancelled(CANCELLED, "cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise JobCancelled(TIMED_OUT, f"timed out after {self.timeout:g}s")
+
+    def sleep(self, seconds: float):
+        """Wait like time.sleep, but wake up as soon as the job is cancelled or expires"""
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, remaining)
+        self._cancelled.wait(seconds)
+        self.check()
+
+
+class JobRegistry:
+    """Handles of the jobs queued or running in this process, by job id"""
+
+    def __init__(self):
+        self._handles: Dict[str, JobHandle] = {}
+        # Model id -> id of the batch job that produces it
+        self._members: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        job_id: str,
+        timeout: Optional[float] = None,
+        owner: Optional[str] = None,
+        members: Iterable[str] = ()
+    ) -> JobHandle:
+        handle = JobHandle(job_id, timeout, owner, members)
+        with self._lock:
+            self._handles[job_id] = handle
+            for member in handle.members:
+                self._members[member] = job_id
+        return handle
+
+    def get(self, job_id: str) -> Optional[JobHandle]:
+        with self._lock:
+            return self._handles.get(job_id)
+
+    def handles(self) -> List[JobHandle]:
+        with self._lock:
+            return list(self._handles.values())
+
+    def find(self, job_id: str) -> Optional[JobHandle]:
+        """Handle of a job, or of the batch job that produces the model `job_id`"""
+        with self._lock:
+            handle = self._handles.get(job_id)
+            if handle is None and job_id in self._members:
+                handle = self._handles.get(self._members[job_id])
+            return handle
+
+    def start(self, job_id: str) -> JobHandle:
+        """Handle of a job that is starting, registering it if it was submitted without one"""
+        with self._lock:
+            handle = self._handles.get(job_id)
+            if handle is None:
+                handle = self._handles[job_id] = JobHandle(job_id)
+        handle.start()
+        return handle
+
+    def discard(self, job_id: str, handle: Optional[JobHandle] = None):
+        """Forget a finished job, unless it has been registered again since"""
+        with self._lock:
+            if handle is None or self._handles.get(job_id) is handle:
+                handle = self._handles.pop(job_id, None)
+                for member in handle.members if handle is not None else ():
+                    if self._members.get(member) == job_id:
+                        del self._members[member]
+
+
+job_registry = JobRegistry()
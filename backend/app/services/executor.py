@@ -0,0 +1,125 @@
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class QueueFullError(Exception):
+    """Raised when the generation queue has reached its limit"""
+
+
+class GenerationExecutor:
+    """Bounded worker pool that runs generation jobs off the event loop
+
+    Threads (the default) suit jobs that wait on I/O or release the GIL.
+    CPU-bound pure-Python work (rasterizing, encoding previews) only scales
+    with cores in `processes` mode, where jobs and their arguments must be
+    picklable and run in spawned worker processes. Process jobs count as
+    queued until they finish, since the parent cannot see when one starts.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_limit: Optional[int] = None,
+        name: str = "generation",
+        processes: bool = False
+    ):
+        self.max_workers = max_workers or settings.GENERATION_WORKERS
+        self.queue_limit = queue_limit or settings.GENERATION_QUEUE_LIMIT
+        self.name = name
+        self.processes = processes
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_pool(self) -> Executor:
+        """Create the worker pool on first use"""
+        if self._pool is None:
+            if self.processes:
+                # Spawned, not forked: the parent runs threads that a fork would copy mid-flight
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name
+                )
+        return self._pool
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Enqueue a job and return immediately"""
+        with self._lock:
+            if self._queued + self._running >= self.queue_limit:
+                raise QueueFullError(f"{self.name.capitalize()} queue is full ({self.queue_limit} jobs)")
+            self._queued += 1
+            pool = self._get_pool()
+
+        if self.processes:
+            future = pool.submit(fn, *args, **kwargs)
+            future.add_done_callback(self._process_done)
+            return future
+        return pool.submit(self._run, fn, args, kwargs)
+
+    def _process_done(self, future: Future):
+        """Settle the counters of a job that ran in a worker process"""
+        with self._lock:
+            self._queued -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def _run(self, fn: Callable[..., Any], args, kwargs) -> Any:
+        """Run a job inside a worker thread, keeping the counters in sync"""
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get a snapshot of the pool counters"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+# Preview rendering gets its own pool so it never delays generation jobs
+render_executor = GenerationExecutor(
+    settings.RENDER_WORKERS,
+    settings.RENDER_QUEUE_LIMIT,
+    name="render",
+    processes=settings.RENDER_PROCESSES
+)
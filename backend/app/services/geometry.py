@@ -0,0 +1,330 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Face order used by every per-face array
+FACE_NAMES = ("north", "east", "south", "west", "up", "down")
+FACE_INDEX = {name: index for index, name in enumerate(FACE_NAMES)}
+
+# Keys written by to_elements; anything else on an element is kept in `extras`
+_CUBE_KEYS = {"name", "uuid", "type", "from", "to", "autouv", "color", "origin", "rotation", "faces"}
+# Face keys held in the arrays; the rest (rotation, cullface, tint, ...) go to `face_extras`
+_FACE_KEYS = {"uv", "texture"}
+
+# Face pairs swapped when mirroring along each axis
+_MIRRORED_FACES = {
+    0: (FACE_INDEX["east"], FACE_INDEX["west"]),
+    1: (FACE_INDEX["up"], FACE_INDEX["down"]),
+    2: (FACE_INDEX["north"], FACE_INDEX["south"])
+}
+
+CUBE_DTYPE = np.dtype([
+    ("from", np.float64, 3),
+    ("to", np.float64, 3),
+    ("origin", np.float64, 3),
+    ("rotation", np.float64, 3),
+    ("uv", np.float64, (6, 4)),
+    ("texture", np.int32, 6),     # -1 means the face has no texture
+    ("color", np.int32),
+    ("autouv", np.int32),
+    ("has_face", np.bool_, 6)
+])
+
+# from, to, origin, rotation (3 each) and 6 x 4 face UVs, stored first in CUBE_DTYPE
+_FLOAT_COLUMNS = 36
+# texture (6), color and autouv follow the float fields
+_INT_COLUMNS = 8
+
+AxisLike = Union[int, str]
+Vector = Union[Sequence[float], np.ndarray]
+
+
+def _axis(axis: AxisLike) -> int:
+    return "xyz".index(axis) if isinstance(axis, str) else int(axis)
+
+
+def _blocks(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """View the float and int fields of cube records as (n, 36) and (n, 8) arrays"""
+    data = np.ascontiguousarray(data)
+    floats = np.ndarray((len(data), _FLOAT_COLUMNS), np.float64, data, 0, (data.itemsize, 8))
+    ints = np.ndarray((len(data), _INT_COLUMNS), np.int32, data, 8 * _FLOAT_COLUMNS, (data.itemsize, 4))
+    return floats, ints
+
+
+def _face_extras(faces: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Per-face keys not held in the arrays, by face name"""
+    extras = None
+    for name, face in faces.items():
+        # Nearly every face has only uv and texture; don't build dicts for those
+        if not _FACE_KEYS.issuperset(face) and name in FACE_INDEX:
+            if extras is None:
+                extras = {}
+            extras[name] = {key: value for key, value in face.items() if key not in _FACE_KEYS}
+    return extras
+
+
+def _swap_cullface(extra: Dict[str, Any], swap: Dict[str, str]) -> Dict[str, Any]:
+    if extra.get("cullface") in swap:
+        return {**extra, "cullface": swap[extra["cullface"]]}
+    return extra
+
+
+def json_numbers(values: np.ndarray) -> list:
+    """Convert an array to nested lists, keeping integral values as ints"""
+    ints = values.astype(np.int64)
+    integral = ints == values
+    if integral.all():
+        return ints.tolist()
+    mixed = values.astype(object)
+    mixed[integral] = values[integral].astype(np.int64)
+    return mixed.tolist()
+
+
+class CubeArray:
+    """Cube elements of a bbmodel stored column-wise in a NumPy structured array"""
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        names: List[str],
+        uuids: List[Optional[str]],
+        extras: Optional[List[Optional[Dict[str, Any]]]] = None,
+        face_extras: Optional[List[Optional[Dict[str, Dict[str, Any]]]]] = None
+    ):
+        self.data = data
+        self.names = names
+        self.uuids = uuids
+        self.extras = extras if extras is not None else [None] * len(data)
+        self.face_extras = face_extras if face_extras is not None else [None] * len(data)
+        # (record bytes, converted rows) shared by clones of an unmodified template
+        self._row_cache: Optional[Tuple[bytes, list, list, list]] = None
+
+    @classmethod
+    def empty(cls, count: int) -> "CubeArray":
+        data = np.zeros(count, dtype=CUBE_DTYPE)
+        data["has_face"] = True
+        data["autouv"] = 1
+        return cls(data, [""] * count, [None] * count)
+
+    @classmethod
+    def from_elements(cls, elements: Iterable[Dict[str, Any]]) -> "CubeArray":
+        """Build a cube array from bbmodel element dicts"""
+        elements = [element for element in elements if element.get("type", "cube") == "cube"]
+        cubes = cls.empty(len(elements))
+        data = cubes.data
+        if not elements:
+            return cubes
+
+        data["from"] = [element["from"] for element in elements]
+        data["to"] = [element["to"] for element in elements]
+        data["origin"] = [element.get("origin", (0, 0, 0)) for element in elements]
+        data["rotation"] = [element.get("rotation", (0, 0, 0)) for element in elements]
+        data["color"] = [element.get("color", 0) for element in elements]
+        data["autouv"] = [element.get("autouv", 1) for element in elements]
+
+        face_sets = [element.get("faces", {}) for element in elements]
+        try:
+            # Fast path: every cube has all six faces with a texture
+            data["uv"] = [[faces[name]["uv"] for name in FACE_NAMES] for faces in face_sets]
+            data["texture"] = [[faces[name]["texture"] for name in FACE_NAMES] for faces in face_sets]
+        except (KeyError, TypeError, ValueError):
+            uv = data["uv"]
+            texture = data["texture"]
+            has_face = data["has_face"]
+            has_face[:] = False
+            for index, faces in enumerate(face_sets):
+                for name, face in faces.items():
+                    face_index = FACE_INDEX.get(name)
+                    if face_index is None:
+                        continue
+                    has_face[index, face_index] = True
+                    uv[index, face_index] = face.get("uv", (0, 0, 0, 0))
+                    face_texture = face.get("texture")
+                    texture[index, face_index] = -1 if face_texture is None else face_texture
+
+        cubes.names = [element.get("name", "cube") for element in elements]
+        cubes.uuids = [element.get("uuid") for element in elements]
+        cubes.extras = [
+            {key: value for key, value in element.items() if key not in _CUBE_KEYS} or None
+            for element in elements
+        ]
+        cubes.face_extras = [_face_extras(faces) for faces in face_sets]
+        return cubes
+
+    def to_elements(self) -> List[Dict[str, Any]]:
+        """Serialize back to the bbmodel element dicts written by the generator"""
+        data = self.data
+        if not len(data):
+            return []
+
+        rows, int_rows, has_faces = self._rows()
+        elements = []
+        for i, row in enumerate(rows):
+            t = int_rows[i]
+            element = {
+                "name": self.names[i],
+                "uuid": self.uuids[i],
+                "type": "cube",
+                "from": row[0:3],
+                "to": row[3:6],
+                "autouv": t[7],
+                "color": t[6],
+                "origin": row[6:9]
+            }
+            if row[9] or row[10] or row[11]:
+                element["rotation"] = row[9:12]
+            face_present = has_faces[i]
+            # Cubes with all six textured faces take the literal fast path
+            if min(t[:6]) >= 0 and all(face_present):
+                element["faces"] = {
+                    "north": {"uv": row[12:16], "texture": t[0]},
+                    "east": {"uv": row[16:20], "texture": t[1]},
+                    "south": {"uv": row[20:24], "texture": t[2]},
+                    "west": {"uv": row[24:28], "texture": t[3]},
+                    "up": {"uv": row[28:32], "texture": t[4]},
+                    "down": {"uv": row[32:36], "texture": t[5]}
+                }
+            else:
+                element["faces"] = {
+                    name: {"uv": row[12 + 4 * f:16 + 4 * f], "texture": t[f] if t[f] >= 0 else None}
+                    for f, name in enumerate(FACE_NAMES)
+                    if face_present[f]
+                }
+            if self.face_extras[i]:
+                faces = element["faces"]
+                for name, face_extra in self.face_extras[i].items():
+                    if name in faces:
+                        faces[name].update(face_extra)
+            if self.extras[i]:
+                element.update(self.extras[i])
+            elements.append(element)
+        return elements
+
+    def _rows(self) -> Tuple[list, list, list]:
+        """Convert the records to Python lists, reusing the shared cache if still valid"""
+        cache = self._row_cache
+        if cache is not None and cache[0] == self.data.tobytes():
+            return cache[1], cache[2], cache[3]
+
+        # Fields of one type are adjacent in CUBE_DTYPE, so convert them as two
+        # blocks instead of paying NumPy call overhead per field
+        floats, ints = _blocks(self.data)
+        return json_numbers(floats), ints.tolist(), self.data["has_face"].tolist()
+
+    def freeze_rows(self):
+        """Precompute list conversion for cubes that will be cloned many times
+        
+        Clones made with copy() share the result for as long as their records
+        are unchanged; the cached lists are only ever sliced, never handed out.
+        """
+        self._row_cache = (self.data.tobytes(), *self._rows())
+
+    def outliner(self) -> List[Dict[str, Any]]:
+        """Flat outliner entries referencing every cube"""
+        return [{"uuid": cube_uuid, "name": name} for cube_uuid, name in zip(self.uuids, self.names)]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def copy(self) -> "CubeArray":
+        # Round-tripping through bytes is much cheaper than copying a structured array
+        data = np.frombuffer(bytearray(self.data.tobytes()), dtype=CUBE_DTYPE)
+        clone = CubeArray(data, list(self.names), list(self.uuids), list(self.extras), list(self.face_extras))
+        clone._row_cache = self._row_cache
+        return clone
+
+    def select(self, indices: Union[np.ndarray, Sequence[int]]) -> "CubeArray":
+        """Get a new cube array holding only the given cubes (index or boolean mask)"""
+        indices = np.asarray(indices)
+        if indices.dtype == np.bool_:
+            indices = np.flatnonzero(indices)
+        return CubeArray(
+            self.data[indices],
+            [self.names[i] for i in indices],
+            [self.uuids[i] for i in indices],
+            [self.extras[i] for i in indices],
+            [self.face_extras[i] for i in indices]
+        )
+
+    @staticmethod
+    def concat(parts: Sequence["CubeArray"]) -> "CubeArray":
+        return CubeArray(
+            np.concatenate([part.data for part in parts]) if parts else np.zeros(0, dtype=CUBE_DTYPE),
+            [name for part in parts for name in part.names],
+            [cube_uuid for part in parts for cube_uuid in part.uuids],
+            [extra for part in parts for extra in part.extras],
+            [extra for part in parts for extra in part.face_extras]
+        )
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return self.data["to"] - self.data["from"]
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Axis-aligned bounds of all cubes, ignoring their rotation"""
+        if not len(self.data):
+            zero = np.zeros(3)
+            return zero, zero
+        return self.data["from"].min(axis=0), self.data["to"].max(axis=0)
+
+    def translate(self, offset: Vector, mask: Optional[np.ndarray] = None) -> "CubeArray":
+        """Move cubes (all of them, or those selected by `mask`) in place"""
+        offset = np.asarray(offset, dtype=np.float64)
+        target = self.data if mask is None else self.data[mask]
+        for field in ("from", "to", "origin"):
+            target[field] += offset
+        if mask is not None:
+            self.data[mask] = target
+        return self
+
+    def scale(self, factor: Union[float, Vector], pivot: Vector = (0, 0, 0)) -> "CubeArray":
+        """Scale cube positions and sizes about a pivot in place"""
+        factor = np.broadcast_to(np.asarray(factor, dtype=np.float64), (3,))
+        pivot = np.asarray(pivot, dtype=np.float64)
+        data = self.data
+        for field in ("from", "to", "origin"):
+            data[field] = (data[field] - pivot) * factor + pivot
+
+        # Negative factors turn from/to inside out
+        low = np.minimum(data["from"], data["to"])
+        high = np.maximum(data["from"], data["to"])
+        data["from"] = low
+        data["to"] = high
+        for axis in np.flatnonzero(factor < 0):
+            self._flip_axis(axis)
+        return self
+
+    def mirror(self, axis: AxisLike, about: float = 0.0) -> "CubeArray":
+        """Mirror cubes across the plane `axis = about` in place"""
+        axis = _axis(axis)
+        data = self.data
+        low = 2 * about - data["to"][:, axis]
+        high = 2 * about - data["from"][:, axis]
+        data["from"][:, axis] = low
+        data["to"][:, axis] = high
+        data["origin"][:, axis] = 2 * about - data["origin"][:, axis]
+        self._flip_axis(axis)
+        return self
+
+    def snap(self, step: float) -> "CubeArray":
+        """Round positions to a grid in place so derived geometry stays compact"""
+        data = self.data
+        for field in ("from", "to", "origin"):
+            data[field] = np.round(data[field] / step) * step
+        return self
+
+    def _flip_axis(self, axis: int):
+        """Fix up rotations and face assignment after reflecting along an axis"""
+        data = self.data
+        other_axes = [a for a in range(3) if a != axis]
+        data["rotation"][:, other_axes] *= -1
+        first, second = _MIRRORED_FACES[axis]
+        for field in ("uv", "texture", "has_face"):
+            values = data[field]
+            values[:, [first, second]] = values[:, [second, first]]
+        swap = {FACE_NAMES[first]: FACE_NAMES[second], FACE_NAMES[second]: FACE_NAMES[first]}
+        self.face_extras = [
+            {swap.get(name, name): _swap_cullface(extra, swap) for name, extra in face_extras.items()}
+            if face_extras else face_extras
+            for face_extras in self.face_extras
+        ]
@@ -0,0 +1,506 @@
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.animation import LINEAR, STEP, ChannelSet, frame_times
+from app.services.geometry import CubeArray
+from app.services.renderer import UNTEXTURED_COLOR, face_normals, face_quads, load_texture_bytes, rotation_matrices
+from app.services.storage import evict_lru, mark_used
+from app.services import serializer
+
+# Bump whenever exported files change so cached exports are not reused
+GLTF_EXPORT_VERSION = "1"
+
+GLB_MAGIC = 0x46546C67
+GLB_VERSION = 2
+GLB_JSON_CHUNK = 0x4E4F534A
+GLB_BIN_CHUNK = 0x004E4942
+MEDIA_TYPE = "model/gltf-binary"
+
+# Blockbench works in pixels, 16 to a block; glTF in metres
+UNITS_PER_METER = 16.0
+
+# Component types and buffer view targets from the glTF specification
+_FLOAT = 5126
+_UNSIGNED_SHORT = 5123
+_UNSIGNED_INT = 5125
+_ARRAY_BUFFER = 34962
+_ELEMENT_ARRAY_BUFFER = 34963
+# Nearest-neighbour filtering and clamped edges keep pixel art crisp
+_SAMPLER = {"magFilter": 9728, "minFilter": 9728, "wrapS": 33071, "wrapT": 33071}
+
+# Two counter-clockwise triangles per face; face corners run clockwise seen from outside
+_QUAD_TRIANGLES = np.array([0, 3, 2, 0, 2, 1], dtype=np.int64)
+
+# Blockbench shows keyframes with X and Y rotations and X offsets negated
+_ROTATION_SIGN = np.array([-1.0, -1.0, 1.0])
+_POSITION_SIGN = np.array([-1.0, 1.0, 1.0])
+
+_IMAGE_TYPES = ((b"\x89PNG", "image/png"), (b"\xff\xd8\xff", "image/jpeg"))
+
+
+def quaternions(matrices: np.ndarray) -> np.ndarray:
+    """Unit (x, y, z, w) quaternions of (n, 3, 3) rotation matrices"""
+    m = matrices
+    q = np.empty((len(m), 4))
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    # Divide by the largest of the four candidates for numerical stability
+    case = np.argmax(np.stack([trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1), axis=1)
+
+    i = case == 0
+    s = np.sqrt(np.maximum(trace[i] + 1, 1e-12)) * 2
+    q[i] = np.stack([(m[i, 2, 1] - m[i, 1, 2]) / s, (m[i, 0, 2] - m[i, 2, 0]) / s, (m[i, 1, 0] - m[i, 0, 1]) / s, s / 4], axis=1)
+    i = case == 1
+    s = np.sqrt(np.maximum(1 + m[i, 0, 0] - m[i, 1, 1] - m[i, 2, 2], 1e-12)) * 2
+    q[i] = np.stack([s / 4, (m[i, 0, 1] + m[i, 1, 0]) / s, (m[i, 0, 2] + m[i, 2, 0]) / s, (m[i, 2, 1] - m[i, 1, 2]) / s], axis=1)
+    i = case == 2
+    s = np.sqrt(np.maximum(1 + m[i, 1, 1] - m[i, 0, 0] - m[i, 2, 2], 1e-12)) * 2
+    q[i] = np.stack([(m[i, 0, 1] + m[i, 1, 0]) / s, s / 4, (m[i, 1, 2] + m[i, 2, 1]) / s, (m[i, 0, 2] - m[i, 2, 0]) / s], axis=1)
+    i = case == 3
+    s = np.sqrt(np.maximum(1 + m[i, 2, 2] - m[i, 0, 0] - m[i, 1, 1], 1e-12)) * 2
+    q[i] = np.stack([(m[i, 0, 2] + m[i, 2, 0]) / s, (m[i, 1, 2] + m[i, 2, 1]) / s, s / 4, (m[i, 1, 0] - m[i, 0, 1]) / s], axis=1)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def _continuous(q: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Flip signs so consecutive keys of each channel are interpolated along the short arc
+
+    `q` holds the keys of several channels back to back, each starting at
+    one of `starts`.
+    """
+    flipped = np.r_[False, np.einsum("ij,ij->i", q[1:], q[:-1]) < 0]
+    flipped[starts] = False
+    # A key is negated when an odd number of flips precede it within its channel
+    parity = np.cumsum(flipped)
+    parity -= np.repeat(parity[starts], np.diff(np.r_[starts, len(q)]))
+    return np.where((parity % 2 == 1)[:, None], -q, q)
+
+
+class _BinaryChunk:
+    """Buffer views of the GLB binary chunk, kept as separate pieces until written"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.views: List[Dict[str, Any]] = []
+        self.accessors: List[Dict[str, Any]] = []
+        self.length = 0
+
+    def view(self, data: bytes, target: Optional[int] = None) -> int:
+        view = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        self.parts.append(data)
+        self.length += len(data)
+        # Every view starts 4-byte aligned, which suits all component types
+        padding = -len(data) % 4
+        if padding:
+            self.parts.append(b"\x00" * padding)
+            self.length += padding
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def accessor(self, view: int, component: int, count: int, kind: str, offset: int = 0, **bounds) -> int:
+        accessor = {"bufferView": view, "componentType": component, "count": int(count), "type": kind}
+        if offset:
+            accessor["byteOffset"] = int(offset)
+        accessor.update(bounds)
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+
+def _outliner_nodes(
+    entries: List[Any],
+    element_uuids: Set[str],
+    nodes: List[Dict[str, Any]],
+    origins: List[np.ndarray],
+    rotations: List[np.ndarray],
+    groups: Dict[str, int],
+    element_parents: Dict[str, int],
+    parent: int
+) -> List[int]:
+    """Add a node for every group of the outliner, returning the indices of the top-level ones"""
+    children = []
+    for entry in entries:
+        entry_uuid = entry if isinstance(entry, str) else entry.get("uuid")
+        if isinstance(entry, str) or ("children" not in entry and entry_uuid in element_uuids):
+            # Generated models list their elements flat, as plain uuids or {uuid, name}
+            element_parents.setdefault(entry_uuid, parent)
+            continue
+        origin = np.asarray(entry.get("origin") or (0, 0, 0), dtype=np.float64)
+        rotation = np.asarray(entry.get("rotation") or (0, 0, 0), dtype=np.float64)
+        index = len(nodes)
+        node: Dict[str, Any] = {"name": entry.get("name") or "group"}
+        parent_origin = origins[parent] if parent >= 0 else np.zeros(3)
+        if (origin != parent_origin).any():
+            node["translation"] = ((origin - parent_origin) / UNITS_PER_METER).tolist()
+        if rotation.any():
+            node["rotation"] = quaternions(rotation_matrices(rotation[None]))[0].tolist()
+        nodes.append(node)
+        origins.append(origin)
+        rotations.append(rotation_matrices(rotation[None])[0])
+        if entry_uuid:
+            groups[entry_uuid] = index
+        kids = _outliner_nodes(
+            entry.get("children", []), element_uuids, nodes, origins, rotations, groups, element_parents, index
+        )
+        if kids:
+            node["children"] = kids
+        children.append(index)
+    return children
+
+
+def build_glb(bbmodel: Dict[str, Any]) -> Tuple[bytes, List[bytes], int]:
+    """Convert a bbmodel to glTF, returning (JSON, binary chunk pieces, binary length)
+
+    All faces go through one NumPy pass: corners, normals and UVs of every
+    face are computed together, then sorted so each (node, material) run
+    is a contiguous slice of shared vertex and index buffers. Cubes that an
+    animation targets get a node of their own pivoting at their origin;
+    the remaining cubes become one mesh on their outliner group (or on a
+    root node). Outliner groups keep their hierarchy, origin and rotation.
+    Linear and stepped keyframes are kept as they are, smooth ones are
+    sampled at GLTF_ANIMATION_FPS.
+    """
+    elements = bbmodel.get("elements", [])
+    cubes = CubeArray.from_elements(elements)
+    element_uuids = set(cubes.uuids)
+    animations = bbmodel.get("animations", [])
+    targets = {target for animation in animations for target in animation.get("animators", {})}
+
+    nodes: List[Dict[str, Any]] = []
+    origins: List[np.ndarray] = []
+    rotations: List[np.ndarray] = []
+    groups: Dict[str, int] = {}
+    element_parents: Dict[str, int] = {}
+    roots = _outliner_nodes(
+        bbmodel.get("outliner", []), element_uuids, nodes, origins, rotations, groups, element_parents, -1
+    )
+
+    # Node holding the mesh of each cube; -1 for cubes left to the root mesh
+    cube_node = np.empty(len(cubes), dtype=np.int64)
+    targets_by_node: Dict[str, int] = dict(groups)
+    for index, cube_uuid in enumerate(cubes.uuids):
+        parent = element_parents.get(cube_uuid, -1)
+        if cube_uuid in targets:
+            origin = cubes.data["origin"][index]
+            parent_origin = origins[parent] if parent >= 0 else np.zeros(3)
+            node = {"name": cubes.names[index] or "cube"}
+            if (origin != parent_origin).any():
+                node["translation"] = ((origin - parent_origin) / UNITS_PER_METER).tolist()
+            nodes.append(node)
+            origins.append(origin)
+            rotations.append(np.eye(3))
+            if parent >= 0:
+                nodes[parent].setdefault("children", []).append(len(nodes) - 1)
+            else:
+                roots.append(len(nodes) - 1)
+            parent = len(nodes) - 1
+            targets_by_node[cube_uuid] = parent
+        cube_node[index] = parent
+    if (cube_node < 0).any():
+        nodes.append({"name": bbmodel.get("name") or "model"})
+        origins.append(np.zeros(3))
+        rotations.append(np.eye(3))
+        roots.append(len(nodes) - 1)
+        cube_node[cube_node < 0] = len(nodes) - 1
+
+    chunk = _BinaryChunk()
+    gltf: Dict[str, Any] = {
+        "asset": {"version": "2.0", "generator": f"bbmodel-generator GLB exporter {GLTF_EXPORT_VERSION}"},
+        "scene": 0,
+        "scenes": [{"name": bbmodel.get("name") or "model", "nodes": roots}],
+        "nodes": nodes
+    }
+    materials = _add_materials(gltf, chunk, bbmodel)
+    if len(cubes):
+        _add_meshes(gltf, chunk, bbmodel, cubes, cube_node, np.array(origins), materials)
+    _add_animations(gltf, chunk, animations, targets_by_node, np.array(origins), np.array(rotations))
+
+    gltf["bufferViews"] = chunk.views
+    gltf["accessors"] = chunk.accessors
+    if chunk.length:
+        gltf["buffers"] = [{"byteLength": chunk.length}]
+    for key in ("bufferViews", "accessors"):
+        if not gltf[key]:
+            del gltf[key]
+    return serializer.dumps(gltf), chunk.parts, chunk.length
+
+
+def _add_materials(gltf: Dict[str, Any], chunk: _BinaryChunk, bbmodel: Dict[str, Any]) -> List[int]:
+    """Embed usable textures, returning the material index for each texture slot and, last, untextured faces"""
+    images, textures, materials, slots = [], [], [], []
+    for texture, data in zip(bbmodel.get("textures", []), load_texture_bytes(bbmodel)):
+        mime = next((mime for magic, mime in _IMAGE_TYPES if data and data.startswith(magic)), None)
+        if mime is None:
+            slots.append(-1)
+            continue
+        images.append({"bufferView": chunk.view(data), "mimeType": mime})
+        textures.append({"sampler": 0, "source": len(images) - 1})
+        materials.append({
+            "name": texture.get("name") or f"texture_{len(textures) - 1}",
+            "pbrMetallicRoughness": {"baseColorTexture": {"index": len(textures) - 1}, "metallicFactor": 0, "roughnessFactor": 1},
+            "alphaMode": "MASK"
+        })
+        slots.append(len(materials) - 1)
+    materials.append({
+        "name": "untextured",
+        "pbrMetallicRoughness": {
+            "baseColorFactor": [channel / 255 for channel in UNTEXTURED_COLOR] + [1.0],
+            "metallicFactor": 0,
+            "roughnessFactor": 1
+        }
+    })
+    untextured = len(materials) - 1
+    slots = [untextured if slot < 0 else slot for slot in slots]
+    if images:
+        gltf["images"] = images
+        gltf["textures"] = textures
+        gltf["samplers"] = [_SAMPLER]
+    gltf["materials"] = materials
+    return slots + [untextured]
+
+
+def _add_meshes(
+    gltf: Dict[str, Any],
+    chunk: _BinaryChunk,
+    bbmodel: Dict[str, Any],
+    cubes: CubeArray,
+    cube_node: np.ndarray,
+    origins: np.ndarray,
+    materials: List[int]
+):
+    """Build the vertex and index buffers of every face at once and split them into primitives"""
+    corners, uv, texture, cube_index = face_quads(cubes)
+    if not len(corners):
+        return
+    normals = face_normals(corners)
+    slot = np.where((texture >= 0) & (texture < len(materials) - 1), texture, len(materials) - 1)
+    material = np.asarray(materials)[slot]
+    node = cube_node[cube_index]
+
+    # Contiguous runs of faces sharing a node and a material become primitives
+    order = np.lexsort((material, node))
+    corners, uv, normals, material, node = corners[order], uv[order], normals[order], material[order], node[order]
+    key = node * (len(materials) + 1) + material
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    counts = np.diff(np.r_[starts, len(key)])
+
+    resolution = bbmodel.get("resolution") or {}
+    uv_size = np.array([resolution.get("width", 16) or 16, resolution.get("height", 16) or 16], dtype=np.float64)
+    positions = ((corners - origins[node][:, None, :]) / UNITS_PER_METER).reshape(-1, 3).astype(np.float32)
+    texcoords = (uv / uv_size).reshape(-1, 2).astype(np.float32)
+    vertex_normals = np.repeat(normals, 4, axis=0).astype(np.float32)
+
+    # Indices restart at 0 for each primitive
+    face_in_run = np.arange(len(key)) - np.repeat(starts, counts)
+    index_type = np.uint16 if counts.max() * 4 <= 0xFFFF else np.uint32
+    indices = (face_in_run[:, None] * 4 + _QUAD_TRIANGLES).astype(index_type)
+
+    position_view = chunk.view(positions.tobytes(), _ARRAY_BUFFER)
+    normal_view = chunk.view(vertex_normals.tobytes(), _ARRAY_BUFFER)
+    texcoord_view = chunk.view(texcoords.tobytes(), _ARRAY_BUFFER)
+    index_view = chunk.view(indices.tobytes(), _ELEMENT_ARRAY_BUFFER)
+    low = np.minimum.reduceat(positions.reshape(-1, 4, 3).min(axis=1), starts)
+    high = np.maximum.reduceat(positions.reshape(-1, 4, 3).max(axis=1), starts)
+    component = _UNSIGNED_SHORT if index_type is np.uint16 else _UNSIGNED_INT
+
+    meshes: Dict[int, List[Dict[str, Any]]] = {}
+    for run, (start, count) in enumerate(zip(starts.tolist(), counts.tolist())):
+        vertices = count * 4
+        primitive = {
+            "attributes": {
+                "POSITION": chunk.accessor(
+                    position_view, _FLOAT, vertices, "VEC3", start * 48, min=low[run].tolist(), max=high[run].tolist()
+                ),
+                "NORMAL": chunk.accessor(normal_view, _FLOAT, vertices, "VEC3", start * 48),
+                "TEXCOORD_0": chunk.accessor(texcoord_view, _FLOAT, vertices, "VEC2", start * 32)
+            },
+            "indices": chunk.accessor(index_view, component, count * 6, "SCALAR", start * 6 * np.dtype(index_type).itemsize),
+            "material": int(material[start])
+        }
+        meshes.setdefault(int(node[start]), []).append(primitive)
+
+    gltf["meshes"] = []
+    for node_index, primitives in meshes.items():
+        gltf["nodes"][node_index]["mesh"] = len(gltf["meshes"])
+        gltf["meshes"].append({"name": gltf["nodes"][node_index]["name"], "primitives": primitives})
+
+
+def _add_animations(
+    gltf: Dict[str, Any],
+    chunk: _BinaryChunk,
+    animations: List[Dict[str, Any]],
+    targets: Dict[str, int],
+    origins: np.ndarray,
+    rotations: np.ndarray
+):
+    """Add an animation per bbmodel animation, with a sampler per animated channel
+
+    Rotations of all channels of an animation are converted to quaternions
+    together, and their outputs share one buffer view.
+    """
+    parents = np.full(len(gltf["nodes"]), -1)
+    for index, node in enumerate(gltf["nodes"]):
+        parents[node.get("children", [])] = index
+    parent_origins = np.where((parents >= 0)[:, None], origins[parents], 0.0)
+
+    inputs: Dict[bytes, int] = {}
+
+    def input_accessor(times: np.ndarray) -> int:
+        data = times.astype(np.float32)
+        key = data.tobytes()
+        if key not in inputs:
+            inputs[key] = chunk.accessor(
+                chunk.view(key), _FLOAT, len(data), "SCALAR", min=[float(data.min())], max=[float(data.max())]
+            )
+        return inputs[key]
+
+    result = []
+    for animation in animations:
+        channels = ChannelSet.from_animation(animation, settings.ANIMATION_INTERPOLATION)
+        baked_times = baked = None
+        # (node, channel, interpolation, times, values) of every exported channel
+        picked = []
+        for c, (target, channel) in enumerate(channels.targets):
+            node = targets.get(target)
+            if node is None:
+                continue
+            count = channels.counts[c]
+            times = channels.times[c, :count]
+            values = channels.values[c, :count]
+            modes = channels.modes[c, :count]
+            interpolation = "LINEAR"
+            if (modes == STEP).all():
+                interpolation = "STEP"
+            elif not (modes == LINEAR).all():
+                if baked is None:
+                    last_key = channels.times[np.isfinite(channels.times)].max(initial=0)
+                    baked_times = frame_times(
+                        max(float(animation.get("length") or 0), float(last_key)),
+                        settings.GLTF_ANIMATION_FPS,
+                        settings.ANIMATION_MAX_FRAMES
+                    )
+                    baked = channels.evaluate(baked_times)
+                times, values = baked_times, baked[c]
+            picked.append((node, channel, interpolation, times, values))
+        if not picked:
+            continue
+
+        nodes = np.array([entry[0] for entry in picked])
+        lengths = np.array([len(entry[3]) for entry in picked])
+        offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+        values = np.concatenate([entry[4] for entry in picked])
+        key_nodes = np.repeat(nodes, lengths)
+        key_channels = np.repeat([entry[1] for entry in picked], lengths)
+
+        # Positions are offsets from the node's rest translation
+        position = key_channels == "position"
+        translations = (origins[key_nodes] - parent_origins[key_nodes] + values * _POSITION_SIGN) / UNITS_PER_METER
+        vectors = np.where(position[:, None], translations, values).astype(np.float32)
+        # Rotations follow the rest rotation of the node (non-zero for groups)
+        rotation = key_channels == "rotation"
+        rotation_rows = np.cumsum(rotation) - rotation
+        if rotation.any():
+            matrices = rotations[key_nodes[rotation]] @ rotation_matrices(values[rotation] * _ROTATION_SIGN)
+            starts = rotation_rows[offsets[[entry[1] == "rotation" for entry in picked]]]
+            quats = _continuous(quaternions(matrices), starts).astype(np.float32)
+
+        pieces, samplers, gltf_channels = [], [], []
+        for index, (node, channel, interpolation, times, _) in enumerate(picked):
+            if channel == "rotation":
+                start = rotation_rows[offsets[index]]
+                pieces.append(quats[start:start + lengths[index]])
+            else:
+                pieces.append(vectors[offsets[index]:offsets[index] + lengths[index]])
+            samplers.append({"input": input_accessor(times), "interpolation": interpolation})
+            path = {"rotation": "rotation", "position": "translation", "scale": "scale"}[channel]
+            gltf_channels.append({"sampler": index, "target": {"node": int(node), "path": path}})
+
+        view = chunk.view(b"".join(piece.tobytes() for piece in pieces))
+        offset = 0
+        for sampler, piece in zip(samplers, pieces):
+            sampler["output"] = chunk.accessor(view, _FLOAT, len(piece), f"VEC{piece.shape[1]}", offset)
+            offset += piece.nbytes
+        result.append({"name": animation.get("name") or "animation", "samplers": samplers, "channels": gltf_channels})
+    if result:
+        gltf["animations"] = result
+
+
+def iter_glb(bbmodel: Dict[str, Any]) -> Iterator[bytes]:
+    """Yield a GLB file piece by piece: header, JSON chunk, then the binary chunk as built"""
+    json_data, parts, length = build_glb(bbmodel)
+    json_data += b" " * (-len(json_data) % 4)
+    total = 12 + 8 + len(json_data) + (8 + length if length else 0)
+    yield struct.pack("<III", GLB_MAGIC, GLB_VERSION, total)
+    yield struct.pack("<II", len(json_data), GLB_JSON_CHUNK) + json_data
+    if length:
+        yield struct.pack("<II", length, GLB_BIN_CHUNK)
+        yield from parts
+
+
+class GLBExporter:
+    """Converts models to GLB and keeps each export on disk under the model's content hash
+
+    Exports of models that were rewritten or deleted are never requested
+    again, so the directory is held to `max_bytes` by dropping the least
+    recently used files whenever a new export is stored.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self._directory = directory
+        self.max_bytes = max_bytes if max_bytes is not None else settings.GLB_EXPORT_CACHE_MAX_BYTES
+
+    @property
+    def directory(self) -> str:
+        directory = self._directory or settings.EXPORTS_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def path_for(self, content_hash: str) -> str:
+        """Where the export of a model with this content hash is (or will be) stored"""
+        digest = hashlib.sha256(
+            f"{GLTF_EXPORT_VERSION}:{settings.GLTF_ANIMATION_FPS}:{settings.ANIMATION_INTERPOLATION}:{content_hash}".encode("utf-8")
+        )
+        return os.path.join(self.directory, digest.hexdigest() + ".glb")
+
+    def cached(self, content_hash: str) -> Optional[str]:
+        """Path of a cached export, marked as recently used, or None"""
+        path = self.path_for(content_hash)
+        return path if mark_used(path) else None
+
+    def stream(self, bbmodel: Dict[str, Any], content_hash: str) -> Iterator[bytes]:
+        """Yield the GLB of a model while writing it to the cache
+
+        The cached file only appears once every piece has been written, so
+        an interrupted download leaves nothing behind.
+        """
+        path = self.path_for(content_hash)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for piece in iter_glb(bbmodel):
+                    f.write(piece)
+                    yield piece
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        evict_lru(self.directory, self.max_bytes, (".glb",), keep=path)
+
+    def export(self, bbmodel: Dict[str, Any], content_hash: str) -> str:
+        """Convert a model unless its export is already cached, returning the file path"""
+        path = self.cached(content_hash)
+        if path is None:
+            path = self.path_for(content_hash)
+            for _ in self.stream(bbmodel, content_hash):
+                pass
+        return path
+
+
+glb_exporter = GLBExporter()
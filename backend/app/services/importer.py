@@ -0,0 +1,322 @@
+import codecs
+import json
+import re
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.bbmodel import BBModelAnimation, BBModelElement
+from app.services import serializer
+from app.services.storage import ModelStorage, model_storage
+
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+
+# Top-level members that must be arrays, and those a model cannot do without
+ARRAY_MEMBERS = ("elements", "outliner", "textures", "animations")
+REQUIRED_MEMBERS = ("meta", "elements")
+
+# Output is handed to storage in pieces of about this size
+WRITE_CHUNK_SIZE = 256 * 1024
+
+
+class BBModelImportError(ValueError):
+    """An uploaded bbmodel is not valid JSON or not a valid model"""
+
+
+class ImportLimitError(BBModelImportError):
+    """An uploaded bbmodel exceeds one of the import limits"""
+
+
+class ImportLimits(NamedTuple):
+    max_bytes: int
+    max_elements: int
+    max_animations: int
+    max_value_bytes: int
+
+
+def default_limits() -> ImportLimits:
+    return ImportLimits(
+        settings.IMPORT_MAX_BYTES,
+        settings.IMPORT_MAX_ELEMENTS,
+        settings.IMPORT_MAX_ANIMATIONS,
+        settings.IMPORT_MAX_VALUE_BYTES
+    )
+
+
+class JSONStreamReader:
+    """Decodes a JSON document from a binary stream one value at a time
+
+    Only the value being decoded and one read chunk are held in memory, so
+    arbitrarily long arrays can be walked item by item. Values larger than
+    `max_value_bytes` and input longer than `max_bytes` are rejected as soon
+    as they are seen.
+    """
+
+    def __init__(self, stream: BinaryIO, max_bytes: int, max_value_bytes: int, chunk_size: Optional[int] = None):
+        self._stream = stream
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        # Characters dropped from the front of the buffer, for error offsets
+        self._offset = 0
+        self._eof = False
+        self.max_bytes = max_bytes
+        self.max_value_bytes = max_value_bytes
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        self.bytes_read = 0
+
+    def _error(self, message: str) -> BBModelImportError:
+        return BBModelImportError(f"Invalid JSON at character {self._offset + self._pos}: {message}")
+
+    def _fill(self, size: int) -> bool:
+        """Append at least `size` more bytes of input, returning False at the end of it"""
+        if self._eof:
+            return False
+        if self._pos:
+            self._offset += self._pos
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        data = self._stream.read(size)
+        self.bytes_read += len(data)
+        if self.bytes_read > self.max_bytes:
+            raise ImportLimitError(f"File is larger than {self.max_bytes} bytes")
+        try:
+            self._buffer += self._utf8.decode(data, final=not data)
+        except UnicodeDecodeError as e:
+            raise self._error(f"not UTF-8 ({e.reason})")
+        if not data:
+            self._eof = True
+        return bool(data)
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of input"""
+        while True:
+            match = _NON_WHITESPACE.search(self._buffer, self._pos)
+            if match:
+                self._pos = match.start()
+                return self._buffer[self._pos]
+            self._pos = len(self._buffer)
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise self._error(f"expected {char!r}, found {found or 'end of input'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value"""
+        self.peek()
+        while True:
+            error = None
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                error = e
+            else:
+                # A number or literal at the end of the buffer may go on in the next chunk
+                if self._eof or _NON_WHITESPACE.search(self._buffer, end):
+                    self._pos = end
+                    return value
+
+            pending = len(self._buffer) - self._pos
+            if pending > self.max_value_bytes:
+                raise ImportLimitError(f"A single value is larger than {self.max_value_bytes} bytes")
+            # Read at least as much again so retrying a long value stays linear
+            if not self._fill(max(self.chunk_size, pending)) and error is not None:
+                raise self._error(error.msg)
+
+    def at_end(self) -> bool:
+        return self.peek() == ""
+
+
+def iter_events(reader: JSONStreamReader) -> Iterator[Tuple[str, str, Any]]:
+    """Walk a top-level JSON object as (event, key, value) tuples
+
+    Arrays are reported as "start_array", one "item" per entry and
+    "end_array"; every other member as a single "value".
+    """
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise reader._error("object keys must be strings")
+        reader.expect(":")
+
+        if reader.peek() == "[":
+            reader.expect("[")
+            yield "start_array", key, None
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield "item", key, reader.value()
+                    if reader.peek() != ",":
+                        reader.expect("]")
+                        break
+                    reader.expect(",")
+            yield "end_array", key, None
+        else:
+            yield "value", key, reader.value()
+
+        if reader.peek() != ",":
+            reader.expect("}")
+            break
+        reader.expect(",")
+    if not reader.at_end():
+        raise reader._error("unexpected data after the model")
+
+
+def _describe(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+
+class BBModelImporter:
+    """Validates uploaded bbmodel files while streaming them into model storage"""
+
+    def __init__(self, storage: Optional[ModelStorage] = None, limits: Optional[ImportLimits] = None):
+        self.storage = storage or model_storage
+        self._limits = limits
+
+    @property
+    def limits(self) -> ImportLimits:
+        # Resolved lazily so settings can be changed after startup
+        return self._limits or default_limits()
+
+    def import_file(
+        self,
+        model_id: str,
+        stream: BinaryIO,
+        user_id: str,
+        filename: Optional[str] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Validate a bbmodel from a binary stream and store it, returning counts and sizes
+
+        Nothing is stored when the file is invalid or exceeds a limit. Any
+        `metadata` member of the upload is replaced with the importer's own.
+        """
+        limits = self.limits
+        reader = JSONStreamReader(stream, limits.max_bytes, limits.max_value_bytes, chunk_size)
+        counts = {"elements": 0, "animations": 0, "textures": 0}
+        metadata = {
+            "name": filename or f"Imported model {model_id[:8]}",
+            "prompt": "",
+            "model_type": "custom",
+            "animation_type": None,
+            "user_id": user_id,
+            "created_at": datetime.now().isoformat(),
+            "imported_from": filename
+        }
+        meta = self.storage.save_stream(model_id, self._chunks(self._convert(reader, counts, metadata)))
+        return {"model_id": model_id, **counts, "size": meta["size"], "stored_size": meta["stored_size"]}
+
+    def _chunks(self, pieces: Iterator[bytes]) -> Iterator[bytes]:
+        """Group small pieces of output into larger writes"""
+        pending = []
+        size = 0
+        for piece in pieces:
+            pending.append(piece)
+            size += len(piece)
+            if size >= WRITE_CHUNK_SIZE:
+                yield b"".join(pending)
+                pending = []
+                size = 0
+        if pending:
+            yield b"".join(pending)
+
+    def _convert(self, reader: JSONStreamReader, counts: Dict[str, int], metadata: Dict[str, Any]) -> Iterator[bytes]:
+        """Validate the upload event by event, yielding the JSON to store"""
+        seen: Set[str] = set()
+        uuids: Set[str] = set()
+        separator = b"{"
+        index = 0
+        for event, key, value in iter_events(reader):
+            if event == "end_array":
+                yield b"]"
+                continue
+            if event == "item":
+                self._check_item(key, value, index, counts, uuids)
+                yield (b"," if index else b"") + serializer.dumps(value)
+                index += 1
+                continue
+
+            if key in seen:
+                raise BBModelImportError(f"Duplicate member {key!r}")
+            seen.add(key)
+            if key == "metadata":
+                # Skipped as a whole; arrays under this key are rejected below
+                if event == "value":
+                    continue
+                raise BBModelImportError("metadata must be an object")
+            if event == "value":
+                self._check_value(key, value)
+                if key == "name" and value:
+                    metadata["name"] = value
+                yield separator + serializer.dumps(key) + b":" + serializer.dumps(value)
+            else:
+                index = 0
+                yield separator + serializer.dumps(key) + b":["
+            separator = b","
+
+        missing = [key for key in REQUIRED_MEMBERS if key not in seen]
+        if missing:
+            raise BBModelImportError(f"Missing {', '.join(missing)}")
+        yield b',"metadata":' + serializer.dumps(metadata) + b"}"
+
+    def _check_value(self, key: str, value: Any):
+        """Validate a top-level member that is not an array"""
+        if key in ARRAY_MEMBERS:
+            raise BBModelImportError(f"{key} must be an array")
+        if key == "meta" and not isinstance(value, dict):
+            raise BBModelImportError("meta must be an object")
+        if key == "name" and not isinstance(value, str):
+            raise BBModelImportError("name must be a string")
+        if key == "resolution":
+            if not isinstance(value, dict) or not all(
+                isinstance(value.get(side), int) and value[side] > 0 for side in ("width", "height")
+            ):
+                raise BBModelImportError("resolution must have positive integer width and height")
+
+    def _check_item(self, key: str, value: Any, index: int, counts: Dict[str, int], uuids: Set[str]):
+        """Validate one entry of a top-level array as soon as it has been read"""
+        if key == "elements":
+            if index >= self.limits.max_elements:
+                raise ImportLimitError(f"More than {self.limits.max_elements} elements")
+            try:
+                element = BBModelElement.model_validate(value)
+            except ValidationError as e:
+                raise BBModelImportError(f"Invalid element {index}: {_describe(e)}")
+            if element.type == "cube" and not (
+                element.from_ and len(element.from_) == 3 and element.to and len(element.to) == 3
+            ):
+                raise BBModelImportError(f"Invalid element {index}: cubes need 3D from and to")
+            if element.uuid in uuids:
+                raise BBModelImportError(f"Invalid element {index}: duplicate uuid {element.uuid}")
+            uuids.add(element.uuid)
+            counts["elements"] += 1
+        elif key == "animations":
+            if index >= self.limits.max_animations:
+                raise ImportLimitError(f"More than {self.limits.max_animations} animations")
+            try:
+                BBModelAnimation.model_validate(value)
+            except ValidationError as e:
+                raise BBModelImportError(f"Invalid animation {index}: {_describe(e)}")
+            counts["animations"] += 1
+        elif key == "textures":
+            if not isinstance(value, dict):
+                raise BBModelImportError(f"Invalid texture {index}: must be an object")
+            counts["textures"] += 1
+
+
+bbmodel_importer = BBModelImporter()
@@ -0,0 +1,181 @@
+import copy
+import math
+from typing import Any, Collection, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.geometry import CubeArray
+from app.services.optimizer import merge_cubes, static_mask
+from app.services.storage import ModelStorage, lod_key
+from app.services import serializer
+
+# A dropped cube is folded into a kept neighbour when their bounding box is
+# at most this much larger than the two cubes together
+ABSORB_SLACK = 0.25
+
+# Above this many (dropped, kept) pairs, small cubes are only dropped
+_MAX_ABSORB_PAIRS = 4_000_000
+# Pairs compared per NumPy call
+_ABSORB_CHUNK_PAIRS = 1_000_000
+
+
+def parse_lod_levels(spec: str) -> List[float]:
+    """Parse "0.5,0.2" into the element budget fraction of LOD 1, 2, ..."""
+    levels = [float(part) for part in spec.split(",") if part.strip()]
+    for fraction in levels:
+        if not 0 < fraction <= 1:
+            raise ValueError(f"LOD budgets must be in (0, 1], got {fraction}")
+    return levels
+
+
+def element_budget(count: int, fraction: float) -> int:
+    return max(1, math.ceil(count * fraction))
+
+
+def simplify_cubes(cubes: CubeArray, budget: int, locked: Optional[Collection[str]] = None) -> CubeArray:
+    """Reduce cubes to at most `budget` elements, losing as little of the silhouette as possible
+
+    Adjacent cubes are merged losslessly first. If that is not enough, the
+    smallest cubes go, with cubes in `locked` (animation targets) going
+    last. A dropped cube that sits against a kept one, so that their
+    bounding box is barely larger than both, stretches that cube instead of
+    leaving a hole. Rotated and animated cubes are never stretched.
+    """
+    return _reduce(merge_cubes(cubes, locked), budget, locked)
+
+
+def _reduce(cubes: CubeArray, budget: int, locked: Optional[Collection[str]]) -> CubeArray:
+    """Keep the `budget` largest of already merged cubes, absorbing what fits"""
+    if len(cubes) <= budget:
+        return cubes
+
+    sizes = np.clip(cubes.sizes, 0, None)
+    volumes = sizes.prod(axis=1)
+    keep_first = np.zeros(len(cubes), dtype=bool)
+    if locked:
+        keep_first = np.fromiter((cube_uuid in locked for cube_uuid in cubes.uuids), bool, len(cubes))
+    # Largest first, animated cubes ahead of everything else; ties keep model order
+    order = np.lexsort((np.arange(len(cubes)), -volumes, ~keep_first))
+    kept = np.sort(order[:budget])
+    dropped = order[budget:]
+
+    data = cubes.data.copy()
+    static = static_mask(cubes, locked)
+    if len(dropped) * len(kept) <= _MAX_ABSORB_PAIRS:
+        _absorb(data, volumes, kept[static[kept]], dropped[static[dropped]])
+
+    return CubeArray(data, cubes.names, cubes.uuids, cubes.extras, cubes.face_extras).select(kept)
+
+
+def _absorb(data: np.ndarray, volumes: np.ndarray, kept: np.ndarray, dropped: np.ndarray):
+    """Stretch kept cubes over the dropped cubes they nearly touch, in place"""
+    if not len(kept) or not len(dropped):
+        return
+    kept_from = data["from"][kept]
+    kept_to = data["to"][kept]
+    kept_volume = volumes[kept]
+    chunk = max(1, _ABSORB_CHUNK_PAIRS // len(kept))
+    targets = []
+    for start in range(0, len(dropped), chunk):
+        part = dropped[start:start + chunk]
+        low = np.minimum(data["from"][part][:, None, :], kept_from[None])
+        high = np.maximum(data["to"][part][:, None, :], kept_to[None])
+        union = (high - low).prod(axis=2)
+        waste = union - (1 + ABSORB_SLACK) * (kept_volume[None] + volumes[part][:, None])
+        best = waste.argmin(axis=1)
+        fits = waste[np.arange(len(part)), best] <= 0
+        targets.append(np.where(fits, best, -1))
+    targets = np.concatenate(targets)
+
+    # Several dropped cubes may stretch the same kept cube
+    absorbing = targets >= 0
+    target_rows = kept[targets[absorbing]]
+    np.minimum.at(data["from"], target_rows, data["from"][dropped[absorbing]])
+    np.maximum.at(data["to"], target_rows, data["to"][dropped[absorbing]])
+
+
+def _prune_outliner(entries: List[Any], keep: Collection[str]) -> List[Any]:
+    """Drop references to removed elements from (possibly nested) outliner entries"""
+    pruned = []
+    for entry in entries:
+        if isinstance(entry, str):
+            if entry in keep:
+                pruned.append(entry)
+        elif "children" in entry:
+            pruned.append({**entry, "children": _prune_outliner(entry["children"], keep)})
+        elif entry.get("uuid") in keep:
+            pruned.append(entry)
+    return pruned
+
+
+def build_lods(bbmodel: Dict[str, Any], levels: List[float], first_level: int = 1) -> List[Dict[str, Any]]:
+    """Low-detail copies of a model using about `levels[i]` of its cube elements each
+
+    Works from the stored elements, so LODs of generated, edited and
+    imported models are built the same way without re-running generation.
+    The elements are converted and merged once for all levels. Animations
+    and the outliner lose their references to removed cubes.
+    """
+    elements = bbmodel.get("elements", [])
+    cubes = CubeArray.from_elements(elements)
+    others = [element for element in elements if element.get("type", "cube") != "cube"]
+    animations = bbmodel.get("animations", [])
+    locked = {target for animation in animations for target in animation.get("animators", {})}
+    merged = merge_cubes(cubes, locked)
+
+    lods = []
+    for level, fraction in enumerate(levels, start=first_level):
+        reduced = _reduce(merged, element_budget(len(cubes), fraction), locked)
+        keep = set(reduced.uuids) | {element.get("uuid") for element in others}
+
+        lod = {key: value for key, value in bbmodel.items() if key not in ("elements", "outliner", "animations", "metadata")}
+        lod["elements"] = reduced.to_elements() + others
+        lod["outliner"] = _prune_outliner(bbmodel.get("outliner", []), keep)
+        lod["animations"] = []
+        for animation in animations:
+            animation = dict(animation)
+            animation["animators"] = {
+                target: animator for target, animator in animation.get("animators", {}).items() if target in keep
+            }
+            lod["animations"].append(animation)
+        lod["metadata"] = copy.deepcopy(bbmodel.get("metadata", {}))
+        lod["metadata"]["lod"] = {
+            "level": level,
+            "budget": fraction,
+            "elements_before": len(elements),
+            "elements_after": len(lod["elements"])
+        }
+        lods.append(lod)
+    return lods
+
+
+def build_lod(bbmodel: Dict[str, Any], fraction: float, level: int) -> Dict[str, Any]:
+    """Build a single LOD, numbered `level`"""
+    return build_lods(bbmodel, [fraction], level)[0]
+
+
+def store_lods(storage: ModelStorage, model_id: str, bbmodel: Dict[str, Any], levels: List[float]) -> List[int]:
+    """Build and store every LOD of a model, returning the stored levels"""
+    storage.delete_lods(model_id)
+    for level, lod in enumerate(build_lods(bbmodel, levels), start=1):
+        storage.save_bytes(lod_key(model_id, level), serializer.dumps(lod, pretty=settings.MODEL_PRETTY_JSON))
+    return list(range(1, len(levels) + 1))
+
+
+def ensure_lod(storage: ModelStorage, model_id: str, level: int, levels: List[float]) -> Optional[str]:
+    """Storage key of a LOD, building it from the stored model if it is missing
+
+    Returns None when the model does not exist or `level` is not configured.
+    """
+    if not 1 <= level <= len(levels):
+        return None
+    key = lod_key(model_id, level)
+    if storage.exists(key):
+        return key
+    bbmodel = storage.load(model_id)
+    if bbmodel is None:
+        return None
+    lod = build_lod(bbmodel, levels[level - 1], level)
+    storage.save_bytes(key, serializer.dumps(lod, pretty=settings.MODEL_PRETTY_JSON))
+    return key
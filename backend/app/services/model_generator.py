@@ -1,135 +1,858 @@
 import os
-import json
 import time
-import uuid
 import random
+import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+import numpy as np
 
 from app.core.config import settings
+from app.models.bbmodel import AnimationType, ModelType
+from app.services.status_store import StatusStore, create_status_store
+from app.services.progress import ProgressBroker, progress_broker
+from app.services.archetypes import archetype_registry, batch_uuid4
+from app.services.geometry import CubeArray
+from app.services.animation import bake_animation, simplify_animation
+from app.services.optimizer import optimize_geometry
+from app.services.uv_packer import pack_uvs
+from app.services.textures import TextureGenerator, palette_from_prompt, texture_generator, texture_url, TEXTURE_VERSION
+from app.services.renderer import PreviewRenderer, preview_renderer
+from app.services.animated_preview import AnimatedPreviewRenderer, animated_preview_renderer
+from app.services.executor import GenerationExecutor, QueueFullError, render_executor
+from app.services.prompt_analyzer import analyze_prompt, resolve_animation, resolve_archetype
+from app.services.backends import BackendPool, backend_pool
+from app.services.cancellation import JobCancelled, JobHandle, JobRegistry, job_registry
+from app.services.metrics import StageTimer, metrics_registry
+from app.services.lod import parse_lod_levels, store_lods
+from app.services.storage import ModelStorage, model_storage
+from app.services.result_cache import ResultCache, SeededUUIDs, generation_key, result_cache
+from app.services import serializer
+
+# Bump whenever generated output changes so cached results are not reused
+GENERATOR_VERSION = "6"
+
+UUIDFactory = Callable[[int], List[str]]
+
+logger = logging.getLogger(__name__)
 
-# Mock model generation status storage
-MODEL_STATUS = {}
+# Per-axis scale applied to batch variants, and the grid they are snapped to
+VARIANT_SCALE_RANGE = (0.8, 1.2)
+VARIANT_GRID = 0.25
+
+# Aspects of a stored model that can be regenerated on their own
+EDIT_ASPECTS = ("animations", "textures", "elements")
+# Timing stage each aspect's regeneration is reported under
+EDIT_STAGES = {"animations": "animations", "textures": "textures", "elements": "structure"}
+
+STAGE_SECONDS = metrics_registry.histogram(
+    "bbmodel_generation_stage_seconds",
+    "Time generation jobs spend in each pipeline stage",
+    ("job", "stage", "model_type", "animation_type")
+)
+JOB_SECONDS = metrics_registry.histogram(
+    "bbmodel_generation_job_seconds",
+    "Run time of generation jobs from start to final status",
+    ("job", "model_type", "animation_type", "status")
+)
+# Label values the histograms accept; free-text types are reported as "other"
+MODEL_TYPE_LABELS = {member.value for member in ModelType} | {"auto"}
+ANIMATION_TYPE_LABELS = {member.value for member in AnimationType} | {"auto"}
+
+def _metric_label(value: Optional[str], allowed: set) -> Optional[str]:
+    """Fold values outside `allowed` into "other" so label cardinality stays bounded"""
+    if value is None or value in allowed:
+        return value
+    return "other"
 
 class ModelGenerator:
-    def __init__(self):
-        os.makedirs(settings.MODELS_DIR, exist_ok=True)
-        os.makedirs(settings.TEXTURES_DIR, exist_ok=True)
+    def __init__(
+        self,
+        status_store: Optional[StatusStore] = None,
+        broker: Optional[ProgressBroker] = None,
+        storage: Optional[ModelStorage] = None,
+        cache: Optional[ResultCache] = None,
+        textures: Optional[TextureGenerator] = None,
+        renderer: Optional[PreviewRenderer] = None,
+        animated_renderer: Optional[AnimatedPreviewRenderer] = None,
+        render_pool: Optional[GenerationExecutor] = None,
+        backend: Optional[BackendPool] = None,
+        jobs: Optional[JobRegistry] = None
+    ):
+        # Storage and textures create their directories when first written to
+        self.status_store = status_store or create_status_store()
+        self.broker = broker or progress_broker
+        self.storage = storage or model_storage
+        self.result_cache = cache or result_cache
+        self.textures = textures or texture_generator
+        self.renderer = renderer or preview_renderer
+        self.animated_renderer = animated_renderer or animated_preview_renderer
+        self.render_pool = render_pool or render_executor
+        self.backend = backend or backend_pool
+        self.jobs = jobs or job_registry
     
     def get_model_status(self, model_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get the status of a model generation task"""
-        if model_id not in MODEL_STATUS:
+        status = self.status_store.get(model_id)
+        if status is None:
             return None
         
-        status = MODEL_STATUS[model_id]
-        
         # Add download URL if model is completed
         if status["status"] == "completed":
             status["download_url"] = f"/api/models/{model_id}/download"
         
         return status
     
-    async def generate_model(
+    def _set_status(self, model_id: str, status: Dict[str, Any]):
+        """Store a job status and push it to any progress subscribers"""
+        self.status_store.set(model_id, status)
+        self.broker.publish(model_id, status)
+    
+    def _update_status(self, model_id: str, **fields):
+        """Update fields of a job status and push the result to subscribers"""
+        status = self.status_store.update(model_id, **fields)
+        if status is not None:
+            self.broker.publish(model_id, status)
+    
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job of this process, returning its status
+        
+        A queued job is dropped at once; a running one stops at its next
+        stage and refunds its tokens. `job_id` may be a model, a batch or a
+        variant of a batch, which cancels the whole batch. Returns None if
+        there is no such job.
+        """
+        job = self.jobs.find(job_id)
+        if job is None:
+            return None
+        if job.cancel():
+            # It never started, so nothing was charged
+            self.jobs.discard(job.job_id, job)
+            if job.members:
+                self._set_status(job.job_id, {
+                    "batch_id": job.job_id,
+                    "status": "cancelled",
+                    "message": "Batch generation cancelled before it started",
+                    "model_ids": list(job.members),
+                    "total": len(job.members),
+                    "completed": 0,
+                    "failed": 0,
+                    "token_cost": 0
+                })
+            for model_id in job.members or (job.job_id,):
+                self._set_status(model_id, {
+                    "model_id": model_id,
+                    **({"batch_id": job.job_id} if job.members else {}),
+                    "status": "cancelled",
+                    "message": "Model generation cancelled before it started",
+                    "token_cost": 0
+                })
+        else:
+            self._update_status(job.job_id, message="Cancelling...")
+        # A job that is just starting may not have stored a status yet
+        return self.status_store.get(job_id) or {
+            "batch_id" if job_id == job.job_id and job.members else "model_id": job_id,
+            "status": "processing",
+            "message": "Cancelling..."
+        }
+    
+    def cancel_dropped(self) -> int:
+        """Record jobs whose futures were cancelled before they ran, such as on shutdown, as cancelled"""
+        dropped = [job for job in self.jobs.handles() if job.future is not None and job.future.cancelled()]
+        for job in dropped:
+            self.cancel(job.job_id)
+        return len(dropped)
+    
+    def _stage(self, job: JobHandle, job_id: str, message: str):
+        """Enter a pipeline stage, unless the job has been cancelled or run out of time"""
+        job.check()
+        self._update_status(job_id, message=message)
+    
+    def _charge_tokens(self, db_session: Any, user_id: str, amount: int, description: str):
+        """Deduct tokens from a user in a single transaction"""
+        from app.db import crud
+        
+        # Check if user has enough tokens
+        user = crud.get_user(db_session, user_id)
+        if user and user.token_balance < amount:
+            raise ValueError(f"Insufficient tokens. Required: {amount}, Available: {user.token_balance}")
+        
+        # Deduct tokens
+        crud.create_token_transaction(db_session, {
+            "user_id": user_id,
+            "amount": -amount,
+            "description": description
+        })
+    
+    def _observe(self, job: str, timer: StageTimer, model_type: str, animation_type: Optional[str], status: str):
+        """Export the stage timings of a finished job"""
+        model_type = _metric_label(model_type, MODEL_TYPE_LABELS)
+        animation_type = _metric_label(animation_type, ANIMATION_TYPE_LABELS)
+        for stage, seconds in timer.timings.items():
+            STAGE_SECONDS.observe(seconds, job=job, stage=stage, model_type=model_type, animation_type=animation_type)
+        JOB_SECONDS.observe(timer.elapsed, job=job, model_type=model_type, animation_type=animation_type, status=status)
+    
+    def _save_model(self, model_id: str, bbmodel: Dict[str, Any], timer: StageTimer):
+        """Serialize and store a model and its LODs, timing each step"""
+        with timer.stage("serialize"):
+            data = serializer.dumps(bbmodel, pretty=settings.MODEL_PRETTY_JSON)
+        with timer.stage("write"):
+            self.storage.save_bytes(model_id, data, pretty=settings.MODEL_PRETTY_JSON)
+        # LODs are simplified from the elements just built, never regenerated
+        if settings.LOD_GENERATION:
+            with timer.stage("lod"):
+                store_lods(self.storage, model_id, bbmodel, parse_lod_levels(settings.LOD_LEVELS))
+        else:
+            # Copies built on demand from the previous version are stale now
+            self.storage.delete_lods(model_id)
+    
+    def _refund_tokens(self, db_session: Any, user_id: str, amount: int, description: str):
+        """Give back tokens charged for a job that was stopped before it finished"""
+        from app.db import crud
+        
+        crud.create_token_transaction(db_session, {
+            "user_id": user_id,
+            "amount": amount,
+            "description": description
+        })
+    
+    def _output_options(self, optimize: bool = False) -> Dict[str, Any]:
+        """Request options and settings that change generated output, for cache keys"""
+        options = {}
+        if optimize:
+            options["optimize"] = True
+        if settings.ANIMATION_BAKE_FPS > 0:
+            options["bake_fps"] = settings.ANIMATION_BAKE_FPS
+            options["interpolation"] = settings.ANIMATION_INTERPOLATION
+        if settings.ANIMATION_SIMPLIFY:
+            options["simplify"] = self._animation_tolerances()
+        if settings.UV_PACKING:
+            options["uv"] = (settings.UV_TEXEL_DENSITY, settings.UV_PADDING)
+        if settings.TEXTURE_GENERATION:
+            options["texture"] = (TEXTURE_VERSION, settings.TEXTURE_EMBED)
+        backend = self.backend.cache_tag()
+        if backend:
+            options["backend"] = backend
+        return options
+    
+    def _animation_tolerances(self) -> Dict[str, float]:
+        return {
+            "rotation": settings.ANIMATION_ROTATION_TOLERANCE,
+            "position": settings.ANIMATION_POSITION_TOLERANCE,
+            "scale": settings.ANIMATION_SCALE_TOLERANCE
+        }
+    
+    def _generate_cached_content(
+        self,
+        cache_key: str,
+        model_type: str,
+        animation_type: Optional[str],
+        seed: Optional[Any],
+        variant: int = 0,
+        optimize: bool = False,
+        prompt: str = "",
+        hints: Optional[Dict[str, Any]] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Dict[str, Any]:
+        """Generate content for a cache miss and remember the result"""
+        # Without an explicit seed, derive one from the request so that the
+        # cached result is exactly what a rerun would produce
+        if seed is None:
+            seed = cache_key
+        elif variant:
+            seed = f"{seed}:{variant}"
+        
+        timer = timer or StageTimer()
+        bbmodel = self._generate_model_content(model_type, animation_type, seed, variant, optimize, prompt, hints, timer)
+        with timer.stage("serialize"):
+            data = serializer.dumps(bbmodel)
+        self.result_cache.put(cache_key, data)
+        return bbmodel
+    
+    def generate_model(
         self,
         prompt: str,
         model_id: str,
         model_type: str = "character",
         animation_type: Optional[str] = None,
         user_id: str = None,
-        db_session = None,
-        token_cost: int = 1
+        db_session_factory: Optional[Callable[[], Any]] = None,
+        token_cost: int = 1,
+        seed: Optional[int] = None,
+        optimize: bool = False
     ):
-        """Generate a bbmodel based on the prompt"""
+        """Generate a bbmodel based on the prompt
+        
+        This is a blocking call and is meant to run inside the generation
+        executor, never directly on the event loop.
+        """
         # Update status to processing
-        MODEL_STATUS[model_id] = {
+        self._set_status(model_id, {
             "model_id": model_id,
             "status": "processing",
             "message": "Starting model generation...",
             "token_cost": token_cost
-        }
+        })
+        
+        # Worker threads get their own session; request sessions are closed
+        # as soon as the response has been sent
+        db_session = db_session_factory() if db_session_factory else None
+        job = self.jobs.start(model_id)
+        timer = StageTimer()
+        outcome = "failed"
+        charged = 0
         
         try:
+            job.check()
+            
             # If we have a database session, deduct tokens from user
             if db_session and user_id:
-                from app.db import crud
-                
-                # Check if user has enough tokens
-                user = crud.get_user(db_session, user_id)
-                if user and user.token_balance < token_cost:
-                    raise ValueError(f"Insufficient tokens. Required: {token_cost}, Available: {user.token_balance}")
-                
-                # Deduct tokens
-                crud.create_token_transaction(db_session, {
-                    "user_id": user_id,
-                    "amount": -token_cost,
-                    "description": f"Generated model: {prompt[:30]}..."
-                })
+                with timer.stage("db"):
+                    self._charge_tokens(db_session, user_id, token_cost, f"Generated model: {prompt[:30]}...")
+                charged = token_cost
             
-            # Simulate processing time
-            MODEL_STATUS[model_id]["message"] = "Analyzing prompt..."
-            time.sleep(1)
+            # Identical requests reuse the stored result of the first one
+            with timer.stage("cache"):
+                cache_key = generation_key(
+                    prompt, model_type, animation_type, GENERATOR_VERSION, seed, **self._output_options(optimize)
+                )
+                cached = self.result_cache.get(cache_key)
             
-            MODEL_STATUS[model_id]["message"] = "Generating 3D structure..."
-            time.sleep(2)
-            
-            MODEL_STATUS[model_id]["message"] = "Creating textures..."
-            time.sleep(1)
-            
-            if animation_type:
-                MODEL_STATUS[model_id]["message"] = f"Adding {animation_type} animations..."
-                time.sleep(1)
+            if cached is not None:
+                with timer.stage("serialize"):
+                    bbmodel = serializer.loads(cached)
+            else:
+                # Memoized, so content generation below reuses the result
+                self._stage(job, model_id, "Analyzing prompt...")
+                with timer.stage("analyze"):
+                    analyze_prompt(prompt)
+                
+                self._stage(job, model_id, "Generating 3D structure...")
+                with timer.stage("structure"):
+                    hints = self.backend.infer(prompt, model_type, seed)
+                
+                # Stand-in inference time, kept apart from the real texture and animation work
+                self._stage(job, model_id, "Creating textures...")
+                with timer.stage("inference"):
+                    self._simulate_work(1, job)
+                
+                if animation_type:
+                    self._stage(job, model_id, f"Adding {animation_type} animations...")
+                    with timer.stage("inference"):
+                        self._simulate_work(1, job)
+                
+                job.check()
+                bbmodel = self._generate_cached_content(
+                    cache_key, model_type, animation_type, seed, optimize=optimize, prompt=prompt, hints=hints,
+                    timer=timer
+                )
             
-            # Generate a mock bbmodel file
-            bbmodel = self._generate_mock_bbmodel(prompt, model_type, animation_type, user_id)
+            bbmodel = self._attach_metadata(bbmodel, prompt, model_type, animation_type, user_id)
             
-            # Save the bbmodel file
-            model_path = os.path.join(settings.MODELS_DIR, f"{model_id}.bbmodel")
-            with open(model_path, "w") as f:
-                json.dump(bbmodel, f, indent=2)
+            # Save the bbmodel file; past this point the job always completes
+            job.check()
+            self._save_model(model_id, bbmodel, timer)
+            with timer.stage("preview"):
+                preview_url = self._save_preview(model_id, bbmodel)
+                animated_preview_url = self._queue_animated_previews(model_id, bbmodel)
             
             # Update status to completed
-            preview_url = f"/static/models/{model_id}_preview.png"
-            MODEL_STATUS[model_id] = {
+            outcome = "completed"
+            self._set_status(model_id, {
                 "model_id": model_id,
                 "status": "completed",
                 "message": "Model generation completed successfully",
                 "preview_url": preview_url,
+                "animated_preview_url": animated_preview_url,
                 "download_url": f"/api/models/{model_id}/download",
-                "token_cost": token_cost
-            }
+                "token_cost": token_cost,
+                "cache_hit": cached is not None,
+                "timings": timer.rounded()
+            })
             
+        except JobCancelled as e:
+            outcome = e.reason
+            if charged:
+                with timer.stage("db"):
+                    self._refund_tokens(db_session, user_id, charged, f"Refund for model {model_id[:8]}: {e}")
+            self._set_status(model_id, {
+                "model_id": model_id,
+                "status": e.reason,
+                "message": f"Model generation {e}",
+                "token_cost": 0,
+                "refunded": charged,
+                "timings": timer.rounded()
+            })
         except Exception as e:
             # Update status to failed
-            MODEL_STATUS[model_id] = {
+            self._set_status(model_id, {
                 "model_id": model_id,
                 "status": "failed",
                 "message": f"Model generation failed: {str(e)}",
+                "token_cost": token_cost,
+                "timings": timer.rounded()
+            })
+        finally:
+            self._observe("generate", timer, model_type, animation_type, outcome)
+            self.jobs.discard(model_id, job)
+            if db_session is not None:
+                db_session.close()
+    
+    def generate_batch(
+        self,
+        batch_id: str,
+        variants: List[Dict[str, Any]],
+        model_type: str = "character",
+        animation_type: Optional[str] = None,
+        user_id: str = None,
+        db_session_factory: Optional[Callable[[], Any]] = None,
+        token_cost: int = 1,
+        seed: Optional[int] = None,
+        optimize: bool = False
+    ):
+        """Generate several variants in one job
+        
+        Each variant is a dict with `model_id`, `prompt` and `variant` (its
+        index among the variants of that prompt), and optionally its own
+        `model_type` and `animation_type` when "auto" resolved differently
+        per prompt; otherwise the batch-wide types apply. Tokens for the
+        whole batch are charged in one transaction, prompt analysis runs once
+        per distinct prompt and the structure stages run once for the batch.
+        """
+        model_ids = [variant["model_id"] for variant in variants]
+        types = [
+            (variant.get("model_type", model_type), variant.get("animation_type", animation_type))
+            for variant in variants
+        ]
+        total_cost = token_cost * len(variants)
+        self._set_status(batch_id, {
+            "batch_id": batch_id,
+            "status": "processing",
+            "message": "Starting batch generation...",
+            "model_ids": model_ids,
+            "total": len(variants),
+            "completed": 0,
+            "failed": 0,
+            "token_cost": total_cost
+        })
+        for model_id in model_ids:
+            self._set_status(model_id, {
+                "model_id": model_id,
+                "batch_id": batch_id,
+                "status": "processing",
+                "message": "Queued in batch...",
                 "token_cost": token_cost
-            }
+            })
+        
+        db_session = db_session_factory() if db_session_factory else None
+        job = self.jobs.start(batch_id)
+        # Shared stages and the per-variant ones of the whole batch, summed
+        timer = StageTimer()
+        charged = False
+        completed = 0
+        failed = 0
+        
+        try:
+            job.check()
+            if db_session and user_id:
+                with timer.stage("db"):
+                    self._charge_tokens(
+                        db_session,
+                        user_id,
+                        total_cost,
+                        f"Generated batch of {len(variants)} models: {variants[0]['prompt'][:30]}..."
+                    )
+                charged = True
+            
+            # Look everything up first so cached variants skip the stages entirely
+            with timer.stage("cache"):
+                keys = []
+                for variant, (variant_model_type, variant_animation_type) in zip(variants, types):
+                    options = self._output_options(optimize)
+                    if variant["variant"]:
+                        options["variant"] = variant["variant"]
+                    keys.append(generation_key(
+                        variant["prompt"], variant_model_type, variant_animation_type, GENERATOR_VERSION, seed,
+                        **options
+                    ))
+                cached = [self.result_cache.get(key) for key in keys]
+            pending = [
+                (variant["prompt"], variant_types)
+                for variant, variant_types, data in zip(variants, types, cached) if data is None
+            ]
+            
+            hints = {}
+            if pending:
+                prompts = sorted({prompt for prompt, _ in pending})
+                self._stage(job, batch_id, f"Analyzing {len(prompts)} prompt(s)...")
+                with timer.stage("analyze"):
+                    for prompt in prompts:
+                        analyze_prompt(prompt)
+                
+                # One batched backend call covers every distinct prompt of a model type
+                self._stage(job, batch_id, "Generating 3D structure...")
+                with timer.stage("structure"):
+                    for structure_type in sorted({pending_types[0] for _, pending_types in pending}):
+                        type_prompts = sorted({
+                            prompt for prompt, pending_types in pending if pending_types[0] == structure_type
+                        })
+                        results = self.backend.infer_batch(type_prompts, structure_type, seed)
+                        hints.update(((prompt, structure_type), result) for prompt, result in zip(type_prompts, results))
+                
+                # Stand-in inference time, kept apart from the real texture and animation work
+                self._stage(job, batch_id, "Creating textures...")
+                with timer.stage("inference"):
+                    self._simulate_work(1, job)
+                
+                animation_types = sorted({pending_types[1] for _, pending_types in pending if pending_types[1]})
+                if animation_types:
+                    self._stage(job, batch_id, f"Adding {', '.join(animation_types)} animations...")
+                    with timer.stage("inference"):
+                        self._simulate_work(1, job)
+            
+            for variant, (variant_model_type, variant_animation_type), key, data in zip(variants, types, keys, cached):
+                model_id = variant["model_id"]
+                job.check()
+                try:
+                    if data is not None:
+                        with timer.stage("serialize"):
+                            bbmodel = serializer.loads(data)
+                    else:
+                        bbmodel = self._generate_cached_content(
+                            key, variant_model_type, variant_animation_type, seed, variant["variant"], optimize,
+                            variant["prompt"], hints.get((variant["prompt"], variant_model_type)), timer
+                        )
+                    bbmodel = self._attach_metadata(
+                        bbmodel, variant["prompt"], variant_model_type, variant_animation_type, user_id
+                    )
+                    bbmodel["metadata"]["batch_id"] = batch_id
+                    bbmodel["metadata"]["variant"] = variant["variant"]
+                    self._save_model(model_id, bbmodel, timer)
+                    with timer.stage("preview"):
+                        preview_url = self._save_preview(model_id, bbmodel)
+                        animated_preview_url = self._queue_animated_previews(model_id, bbmodel)
+                    
+                    self._set_status(model_id, {
+                        "model_id": model_id,
+                        "batch_id": batch_id,
+                        "status": "completed",
+                        "message": "Model generation completed successfully",
+                        "preview_url": preview_url,
+                        "animated_preview_url": animated_preview_url,
+                        "download_url": f"/api/models/{model_id}/download",
+                        "token_cost": token_cost,
+                        "cache_hit": data is not None
+                    })
+                    completed += 1
+                except Exception as e:
+                    self._set_status(model_id, {
+                        "model_id": model_id,
+                        "batch_id": batch_id,
+                        "status": "failed",
+                        "message": f"Model generation failed: {str(e)}",
+                        "token_cost": token_cost
+                    })
+                    failed += 1
+                
+                self._update_status(batch_id, completed=completed, failed=failed)
+            
+            self._update_status(
+                batch_id,
+                status="completed" if completed else "failed",
+                message=f"Batch finished: {completed} completed, {failed} failed",
+                timings=timer.rounded()
+            )
+            
+        except JobCancelled as e:
+            # Variants that were already stored keep their tokens
+            unfinished = len(variants) - completed - failed
+            refund = token_cost * unfinished if charged else 0
+            if refund:
+                with timer.stage("db"):
+                    self._refund_tokens(db_session, user_id, refund, f"Refund for batch {batch_id[:8]}: {e}")
+            message = f"Model generation {e}"
+            for model_id in model_ids[completed + failed:]:
+                self._set_status(model_id, {
+                    "model_id": model_id,
+                    "batch_id": batch_id,
+                    "status": e.reason,
+                    "message": message,
+                    "token_cost": 0,
+                    "refunded": token_cost if charged else 0
+                })
+            self._update_status(batch_id, status=e.reason, message=message, refunded=refund, timings=timer.rounded())
+        except Exception as e:
+            message = f"Model generation failed: {str(e)}"
+            for model_id in model_ids:
+                self._update_status(model_id, status="failed", message=message)
+            self._update_status(
+                batch_id, status="failed", message=message, failed=len(variants), timings=timer.rounded()
+            )
+        finally:
+            status = self.status_store.get(batch_id) or {}
+            # Label with the resolved types when every variant shares them
+            label_model_type, label_animation_type = types[0] if len(set(types)) == 1 else (model_type, animation_type)
+            self._observe("batch", timer, label_model_type, label_animation_type, status.get("status", "failed"))
+            self.jobs.discard(batch_id, job)
+            if db_session is not None:
+                db_session.close()
+    
+    def edit_model(
+        self,
+        model_id: str,
+        aspect: str,
+        prompt: Optional[str] = None,
+        animation_type: Optional[str] = None,
+        group: Optional[str] = None,
+        user_id: str = None,
+        db_session_factory: Optional[Callable[[], Any]] = None,
+        token_cost: int = 1,
+        seed: Optional[int] = None
+    ):
+        """Regenerate one aspect of a stored model and rewrite it
+        
+        Only the stage of the edited aspect runs, and previews are only
+        re-rendered when what they show changed. Like generate_model this is
+        blocking and meant for the generation executor.
+        """
+        self._set_status(model_id, {
+            "model_id": model_id,
+            "status": "processing",
+            "message": f"Starting {aspect} edit...",
+            "token_cost": token_cost
+        })
+        
+        db_session = db_session_factory() if db_session_factory else None
+        job = self.jobs.start(model_id)
+        timer = StageTimer()
+        outcome = "failed"
+        model_type = None
+        charged = 0
+        
+        try:
+            job.check()
+            with timer.stage("read"):
+                bbmodel = self.storage.load(model_id)
+            if bbmodel is None:
+                raise ValueError("Model file not found")
+            model_type = bbmodel.get("metadata", {}).get("model_type")
+            
+            if db_session and user_id and token_cost:
+                with timer.stage("db"):
+                    self._charge_tokens(db_session, user_id, token_cost, f"Edited {aspect} of model {model_id[:8]}")
+                charged = token_cost
+            
+            self._stage(job, model_id, f"Regenerating {aspect}...")
+            with timer.stage("inference"):
+                self._simulate_work(1, job)
+            with timer.stage(EDIT_STAGES.get(aspect, aspect)):
+                changed = self._edit_model_content(bbmodel, aspect, prompt, animation_type, group, seed)
+            job.check()
+            
+            # The job status was replaced when the edit started, so ask storage what exists
+            preview_url, animated_preview_url = self._existing_preview_urls(model_id, bbmodel)
+            if changed:
+                bbmodel["metadata"]["updated_at"] = datetime.now().isoformat()
+                self._save_model(model_id, bbmodel, timer)
+                # Animations do not show on the still preview, textures do not move
+                with timer.stage("preview"):
+                    if "elements" in changed or "textures" in changed:
+                        preview_url = self._save_preview(model_id, bbmodel)
+                    if "elements" in changed or "animations" in changed:
+                        animated_preview_url = self._queue_animated_previews(model_id, bbmodel)
+            
+            outcome = "completed"
+            
+            self._set_status(model_id, {
+                "model_id": model_id,
+                "status": "completed",
+                "message": f"Regenerated {aspect}" if changed else f"{aspect.capitalize()} unchanged",
+                "preview_url": preview_url,
+                "animated_preview_url": animated_preview_url,
+                "download_url": f"/api/models/{model_id}/download",
+                "token_cost": token_cost,
+                "changed": changed,
+                "timings": timer.rounded()
+            })
+            
+        except JobCancelled as e:
+            outcome = e.reason
+            if charged:
+                with timer.stage("db"):
+                    self._refund_tokens(
+                        db_session, user_id, charged, f"Refund for edit of model {model_id[:8]}: {e}"
+                    )
+            # The stored model was not touched, so its previews are still current
+            preview_url, animated_preview_url = self._existing_preview_urls(model_id, self.storage.load(model_id) or {})
+            self._set_status(model_id, {
+                "model_id": model_id,
+                "status": e.reason,
+                "message": f"Model edit {e}",
+                "preview_url": preview_url,
+                "animated_preview_url": animated_preview_url,
+                "download_url": f"/api/models/{model_id}/download",
+                "token_cost": 0,
+                "refunded": charged,
+                "timings": timer.rounded()
+            })
+        except Exception as e:
+            self._set_status(model_id, {
+                "model_id": model_id,
+                "status": "failed",
+                "message": f"Model edit failed: {str(e)}",
+                "token_cost": token_cost,
+                "timings": timer.rounded()
+            })
+        finally:
+            self._observe("edit", timer, model_type or "unknown", animation_type, outcome)
+            self.jobs.discard(model_id, job)
+            if db_session is not None:
+                db_session.close()
+    
+    def _save_preview(self, model_id: str, bbmodel: Dict[str, Any]) -> Optional[str]:
+        """Render and store a model's thumbnail, returning its URL
+        
+        A failed preview never fails the generation; the preview endpoint
+        can still render it later.
+        """
+        if not settings.PREVIEW_RENDERING:
+            return None
+        try:
+            self.storage.save_preview(model_id, self.renderer.render(bbmodel))
+        except Exception:
+            logger.exception("Preview rendering failed for model %s", model_id)
+            return None
+        return self._preview_url(model_id)
+    
+    def _preview_url(self, model_id: str) -> str:
+        return f"/static/models/{model_id}_preview.png"
+    
+    def _animated_preview_url(self, model_id: str) -> str:
+        return f"/api/models/{model_id}/preview/animated"
+    
+    def _existing_preview_urls(self, model_id: str, bbmodel: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """URLs of the previews a stored model already has: (thumbnail, animated)"""
+        preview_url = self._preview_url(model_id) if os.path.exists(self.storage.preview_path(model_id)) else None
+        animated_preview_url = None
+        if settings.ANIMATED_PREVIEWS and bbmodel.get("animations"):
+            animated_preview_url = self._animated_preview_url(model_id)
+        return preview_url, animated_preview_url
+    
+    def _queue_animated_previews(self, model_id: str, bbmodel: Dict[str, Any]) -> Optional[str]:
+        """Hand a model's animations to the render pool, returning the animated preview URL
+        
+        Rendering happens after the job completes; the preview endpoint
+        serves the file once it exists and renders it itself otherwise.
+        """
+        if not settings.ANIMATED_PREVIEWS or not bbmodel.get("animations"):
+            return None
+        for animation in bbmodel["animations"]:
+            try:
+                self.render_pool.submit(self.animated_renderer.render, bbmodel, animation.get("name"))
+            except QueueFullError:
+                logger.warning("Render queue full, skipping animated previews of model %s", model_id)
+                break
+        return self._animated_preview_url(model_id)
+    
+    def _simulate_work(self, units: float, job: Optional[JobHandle] = None):
+        """Stand-in for the model inference time of a pipeline stage"""
+        delay = units * settings.GENERATION_STAGE_DELAY
+        if delay > 0:
+            if job is not None:
+                # Wakes up early when the job is cancelled or runs out of time
+                job.sleep(delay)
+            else:
+                time.sleep(delay)
     
     def _generate_mock_bbmodel(
         self,
         prompt: str,
         model_type: str,
         animation_type: Optional[str],
-        user_id: str
+        user_id: str,
+        seed: Optional[Any] = None
     ) -> Dict[str, Any]:
         """Generate a mock bbmodel file for demonstration purposes"""
+        bbmodel = self._generate_model_content(model_type, animation_type, seed, prompt=prompt)
+        return self._attach_metadata(bbmodel, prompt, model_type, animation_type, user_id)
+    
+    def _generate_model_content(
+        self,
+        model_type: str,
+        animation_type: Optional[str],
+        seed: Optional[Any] = None,
+        variant: int = 0,
+        optimize: bool = False,
+        prompt: str = "",
+        hints: Optional[Dict[str, Any]] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Dict[str, Any]:
+        """Generate the request-independent part of a bbmodel
+        
+        With a seed, every UUID is derived from it and the result is fully
+        deterministic, which is what makes it safe to cache. Variants other
+        than 0 get proportions jittered by the seed, and `optimize` merges
+        cubes and culls hidden faces before serialization. The prompt picks
+        the archetype when `model_type` is "auto" or has no template, the
+        animation when `animation_type` is "auto", the size and the palette.
+        `hints` from the generator backend may adjust the proportions.
+        `timer` accumulates the time spent in each stage.
+        """
+        timer = timer or StageTimer()
+        uuid_factory = SeededUUIDs(seed) if seed is not None else batch_uuid4
+        with timer.stage("analyze"):
+            features = analyze_prompt(prompt)
+            model_type = resolve_archetype(model_type, features, archetype_registry.templates)
+            animation_type = resolve_animation(animation_type, features)
         
         # Create a basic structure based on model_type
-        if model_type == "character":
-            elements = self._generate_character_elements()
-        elif model_type == "animal":
-            elements = self._generate_animal_elements()
-        elif model_type == "vehicle":
-            elements = self._generate_vehicle_elements()
-        else:
-            elements = self._generate_basic_elements()
+        with timer.stage("structure"):
+            cubes = self._generate_geometry(model_type, uuid_factory)
+            if features.size != 1:
+                self._scale_on_ground(cubes, features.size)
+            if hints and hints.get("proportions"):
+                self._scale_on_ground(cubes, hints["proportions"])
+            if variant:
+                self._apply_variation(cubes, random.Random(f"{seed}:{variant}"))
         
-        # Add animations if requested
+        # Add animations if requested; they only need element names and UUIDs
         animations = []
         if animation_type:
-            animations = self._generate_animations(elements, animation_type)
+            with timer.stage("animations"):
+                animations = self._generate_animations(cubes.outliner(), animation_type, uuid_factory)
+        
+        content_metadata = {"archetype": model_type, "prompt_features": features.to_dict()}
+        with timer.stage("structure"):
+            if optimize:
+                # Animated cubes move, so they are neither merged nor used to hide faces
+                locked = {target for animation in animations for target in animation["animators"]}
+                cubes, content_metadata["geometry_optimization"] = optimize_geometry(
+                    cubes, locked, uvs_repacked=settings.UV_PACKING
+                )
+            
+            # Lay out face UVs for the final geometry
+            resolution = (64, 64)
+            if settings.UV_PACKING:
+                resolution = pack_uvs(cubes, settings.UV_TEXEL_DENSITY, settings.UV_PADDING)
+        
+        # Paint the atlas; identical palettes and layouts share one PNG
+        textures = []
+        if settings.TEXTURE_GENERATION:
+            with timer.stage("textures"):
+                key, png = self.textures.generate(cubes, palette_from_prompt(prompt, model_type), resolution)
+                self.textures.save(key, png)
+                textures.append(self.textures.texture_entry(key, png, uuid_factory(1)[0], settings.TEXTURE_EMBED))
+                content_metadata["texture_url"] = texture_url(key)
+        with timer.stage("structure"):
+            elements = cubes.to_elements()
+        
+        # Drop redundant keyframes and keep a report of what that saved
+        reports = []
+        if animations:
+            with timer.stage("animations"):
+                animations, reports = self._simplify_animations(animations)
+        if reports:
+            content_metadata["animation_reduction"] = reports
         
         # Create the bbmodel structure
         bbmodel = {
@@ -138,357 +861,231 @@ class ModelGenerator:
                 "model_format": "free",
                 "box_uv": False
             },
-            "name": f"AI Generated: {prompt[:20]}",
+            "name": "",
             "geometry_name": "",
             "visible_box": [1, 1, 0],
             "variable_placeholders": "",
             "resolution": {
-                "width": 64,
-                "height": 64
+                "width": resolution[0],
+                "height": resolution[1]
             },
             "elements": elements,
-            "outliner": self._generate_outliner(elements),
-            "animations": animations,
-            "metadata": {
-                "prompt": prompt,
-                "model_type": model_type,
-                "animation_type": animation_type,
-                "user_id": user_id,
-                "created_at": datetime.now().isoformat(),
-                "generator": "AI-Powered bbmodel Generator"
-            }
+            "outliner": cubes.outliner(),
+            "textures": textures,
+            "animations": animations
         }
-        
+        bbmodel["metadata"] = content_metadata
         return bbmodel
     
-    def _generate_character_elements(self) -> List[Dict[str, Any]]:
-        """Generate elements for a character model"""
-        elements = []
-        
-        # Head
-        head_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "head",
-            "uuid": head_uuid,
-            "type": "cube",
-            "from": [-4, 24, -4],
-            "to": [4, 32, 4],
-            "autouv": 1,
-            "color": 0,
-            "origin": [0, 24, 0],
-            "faces": {
-                "north": {"uv": [0, 0, 8, 8], "texture": 0},
-                "east": {"uv": [8, 0, 16, 8], "texture": 0},
-                "south": {"uv": [16, 0, 24, 8], "texture": 0},
-                "west": {"uv": [24, 0, 32, 8], "texture": 0},
-                "up": {"uv": [8, 0, 16, 8], "texture": 0},
-                "down": {"uv": [16, 0, 24, 8], "texture": 0}
-            }
-        })
+    def _simplify_animations(self, animations: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Simplify animations if enabled, returning them with a reduction report per animation"""
+        if not animations or not settings.ANIMATION_SIMPLIFY:
+            return animations, []
+        tolerances = self._animation_tolerances()
+        simplified = [
+            simplify_animation(animation, tolerances, settings.ANIMATION_INTERPOLATION)
+            for animation in animations
+        ]
+        return [animation for animation, _ in simplified], [report for _, report in simplified]
+    
+    def _attach_metadata(
+        self,
+        bbmodel: Dict[str, Any],
+        prompt: str,
+        model_type: str,
+        animation_type: Optional[str],
+        user_id: str
+    ) -> Dict[str, Any]:
+        """Fill in the per-request name and metadata of a generated bbmodel"""
+        bbmodel["name"] = f"AI Generated: {prompt[:20]}"
+        # Content-level metadata (such as animation reports) is kept
+        bbmodel["metadata"] = {
+            **bbmodel.get("metadata", {}),
+            "prompt": prompt,
+            "model_type": model_type,
+            "animation_type": animation_type,
+            "user_id": user_id,
+            "created_at": datetime.now().isoformat(),
+            "generator": "AI-Powered bbmodel Generator",
+            "generator_version": GENERATOR_VERSION
+        }
+        return bbmodel
+    
+    def _generate_geometry(self, model_type: str, uuid_factory: UUIDFactory = batch_uuid4) -> CubeArray:
+        """Instantiate the archetype template for a model type"""
+        return archetype_registry.instantiate(model_type, uuid_factory)
+    
+    def _apply_variation(self, cubes: CubeArray, rng: random.Random):
+        """Stretch a model along each axis while keeping it on the ground"""
+        self._scale_on_ground(cubes, [rng.uniform(*VARIANT_SCALE_RANGE) for _ in range(3)])
+    
+    def _scale_on_ground(self, cubes: CubeArray, factor: Any):
+        """Scale a model about the centre of its base, snapped to the variant grid"""
+        low, high = cubes.bounds()
+        pivot = ((low[0] + high[0]) / 2, low[1], (low[2] + high[2]) / 2)
+        cubes.scale(factor, pivot).snap(VARIANT_GRID)
+    
+    def _edit_model_content(
+        self,
+        bbmodel: Dict[str, Any],
+        aspect: str,
+        prompt: Optional[str] = None,
+        animation_type: Optional[str] = None,
+        group: Optional[str] = None,
+        seed: Optional[Any] = None
+    ) -> List[str]:
+        """Regenerate one aspect of a bbmodel in place, returning the aspects that changed
         
-        # Body
-        body_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "body",
-            "uuid": body_uuid,
-            "type": "cube",
-            "from": [-4, 12, -2],
-            "to": [4, 24, 2],
-            "autouv": 1,
-            "color": 1,
-            "origin": [0, 12, 0],
-            "faces": {
-                "north": {"uv": [0, 8, 8, 20], "texture": 0},
-                "east": {"uv": [8, 8, 12, 20], "texture": 0},
-                "south": {"uv": [12, 8, 20, 20], "texture": 0},
-                "west": {"uv": [20, 8, 24, 20], "texture": 0},
-                "up": {"uv": [8, 8, 16, 12], "texture": 0},
-                "down": {"uv": [16, 8, 24, 12], "texture": 0}
-            }
-        })
+        Everything else is kept as stored. Rebuilding an element group also
+        repacks the UVs, so it repaints the texture as well.
+        """
+        if aspect not in EDIT_ASPECTS:
+            raise ValueError(f"Unknown aspect: {aspect}")
+        uuid_factory = SeededUUIDs(seed) if seed is not None else batch_uuid4
+        metadata = bbmodel.setdefault("metadata", {})
+        prompt = prompt or metadata.get("prompt", "")
+        features = analyze_prompt(prompt)
+        archetype = metadata.get("archetype") or resolve_archetype(
+            metadata.get("model_type"), features, archetype_registry.templates
+        )
         
-        # Left Arm
-        left_arm_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "left_arm",
-            "uuid": left_arm_uuid,
-            "type": "cube",
-            "from": [4, 12, -2],
-            "to": [8, 24, 2],
-            "autouv": 1,
-            "color": 2,
-            "origin": [4, 22, 0],
-            "faces": {
-                "north": {"uv": [32, 0, 36, 12], "texture": 0},
-                "east": {"uv": [36, 0, 40, 12], "texture": 0},
-                "south": {"uv": [40, 0, 44, 12], "texture": 0},
-                "west": {"uv": [44, 0, 48, 12], "texture": 0},
-                "up": {"uv": [32, 0, 36, 4], "texture": 0},
-                "down": {"uv": [36, 0, 40, 4], "texture": 0}
-            }
-        })
+        if aspect == "animations":
+            changed = self._edit_animations(bbmodel, resolve_animation(animation_type, features), uuid_factory)
+            return ["animations"] if changed else []
         
-        # Right Arm
-        right_arm_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "right_arm",
-            "uuid": right_arm_uuid,
-            "type": "cube",
-            "from": [-8, 12, -2],
-            "to": [-4, 24, 2],
-            "autouv": 1,
-            "color": 3,
-            "origin": [-4, 22, 0],
-            "faces": {
-                "north": {"uv": [48, 0, 52, 12], "texture": 0},
-                "east": {"uv": [52, 0, 56, 12], "texture": 0},
-                "south": {"uv": [56, 0, 60, 12], "texture": 0},
-                "west": {"uv": [60, 0, 64, 12], "texture": 0},
-                "up": {"uv": [48, 0, 52, 4], "texture": 0},
-                "down": {"uv": [52, 0, 56, 4], "texture": 0}
-            }
-        })
+        changed = []
+        if aspect == "elements":
+            variation = random.Random(f"{seed}:{group}") if seed is not None else None
+            self._edit_element_group(bbmodel, archetype, group, features.size, variation, uuid_factory)
+            changed.append("elements")
+        if settings.TEXTURE_GENERATION and (aspect == "textures" or bbmodel.get("textures")):
+            if self._edit_textures(bbmodel, prompt, archetype, uuid_factory):
+                changed.append("textures")
+        return changed
+    
+    def _edit_animations(
+        self,
+        bbmodel: Dict[str, Any],
+        animation_type: Optional[str],
+        uuid_factory: UUIDFactory = batch_uuid4
+    ) -> bool:
+        """Replace a bbmodel's animations with freshly generated ones (none without a type)"""
+        animations = []
+        if animation_type:
+            animations = self._generate_animations(
+                self._generate_outliner(bbmodel.get("elements", [])), animation_type, uuid_factory
+            )
+        animations, reports = self._simplify_animations(animations)
         
-        # Left Leg
-        left_leg_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "left_leg",
-            "uuid": left_leg_uuid,
-            "type": "cube",
-            "from": [0, 0, -2],
-            "to": [4, 12, 2],
-            "autouv": 1,
-            "color": 4,
-            "origin": [0, 12, 0],
-            "faces": {
-                "north": {"uv": [0, 20, 4, 32], "texture": 0},
-                "east": {"uv": [4, 20, 8, 32], "texture": 0},
-                "south": {"uv": [8, 20, 12, 32], "texture": 0},
-                "west": {"uv": [12, 20, 16, 32], "texture": 0},
-                "up": {"uv": [0, 20, 4, 24], "texture": 0},
-                "down": {"uv": [4, 20, 8, 24], "texture": 0}
-            }
-        })
+        metadata = bbmodel["metadata"]
+        metadata["animation_type"] = animation_type
+        metadata.pop("animation_reduction", None)
+        if reports:
+            metadata["animation_reduction"] = reports
+        changed = animations != bbmodel.get("animations", [])
+        bbmodel["animations"] = animations
+        return changed
+    
+    def _edit_element_group(
+        self,
+        bbmodel: Dict[str, Any],
+        archetype: str,
+        group: str,
+        size: float = 1.0,
+        variation: Optional[random.Random] = None,
+        uuid_factory: UUIDFactory = batch_uuid4
+    ):
+        """Rebuild the cubes whose name contains `group` from the archetype template
         
-        # Right Leg
-        right_leg_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "right_leg",
-            "uuid": right_leg_uuid,
-            "type": "cube",
-            "from": [-4, 0, -2],
-            "to": [0, 12, 2],
-            "autouv": 1,
-            "color": 5,
-            "origin": [0, 12, 0],
-            "faces": {
-                "north": {"uv": [16, 20, 20, 32], "texture": 0},
-                "east": {"uv": [20, 20, 24, 32], "texture": 0},
-                "south": {"uv": [24, 20, 28, 32], "texture": 0},
-                "west": {"uv": [28, 20, 32, 32], "texture": 0},
-                "up": {"uv": [16, 20, 20, 24], "texture": 0},
-                "down": {"uv": [20, 20, 24, 24], "texture": 0}
-            }
-        })
+        The fresh cubes are fitted to the bounds of the stored ones, so earlier
+        resizing and variation carry over, and keep the UUIDs of same-named
+        cubes so animations still drive them. A size other than 1 and the
+        optional variation then reshape the group on its own.
+        """
+        elements = bbmodel.get("elements", [])
+        cubes = CubeArray.from_elements(elements)
+        stored = np.array([group in name for name in cubes.names], dtype=bool)
+        template = self._generate_geometry(archetype, uuid_factory)
+        fresh = template.select(np.array([group in name for name in template.names], dtype=bool))
+        if not stored.any() or not len(fresh):
+            raise ValueError(f"No element group named {group!r}")
         
-        return elements
-    
-    def _generate_animal_elements(self) -> List[Dict[str, Any]]:
-        """Generate elements for an animal model"""
-        elements = []
-        
-        # Body
-        body_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "body",
-            "uuid": body_uuid,
-            "type": "cube",
-            "from": [-4, 8, -8],
-            "to": [4, 16, 8],
-            "autouv": 1,
-            "color": 0,
-            "origin": [0, 12, 0],
-            "faces": {
-                "north": {"uv": [0, 0, 8, 8], "texture": 0},
-                "east": {"uv": [8, 0, 24, 8], "texture": 0},
-                "south": {"uv": [24, 0, 32, 8], "texture": 0},
-                "west": {"uv": [32, 0, 48, 8], "texture": 0},
-                "up": {"uv": [0, 8, 8, 24], "texture": 0},
-                "down": {"uv": [8, 8, 16, 24], "texture": 0}
-            }
-        })
+        low, high = cubes.select(stored).bounds()
+        fresh_low, fresh_high = fresh.bounds()
+        extent = fresh_high - fresh_low
+        factor = np.where(extent > 0, (high - low) / np.where(extent > 0, extent, 1), 1.0)
+        fresh.scale(factor, fresh_low).translate(low - fresh_low)
+        if size != 1:
+            self._scale_on_ground(fresh, size)
+        if variation is not None:
+            self._apply_variation(fresh, variation)
         
-        # Head
-        head_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "head",
-            "uuid": head_uuid,
-            "type": "cube",
-            "from": [-3, 9, 8],
-            "to": [3, 15, 14],
-            "autouv": 1,
-            "color": 1,
-            "origin": [0, 12, 8],
-            "faces": {
-                "north": {"uv": [16, 8, 22, 14], "texture": 0},
-                "east": {"uv": [22, 8, 28, 14], "texture": 0},
-                "south": {"uv": [28, 8, 34, 14], "texture": 0},
-                "west": {"uv": [34, 8, 40, 14], "texture": 0},
-                "up": {"uv": [16, 14, 22, 20], "texture": 0},
-                "down": {"uv": [22, 14, 28, 20], "texture": 0}
-            }
-        })
+        stored_uuids = {name: cube_uuid for name, cube_uuid, keep in zip(cubes.names, cubes.uuids, stored) if keep}
+        fresh.uuids = [stored_uuids.get(name, cube_uuid) for name, cube_uuid in zip(fresh.names, fresh.uuids)]
+        removed = set(stored_uuids.values()) - set(fresh.uuids)
+        added = [cube_uuid for cube_uuid in fresh.uuids if cube_uuid not in stored_uuids.values()]
         
-        # Legs
-        for i in range(4):
-            x_offset = -3 if i % 2 == 0 else 1
-            z_offset = -6 if i < 2 else 4
-            leg_uuid = str(uuid.uuid4())
-            elements.append({
-                "name": f"leg_{i+1}",
-                "uuid": leg_uuid,
-                "type": "cube",
-                "from": [x_offset, 0, z_offset],
-                "to": [x_offset + 2, 8, z_offset + 2],
-                "autouv": 1,
-                "color": i + 2,
-                "origin": [x_offset + 1, 4, z_offset + 1],
-                "faces": {
-                    "north": {"uv": [40, i*8, 42, i*8+8], "texture": 0},
-                    "east": {"uv": [42, i*8, 44, i*8+8], "texture": 0},
-                    "south": {"uv": [44, i*8, 46, i*8+8], "texture": 0},
-                    "west": {"uv": [46, i*8, 48, i*8+8], "texture": 0},
-                    "up": {"uv": [40, i*8, 42, i*8+2], "texture": 0},
-                    "down": {"uv": [42, i*8, 44, i*8+2], "texture": 0}
-                }
-            })
+        # The group takes the place of its first cube; other elements keep their order
+        first = int(np.flatnonzero(stored)[0])
+        rest = np.flatnonzero(~stored)
+        cubes = CubeArray.concat([cubes.select(rest[rest < first]), fresh, cubes.select(rest[rest > first])])
+        if settings.UV_PACKING:
+            resolution = pack_uvs(cubes, settings.UV_TEXEL_DENSITY, settings.UV_PADDING)
+            bbmodel["resolution"] = {"width": resolution[0], "height": resolution[1]}
+        others = [element for element in elements if element.get("type", "cube") != "cube"]
+        bbmodel["elements"] = cubes.to_elements() + others
         
-        # Tail
-        tail_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "tail",
-            "uuid": tail_uuid,
-            "type": "cube",
-            "from": [-1, 10, -12],
-            "to": [1, 14, -8],
-            "autouv": 1,
-            "color": 6,
-            "origin": [0, 12, -8],
-            "faces": {
-                "north": {"uv": [48, 0, 50, 4], "texture": 0},
-                "east": {"uv": [50, 0, 54, 4], "texture": 0},
-                "south": {"uv": [54, 0, 56, 4], "texture": 0},
-                "west": {"uv": [56, 0, 60, 4], "texture": 0},
-                "up": {"uv": [48, 4, 50, 8], "texture": 0},
-                "down": {"uv": [50, 4, 52, 8], "texture": 0}
+        names = dict(zip(fresh.uuids, fresh.names))
+        bbmodel["outliner"] = [
+            entry for entry in bbmodel.get("outliner", [])
+            if (entry if isinstance(entry, str) else entry.get("uuid")) not in removed
+        ] + [{"uuid": cube_uuid, "name": names[cube_uuid]} for cube_uuid in added]
+        for animation in bbmodel.get("animations", []):
+            animation["animators"] = {
+                target: animator for target, animator in animation.get("animators", {}).items()
+                if target not in removed
             }
-        })
+    
+    def _edit_textures(
+        self,
+        bbmodel: Dict[str, Any],
+        prompt: str,
+        archetype: str,
+        uuid_factory: UUIDFactory = batch_uuid4
+    ) -> bool:
+        """Repaint a bbmodel's atlas for the prompt's palette and its current UVs"""
+        cubes = CubeArray.from_elements(bbmodel.get("elements", []))
+        resolution = bbmodel.get("resolution", {})
+        resolution = (resolution.get("width", 64), resolution.get("height", 64))
+        key, png = self.textures.generate(cubes, palette_from_prompt(prompt, archetype), resolution)
         
-        return elements
+        metadata = bbmodel["metadata"]
+        textures = bbmodel.get("textures") or []
+        if textures and metadata.get("texture_url") == texture_url(key):
+            return False
+        self.textures.save(key, png)
+        # Reuse the texture UUID so references to it stay valid
+        texture_uuid = textures[0].get("uuid") if textures else None
+        entry = self.textures.texture_entry(key, png, texture_uuid or uuid_factory(1)[0], settings.TEXTURE_EMBED)
+        bbmodel["textures"] = [entry] + textures[1:]
+        metadata["texture_url"] = texture_url(key)
+        return True
+    
+    def _generate_character_elements(self) -> List[Dict[str, Any]]:
+        """Generate elements for a character model"""
+        return self._generate_geometry("character").to_elements()
+    
+    def _generate_animal_elements(self) -> List[Dict[str, Any]]:
+        """Generate elements for an animal model"""
+        return self._generate_geometry("animal").to_elements()
     
     def _generate_vehicle_elements(self) -> List[Dict[str, Any]]:
         """Generate elements for a vehicle model"""
-        elements = []
-        
-        # Main body
-        body_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "body",
-            "uuid": body_uuid,
-            "type": "cube",
-            "from": [-8, 0, -12],
-            "to": [8, 6, 12],
-            "autouv": 1,
-            "color": 0,
-            "origin": [0, 0, 0],
-            "faces": {
-                "north": {"uv": [0, 0, 16, 6], "texture": 0},
-                "east": {"uv": [16, 0, 40, 6], "texture": 0},
-                "south": {"uv": [40, 0, 56, 6], "texture": 0},
-                "west": {"uv": [0, 6, 24, 12], "texture": 0},
-                "up": {"uv": [0, 12, 16, 36], "texture": 0},
-                "down": {"uv": [16, 12, 32, 36], "texture": 0}
-            }
-        })
-        
-        # Cabin
-        cabin_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "cabin",
-            "uuid": cabin_uuid,
-            "type": "cube",
-            "from": [-6, 6, -4],
-            "to": [6, 12, 6],
-            "autouv": 1,
-            "color": 1,
-            "origin": [0, 6, 0],
-            "faces": {
-                "north": {"uv": [24, 6, 36, 12], "texture": 0},
-                "east": {"uv": [36, 6, 46, 12], "texture": 0},
-                "south": {"uv": [46, 6, 58, 12], "texture": 0},
-                "west": {"uv": [32, 12, 42, 18], "texture": 0},
-                "up": {"uv": [32, 18, 44, 28], "texture": 0},
-                "down": {"uv": [44, 18, 56, 28], "texture": 0}
-            }
-        })
-        
-        # Wheels
-        wheel_positions = [
-            [-7, -3, -8],
-            [7, -3, -8],
-            [-7, -3, 8],
-            [7, -3, 8]
-        ]
-        
-        for i, pos in enumerate(wheel_positions):
-            wheel_uuid = str(uuid.uuid4())
-            elements.append({
-                "name": f"wheel_{i+1}",
-                "uuid": wheel_uuid,
-                "type": "cube",
-                "from": [pos[0] - 2, pos[1] - 2, pos[2] - 2],
-                "to": [pos[0] + 2, pos[1] + 2, pos[2] + 2],
-                "autouv": 1,
-                "color": i + 2,
-                "origin": pos,
-                "faces": {
-                    "north": {"uv": [56, i*8, 60, i*8+4], "texture": 0},
-                    "east": {"uv": [56, i*8+4, 60, i*8+8], "texture": 0},
-                    "south": {"uv": [60, i*8, 64, i*8+4], "texture": 0},
-                    "west": {"uv": [60, i*8+4, 64, i*8+8], "texture": 0},
-                    "up": {"uv": [56, i*8+8, 60, i*8+12], "texture": 0},
-                    "down": {"uv": [60, i*8+8, 64, i*8+12], "texture": 0}
-                }
-            })
-        
-        return elements
+        return self._generate_geometry("vehicle").to_elements()
     
     def _generate_basic_elements(self) -> List[Dict[str, Any]]:
         """Generate basic cube elements"""
-        elements = []
-        
-        # Create a simple cube
-        cube_uuid = str(uuid.uuid4())
-        elements.append({
-            "name": "cube",
-            "uuid": cube_uuid,
-            "type": "cube",
-            "from": [-8, 0, -8],
-            "to": [8, 16, 8],
-            "autouv": 1,
-            "color": 0,
-            "origin": [0, 0, 0],
-            "faces": {
-                "north": {"uv": [0, 0, 16, 16], "texture": 0},
-                "east": {"uv": [16, 0, 32, 16], "texture": 0},
-                "south": {"uv": [32, 0, 48, 16], "texture": 0},
-                "west": {"uv": [48, 0, 64, 16], "texture": 0},
-                "up": {"uv": [0, 16, 16, 32], "texture": 0},
-                "down": {"uv": [16, 16, 32, 32], "texture": 0}
-            }
-        })
-        
-        return elements
+        return self._generate_geometry("basic").to_elements()
     
     def _generate_outliner(self, elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Generate the outliner structure based on elements"""
@@ -505,21 +1102,35 @@ class ModelGenerator:
     def _generate_animations(
         self,
         elements: List[Dict[str, Any]],
-        animation_type: str
+        animation_type: str,
+        uuid_factory: UUIDFactory = batch_uuid4
     ) -> List[Dict[str, Any]]:
         """Generate animations based on the elements and animation type"""
         animations = []
         
         if animation_type == "walk":
-            animations.append(self._generate_walk_animation(elements))
+            animations.append(self._generate_walk_animation(elements, uuid_factory))
         elif animation_type == "idle":
-            animations.append(self._generate_idle_animation(elements))
+            animations.append(self._generate_idle_animation(elements, uuid_factory))
         elif animation_type == "attack":
-            animations.append(self._generate_attack_animation(elements))
+            animations.append(self._generate_attack_animation(elements, uuid_factory))
+        
+        # Optionally bake to a key per frame for consumers without interpolation
+        if settings.ANIMATION_BAKE_FPS > 0:
+            animations = [
+                bake_animation(
+                    animation, settings.ANIMATION_BAKE_FPS, settings.ANIMATION_INTERPOLATION, settings.ANIMATION_MAX_FRAMES
+                )
+                for animation in animations
+            ]
         
         return animations
     
-    def _generate_walk_animation(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_walk_animation(
+        self,
+        elements: List[Dict[str, Any]],
+        uuid_factory: UUIDFactory = batch_uuid4
+    ) -> Dict[str, Any]:
         """Generate a walking animation"""
         animators = {}
         
@@ -556,7 +1167,7 @@ class ModelGenerator:
         
         return {
             "name": "walk",
-            "uuid": str(uuid.uuid4()),
+            "uuid": uuid_factory(1)[0],
             "loop": "loop",
             "override": False,
             "length": 1,
@@ -565,7 +1176,11 @@ class ModelGenerator:
             "animators": animators
         }
     
-    def _generate_idle_animation(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_idle_animation(
+        self,
+        elements: List[Dict[str, Any]],
+        uuid_factory: UUIDFactory = batch_uuid4
+    ) -> Dict[str, Any]:
         """Generate an idle animation"""
         animators = {}
         
@@ -602,7 +1217,7 @@ class ModelGenerator:
         
         return {
             "name": "idle",
-            "uuid": str(uuid.uuid4()),
+            "uuid": uuid_factory(1)[0],
             "loop": "loop",
             "override": False,
             "length": 4,
@@ -611,7 +1226,11 @@ class ModelGenerator:
             "animators": animators
         }
     
-    def _generate_attack_animation(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_attack_animation(
+        self,
+        elements: List[Dict[str, Any]],
+        uuid_factory: UUIDFactory = batch_uuid4
+    ) -> Dict[str, Any]:
         """Generate an attack animation"""
         animators = {}
         
@@ -647,7 +1266,7 @@ class ModelGenerator:
         
         return {
             "name": "attack",
-            "uuid": str(uuid.uuid4()),
+            "uuid": uuid_factory(1)[0],
             "loop": "once",
             "override": False,
             "length": 0.5,
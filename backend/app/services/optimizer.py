@@ -0,0 +1,270 @@
+import json
+from typing import Any, Collection, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.services.geometry import FACE_INDEX, CubeArray
+
+# For each axis, the faces on the low and high side of a cube
+_AXIS_FACES = {
+    0: (FACE_INDEX["west"], FACE_INDEX["east"]),
+    1: (FACE_INDEX["down"], FACE_INDEX["up"]),
+    2: (FACE_INDEX["north"], FACE_INDEX["south"])
+}
+
+# Upper bound on the grid cells one occluding face is registered in
+_MAX_CELLS_PER_AXIS = 32
+
+
+def static_mask(cubes: CubeArray, locked: Optional[Collection[str]] = None) -> np.ndarray:
+    """Cubes that may be merged: unrotated and not targeted by any animation"""
+    static = ~cubes.data["rotation"].any(axis=1)
+    if locked:
+        static &= ~np.fromiter((cube_uuid in locked for cube_uuid in cubes.uuids), bool, len(cubes))
+    return static
+
+
+def merge_cubes(
+    cubes: CubeArray,
+    locked: Optional[Collection[str]] = None,
+    uvs_repacked: bool = False
+) -> CubeArray:
+    """Merge runs of adjacent cubes with identical cross-sections and faces
+
+    Greedy-meshing style: for each axis the cubes are sorted so that cubes
+    sharing a cross-section and attributes sit next to each other in order
+    of position, and every chain where one cube ends where the next begins
+    collapses into its first cube. Running the three axes in turn merges
+    rows into slabs and slabs into blocks. Rotated cubes and cubes in
+    `locked` (usually animation targets) are left alone, and only cubes
+    with the same name and extras (inflate, face rotation, ...) merge.
+
+    A merged cube keeps the face UVs of the first cube of its run, so
+    unless the caller lays out UVs afterwards (`uvs_repacked`), only cubes
+    with identical UVs merge.
+    """
+    if len(cubes) < 2:
+        return cubes
+    attributes = _attribute_labels(cubes, uvs_repacked)
+    for _ in range(2):
+        before = len(cubes)
+        for axis in range(3):
+            cubes, attributes = _merge_axis(cubes, axis, static_mask(cubes, locked), attributes)
+        if len(cubes) == before:
+            break
+    return cubes
+
+
+def _labels(values: Iterable[Any], count: int) -> np.ndarray:
+    """Number hashable values so that equal values get equal labels"""
+    ids: Dict[Any, int] = {}
+    return np.fromiter((ids.setdefault(value, len(ids)) for value in values), np.int64, count)
+
+
+def _extras_key(extras: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(extras, sort_keys=True, default=str) if extras else ""
+
+
+def _attribute_labels(cubes: CubeArray, uvs_repacked: bool) -> np.ndarray:
+    """Label cubes so that only cubes with equal labels may merge"""
+    count = len(cubes)
+    labels = _labels(
+        (
+            (name, _extras_key(extras), _extras_key(face_extras))
+            for name, extras, face_extras in zip(cubes.names, cubes.extras, cubes.face_extras)
+        ),
+        count
+    )
+    if not uvs_repacked:
+        # Compare the 24 UV floats of each cube as one opaque record
+        uv = np.ascontiguousarray(cubes.data["uv"]).reshape(count, -1)
+        _, uv_layout = np.unique(uv.view(np.dtype((np.void, uv.itemsize * uv.shape[1]))), return_inverse=True)
+        labels = labels * count + uv_layout.reshape(-1)
+    return labels
+
+
+def _merge_axis(
+    cubes: CubeArray,
+    axis: int,
+    mergeable: np.ndarray,
+    attributes: np.ndarray
+) -> Tuple[CubeArray, np.ndarray]:
+    data = cubes.data
+    count = len(data)
+    if count < 2 or not mergeable.any():
+        return cubes, attributes
+
+    u, v = [a for a in range(3) if a != axis]
+    # Cubes that must not merge get a group of their own
+    group = np.where(mergeable, -1, np.arange(count))
+    columns = [
+        group,
+        attributes,
+        data["color"],
+        data["autouv"],
+        *data["texture"].T,
+        *data["has_face"].T.astype(np.int8),
+        data["from"][:, u],
+        data["from"][:, v],
+        data["to"][:, u],
+        data["to"][:, v]
+    ]
+    # np.lexsort treats its last key as the primary one
+    order = np.lexsort([data["from"][:, axis]] + columns[::-1])
+    ordered = data[order]
+
+    same = np.ones(count - 1, dtype=bool)
+    for column in columns:
+        sorted_column = column[order]
+        same &= sorted_column[1:] == sorted_column[:-1]
+    link = same & (ordered["to"][:-1, axis] == ordered["from"][1:, axis]) & mergeable[order][1:]
+    if not link.any():
+        return cubes, attributes
+
+    # Each run of linked cubes becomes its first cube stretched to the last
+    starts = np.flatnonzero(np.concatenate(([True], ~link)))
+    ends = np.append(starts[1:], count) - 1
+    merged = ordered[starts]
+    merged["to"][:, axis] = ordered["to"][ends, axis]
+
+    # Restore the original element order of the surviving cubes
+    keep = order[starts]
+    restore = np.argsort(keep, kind="stable")
+    merged_cubes = CubeArray(
+        merged[restore],
+        [cubes.names[i] for i in keep[restore]],
+        [cubes.uuids[i] for i in keep[restore]],
+        [cubes.extras[i] for i in keep[restore]],
+        [cubes.face_extras[i] for i in keep[restore]]
+    )
+    return merged_cubes, attributes[keep[restore]]
+
+
+def cull_hidden_faces(cubes: CubeArray, locked: Optional[Collection[str]] = None) -> int:
+    """Drop faces covered by the touching face of another cube, in place
+
+    A face is hidden when another unrotated cube starts exactly where it
+    ends and that cube's opposite face is present and covers the whole
+    face. Cubes in `locked` move during animations, so they neither hide
+    nor lose faces. Candidate pairs are found through a grid over each face plane: every
+    covering face is registered in the cells it spans, and every face only
+    looks up the cell holding its lower corner. Returns the number of faces
+    dropped.
+    """
+    data = cubes.data
+    count = len(data)
+    if count < 2:
+        return 0
+
+    static = np.flatnonzero(static_mask(cubes, locked))
+    if len(static) < 2:
+        return 0
+    low_corner = data["from"][static]
+    high_corner = data["to"][static]
+    hidden = np.zeros((count, 6), dtype=bool)
+
+    for axis, (low_face, high_face) in _AXIS_FACES.items():
+        u, v = [a for a in range(3) if a != axis]
+        # High faces of one cube meet low faces of the next and vice versa;
+        # a cube with its touching face removed covers nothing
+        for face, plane, cover_face, cover_plane in (
+            (high_face, high_corner[:, axis], low_face, low_corner[:, axis]),
+            (low_face, low_corner[:, axis], high_face, high_corner[:, axis])
+        ):
+            occluded = _covered(
+                plane, low_corner[:, [u, v]], high_corner[:, [u, v]],
+                cover_plane, low_corner[:, [u, v]], high_corner[:, [u, v]],
+                data["has_face"][static, cover_face]
+            )
+            hidden[static[occluded], face] = True
+
+    hidden &= data["has_face"]
+    data["has_face"] &= ~hidden
+    return int(hidden.sum())
+
+
+def _covered(
+    plane: np.ndarray,
+    low: np.ndarray,
+    high: np.ndarray,
+    cover_plane: np.ndarray,
+    cover_low: np.ndarray,
+    cover_high: np.ndarray,
+    cover_mask: np.ndarray
+) -> np.ndarray:
+    """For each face rectangle, whether a covering rectangle on the same plane contains it
+
+    Only rectangles where `cover_mask` is set can cover a face.
+    """
+    count = len(plane)
+    extents = np.concatenate([high - low, cover_high - cover_low])
+    span = np.concatenate([high, cover_high]).max(axis=0) - np.concatenate([low, cover_low]).min(axis=0)
+    cell = np.maximum(np.median(extents, axis=0), span / _MAX_CELLS_PER_AXIS)
+    cell = np.where(cell > 0, cell, 1.0)
+    origin = np.minimum(low.min(axis=0), cover_low.min(axis=0))
+
+    # Planes are matched exactly, so index them by their distinct values
+    _, plane_ids = np.unique(np.concatenate([plane, cover_plane]), return_inverse=True)
+    face_plane = plane_ids[:count]
+    cover_plane_id = plane_ids[count:]
+
+    cells_u = int(np.ceil(span[0] / cell[0])) + 1
+    cells_v = int(np.ceil(span[1] / cell[1])) + 1
+
+    def key(plane_id, cell_u, cell_v):
+        return (plane_id.astype(np.int64) * cells_u + cell_u) * cells_v + cell_v
+
+    # Register every covering rectangle in each cell it overlaps
+    first = np.floor((cover_low - origin) / cell).astype(np.int64)
+    last = np.maximum(np.ceil((cover_high - origin) / cell).astype(np.int64) - 1, first)
+    widths = last - first + 1
+    cell_counts = np.where(cover_mask, widths[:, 0] * widths[:, 1], 0)
+    owner = np.repeat(np.arange(count), cell_counts)
+    offset = np.arange(len(owner)) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+    cell_u = first[owner, 0] + offset // widths[owner, 1]
+    cell_v = first[owner, 1] + offset % widths[owner, 1]
+    registered = key(cover_plane_id[owner], cell_u, cell_v)
+    by_key = np.argsort(registered, kind="stable")
+    registered = registered[by_key]
+    owner = owner[by_key]
+
+    # Each face looks up the cell holding its lower corner
+    corner = np.floor((low - origin) / cell).astype(np.int64)
+    lookup = key(face_plane, corner[:, 0], corner[:, 1])
+    start = np.searchsorted(registered, lookup, side="left")
+    stop = np.searchsorted(registered, lookup, side="right")
+    matches = stop - start
+    face = np.repeat(np.arange(count), matches)
+    within = np.arange(len(face)) - np.repeat(np.cumsum(matches) - matches, matches)
+    candidate = owner[np.repeat(start, matches) + within]
+
+    contained = (
+        (face != candidate)
+        & (cover_low[candidate] <= low[face]).all(axis=1)
+        & (cover_high[candidate] >= high[face]).all(axis=1)
+    )
+    occluded = np.zeros(count, dtype=bool)
+    occluded[face[contained]] = True
+    return occluded
+
+
+def optimize_geometry(
+    cubes: CubeArray,
+    locked: Optional[Collection[str]] = None,
+    merge: bool = True,
+    cull: bool = True,
+    uvs_repacked: bool = False
+) -> Tuple[CubeArray, Dict[str, Any]]:
+    """Merge adjacent cubes and drop hidden faces, reporting what changed"""
+    cubes_before = len(cubes)
+    faces_before = int(cubes.data["has_face"].sum())
+    if merge:
+        cubes = merge_cubes(cubes, locked, uvs_repacked)
+    culled = cull_hidden_faces(cubes, locked) if cull else 0
+    return cubes, {
+        "cubes_before": cubes_before,
+        "cubes_after": len(cubes),
+        "faces_before": faces_before,
+        "faces_after": int(cubes.data["has_face"].sum()),
+        "faces_culled": culled
+    }
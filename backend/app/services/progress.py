@@ -0,0 +1,113 @@
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.services.status_store import TERMINAL_STATUSES
+
+
+class Subscription:
+    """A single watcher of one job's progress events"""
+
+    def __init__(self, model_id: str, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.model_id = model_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def _deliver(self, event: Dict[str, Any]):
+        """Queue an event on the subscriber's loop, dropping the oldest if it lags"""
+        if self.queue.full():
+            # Events are full status snapshots, so only the latest ones matter
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+
+class ProgressBroker:
+    """In-process pub/sub fanning job status changes out to async subscribers"""
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, model_id: str) -> Subscription:
+        """Register a watcher; must be called from a running event loop"""
+        subscription = Subscription(model_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(model_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.model_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.model_id]
+
+    def publish(self, model_id: str, event: Dict[str, Any]):
+        """Push an event to every watcher of a job; safe to call from worker threads"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(model_id, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, dict(event))
+            except RuntimeError:
+                # The subscriber's loop has already been closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self, model_id: Optional[str] = None) -> int:
+        with self._lock:
+            if model_id is not None:
+                return len(self._subscribers.get(model_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+def format_sse(event: Dict[str, Any], event_type: str = "status") -> str:
+    """Encode an event in Server-Sent Events wire format"""
+    return f"event: {event_type}\ndata: {json.dumps(event)}\n\n"
+
+
+async def stream_status_events(
+    broker: ProgressBroker,
+    model_id: str,
+    get_status: Callable[[], Optional[Dict[str, Any]]],
+    heartbeat_seconds: Optional[float] = None
+) -> AsyncIterator[str]:
+    """Yield SSE frames for a job until it reaches a terminal state"""
+    heartbeat_seconds = heartbeat_seconds or settings.PROGRESS_HEARTBEAT_SECONDS
+
+    # Subscribe before reading the current state so no transition is missed
+    subscription = broker.subscribe(model_id)
+    try:
+        status = get_status()
+        if status is None:
+            return
+        yield format_sse(status)
+
+        while status.get("status") not in TERMINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                # The job may be running in another worker process, so fall back
+                # to the shared status store when nothing was published here
+                event = get_status()
+                if event is None:
+                    return
+                if event == status:
+                    yield ": keep-alive\n\n"
+                    continue
+
+            status = event
+            yield format_sse(status)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+progress_broker = ProgressBroker()
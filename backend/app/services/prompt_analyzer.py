@@ -0,0 +1,233 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+# Colours recognised in prompts and the RGB they stand for
+COLOR_WORDS = {
+    "red": (200, 48, 48),
+    "orange": (230, 126, 34),
+    "yellow": (241, 196, 15),
+    "gold": (212, 175, 55),
+    "golden": (212, 175, 55),
+    "green": (60, 160, 70),
+    "lime": (140, 210, 60),
+    "teal": (0, 128, 128),
+    "cyan": (40, 200, 220),
+    "blue": (52, 100, 200),
+    "navy": (30, 40, 110),
+    "purple": (130, 70, 170),
+    "violet": (150, 90, 200),
+    "pink": (240, 130, 170),
+    "brown": (120, 80, 45),
+    "tan": (210, 180, 140),
+    "white": (235, 235, 235),
+    "silver": (190, 195, 200),
+    "gray": (128, 128, 128),
+    "grey": (128, 128, 128),
+    "black": (40, 40, 45)
+}
+
+# Nouns that pick the archetype template
+ARCHETYPE_WORDS = {
+    "character": [
+        "person", "man", "woman", "boy", "girl", "human", "humanoid", "knight", "robot", "android",
+        "zombie", "skeleton", "soldier", "warrior", "wizard", "witch", "villager", "king", "queen",
+        "hero", "player", "ninja", "pirate", "elf", "goblin", "orc", "astronaut", "character"
+    ],
+    "animal": [
+        "animal", "dog", "puppy", "cat", "kitten", "horse", "pony", "cow", "pig", "sheep", "wolf",
+        "fox", "bear", "lion", "tiger", "deer", "goat", "rabbit", "bunny", "dragon", "dinosaur",
+        "lizard", "creature", "beast", "pet"
+    ],
+    "vehicle": [
+        "vehicle", "car", "truck", "tank", "bus", "van", "cart", "wagon", "train", "tractor", "jeep",
+        "race car", "fire truck", "monster truck", "buggy", "minecart"
+    ],
+    "basic": ["box", "crate", "block", "cube", "barrel", "chest"]
+}
+
+# Scale applied to the template for size adjectives
+SIZE_WORDS = {
+    "tiny": 0.5,
+    "mini": 0.5,
+    "small": 0.75,
+    "little": 0.75,
+    "baby": 0.75,
+    "big": 1.25,
+    "large": 1.25,
+    "tall": 1.25,
+    "huge": 1.5,
+    "giant": 1.5,
+    "massive": 1.5,
+    "colossal": 1.75
+}
+
+# Verbs that pick the generated animation
+ANIMATION_WORDS = {
+    "walk": ["walk", "walks", "walking", "run", "runs", "running", "trotting", "marching", "strolling"],
+    "idle": ["idle", "idling", "standing", "sitting", "resting", "sleeping", "breathing", "waiting"],
+    "attack": [
+        "attack", "attacks", "attacking", "fight", "fighting", "punching", "swinging", "slashing",
+        "striking", "charging"
+    ]
+}
+
+# Parts worth reporting; they do not change the template yet
+PART_WORDS = [
+    "head", "arm", "leg", "tail", "wing", "horn", "ear", "helmet", "hat", "sword", "shield",
+    "armor", "cape", "wheel", "cabin", "antenna"
+]
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+class PromptFeatures(NamedTuple):
+    """What the analyzer recognised in a prompt"""
+    archetype: Optional[str]
+    colors: Tuple[str, ...]
+    size: float
+    animation: Optional[str]
+    parts: Tuple[str, ...]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "archetype": self.archetype,
+            "colors": list(self.colors),
+            "size": self.size,
+            "animation": self.animation,
+            "parts": list(self.parts)
+        }
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton finding whole-word phrases in one pass over the text
+
+    Phrases and text are normalized to single-space separated words with a
+    space on each side, so every match lands on word boundaries without any
+    extra checks.
+    """
+
+    def __init__(self, phrases: Dict[str, Any]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+        for phrase, value in phrases.items():
+            self._add(normalize(phrase), value)
+        self._link()
+
+    def _add(self, phrase: str, value: Any):
+        state = 0
+        for char in phrase:
+            following = self._goto[state].get(char)
+            if following is None:
+                following = len(self._goto)
+                self._goto[state][char] = following
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = following
+        self._output[state].append(value)
+
+    def _link(self):
+        """Breadth-first fill of failure links, merging the outputs they lead to"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[following] = target if target != following else 0
+                self._output[following] = self._output[following] + self._output[self._fail[following]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """Yield (end offset, value) for every phrase in already normalized text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield index, value
+
+
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces, padded with a space on each side"""
+    return f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+
+
+def _vocabulary() -> Dict[str, Tuple[str, Any]]:
+    phrases: Dict[str, Tuple[str, Any]] = {}
+    for color in COLOR_WORDS:
+        phrases[color] = ("color", color)
+    for archetype, words in ARCHETYPE_WORDS.items():
+        for word in words:
+            phrases[word] = ("archetype", archetype)
+            phrases[word + "s"] = ("archetype", archetype)
+    for word, factor in SIZE_WORDS.items():
+        phrases[word] = ("size", factor)
+    for animation, words in ANIMATION_WORDS.items():
+        for word in words:
+            phrases[word] = ("animation", animation)
+    for word in PART_WORDS:
+        phrases[word] = ("part", word)
+        phrases[word + "s"] = ("part", word)
+    return phrases
+
+
+_matcher = PhraseMatcher(_vocabulary())
+
+
+@lru_cache(maxsize=settings.PROMPT_ANALYSIS_CACHE_SIZE)
+def _analyze(text: str) -> PromptFeatures:
+    archetype = None
+    archetype_end = -1
+    colors: List[str] = []
+    parts: List[str] = []
+    size = 1.0
+    animation = None
+    for end, (kind, value) in _matcher.find(text):
+        if kind == "archetype":
+            # The head noun comes last ("robot dog" is a dog); on ties the longer phrase,
+            # which the automaton reports first, wins
+            if end > archetype_end:
+                archetype, archetype_end = value, end
+        elif kind == "color":
+            if value not in colors:
+                colors.append(value)
+        elif kind == "size":
+            size = value
+        elif kind == "animation":
+            animation = animation or value
+        elif value not in parts:
+            parts.append(value)
+    return PromptFeatures(archetype, tuple(colors), size, animation, tuple(parts))
+
+
+def analyze_prompt(prompt: str) -> PromptFeatures:
+    """Extract archetype, colours, size, animation and parts from a prompt
+
+    Results are memoized per normalized prompt, so repeated and trivially
+    different prompts (case, punctuation) cost a dictionary lookup.
+    """
+    return _analyze(normalize(prompt))
+
+
+def resolve_archetype(model_type: Optional[str], features: PromptFeatures, templates: Any) -> str:
+    """Archetype to build: the requested type if it has a template, else what the prompt names"""
+    if model_type and model_type != "auto" and model_type in templates:
+        return model_type
+    return features.archetype or (model_type if model_type and model_type != "auto" else "character")
+
+
+def resolve_animation(animation_type: Optional[str], features: PromptFeatures) -> Optional[str]:
+    """Animation to generate; "auto" takes the verb of the prompt, if any"""
+    if animation_type == "auto":
+        return features.animation
+    return animation_type
@@ -0,0 +1,329 @@
+import base64
+import hashlib
+import io
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.geometry import CubeArray
+from app.services.result_cache import ResultCache
+from app.services.textures import encode_png
+from app.services import serializer
+
+# Bump whenever rendered previews change so cached images are not reused
+RENDER_VERSION = "1"
+
+# Corners of every face in FACE_NAMES order, as picks between a cube's `from`
+# (0) and `to` (1) per axis. Corners run top-left, top-right, bottom-right,
+# bottom-left as seen from outside the cube, matching the UV rectangle corners.
+_FACE_CORNERS = np.array([
+    [(1, 1, 0), (0, 1, 0), (0, 0, 0), (1, 0, 0)],  # north
+    [(1, 1, 1), (1, 1, 0), (1, 0, 0), (1, 0, 1)],  # east
+    [(0, 1, 1), (1, 1, 1), (1, 0, 1), (0, 0, 1)],  # south
+    [(0, 1, 0), (0, 1, 1), (0, 0, 1), (0, 0, 0)],  # west
+    [(0, 1, 0), (1, 1, 0), (1, 1, 1), (0, 1, 1)],  # up
+    [(0, 0, 1), (1, 0, 1), (1, 0, 0), (0, 0, 0)]   # down
+], dtype=bool)
+
+# Indices into (u1, v1, u2, v2) giving the UV of each corner above
+_CORNER_UV = np.array([(0, 1), (2, 1), (2, 3), (0, 3)])
+
+# Isometric camera: looking down at the model's front-left corner
+VIEW_YAW = -135.0
+VIEW_PITCH = 30.0
+LIGHT_DIRECTION = (-0.4, 0.8, -0.45)
+AMBIENT = 0.45
+MARGIN = 0.06
+
+# Colour of faces without a usable texture
+UNTEXTURED_COLOR = (170, 170, 170)
+
+# Fragments rasterized per NumPy pass; bounds memory for very large models
+_FRAGMENT_CHUNK = 1 << 21
+
+
+def view_basis(yaw: float = VIEW_YAW, pitch: float = VIEW_PITCH) -> np.ndarray:
+    """Rows are the screen right, screen up and towards-camera axes in model space"""
+    yaw, pitch = np.radians(yaw), np.radians(pitch)
+    back = np.array([np.sin(yaw) * np.cos(pitch), np.sin(pitch), np.cos(yaw) * np.cos(pitch)])
+    right = np.cross((0.0, 1.0, 0.0), back)
+    right /= np.linalg.norm(right)
+    return np.stack([right, np.cross(back, right), back])
+
+
+def rotation_matrices(rotation: np.ndarray) -> np.ndarray:
+    """Blockbench cube rotations (degrees, applied X then Y then Z) as (n, 3, 3) matrices"""
+    x, y, z = np.radians(rotation).T
+    cx, sx, cy, sy, cz, sz = np.cos(x), np.sin(x), np.cos(y), np.sin(y), np.cos(z), np.sin(z)
+    return np.stack([
+        np.stack([cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz], axis=1),
+        np.stack([cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz], axis=1),
+        np.stack([-sy, sx * cy, cx * cy], axis=1)
+    ], axis=1)
+
+
+def face_normals(corners: np.ndarray) -> np.ndarray:
+    """Outward unit normals of (m, 4, 3) face corners"""
+    normals = np.cross(corners[:, 3] - corners[:, 0], corners[:, 1] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+
+def face_quads(cubes: CubeArray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Corners (m, 4, 3), UVs (m, 4, 2), textures and owning cube of all present faces"""
+    data = cubes.data
+    cube_index, face_index = np.nonzero(data["has_face"])
+    low = data["from"][cube_index]
+    high = data["to"][cube_index]
+    corners = np.where(_FACE_CORNERS[face_index], high[:, None, :], low[:, None, :])
+
+    rotated = data["rotation"].any(axis=1)[cube_index]
+    if rotated.any():
+        origin = data["origin"][cube_index[rotated]][:, None, :]
+        matrices = rotation_matrices(data["rotation"][cube_index[rotated]])
+        corners[rotated] = np.einsum("nij,nkj->nki", matrices, corners[rotated] - origin) + origin
+
+    uv = data["uv"][cube_index, face_index][:, _CORNER_UV]
+    return corners, uv, data["texture"][cube_index, face_index], cube_index
+
+
+def load_texture_bytes(bbmodel: Dict[str, Any]) -> List[Optional[bytes]]:
+    """Encoded image of each of the bbmodel's textures (None where there is none)"""
+    # Generated models that do not embed their texture link it from TEXTURES_DIR
+    linked = bbmodel.get("metadata", {}).get("texture_url")
+    images = []
+    for texture in bbmodel.get("textures", []):
+        data = None
+        source = texture.get("source") or ""
+        if source.startswith("data:image/") and "," in source:
+            data = base64.b64decode(source.split(",", 1)[1])
+        else:
+            # Only the file name is trusted; imported models must not reach outside TEXTURES_DIR
+            for link in (texture.get("relative_path"), linked):
+                path = os.path.join(settings.TEXTURES_DIR, os.path.basename(link or ""))
+                if link and os.path.isfile(path):
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    break
+        images.append(data)
+    return images
+
+
+def load_textures(bbmodel: Dict[str, Any]) -> List[Optional[np.ndarray]]:
+    """Decode the bbmodel's textures to RGBA arrays (None where one cannot be read)"""
+    images = []
+    for data in load_texture_bytes(bbmodel):
+        try:
+            images.append(np.asarray(Image.open(io.BytesIO(data)).convert("RGBA")) if data else None)
+        except (OSError, ValueError):
+            images.append(None)
+    return images
+
+
+def _fragments(screen: np.ndarray, width: int, height: int):
+    """Pixels covered by each projected face, with their (s, t) face coordinates
+
+    Under an orthographic camera every cube face projects to a
+    parallelogram, so each one is rasterized whole: the pixel centres of its
+    bounding box are mapped back to face coordinates along the top and left
+    edges and kept when both fall in [0, 1]. Yields chunks of (face index,
+    pixel index, s, t) so very large models stay within memory.
+    """
+    low = np.clip(np.floor(screen.min(axis=1) - 0.5).astype(np.int64), 0, [width, height])
+    high = np.clip(np.ceil(screen.max(axis=1) - 0.5).astype(np.int64) + 1, 0, [width, height])
+    extent = high - low
+    counts = extent[:, 0] * extent[:, 1]
+
+    origin = screen[:, 0]
+    edge_s = screen[:, 1] - origin
+    edge_t = screen[:, 3] - origin
+    det = edge_s[:, 0] * edge_t[:, 1] - edge_s[:, 1] * edge_t[:, 0]
+    faces = np.flatnonzero((np.abs(det) > 1e-12) & (counts > 0))
+    inv_det = np.zeros_like(det)
+    inv_det[faces] = 1.0 / det[faces]
+
+    start = 0
+    while start < len(faces):
+        # Take faces until the chunk holds enough fragments
+        totals = np.cumsum(counts[faces[start:]])
+        stop = start + max(int(np.searchsorted(totals, _FRAGMENT_CHUNK, side="right")), 1)
+        chunk = faces[start:stop]
+        start = stop
+
+        chunk_counts = counts[chunk]
+        owner = np.repeat(chunk, chunk_counts)
+        offset = np.arange(len(owner)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        px = low[owner, 0] + offset % extent[owner, 0]
+        py = low[owner, 1] + offset // extent[owner, 0]
+        dx = px + 0.5 - origin[owner, 0]
+        dy = py + 0.5 - origin[owner, 1]
+
+        # Solve pixel = origin + s * edge_s + t * edge_t
+        s = (dx * edge_t[owner, 1] - dy * edge_t[owner, 0]) * inv_det[owner]
+        t = (edge_s[owner, 0] * dy - edge_s[owner, 1] * dx) * inv_det[owner]
+        inside = (s >= 0) & (s <= 1) & (t >= 0) & (t <= 1)
+        yield owner[inside], (py * width + px)[inside], s[inside], t[inside]
+
+
+class Scene:
+    """Face buffers of a bbmodel, built once and shared by every frame rendered from it"""
+
+    def __init__(self, bbmodel: Dict[str, Any]):
+        self.cubes = CubeArray.from_elements(bbmodel.get("elements", []))
+        self.corners, self.uv, self.texture, self.cube_index = face_quads(self.cubes)
+        self.normals = face_normals(self.corners)
+        self.textures = load_textures(bbmodel)
+        resolution = bbmodel.get("resolution") or {}
+        self.uv_size = np.array(
+            [resolution.get("width", 16) or 16, resolution.get("height", 16) or 16], dtype=np.float64
+        )
+
+    def pose(
+        self,
+        rotation: Optional[np.ndarray] = None,
+        position: Optional[np.ndarray] = None,
+        scale: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Face corners and normals with per-cube (n, 3) animation transforms applied
+
+        Transforms act about each cube's origin and follow Blockbench's
+        display of keyframes, which negates X and Y rotations and X offsets.
+        Only faces of cubes that actually move are recomputed.
+        """
+        count = len(self.cubes)
+        rotation = np.zeros((count, 3)) if rotation is None else rotation
+        position = np.zeros((count, 3)) if position is None else position
+        scale = np.ones((count, 3)) if scale is None else scale
+        moved = (rotation != 0).any(axis=1) | (position != 0).any(axis=1) | (scale != 1).any(axis=1)
+        faces = moved[self.cube_index]
+        if not faces.any():
+            return self.corners, self.normals
+
+        owner = self.cube_index[faces]
+        matrices = rotation_matrices(rotation[owner] * (-1, -1, 1))
+        origin = self.cubes.data["origin"][owner][:, None, :]
+        local = (self.corners[faces] - origin) * scale[owner][:, None, :]
+        corners = self.corners.copy()
+        corners[faces] = np.einsum("nij,nkj->nki", matrices, local) + origin + (position[owner] * (-1, 1, 1))[:, None, :]
+        normals = self.normals.copy()
+        normals[faces] = face_normals(corners[faces])
+        return corners, normals
+
+    def fit(self, corner_sets: Sequence[np.ndarray], size: int, basis: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Screen centre and scale that fit every given pose into the image with a margin"""
+        low = np.full(2, np.inf)
+        high = np.full(2, -np.inf)
+        for corners in corner_sets:
+            if len(corners):
+                view = corners.reshape(-1, 3) @ basis[:2].T
+                low = np.minimum(low, view.min(axis=0))
+                high = np.maximum(high, view.max(axis=0))
+        if not np.isfinite(low).all():
+            return np.zeros(2), 1.0
+        return (low + high) / 2, size * (1 - 2 * MARGIN) / max(float((high - low).max()), 1e-9)
+
+    def rasterize(
+        self,
+        corners: np.ndarray,
+        normals: np.ndarray,
+        size: int,
+        basis: np.ndarray,
+        fit: Tuple[np.ndarray, float]
+    ) -> np.ndarray:
+        """Draw one pose of the faces to a (size, size, 4) RGBA array
+
+        Orthographic projection with back-face culling, a z-buffer, flat
+        Lambert shading per face and nearest-neighbour texture sampling.
+        Texels with low alpha are see-through. The background is transparent.
+        """
+        image = np.zeros((size, size, 4), dtype=np.uint8)
+        visible = np.flatnonzero(normals @ basis[2] > 1e-9)
+        if not len(visible):
+            return image
+        uv, texture = self.uv[visible], self.texture[visible]
+
+        center, scale = fit
+        view = corners[visible] @ basis.T
+        screen = np.empty(view.shape[:2] + (2,))
+        screen[..., 0] = (view[..., 0] - center[0]) * scale + size / 2
+        screen[..., 1] = (center[1] - view[..., 1]) * scale + size / 2
+        depth = view[..., 2]
+
+        light = np.asarray(LIGHT_DIRECTION, dtype=np.float64)
+        light /= np.linalg.norm(light)
+        shade = AMBIENT + (1 - AMBIENT) * np.maximum(normals[visible] @ light, 0)
+
+        zbuffer = np.full(size * size, -np.inf)
+        colors = np.zeros((size * size, 3), dtype=np.float64)
+        for face, pixel, s, t in _fragments(screen, size, size):
+            frag_depth = depth[face, 0] + s * (depth[face, 1] - depth[face, 0]) + t * (depth[face, 3] - depth[face, 0])
+
+            # Sample each face's texture; faces without one get a flat colour
+            rgba = np.empty((len(pixel), 4))
+            rgba[:] = UNTEXTURED_COLOR + (255,)
+            face_texture = texture[face]
+            for index, texels in enumerate(self.textures):
+                mask = face_texture == index
+                if texels is None or not mask.any():
+                    continue
+                tex_height, tex_width = texels.shape[:2]
+                textured = face[mask]
+                u = uv[textured, 0, 0] + s[mask] * (uv[textured, 1, 0] - uv[textured, 0, 0])
+                v = uv[textured, 0, 1] + t[mask] * (uv[textured, 3, 1] - uv[textured, 0, 1])
+                u = np.clip((u / self.uv_size[0] * tex_width).astype(np.int64), 0, tex_width - 1)
+                v = np.clip((v / self.uv_size[1] * tex_height).astype(np.int64), 0, tex_height - 1)
+                rgba[mask] = texels[v, u]
+            opaque = rgba[:, 3] >= 128
+            face, pixel, frag_depth, rgba = face[opaque], pixel[opaque], frag_depth[opaque], rgba[opaque]
+
+            # Depth test; fragments that tie for a pixel may land in either order
+            np.maximum.at(zbuffer, pixel, frag_depth)
+            nearest = frag_depth >= zbuffer[pixel]
+            colors[pixel[nearest]] = rgba[nearest, :3] * shade[face[nearest], None]
+
+        drawn = np.isfinite(zbuffer)
+        image.reshape(-1, 4)[:, :3] = np.clip(colors, 0, 255)
+        image.reshape(-1, 4)[:, 3] = drawn * np.uint8(255)
+        return image
+
+
+def render_image(
+    bbmodel: Dict[str, Any],
+    size: int = 256,
+    yaw: float = VIEW_YAW,
+    pitch: float = VIEW_PITCH
+) -> np.ndarray:
+    """Rasterize the cube elements of a bbmodel at rest to a (size, size, 4) RGBA array"""
+    scene = Scene(bbmodel)
+    basis = view_basis(yaw, pitch)
+    return scene.rasterize(scene.corners, scene.normals, size, basis, scene.fit([scene.corners], size, basis))
+
+
+class PreviewRenderer:
+    """Renders PNG preview thumbnails and caches them by model content"""
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache or ResultCache(settings.PREVIEW_CACHE_MAX_BYTES)
+
+    def preview_key(self, bbmodel: Dict[str, Any], size: int) -> str:
+        """Hash of everything that shows up in a preview, ignoring names and metadata"""
+        content = {key: bbmodel.get(key) for key in ("elements", "textures", "resolution")}
+        digest = hashlib.sha256(f"{RENDER_VERSION}:{size}:".encode("utf-8"))
+        digest.update(serializer.dumps(content))
+        return digest.hexdigest()
+
+    def render(self, bbmodel: Dict[str, Any], size: Optional[int] = None) -> bytes:
+        """Get the PNG preview of a bbmodel, rendering it on a cache miss"""
+        size = size or settings.PREVIEW_SIZE
+        key = self.preview_key(bbmodel, size)
+        png = self.cache.get(key)
+        if png is None:
+            png = encode_png(render_image(bbmodel, size))
+            self.cache.put(key, png)
+        return png
+
+
+preview_renderer = PreviewRenderer()
@@ -0,0 +1,110 @@
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+# Namespace for UUIDs derived from a generation seed
+SEED_NAMESPACE = uuid.UUID("6f1c2b0e-8a4d-5c3e-9b7a-2d1e0f4c3b5a")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Fold case and whitespace so near-identical prompts share a cache entry"""
+    return " ".join(prompt.lower().split())
+
+
+def generation_key(
+    prompt: str,
+    model_type: str,
+    animation_type: Optional[str],
+    generator_version: str,
+    seed: Optional[int] = None,
+    **options: Any
+) -> str:
+    """Content address of a generation request"""
+    parts = [
+        generator_version,
+        normalize_prompt(prompt),
+        model_type or "",
+        animation_type or "",
+        "" if seed is None else str(seed)
+    ]
+    parts.extend(f"{name}={options[name]}" for name in sorted(options))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class SeededUUIDs:
+    """UUID factory that yields the same sequence for the same seed"""
+
+    def __init__(self, seed: Any):
+        self.seed = str(seed)
+        self.counter = 0
+
+    def __call__(self, count: int) -> List[str]:
+        start = self.counter
+        self.counter += count
+        return [
+            str(uuid.uuid5(SEED_NAMESPACE, f"{self.seed}:{index}"))
+            for index in range(start, start + count)
+        ]
+
+
+class ResultCache:
+    """Size-bounded LRU of serialized generation results keyed by content address"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else settings.RESULT_CACHE_MAX_BYTES
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        # Entries larger than the whole budget would only evict everything else
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+result_cache = ResultCache()
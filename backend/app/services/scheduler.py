@@ -0,0 +1,329 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.executor import QueueFullError
+from app.services.metrics import metrics_registry
+
+# Tier of users without an active subscription
+FREE_TIER = "free"
+
+QUEUE_WAIT_SECONDS = metrics_registry.histogram(
+    "bbmodel_scheduler_wait_seconds",
+    "Time jobs wait in the scheduler queue before a worker starts them",
+    ("scheduler", "tier")
+)
+
+
+def parse_tier_weights(spec: str) -> Dict[str, float]:
+    """Parse "enterprise:8,pro:4,..." into a tier -> weight mapping"""
+    weights = {}
+    for part in spec.split(","):
+        tier, _, weight = part.partition(":")
+        if tier.strip():
+            weights[tier.strip()] = float(weight)
+    weights.setdefault(FREE_TIER, 1.0)
+    return weights
+
+
+class _Job:
+    __slots__ = ("fn", "args", "kwargs", "future", "user_id", "tier", "enqueued_at", "queued")
+
+    def __init__(self, fn: Callable[..., Any], args, kwargs, user_id: Optional[str], tier: str):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.user_id = user_id
+        self.tier = tier
+        self.enqueued_at = time.monotonic()
+        self.queued = True
+
+
+class _TierQueue:
+    """Jobs of one tier, one FIFO per user, with users served round-robin"""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.users: "OrderedDict[Optional[str], Deque[_Job]]" = OrderedDict()
+        # Stride scheduling: the tier with the lowest pass runs next and
+        # advances by 1 / weight, so tiers share workers in weight ratio
+        self.pass_value = 0.0
+        self.queued = 0
+        self.running = 0
+        self.started = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class FairShareScheduler:
+    """Bounded worker pool that orders jobs by subscription tier, then fairly among users
+
+    Tiers share the workers in proportion to their weights (a backlogged
+    enterprise tier gets eight times the starts of the free tier by default)
+    without starving the lower ones. Within a tier, users take turns, and no
+    user has more than `user_concurrency` jobs running at once, so a single
+    user with hundreds of queued jobs only ever delays others by one turn.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_limit: Optional[int] = None,
+        name: str = "generation",
+        tier_weights: Optional[Dict[str, float]] = None,
+        user_concurrency: Optional[int] = None,
+        user_queue_limit: Optional[int] = None
+    ):
+        self.max_workers = max_workers or settings.GENERATION_WORKERS
+        self.queue_limit = queue_limit or settings.GENERATION_QUEUE_LIMIT
+        self.name = name
+        self.tier_weights = tier_weights or parse_tier_weights(settings.SCHEDULER_TIER_WEIGHTS)
+        self.user_concurrency = user_concurrency or settings.SCHEDULER_USER_CONCURRENCY
+        self.user_queue_limit = user_queue_limit or settings.SCHEDULER_USER_QUEUE_LIMIT
+        self._tiers = {tier: _TierQueue(weight) for tier, weight in self.tier_weights.items()}
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._shutdown = False
+        self._virtual_time = 0.0
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._user_queued: Dict[Optional[str], int] = {}
+        self._user_running: Dict[Optional[str], int] = {}
+        self._user_tier: Dict[Optional[str], str] = {}
+
+    def _start_workers(self):
+        """Start the worker threads on first use"""
+        if self._threads:
+            return
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self._work, name=f"{self.name}_{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn: Callable[..., Any], /, *args, **kwargs) -> Future:
+        """Enqueue a job without a user, in the free tier"""
+        return self.submit_as(None, FREE_TIER, fn, *args, **kwargs)
+
+    def submit_as(self, user_id: Optional[str], tier: Optional[str], fn: Callable[..., Any], /, *args, **kwargs) -> Future:
+        """Enqueue a job on behalf of a user and return immediately"""
+        tier = tier if tier in self._tiers else FREE_TIER
+        job = _Job(fn, args, kwargs, user_id, tier)
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError(f"{self.name.capitalize()} scheduler is shut down")
+            if self._queued + self._running >= self.queue_limit:
+                raise QueueFullError(f"{self.name.capitalize()} queue is full ({self.queue_limit} jobs)")
+            if user_id is not None and self._user_queued.get(user_id, 0) >= self.user_queue_limit:
+                raise QueueFullError(f"Too many queued jobs for this user ({self.user_queue_limit})")
+
+            queue = self._tiers[tier]
+            if not queue.queued:
+                # A tier that was idle does not get to catch up on missed turns
+                queue.pass_value = max(queue.pass_value, self._virtual_time)
+            queue.users.setdefault(user_id, deque()).append(job)
+            queue.queued += 1
+            self._queued += 1
+            self._user_queued[user_id] = self._user_queued.get(user_id, 0) + 1
+            self._user_tier[user_id] = tier
+            self._start_workers()
+            self._condition.notify()
+        job.future.add_done_callback(lambda future: self._discard(job))
+        return job.future
+
+    def _discard(self, job: _Job):
+        """Drop a job whose future was cancelled before a worker picked it up"""
+        if not job.future.cancelled():
+            return
+        with self._condition:
+            if not job.queued:
+                return
+            job.queued = False
+            queue = self._tiers[job.tier]
+            jobs = queue.users[job.user_id]
+            jobs.remove(job)
+            if not jobs:
+                del queue.users[job.user_id]
+            queue.queued -= 1
+            self._queued -= 1
+            self._cancelled += 1
+            self._user_queued[job.user_id] -= 1
+            self._forget_user(job.user_id)
+
+    def _eligible(self, user_id: Optional[str]) -> bool:
+        return user_id is None or self._user_running.get(user_id, 0) < self.user_concurrency
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pick the next job to run; called with the condition held"""
+        best = None
+        for queue in self._tiers.values():
+            if queue.queued and (best is None or queue.pass_value < best.pass_value):
+                if any(self._eligible(user_id) for user_id in queue.users):
+                    best = queue
+        if best is None:
+            return None
+
+        for user_id, jobs in best.users.items():
+            if self._eligible(user_id):
+                job = jobs.popleft()
+                job.queued = False
+                # Send the user to the back of the rotation, or drop them once drained
+                del best.users[user_id]
+                if jobs:
+                    best.users[user_id] = jobs
+                break
+        self._virtual_time = best.pass_value
+        best.pass_value += 1 / best.weight
+
+        wait = time.monotonic() - job.enqueued_at
+        QUEUE_WAIT_SECONDS.observe(wait, scheduler=self.name, tier=job.tier)
+        best.queued -= 1
+        best.running += 1
+        best.started += 1
+        best.total_wait += wait
+        best.max_wait = max(best.max_wait, wait)
+        self._queued -= 1
+        self._running += 1
+        self._user_queued[job.user_id] -= 1
+        self._user_running[job.user_id] = self._user_running.get(job.user_id, 0) + 1
+        return job
+
+    def _forget_user(self, user_id: Optional[str]):
+        """Drop the counters of a user without jobs; called with the condition held"""
+        for counts in (self._user_queued, self._user_running):
+            if counts.get(user_id) == 0:
+                del counts[user_id]
+        if user_id not in self._user_queued and user_id not in self._user_running:
+            self._user_tier.pop(user_id, None)
+
+    def _finish(self, job: _Job, outcome: str):
+        with self._condition:
+            self._tiers[job.tier].running -= 1
+            self._running -= 1
+            self._user_running[job.user_id] -= 1
+            self._forget_user(job.user_id)
+            if outcome == "failed":
+                self._failed += 1
+            elif outcome == "cancelled":
+                self._cancelled += 1
+            else:
+                self._completed += 1
+            # The user may have become eligible again
+            self._condition.notify_all()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown and not self._queued:
+                        return
+                    self._condition.wait()
+                    job = self._next_job()
+
+            if not job.future.set_running_or_notify_cancel():
+                self._finish(job, "cancelled")
+                continue
+            # Counters are settled before the result is published, so a caller
+            # woken by the future sees the job as finished
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except BaseException as e:
+                self._finish(job, "failed")
+                job.future.set_exception(e)
+            else:
+                self._finish(job, "completed")
+                job.future.set_result(result)
+
+    def stats(self, user_id: Optional[str] = None, all_users: bool = True) -> Dict[str, Any]:
+        """Get queue depth, per-tier waits and per-user counts
+
+        With `all_users` off, only the entry of `user_id` is included.
+        """
+        with self._condition:
+            tiers = {
+                tier: {
+                    "weight": queue.weight,
+                    "queued": queue.queued,
+                    "running": queue.running,
+                    "started": queue.started,
+                    "mean_wait_seconds": queue.total_wait / queue.started if queue.started else 0.0,
+                    "max_wait_seconds": queue.max_wait
+                }
+                for tier, queue in self._tiers.items()
+            }
+            users = {
+                key: {
+                    "tier": self._user_tier.get(key),
+                    "queued": self._user_queued.get(key, 0),
+                    "in_flight": self._user_running.get(key, 0)
+                }
+                for key in self._user_tier
+                if key is not None and (all_users or key == user_id)
+            }
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "cancelled": self._cancelled,
+                "tiers": tiers,
+                "users": users
+            }
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stop the workers once the queued jobs have run
+
+        With `cancel_futures` the queued jobs are cancelled instead and only
+        the running ones are waited for, as with ThreadPoolExecutor.
+        """
+        dropped = []
+        with self._condition:
+            self._shutdown = True
+            threads, self._threads = self._threads, []
+            if cancel_futures:
+                for queue in self._tiers.values():
+                    for jobs in queue.users.values():
+                        dropped.extend(jobs)
+                    queue.users.clear()
+                    queue.queued = 0
+                for job in dropped:
+                    job.queued = False
+                    self._user_queued[job.user_id] -= 1
+                    self._forget_user(job.user_id)
+                self._queued = 0
+                self._cancelled += len(dropped)
+            self._condition.notify_all()
+        for job in dropped:
+            job.future.cancel()
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+generation_scheduler = FairShareScheduler()
+
+
+def _queue_depth():
+    stats = generation_scheduler.stats(all_users=False)
+    return {
+        (tier, state): counts[state]
+        for tier, counts in stats["tiers"].items()
+        for state in ("queued", "running")
+    }
+
+
+metrics_registry.gauge_callback(
+    "bbmodel_scheduler_jobs",
+    "Generation jobs waiting for or holding a worker, per subscription tier",
+    ("tier", "state"),
+    _queue_depth
+)
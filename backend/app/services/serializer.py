@@ -0,0 +1,119 @@
+import gzip
+import json
+import zlib
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+# Content encodings a model can be stored in, mapped to their file suffix
+ENCODING_SUFFIXES = {
+    "identity": "",
+    "gzip": ".gz",
+    "zstd": ".zst"
+}
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON, compact unless `pretty` is set"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def available_encodings() -> Dict[str, bool]:
+    return {
+        "identity": True,
+        "gzip": True,
+        "zstd": zstandard is not None
+    }
+
+
+def resolve_encoding(encoding: Optional[str]) -> str:
+    """Pick the storage encoding, falling back to gzip when zstd is not installed"""
+    encoding = encoding or "identity"
+    if encoding not in ENCODING_SUFFIXES:
+        raise ValueError(f"Unknown model encoding: {encoding}")
+    if encoding == "zstd" and zstandard is None:
+        return "gzip"
+    return encoding
+
+
+def encode(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress serialized bytes with a content encoding"""
+    if encoding == "identity":
+        return data
+    if encoding == "gzip":
+        # mtime=0 keeps output deterministic for identical models
+        return gzip.compress(data, compresslevel=level or 6, mtime=0)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level or 3).compress(data)
+    raise ValueError(f"Unknown model encoding: {encoding}")
+
+
+class _IdentityEncoder:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def encoder(encoding: str, level: Optional[int] = None) -> Any:
+    """Incremental version of encode(): an object with compress(data) and flush()"""
+    if encoding == "identity":
+        return _IdentityEncoder()
+    if encoding == "gzip":
+        # wbits=31 writes a gzip header (with a zero mtime) instead of a zlib one
+        return zlib.compressobj(level or 6, zlib.DEFLATED, 31)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level or 3).compressobj()
+    raise ValueError(f"Unknown model encoding: {encoding}")
+
+
+def decode(data: bytes, encoding: str) -> bytes:
+    """Undo a content encoding"""
+    if encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required to read zstd-encoded models")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown model encoding: {encoding}")
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    """Check whether an Accept-Encoding header allows a content encoding"""
+    if encoding == "identity":
+        return True
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() not in (encoding, "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
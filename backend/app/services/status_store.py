@@ -0,0 +1,237 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+# Statuses that will never change again and can be evicted after retention
+TERMINAL_STATUSES = {"completed", "failed", "cancelled", "timed_out"}
+
+
+class StatusStore(ABC):
+    """Interface for job status backends"""
+
+    @abstractmethod
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def set(self, model_id: str, status: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def update(self, model_id: str, **fields) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete(self, model_id: str):
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryStatusStore(StatusStore):
+    """Per-process LRU store with time-based eviction of terminal states"""
+
+    def __init__(self, max_entries: Optional[int] = None, retention_seconds: Optional[float] = None):
+        self.max_entries = max_entries or settings.STATUS_STORE_MAX_ENTRIES
+        self.retention_seconds = (
+            retention_seconds if retention_seconds is not None else settings.STATUS_RETENTION_SECONDS
+        )
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Terminal entries in expiry order; retention is constant so this stays sorted
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        """Drop terminal entries whose retention window has passed"""
+        while self._expiry:
+            model_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            self._expiry.popitem(last=False)
+            self._entries.pop(model_id, None)
+
+    def _store(self, model_id: str, status: Dict[str, Any], now: float):
+        self._entries[model_id] = status
+        self._entries.move_to_end(model_id)
+        self._expiry.pop(model_id, None)
+        if status.get("status") in TERMINAL_STATUSES:
+            self._expiry[model_id] = now + self.retention_seconds
+
+        # Bound memory even if many jobs are still in flight
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._expiry.pop(evicted, None)
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._expire(time.time())
+            status = self._entries.get(model_id)
+            if status is None:
+                return None
+            # Polled jobs are the ones still wanted; keep them away from eviction
+            self._entries.move_to_end(model_id)
+            return dict(status)
+
+    def set(self, model_id: str, status: Dict[str, Any]):
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            self._store(model_id, dict(status), now)
+
+    def update(self, model_id: str, **fields) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            status = self._entries.get(model_id)
+            if status is None:
+                return None
+            status = {**status, **fields}
+            self._store(model_id, status, now)
+            return dict(status)
+
+    def delete(self, model_id: str):
+        with self._lock:
+            self._entries.pop(model_id, None)
+            self._expiry.pop(model_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.time())
+            return len(self._entries)
+
+
+class SQLiteStatusStore(StatusStore):
+    """Status store shared by every worker process on the host
+
+    Like the memory store it is bounded by `max_entries`: the sweep that
+    drops expired rows also drops the least recently written rows beyond
+    the bound, so the table can overshoot by at most PURGE_INTERVAL rows.
+    """
+
+    # Run the expiry sweep once every this many writes
+    PURGE_INTERVAL = 256
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        retention_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.path = path or settings.STATUS_STORE_PATH
+        self.max_entries = max_entries or settings.STATUS_STORE_MAX_ENTRIES
+        self.retention_seconds = (
+            retention_seconds if retention_seconds is not None else settings.STATUS_RETENTION_SECONDS
+        )
+        self._local = threading.local()
+        # Written from several worker threads; next() on a count is atomic
+        self._writes = itertools.count(1)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_status ("
+            "model_id TEXT PRIMARY KEY, "
+            "data TEXT NOT NULL, "
+            "expires_at REAL, "
+            "updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_job_status_expires_at ON job_status (expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_job_status_updated_at ON job_status (updated_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _expires_at(self, status: Dict[str, Any], now: float) -> Optional[float]:
+        if status.get("status") in TERMINAL_STATUSES:
+            return now + self.retention_seconds
+        return None
+
+    def _maybe_purge(self, conn: sqlite3.Connection, now: float):
+        if next(self._writes) % self.PURGE_INTERVAL == 0:
+            conn.execute("DELETE FROM job_status WHERE expires_at < ?", (now,))
+            # Bound the table even if many jobs are still in flight
+            conn.execute(
+                "DELETE FROM job_status WHERE model_id IN ("
+                "SELECT model_id FROM job_status ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def get(self, model_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM job_status WHERE model_id = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (model_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, model_id: str, status: Dict[str, Any]):
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO job_status (model_id, data, expires_at, updated_at) VALUES (?, ?, ?, ?)",
+            (model_id, json.dumps(status), self._expires_at(status, now), now)
+        )
+        self._maybe_purge(conn, now)
+
+    def update(self, model_id: str, **fields) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._connection()
+        # Serialize read-modify-write across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data FROM job_status WHERE model_id = ?", (model_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = {**json.loads(row[0]), **fields}
+            conn.execute(
+                "UPDATE job_status SET data = ?, expires_at = ?, updated_at = ? WHERE model_id = ?",
+                (json.dumps(status), self._expires_at(status, now), now, model_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._maybe_purge(conn, now)
+        return status
+
+    def delete(self, model_id: str):
+        self._connection().execute("DELETE FROM job_status WHERE model_id = ?", (model_id,))
+
+    def __len__(self) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM job_status WHERE expires_at IS NULL OR expires_at >= ?",
+            (time.time(),)
+        ).fetchone()
+        return row[0]
+
+
+def create_status_store() -> StatusStore:
+    """Create the status store configured by STATUS_STORE_BACKEND"""
+    backend = settings.STATUS_STORE_BACKEND
+    if backend == "memory":
+        return MemoryStatusStore()
+    if backend == "sqlite":
+        return SQLiteStatusStore()
+    raise ValueError(f"Unknown status store backend: {backend}")
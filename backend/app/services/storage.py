@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from app.core.config import settings
+from app.services import serializer
+
+MODEL_SUFFIX = ".bbmodel"
+META_SUFFIX = ".meta.json"
+PREVIEW_SUFFIX = "_preview.png"
+# Reduced-detail copies are stored as models of their own under "<model_id>.lod<level>"
+LOD_INFIX = ".lod"
+
+
+def lod_key(model_id: str, level: int) -> str:
+    return f"{model_id}{LOD_INFIX}{level}"
+
+
+def write_atomic(path: str, data: bytes):
+    """Write a file so readers never observe a partial one"""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def mark_used(path: str) -> bool:
+    """Refresh a cached file's mtime for evict_lru, returning False if it does not exist"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def evict_lru(directory: str, max_bytes: int, suffixes: Tuple[str, ...], keep: Optional[str] = None):
+    """Delete the least recently used files ending in `suffixes` until they fit in max_bytes
+
+    Files are ordered by mtime, which mark_used refreshes on cache hits.
+    `keep` (usually the file just written) is never deleted.
+    """
+    entries = []
+    with os.scandir(directory) as scan:
+        for entry in scan:
+            if entry.name.endswith(suffixes) and not entry.name.startswith("."):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+class ModelStorage:
+    """Stores serialized bbmodels in MODELS_DIR along with encoding metadata"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        # Resolved lazily so tests and tools can repoint settings.MODELS_DIR
+        directory = self._directory or settings.MODELS_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _meta_path(self, model_id: str) -> str:
+        return os.path.join(self.directory, f"{model_id}{META_SUFFIX}")
+
+    def _model_path(self, model_id: str, encoding: str) -> str:
+        suffix = serializer.ENCODING_SUFFIXES[encoding]
+        return os.path.join(self.directory, f"{model_id}{MODEL_SUFFIX}{suffix}")
+
+    def save(
+        self,
+        model_id: str,
+        bbmodel: Dict[str, Any],
+        encoding: Optional[str] = None,
+        pretty: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Serialize and store a model, returning its metadata"""
+        pretty = settings.MODEL_PRETTY_JSON if pretty is None else pretty
+        return self.save_bytes(model_id, serializer.dumps(bbmodel, pretty=pretty), encoding, pretty)
+
+    def save_bytes(
+        self,
+        model_id: str,
+        data: bytes,
+        encoding: Optional[str] = None,
+        pretty: bool = False
+    ) -> Dict[str, Any]:
+        """Store already-serialized model JSON"""
+        encoding = serializer.resolve_encoding(encoding or settings.MODEL_STORAGE_ENCODING)
+        stored = serializer.encode(data, encoding)
+        write_atomic(self._model_path(model_id, encoding), stored)
+        return self._commit(model_id, encoding, pretty, len(data), len(stored), hashlib.sha256(data).hexdigest())
+
+    def save_stream(
+        self,
+        model_id: str,
+        chunks: Iterable[bytes],
+        encoding: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store model JSON produced piece by piece, without holding all of it in memory
+
+        The file only replaces a stored model once every chunk has been
+        written; if the iterable raises, nothing is kept.
+        """
+        encoding = serializer.resolve_encoding(encoding or settings.MODEL_STORAGE_ENCODING)
+        encoder = serializer.encoder(encoding)
+        digest = hashlib.sha256()
+        size = 0
+        stored_size = 0
+        path = self._model_path(model_id, encoding)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    stored = encoder.compress(chunk)
+                    stored_size += len(stored)
+                    f.write(stored)
+                stored = encoder.flush()
+                stored_size += len(stored)
+                f.write(stored)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self._commit(model_id, encoding, False, size, stored_size, digest.hexdigest())
+
+    def _commit(
+        self,
+        model_id: str,
+        encoding: str,
+        pretty: bool,
+        size: int,
+        stored_size: int,
+        content_hash: str
+    ) -> Dict[str, Any]:
+        """Write the metadata of a just-stored model file"""
+        # Drop copies left behind under a previously configured encoding
+        for other in serializer.ENCODING_SUFFIXES:
+            other_path = self._model_path(model_id, other)
+            if other != encoding and os.path.exists(other_path):
+                os.remove(other_path)
+
+        meta = {
+            "model_id": model_id,
+            "encoding": encoding,
+            "pretty": pretty,
+            "size": size,
+            "stored_size": stored_size,
+            "content_hash": content_hash
+        }
+        write_atomic(self._meta_path(model_id), json.dumps(meta).encode("utf-8"))
+        return meta
+
+    def get_meta(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """Get storage metadata, inferring it for files written before metadata existed"""
+        try:
+            with open(self._meta_path(model_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+
+        path = self._model_path(model_id, "identity")
+        if not os.path.exists(path):
+            return None
+        return {"model_id": model_id, "encoding": "identity", "size": os.path.getsize(path)}
+
+    def content_hash(self, model_id: str) -> Optional[str]:
+        """SHA-256 of a model's JSON, hashing the file if its metadata predates content hashes"""
+        meta = self.get_meta(model_id)
+        if meta is None:
+            return None
+        if "content_hash" in meta:
+            return meta["content_hash"]
+        data = self.load_bytes(model_id)
+        return hashlib.sha256(data).hexdigest() if data is not None else None
+
+    def path(self, model_id: str) -> Optional[str]:
+        """Path of the stored (possibly compressed) file"""
+        meta = self.get_meta(model_id)
+        if meta is None:
+            return None
+        path = self._model_path(model_id, meta["encoding"])
+        return path if os.path.exists(path) else None
+
+    def exists(self, model_id: str) -> bool:
+        return self.path(model_id) is not None
+
+    def load_bytes(self, model_id: str) -> Optional[bytes]:
+        """Read a model's JSON bytes, undoing any storage encoding"""
+        meta = self.get_meta(model_id)
+        path = self.path(model_id)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return serializer.decode(f.read(), meta["encoding"])
+
+    def load(self, model_id: str) -> Optional[Dict[str, Any]]:
+        data = self.load_bytes(model_id)
+        return serializer.loads(data) if data is not None else None
+
+    def preview_path(self, model_id: str) -> str:
+        return os.path.join(self.directory, f"{model_id}{PREVIEW_SUFFIX}")
+
+    def save_preview(self, model_id: str, png: bytes):
+        write_atomic(self.preview_path(model_id), png)
+
+    def lod_levels(self, model_id: str) -> Iterator[int]:
+        """Yield the level of every stored LOD of a model"""
+        prefix = f"{model_id}{LOD_INFIX}"
+        for filename in os.listdir(self.directory):
+            if filename.startswith(prefix) and filename.endswith(META_SUFFIX):
+                level = filename[len(prefix):-len(META_SUFFIX)]
+                if level.isdigit():
+                    yield int(level)
+
+    def delete_lods(self, model_id: str):
+        for level in list(self.lod_levels(model_id)):
+            self.delete(lod_key(model_id, level))
+
+    def delete(self, model_id: str):
+        if LOD_INFIX not in model_id:
+            self.delete_lods(model_id)
+        for encoding in serializer.ENCODING_SUFFIXES:
+            path = self._model_path(model_id, encoding)
+            if os.path.exists(path):
+                os.remove(path)
+        for path in (self._meta_path(model_id), self.preview_path(model_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def iter_model_ids(self) -> Iterator[str]:
+        """Yield the id of every stored model, not counting LODs"""
+        for filename in os.listdir(self.directory):
+            for suffix in serializer.ENCODING_SUFFIXES.values():
+                if filename.endswith(MODEL_SUFFIX + suffix) and not filename.startswith(".") and LOD_INFIX not in filename:
+                    yield filename[:-len(MODEL_SUFFIX + suffix)]
+                    break
+
+
+model_storage = ModelStorage()
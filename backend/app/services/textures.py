@@ -0,0 +1,219 @@
+import base64
+import hashlib
+import io
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.geometry import CubeArray
+from app.services.prompt_analyzer import COLOR_WORDS, analyze_prompt
+from app.services.result_cache import ResultCache
+from app.services.storage import write_atomic
+
+# Bump whenever rendered textures change so cached PNGs are not reused
+TEXTURE_VERSION = "1"
+
+# Palettes used when a prompt names no colours
+DEFAULT_PALETTES = {
+    "character": [(90, 140, 200), (230, 190, 150), (70, 70, 90)],
+    "animal": [(150, 105, 65), (200, 160, 110), (80, 55, 35)],
+    "vehicle": [(180, 50, 50), (170, 200, 220), (40, 40, 45)],
+    "basic": [(140, 140, 140), (180, 180, 180), (90, 90, 90)]
+}
+
+# Palette slot used for cubes whose name contains one of these words
+PART_SLOTS = {
+    "head": 1,
+    "cabin": 1,
+    "tail": 1,
+    "arm": 2,
+    "leg": 2,
+    "wheel": 3
+}
+
+# Baked lighting per face, in FACE_NAMES order
+FACE_SHADES = np.array([0.85, 0.75, 0.85, 0.75, 1.0, 0.6])
+
+
+def palette_from_prompt(prompt: str, model_type: str) -> List[Tuple[int, int, int]]:
+    """Pick base colours for a model: colours named in the prompt, in order, then defaults"""
+    named = []
+    for name in analyze_prompt(prompt).colors:
+        if COLOR_WORDS[name] not in named:
+            named.append(COLOR_WORDS[name])
+
+    palette = named + DEFAULT_PALETTES.get(model_type, DEFAULT_PALETTES["basic"])
+    primary, secondary, accent = palette[0], palette[1], palette[2]
+    # The last slot is a dark trim colour derived from the primary one
+    dark = tuple(int(channel * 0.35) for channel in primary)
+    return [primary, secondary, accent, dark]
+
+
+def part_slots(names: Sequence[str]) -> np.ndarray:
+    """Palette slot of every cube, chosen from its name"""
+    slots = np.zeros(len(names), dtype=np.int64)
+    for index, name in enumerate(names):
+        for word, slot in PART_SLOTS.items():
+            if word in name:
+                slots[index] = slot
+                break
+    return slots
+
+
+def value_noise(height: int, width: int, cell: int, rng: np.random.Generator) -> np.ndarray:
+    """Smooth noise in [-1, 1] from a random lattice interpolated every `cell` texels"""
+    lattice = rng.random((height // cell + 2, width // cell + 2), dtype=np.float32) * 2 - 1
+    y = np.arange(height, dtype=np.float32) / cell
+    x = np.arange(width, dtype=np.float32) / cell
+    y0 = y.astype(np.int64)
+    x0 = x.astype(np.int64)
+    # Smoothstep weights hide the lattice grid
+    fy = (y - y0) ** 2 * (3 - 2 * (y - y0))
+    fx = (x - x0) ** 2 * (3 - 2 * (x - x0))
+    # Interpolate along x on the lattice rows first, then expand to every row
+    rows = lattice[:, x0] * (1 - fx) + lattice[:, x0 + 1] * fx
+    return rows[y0] * (1 - fy[:, None]) + rows[y0 + 1] * fy[:, None]
+
+
+def render_atlas(
+    width: int,
+    height: int,
+    rects: np.ndarray,
+    colors: np.ndarray,
+    shades: np.ndarray,
+    seed: int
+) -> np.ndarray:
+    """Paint face rectangles with noisy palette fills, returning an RGBA image array
+
+    `rects` holds (x1, y1, x2, y2) texel bounds per face, `colors` the RGB
+    base colour and `shades` the lighting factor of each face. Texels not
+    covered by any face stay transparent.
+    """
+    # Label every texel with the face it belongs to; the loop only slices
+    label = np.full((height, width), -1, dtype=np.int32)
+    for index, (x1, y1, x2, y2) in enumerate(rects.tolist()):
+        label[y1:y2, x1:x2] = index
+    covered = label >= 0
+    face = np.where(covered, label, 0)
+
+    rng = np.random.default_rng(seed)
+    shading = shades.astype(np.float32)[face]
+    shading *= 1 + 0.10 * value_noise(height, width, 8, rng)
+    shading *= 1 + 0.05 * (rng.random((height, width), dtype=np.float32) * 2 - 1)
+
+    # Darken the outermost texels of each face to outline it
+    edge = np.zeros((height, width), dtype=bool)
+    edge[1:, :] |= label[1:, :] != label[:-1, :]
+    edge[:-1, :] |= label[:-1, :] != label[1:, :]
+    edge[:, 1:] |= label[:, 1:] != label[:, :-1]
+    edge[:, :-1] |= label[:, :-1] != label[:, 1:]
+    shading[edge] *= 0.8
+
+    image = np.empty((height, width, 4), dtype=np.uint8)
+    image[..., :3] = np.clip(colors.astype(np.float32)[face] * shading[..., None], 0, 255)
+    image[..., 3] = covered * np.uint8(255)
+    return image
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    Image.fromarray(image, "RGBA").save(buffer, format="PNG", compress_level=settings.TEXTURE_PNG_COMPRESSION)
+    return buffer.getvalue()
+
+
+class TextureGenerator:
+    """Renders procedural atlas textures and caches the encoded PNGs by content"""
+
+    def __init__(self, cache: Optional[ResultCache] = None, directory: Optional[str] = None):
+        self.cache = cache or ResultCache(settings.TEXTURE_CACHE_MAX_BYTES)
+        self._directory = directory
+
+    @property
+    def directory(self) -> str:
+        directory = self._directory or settings.TEXTURES_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def _layout(self, cubes: CubeArray, palette: Sequence[Tuple[int, int, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Texel rectangles, base colours and shades of every present face"""
+        cube_index, face_index = np.nonzero(cubes.data["has_face"])
+        uv = cubes.data["uv"][cube_index, face_index]
+        rects = np.stack([
+            np.floor(np.minimum(uv[:, 0], uv[:, 2])),
+            np.floor(np.minimum(uv[:, 1], uv[:, 3])),
+            np.ceil(np.maximum(uv[:, 0], uv[:, 2])),
+            np.ceil(np.maximum(uv[:, 1], uv[:, 3]))
+        ], axis=1).astype(np.int64)
+        colors = np.asarray(palette, dtype=np.float64)[part_slots(cubes.names)[cube_index]]
+        return rects, colors, FACE_SHADES[face_index]
+
+    def texture_key(self, rects: np.ndarray, colors: np.ndarray, resolution: Tuple[int, int]) -> str:
+        """Content address of a texture: its palette fills and atlas layout"""
+        digest = hashlib.sha256()
+        digest.update(f"{TEXTURE_VERSION}:{resolution[0]}x{resolution[1]}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(rects, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(colors, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def generate(
+        self,
+        cubes: CubeArray,
+        palette: Sequence[Tuple[int, int, int]],
+        resolution: Tuple[int, int]
+    ) -> Tuple[str, bytes]:
+        """Get the (key, PNG bytes) of the atlas texture for the cubes' current UVs"""
+        rects, colors, shades = self._layout(cubes, palette)
+        rects[:, [0, 2]] = np.clip(rects[:, [0, 2]], 0, resolution[0])
+        rects[:, [1, 3]] = np.clip(rects[:, [1, 3]], 0, resolution[1])
+        key = self.texture_key(rects, colors, resolution)
+
+        png = self.cache.get(key)
+        if png is None:
+            # Noise is seeded by the key so a texture always renders the same
+            image = render_atlas(resolution[0], resolution[1], rects, colors, shades, int(key[:16], 16))
+            png = encode_png(image)
+            self.cache.put(key, png)
+        return key, png
+
+    def save(self, key: str, png: bytes) -> str:
+        """Write a texture to TEXTURES_DIR once, returning its path"""
+        path = os.path.join(self.directory, f"{key}.png")
+        if not os.path.exists(path):
+            write_atomic(path, png)
+        return path
+
+    def texture_entry(self, key: str, png: bytes, texture_uuid: str, embed: bool = True) -> Dict[str, Any]:
+        """bbmodel `textures` entry for a generated atlas
+
+        Without `embed` the entry links the atlas stored by save() through
+        `relative_path`, which Blockbench resolves against the model file.
+        """
+        entry = {
+            "path": "",
+            "name": f"{key[:16]}.png",
+            "folder": "",
+            "namespace": "",
+            "id": "0",
+            "particle": False,
+            "render_mode": "default",
+            "visible": True,
+            "mode": "bitmap",
+            "saved": True,
+            "uuid": texture_uuid
+        }
+        if embed:
+            entry["source"] = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+        else:
+            path = os.path.join(self.directory, f"{key}.png")
+            entry["relative_path"] = os.path.relpath(path, settings.MODELS_DIR).replace(os.sep, "/")
+        return entry
+
+
+def texture_url(key: str) -> str:
+    return f"/static/textures/{key}.png"
+
+
+texture_generator = TextureGenerator()
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.services.geometry import FACE_INDEX, CubeArray
+
+# Cube axes spanned by each face's UV rectangle (horizontal, vertical)
+_FACE_AXES = np.array([
+    (0, 1),  # north
+    (2, 1),  # east
+    (0, 1),  # south
+    (2, 1),  # west
+    (0, 2),  # up
+    (0, 2)   # down
+])
+
+# Largest atlas edge the packer will produce
+MAX_ATLAS_SIZE = 8192
+
+
+def next_power_of_two(value: float) -> int:
+    return 1 << max(int(np.ceil(value)) - 1, 0).bit_length()
+
+
+def face_sizes(cubes: CubeArray, texel_density: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Pixel size of every present face, as (cube index, face index, widths, heights)"""
+    cube_index, face_index = np.nonzero(cubes.data["has_face"])
+    extents = np.abs(cubes.data["to"] - cubes.data["from"])[cube_index]
+    axes = _FACE_AXES[face_index]
+    # Every face gets at least one texel, even when the cube is flat
+    widths = np.maximum(np.ceil(extents[np.arange(len(axes)), axes[:, 0]] * texel_density - 1e-9), 1).astype(np.int64)
+    heights = np.maximum(np.ceil(extents[np.arange(len(axes)), axes[:, 1]] * texel_density - 1e-9), 1).astype(np.int64)
+    return cube_index, face_index, widths, heights
+
+
+def _window_max(skyline: np.ndarray, width: int) -> np.ndarray:
+    """Highest skyline point under every placement of a `width` wide rectangle
+
+    Uses doubling (as in a sparse table) so each rectangle costs log(width)
+    NumPy passes over the skyline rather than a Python loop over positions.
+    """
+    result = skyline
+    span = 1
+    while span * 2 <= width:
+        result = np.maximum(result[:-span], result[span:])
+        span *= 2
+    if span < width:
+        shift = width - span
+        result = np.maximum(result[:-shift], result[shift:])
+    return result
+
+
+def _skyline_pack(widths: np.ndarray, heights: np.ndarray, atlas_width: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Bottom-left skyline packing into a fixed width, returning positions and used height"""
+    skyline = np.zeros(atlas_width, dtype=np.int64)
+    x = np.zeros(len(widths), dtype=np.int64)
+    y = np.zeros(len(widths), dtype=np.int64)
+    # Tall rectangles first, then wide ones, keeps the skyline flat
+    order = np.lexsort((-widths, -heights))
+    for index in order.tolist():
+        width = int(widths[index])
+        tops = _window_max(skyline, width)
+        left = int(tops.argmin())
+        top = int(tops[left])
+        x[index] = left
+        y[index] = top
+        skyline[left:left + width] = top + int(heights[index])
+    return x, y, int(skyline.max(initial=0))
+
+
+def pack_rectangles(widths: np.ndarray, heights: np.ndarray, padding: int = 0) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """Pack rectangles into the smallest power-of-two atlas found
+
+    Returns the x and y of every rectangle and the atlas width and height.
+    `padding` texels are kept free to the right of and below each rectangle.
+    """
+    widths = np.asarray(widths, dtype=np.int64) + padding
+    heights = np.asarray(heights, dtype=np.int64) + padding
+    if not len(widths):
+        return widths, heights, 16, 16
+
+    area = int((widths * heights).sum())
+    atlas_width = max(next_power_of_two(np.sqrt(area)), next_power_of_two(widths.max()), 16)
+    best = None
+    while atlas_width <= MAX_ATLAS_SIZE:
+        x, y, used = _skyline_pack(widths, heights, atlas_width)
+        atlas_height = max(next_power_of_two(used), 16)
+        # Prefer the smaller atlas, and the squarer one when areas tie
+        score = (atlas_width * atlas_height, max(atlas_width, atlas_height))
+        if best is None or score < best[0]:
+            best = (score, x, y, atlas_width, atlas_height)
+        # A wider atlas can only help while this one came out taller than wide
+        if atlas_height <= atlas_width:
+            break
+        atlas_width *= 2
+
+    if best is None or best[4] > MAX_ATLAS_SIZE:
+        raise ValueError(f"Faces do not fit in a {MAX_ATLAS_SIZE}x{MAX_ATLAS_SIZE} atlas")
+    _, x, y, atlas_width, atlas_height = best
+    return x, y, atlas_width, atlas_height
+
+
+def pack_uvs(cubes: CubeArray, texel_density: float = 1.0, padding: int = 0) -> Tuple[int, int]:
+    """Give every present face of the cubes its own atlas rectangle, in place
+
+    Returns the atlas (width, height) that the model resolution should use.
+    """
+    cube_index, face_index, widths, heights = face_sizes(cubes, texel_density)
+    x, y, atlas_width, atlas_height = pack_rectangles(widths, heights, padding)
+    cubes.data["uv"][cube_index, face_index] = np.stack([x, y, x + widths, y + heights], axis=1)
+    return atlas_width, atlas_height
+
+
+def pack_model_uvs(bbmodel: Dict[str, Any], texel_density: float = 1.0, padding: int = 0) -> Tuple[int, int]:
+    """Repack the face UVs of a bbmodel's cube elements and update its resolution, in place
+
+    Works on any bbmodel dict (generated or imported); elements other than
+    cubes are left untouched.
+    """
+    elements: List[Dict[str, Any]] = [
+        element for element in bbmodel.get("elements", []) if element.get("type", "cube") == "cube"
+    ]
+    cubes = CubeArray.from_elements(elements)
+    atlas_width, atlas_height = pack_uvs(cubes, texel_density, padding)
+
+    uvs = cubes.data["uv"].tolist()
+    present = cubes.data["has_face"]
+    for index, element in enumerate(elements):
+        for name, face in element.get("faces", {}).items():
+            face_index = FACE_INDEX.get(name)
+            if face_index is not None and present[index, face_index]:
+                face["uv"] = uvs[index][face_index]
+    bbmodel["resolution"] = {"width": atlas_width, "height": atlas_height}
+    return atlas_width, atlas_height
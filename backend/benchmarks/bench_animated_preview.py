@@ -0,0 +1,59 @@
+"""Time animated preview rendering against rebuilding the scene every frame.
+
+Renders the generated animations of each archetype with shared face
+buffers (render_frames) and with a full render_image-style rebuild per
+frame, then times GIF and APNG encoding. Run from the backend directory:
+
+    python -m benchmarks.bench_animated_preview --size 128 --fps 12
+"""
+import argparse
+import tempfile
+import time
+
+from app.services.animated_preview import encode_animation, find_animation, render_frames
+from app.services.model_generator import ModelGenerator
+from app.services.renderer import Scene, view_basis
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+
+
+def rebuild_each_frame(bbmodel, animation, size, fps):
+    """Baseline: prepare the scene (parsing and texture decoding) once per frame"""
+    frames = render_frames(bbmodel, animation, size, fps)
+    basis = view_basis()
+    for _ in frames:
+        scene = Scene(bbmodel)
+        scene.rasterize(scene.corners, scene.normals, size, basis, scene.fit([scene.corners], size, basis))
+    return frames
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=128)
+    parser.add_argument("--fps", type=float, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(64 * 1024 * 1024), directory))
+        for model_type, animation_type in (("character", "walk"), ("animal", "idle"), ("character", "attack")):
+            bbmodel = generator._generate_mock_bbmodel("a red knight", model_type, animation_type, "bench", seed=1)
+            animation = find_animation(bbmodel)
+            shared, frames = timed(render_frames, bbmodel, animation, args.size, args.fps)
+            rebuilt, _ = timed(rebuild_each_frame, bbmodel, animation, args.size, args.fps)
+            gif, _ = timed(encode_animation, frames, args.fps, "gif")
+            apng, _ = timed(encode_animation, frames, args.fps, "apng")
+            print(
+                f"{model_type:>9s} {animation_type:<6s} {len(frames):3d} frames: "
+                f"shared={shared * 1000:6.1f}ms  per-frame rebuild={(rebuilt - shared) * 1000:6.1f}ms  "
+                f"gif={gif * 1000:5.1f}ms  apng={apng * 1000:5.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
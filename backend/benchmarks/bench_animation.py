@@ -0,0 +1,85 @@
+"""Time animation baking: vectorized ChannelSet vs a per-frame Python loop.
+
+The loop is the straightforward implementation (bisect per animator, per
+channel, per frame) that the engine replaces. Run from the backend directory:
+
+    python -m benchmarks.bench_animation --animators 50 500 --fps 60
+"""
+import argparse
+import bisect
+import random
+import time
+
+import numpy as np
+
+from app.services.animation import ChannelSet, frame_times
+
+
+def synthetic_animation(animators: int, keys: int, length: float, seed: int = 0):
+    rng = random.Random(seed)
+    return {
+        "length": length,
+        "animators": {
+            f"bone-{index}": {
+                channel: {
+                    str(round(length * k / (keys - 1), 4)): [rng.uniform(-90, 90) for _ in range(3)]
+                    for k in range(keys)
+                }
+                for channel in ("rotation", "position")
+            }
+            for index in range(animators)
+        }
+    }
+
+
+def bake_loop(animation, times):
+    result = {}
+    for target, animator in animation["animators"].items():
+        for channel, keys in animator.items():
+            key_times = sorted(float(t) for t in keys)
+            key_values = [keys[t] for t in sorted(keys, key=float)]
+            samples = []
+            for t in times:
+                i = bisect.bisect_right(key_times, t) - 1
+                if i < 0:
+                    samples.append(key_values[0])
+                elif i >= len(key_times) - 1:
+                    samples.append(key_values[-1])
+                else:
+                    a = (t - key_times[i]) / (key_times[i + 1] - key_times[i])
+                    samples.append([p + (q - p) * a for p, q in zip(key_values[i], key_values[i + 1])])
+            result[(target, channel)] = samples
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--animators", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--keys", type=int, default=5)
+    parser.add_argument("--length", type=float, default=2.0)
+    parser.add_argument("--fps", type=float, default=60)
+    args = parser.parse_args()
+
+    times = frame_times(args.length, args.fps)
+    for count in args.animators:
+        animation = synthetic_animation(count, args.keys, args.length)
+
+        start = time.perf_counter()
+        expected = bake_loop(animation, times)
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        channels = ChannelSet.from_animation(animation)
+        values = channels.evaluate(times)
+        vectorized = time.perf_counter() - start
+
+        reference = np.array([expected[target] for target in channels.targets])
+        assert np.allclose(values, reference)
+        print(
+            f"{count:5d} animators x {len(times)} frames: loop={loop * 1000:8.1f}ms  "
+            f"vectorized={vectorized * 1000:7.1f}ms  speedup={loop / vectorized:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
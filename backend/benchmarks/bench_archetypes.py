@@ -0,0 +1,180 @@
+"""Compare per-model element generation: legacy dict literals vs archetype templates.
+
+    python -m benchmarks.bench_archetypes --models 20000
+"""
+import argparse
+import time
+import uuid
+from typing import Any, Dict, List
+
+from app.services.archetypes import archetype_registry
+
+
+def legacy_character_elements() -> List[Dict[str, Any]]:
+    """Literal-building generator as it existed before archetype templates"""
+    elements = []
+
+    # Head
+    head_uuid = str(uuid.uuid4())
+    elements.append({
+        "name": "head",
+        "uuid": head_uuid,
+        "type": "cube",
+        "from": [-4, 24, -4],
+        "to": [4, 32, 4],
+        "autouv": 1,
+        "color": 0,
+        "origin": [0, 24, 0],
+        "faces": {
+            "north": {"uv": [0, 0, 8, 8], "texture": 0},
+            "east": {"uv": [8, 0, 16, 8], "texture": 0},
+            "south": {"uv": [16, 0, 24, 8], "texture": 0},
+            "west": {"uv": [24, 0, 32, 8], "texture": 0},
+            "up": {"uv": [8, 0, 16, 8], "texture": 0},
+            "down": {"uv": [16, 0, 24, 8], "texture": 0}
+        }
+    })
+
+    # Body
+    body_uuid = str(uuid.uuid4())
+    elements.append({
+        "name": "body",
+        "uuid": body_uuid,
+        "type": "cube",
+        "from": [-4, 12, -2],
+        "to": [4, 24, 2],
+        "autouv": 1,
+        "color": 1,
+        "origin": [0, 12, 0],
+        "faces": {
+            "north": {"uv": [0, 8, 8, 20], "texture": 0},
+            "east": {"uv": [8, 8, 12, 20], "texture": 0},
+            "south": {"uv": [12, 8, 20, 20], "texture": 0},
+            "west": {"uv": [20, 8, 24, 20], "texture": 0},
+            "up": {"uv": [8, 8, 16, 12], "texture": 0},
+            "down": {"uv": [16, 8, 24, 12], "texture": 0}
+        }
+    })
+
+    # Left Arm
+    left_arm_uuid = str(uuid.uuid4())
+    elements.append({
+        "name": "left_arm",
+        "uuid": left_arm_uuid,
+        "type": "cube",
+        "from": [4, 12, -2],
+        "to": [8, 24, 2],
+        "autouv": 1,
+        "color": 2,
+        "origin": [4, 22, 0],
+        "faces": {
+            "north": {"uv": [32, 0, 36, 12], "texture": 0},
+            "east": {"uv": [36, 0, 40, 12], "texture": 0},
+            "south": {"uv": [40, 0, 44, 12], "texture": 0},
+            "west": {"uv": [44, 0, 48, 12], "texture": 0},
+            "up": {"uv": [32, 0, 36, 4], "texture": 0},
+            "down": {"uv": [36, 0, 40, 4], "texture": 0}
+        }
+    })
+
+    # Right Arm
+    right_arm_uuid = str(uuid.uuid4())
+    elements.append({
+        "name": "right_arm",
+        "uuid": right_arm_uuid,
+        "type": "cube",
+        "from": [-8, 12, -2],
+        "to": [-4, 24, 2],
+        "autouv": 1,
+        "color": 3,
+        "origin": [-4, 22, 0],
+        "faces": {
+            "north": {"uv": [48, 0, 52, 12], "texture": 0},
+            "east": {"uv": [52, 0, 56, 12], "texture": 0},
+            "south": {"uv": [56, 0, 60, 12], "texture": 0},
+            "west": {"uv": [60, 0, 64, 12], "texture": 0},
+            "up": {"uv": [48, 0, 52, 4], "texture": 0},
+            "down": {"uv": [52, 0, 56, 4], "texture": 0}
+        }
+    })
+
+    # Left Leg
+    left_leg_uuid = str(uuid.uuid4())
+    elements.append({
+        "name": "left_leg",
+        "uuid": left_leg_uuid,
+        "type": "cube",
+        "from": [0, 0, -2],
+        "to": [4, 12, 2],
+        "autouv": 1,
+        "color": 4,
+        "origin": [0, 12, 0],
+        "faces": {
+            "north": {"uv": [0, 20, 4, 32], "texture": 0},
+            "east": {"uv": [4, 20, 8, 32], "texture": 0},
+            "south": {"uv": [8, 20, 12, 32], "texture": 0},
+            "west": {"uv": [12, 20, 16, 32], "texture": 0},
+            "up": {"uv": [0, 20, 4, 24], "texture": 0},
+            "down": {"uv": [4, 20, 8, 24], "texture": 0}
+        }
+    })
+
+    # Right Leg
+    right_leg_uuid = str(uuid.uuid4())
+    elements.append({
+        "name": "right_leg",
+        "uuid": right_leg_uuid,
+        "type": "cube",
+        "from": [-4, 0, -2],
+        "to": [0, 12, 2],
+        "autouv": 1,
+        "color": 5,
+        "origin": [0, 12, 0],
+        "faces": {
+            "north": {"uv": [16, 20, 20, 32], "texture": 0},
+            "east": {"uv": [20, 20, 24, 32], "texture": 0},
+            "south": {"uv": [24, 20, 28, 32], "texture": 0},
+            "west": {"uv": [28, 20, 32, 32], "texture": 0},
+            "up": {"uv": [16, 20, 20, 24], "texture": 0},
+            "down": {"uv": [20, 20, 24, 24], "texture": 0}
+        }
+    })
+
+    return elements
+
+
+def _legacy_with_outliner():
+    elements = legacy_character_elements()
+    outliner = [{"uuid": element["uuid"], "name": element["name"]} for element in elements]
+    return elements, outliner
+
+
+def _template():
+    cubes = archetype_registry.instantiate("character")
+    return cubes.to_elements(), cubes.outliner()
+
+
+def _time(fn, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Load templates outside the timed region, as a warm worker would
+    archetype_registry.get("character")
+
+    legacy = _time(_legacy_with_outliner, args.models)
+    template = _time(_template, args.models)
+    print(f"legacy literals : {legacy * 1e6:8.2f} us/model")
+    print(f"templates       : {template * 1e6:8.2f} us/model")
+    print(f"speedup         : {legacy / template:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
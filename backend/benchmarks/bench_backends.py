@@ -0,0 +1,80 @@
+"""Measure startup time and first-request latency of each generator backend.
+
+Every backend is measured in a fresh interpreter so imports start cold:
+once loaded at startup (GENERATOR_BACKEND_PRELOAD=1) and once lazily by
+the first request. Reports the API import time, the backend's own import
+and load time, the first inference and the steady-state inference latency.
+Run from the backend directory:
+
+    python -m benchmarks.bench_backends --backends mock local
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROMPTS = ["a tall red knight", "a small brown dog", "a huge blue fire truck", "a tiny green robot"]
+
+
+def measure(preload: bool) -> dict:
+    """Run inside the child interpreter"""
+    start = time.perf_counter()
+    import app.main  # noqa: F401  (the API import path)
+    from app.services.backends import backend_pool
+    api_import = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if preload:
+        backend_pool.warm()
+    startup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backend_pool.infer(PROMPTS[0], "character")
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index in range(100):
+        backend_pool.infer(PROMPTS[index % len(PROMPTS)], "character")
+    steady = (time.perf_counter() - start) / 100
+
+    stats = backend_pool.stats()
+    return {
+        "api_import": api_import,
+        "startup": startup,
+        "backend_import": stats["import_seconds"],
+        "load": sum(stats["load_seconds"]),
+        "first": first,
+        "steady": steady
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=["mock", "local"])
+    parser.add_argument("--child", choices=["preload", "lazy"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child == "preload")))
+        return
+
+    print(f"{'backend':<8} {'mode':<8} {'api ms':>8} {'startup ms':>11} {'import ms':>10} "
+          f"{'load ms':>8} {'first ms':>9} {'steady ms':>10}")
+    for backend in args.backends:
+        for mode in ("preload", "lazy"):
+            # No simulated stage delay, so the mock shows only its own overhead
+            env = dict(os.environ, GENERATOR_BACKEND=backend, GENERATION_STAGE_DELAY="0")
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_backends", "--child", mode],
+                env=env, capture_output=True, check=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{backend:<8} {mode:<8} {result['api_import'] * 1000:>8.1f} {result['startup'] * 1000:>11.1f} "
+                  f"{result['backend_import'] * 1000:>10.1f} {result['load'] * 1000:>8.1f} "
+                  f"{result['first'] * 1000:>9.2f} {result['steady'] * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
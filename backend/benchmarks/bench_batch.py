@@ -0,0 +1,63 @@
+"""Compare N single generations against one batch job of N variants.
+
+Both sides run the generator directly with a fresh result cache, so the
+numbers reflect pipeline work only (no HTTP or database). Run from the
+backend directory:
+
+    python -m benchmarks.bench_batch --variants 10 50 --delay 0.01
+"""
+import argparse
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+
+
+def _generator(directory: str) -> ModelGenerator:
+    return ModelGenerator(
+        status_store=MemoryStatusStore(),
+        storage=ModelStorage(directory),
+        cache=ResultCache()
+    )
+
+
+def _time_singles(count: int, directory: str) -> float:
+    generator = _generator(directory)
+    start = time.perf_counter()
+    for index in range(count):
+        # Distinct seeds stand in for N different variant requests
+        generator.generate_model("bench robot", f"single-{index}", "character", "walk", seed=index)
+    return time.perf_counter() - start
+
+
+def _time_batch(count: int, directory: str) -> float:
+    generator = _generator(directory)
+    variants = [{"model_id": f"batch-{index}", "prompt": "bench robot", "variant": index} for index in range(count)]
+    start = time.perf_counter()
+    generator.generate_batch("bench-batch", variants, "character", "walk", seed=1)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--variants", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--delay", type=float, default=0.01, help="seconds per simulated stage unit")
+    args = parser.parse_args()
+
+    settings.GENERATION_STAGE_DELAY = args.delay
+    for count in args.variants:
+        with tempfile.TemporaryDirectory(prefix="bench-models-") as directory:
+            singles = _time_singles(count, directory)
+            batch = _time_batch(count, directory)
+        print(
+            f"{count:4d} variants: singles={singles * 1000:8.1f}ms  batch={batch * 1000:8.1f}ms  "
+            f"speedup={singles / batch:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
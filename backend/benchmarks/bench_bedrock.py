@@ -0,0 +1,59 @@
+"""Time Bedrock conversion and bulk archiving of generated models.
+
+Converts a mix of character, animal and vehicle models (each with its
+animation and embedded texture) to geo.json/animation.json, alone and
+streamed into a zip archive as the bulk export endpoint does. Reports
+models per minute on one core. Run from the backend directory:
+
+    python -m benchmarks.bench_bedrock --models 1000
+"""
+import argparse
+import tempfile
+import time
+
+from app.services.bedrock import iter_bedrock_archive, to_bedrock
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+from app.services import serializer
+
+ARCHETYPES = (("character", "walk"), ("animal", "idle"), ("vehicle", None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(64 * 1024 * 1024), directory))
+        # Stored models are read back from JSON, so convert parsed copies
+        templates = [
+            serializer.loads(serializer.dumps(
+                generator._generate_mock_bbmodel("a red and gold knight", model_type, animation, "bench", seed=seed)
+            ))
+            for model_type, animation in ARCHETYPES for seed in range(4)
+        ]
+        models = [templates[index % len(templates)] for index in range(args.models)]
+
+        start = time.perf_counter()
+        for index, bbmodel in enumerate(models):
+            geometry, animations = to_bedrock(bbmodel, f"model_{index}")
+            serializer.dumps(geometry)
+            serializer.dumps(animations)
+        convert = time.perf_counter() - start
+
+        start = time.perf_counter()
+        size = sum(
+            len(piece) for piece in iter_bedrock_archive(
+                (str(index), lambda bbmodel=bbmodel: bbmodel) for index, bbmodel in enumerate(models)
+            )
+        )
+        archive = time.perf_counter() - start
+
+        print(f"convert: {convert * 1000:8.1f}ms  {len(models) / convert * 60:9.0f} models/min")
+        print(f"archive: {archive * 1000:8.1f}ms  {len(models) / archive * 60:9.0f} models/min  zip={size / 1024:.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare regenerating a whole model with editing one aspect of it.
+
+Times content generation of an archetype against the edit of its
+animations, its textures and one element group. Atlas PNGs come from a
+warm texture cache in every case and the simulated stage delay is left
+out, so this only shows the CPU side. Run from the backend directory:
+
+    python -m benchmarks.bench_editing --model-type animal --group leg
+"""
+import argparse
+import copy
+import tempfile
+import time
+
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-type", default="animal")
+    parser.add_argument("--group", default="leg")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(256 * 1024 * 1024), directory))
+        base = generator._generate_model_content(args.model_type, "walk", seed=1, prompt="a red model")
+
+        def full():
+            generator._generate_model_content(args.model_type, "walk", seed=1, prompt="a red model")
+
+        def edit(aspect, **options):
+            # Edits work in place, so each run gets its own copy made up front
+            copies = [copy.deepcopy(base) for _ in range(args.repeat)]
+            return lambda: generator._edit_model_content(copies.pop(), aspect, **options)
+
+        cases = [
+            ("full generation", full),
+            ("animations", edit("animations", animation_type="idle")),
+            ("textures", edit("textures", prompt="a blue model")),
+            (f"elements ({args.group})", edit("elements", prompt="giant", group=args.group))
+        ]
+        print(f"{'operation':<20} {'ms':>8}")
+        for name, func in cases:
+            print(f"{name:<20} {best_of(args.repeat, func) * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare render throughput of thread and process worker pools.
+
+Renders a batch of distinct animated previews through GenerationExecutor
+in thread mode and in process mode at increasing worker counts. Scene
+setup and frame encoding are largely pure Python and hold the GIL, so
+thread throughput levels off after one or two workers while process
+throughput keeps rising with the available cores (minus spawn and
+pickling overhead). Run from the backend directory:
+
+    python -m benchmarks.bench_executor --jobs 16 --workers 1,2,4
+"""
+import argparse
+import copy
+import os
+import tempfile
+import time
+
+from app.services.animated_preview import AnimatedPreviewRenderer
+from app.services.executor import GenerationExecutor
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+
+
+def variants(bbmodel, count):
+    """Copies of a model whose animations differ, so no render hits the cache"""
+    models = []
+    for index in range(count):
+        model = copy.deepcopy(bbmodel)
+        model["animations"][0]["length"] = model["animations"][0].get("length", 1) + index * 0.01
+        models.append(model)
+    return models
+
+
+def throughput(renderer, models, workers, processes, size):
+    executor = GenerationExecutor(workers, len(models), name="bench", processes=processes)
+    # Start the workers first so process spawn time is not counted
+    executor.submit(os.getpid).result()
+    start = time.perf_counter()
+    futures = [executor.submit(renderer.render, model, None, size) for model in models]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    executor.shutdown(wait=True)
+    return len(models) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--size", type=int, default=128)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(64 * 1024 * 1024), directory))
+        bbmodel = generator._generate_mock_bbmodel("a red knight", "character", "walk", "bench", seed=1)
+        print(f"{os.cpu_count()} cores, {args.jobs} renders per run")
+        for workers in (int(value) for value in args.workers.split(",")):
+            rates = []
+            for processes in (False, True):
+                with tempfile.TemporaryDirectory() as previews:
+                    renderer = AnimatedPreviewRenderer(previews)
+                    rates.append(throughput(renderer, variants(bbmodel, args.jobs), workers, processes, args.size))
+            print(f"{workers:2d} workers: threads={rates[0]:6.1f}/s  processes={rates[1]:6.1f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Time vectorized cube transforms and serialization on large synthetic models.
+
+    python -m benchmarks.bench_geometry --cubes 1000 10000 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.archetypes import batch_uuid4
+from app.services.geometry import CubeArray
+
+
+def synthetic_cubes(count: int, seed: int = 0) -> CubeArray:
+    """Random unrotated cubes on an integer grid"""
+    rng = np.random.default_rng(seed)
+    cubes = CubeArray.empty(count)
+    low = rng.integers(-64, 64, size=(count, 3)).astype(np.float64)
+    cubes.data["from"] = low
+    cubes.data["to"] = low + rng.integers(1, 8, size=(count, 3))
+    cubes.data["origin"] = low
+    cubes.data["uv"] = rng.integers(0, 64, size=(count, 6, 4))
+    cubes.names = [f"cube_{i}" for i in range(count)]
+    cubes.uuids = batch_uuid4(count)
+    return cubes
+
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'cubes':>7} {'translate':>10} {'scale':>8} {'mirror':>8} {'bounds':>8} {'to_elements':>12} {'from_elements':>14}  (ms)")
+    for count in args.cubes:
+        cubes = synthetic_cubes(count)
+        translate = _time(lambda: cubes.translate((1, 2, 3)))
+        scale = _time(lambda: cubes.scale(1.5, pivot=(0, 8, 0)))
+        mirror = _time(lambda: cubes.mirror("x"))
+        bounds = _time(cubes.bounds)
+        elements = []
+        to_elements = _time(lambda: elements.extend(cubes.to_elements()))
+        from_elements = _time(lambda: CubeArray.from_elements(elements))
+        print(f"{count:7d} {translate:10.3f} {scale:8.3f} {mirror:8.3f} {bounds:8.3f} {to_elements:12.2f} {from_elements:14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time GLB export of generated models and synthetic models of 1k-50k cubes.
+
+Synthetic models come as a static block of cubes and with every tenth cube
+targeted by a walk-style animation, which gives those cubes a node, mesh
+and rotation channel of their own. Reports conversion time and file size.
+Run from the backend directory:
+
+    python -m benchmarks.bench_gltf --cubes 1000 10000 50000
+"""
+import argparse
+import tempfile
+import time
+
+from app.services.gltf import iter_glb
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+from benchmarks.bench_geometry import synthetic_cubes
+
+
+def animated(bbmodel, every: int = 10):
+    """Copy of a model with every `every`-th cube swinging back and forth"""
+    animators = {
+        element["uuid"]: {"rotation": {"0": [0, 0, 0], "0.5": [30, 0, 0], "1": [0, 0, 0]}}
+        for element in bbmodel["elements"][::every]
+    }
+    return {**bbmodel, "animations": [{"name": "swing", "loop": "loop", "length": 1, "animators": animators}]}
+
+
+def best_of(repeat, fn, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(64 * 1024 * 1024), directory))
+        models = [
+            (model_type, generator._generate_mock_bbmodel("a red and gold knight", model_type, "walk", "bench", seed=1))
+            for model_type in ("character", "animal", "vehicle")
+        ]
+        for count in args.cubes:
+            bbmodel = {"elements": synthetic_cubes(count).to_elements(), "resolution": {"width": 64, "height": 64}}
+            models.append((f"{count} cubes", bbmodel))
+            models.append((f"{count} anim", animated(bbmodel)))
+
+        for name, bbmodel in models:
+            seconds, size = best_of(args.repeat, lambda model: sum(len(piece) for piece in iter_glb(model)), bbmodel)
+            cubes = len(bbmodel["elements"])
+            print(
+                f"{name:>12s}: export={seconds * 1000:8.1f}ms  {cubes / seconds:9.0f} cubes/s  "
+                f"glb={size / 1024:8.1f}KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time streaming import of a large synthetic bbmodel.
+
+Writes a file of cube elements plus embedded textures to a temporary
+directory, then imports it and reports throughput and how much the peak
+resident memory grew while doing so. Run from the backend directory:
+
+    python -m benchmarks.bench_importer --elements 100000 --textures 256
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.importer import BBModelImporter, ImportLimits
+from app.services.model_generator import ModelGenerator
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--textures", type=int, default=256)
+    parser.add_argument("--texture-kb", type=int, default=1024)
+    parser.add_argument("--encoding", default="identity")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+        cube = generator._generate_model_content("character", None, seed=1)["elements"][0]
+        element = json.dumps(cube)
+        path = os.path.join(directory, "synthetic.bbmodel")
+        with open(path, "w") as f:
+            f.write('{"meta": {"format_version": "4.5"}, "name": "synthetic", "elements": [')
+            # Written piece by piece so building the file does not raise the memory baseline
+            for index in range(args.elements):
+                f.write(("," if index else "") + element.replace(cube["uuid"], str(index)))
+            f.write('], "textures": [')
+            source = "data:image/png;base64," + "A" * (args.texture_kb * 1024)
+            for index in range(args.textures):
+                f.write(("," if index else "") + json.dumps({"name": f"t{index}", "source": source}))
+            f.write("]}")
+        size = os.path.getsize(path)
+
+        settings.MODEL_STORAGE_ENCODING = args.encoding
+        importer = BBModelImporter(ModelStorage(directory), ImportLimits(2 ** 40, args.elements, 1000, 2 ** 26))
+
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            summary = importer.import_file("synthetic", f, "bench")
+        elapsed = time.perf_counter() - start
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+
+    print(f"file size      {size / 2 ** 20:10.1f} MB")
+    print(f"stored size    {summary['stored_size'] / 2 ** 20:10.1f} MB ({args.encoding})")
+    print(f"import time    {elapsed:10.2f} s")
+    print(f"throughput     {size / 2 ** 20 / elapsed:10.1f} MB/s")
+    print(f"peak RSS grew  {growth / 1024:10.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Time keyframe reduction on large baked animations.
+
+Builds random-walk animations, bakes them at --fps and simplifies every
+channel at once, reporting keys and bytes before/after. Run from the
+backend directory:
+
+    python -m benchmarks.bench_keyframes --animators 50 500 --fps 60
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.animation import bake_animation, format_time, simplify_animation
+
+
+def synthetic_animation(animators: int, keys: int, length: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    key_times = [format_time(t) for t in np.linspace(0, length, keys)]
+    return {
+        "name": "synthetic",
+        "length": length,
+        "animators": {
+            f"bone-{index}": {
+                "rotation": dict(zip(key_times, rng.uniform(-90, 90, (keys, 3)).round(2).tolist())),
+                "position": dict(zip(key_times, rng.uniform(-4, 4, (keys, 3)).round(2).tolist()))
+            }
+            for index in range(animators)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--animators", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--keys", type=int, default=8)
+    parser.add_argument("--length", type=float, default=2.0)
+    parser.add_argument("--fps", type=float, default=60)
+    args = parser.parse_args()
+
+    tolerances = {"rotation": 0.1, "position": 0.01, "scale": 0.001}
+    for count in args.animators:
+        baked = bake_animation(synthetic_animation(count, args.keys, args.length), args.fps)
+        start = time.perf_counter()
+        _, report = simplify_animation(baked, tolerances)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{count:5d} animators: {elapsed * 1000:8.1f}ms  "
+            f"keys {report['keys_before']} -> {report['keys_after']}  "
+            f"bytes {report['bytes_before']} -> {report['bytes_after']}  "
+            f"max_error={report['max_error']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Time LOD building on models of 1k-50k cubes.
+
+Each model is a cloud of randomly sized, differently textured cubes, so the
+lossless merge finds little and every budget has to be met by absorbing and
+dropping cubes. Reports the time to build every configured level at once
+and their element counts.
+Run from the backend directory:
+
+    python -m benchmarks.bench_lod --cubes 1000 10000 50000 --levels 0.5,0.2
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.geometry import CubeArray
+from app.services.lod import build_lods, parse_lod_levels
+
+
+def cube_cloud(count: int, seed: int = 0) -> CubeArray:
+    """`count` cubes of 0.25-4 units scattered over a box that grows with the count"""
+    rng = np.random.default_rng(seed)
+    extent = max(count ** (1 / 3) * 2, 8)
+    positions = rng.uniform(0, extent, (count, 3))
+    sizes = rng.uniform(0.25, 4, (count, 3))
+
+    cubes = CubeArray.empty(count)
+    cubes.data["from"] = positions
+    cubes.data["to"] = positions + sizes
+    cubes.data["uv"] = [0, 0, 16, 16]
+    cubes.data["texture"] = rng.integers(0, 8, (count, 1))
+    cubes.names = ["cube"] * count
+    cubes.uuids = [str(index) for index in range(count)]
+    return cubes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--levels", default="0.5,0.2")
+    args = parser.parse_args()
+    levels = parse_lod_levels(args.levels)
+
+    for count in args.cubes:
+        bbmodel = {"elements": cube_cloud(count).to_elements(), "outliner": [], "animations": [], "metadata": {}}
+        start = time.perf_counter()
+        lods = build_lods(bbmodel, levels)
+        elapsed = time.perf_counter() - start
+        counts = " / ".join(str(len(lod["elements"])) for lod in lods)
+        print(f"{count:6d} cubes: {elapsed * 1000:7.1f}ms for {len(levels)} levels  cubes {count} -> {counts}")
+
+
+if __name__ == "__main__":
+    main()
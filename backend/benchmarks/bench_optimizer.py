@@ -0,0 +1,69 @@
+"""Time the geometry optimizer on voxel terrain of 1k-50k cubes.
+
+Each model is a heightmap of unit cubes with a few texture materials, the
+kind of output a voxel-style generator produces. Reports cube and face
+counts before/after and the serialized size saved. Run from the backend
+directory:
+
+    python -m benchmarks.bench_optimizer --cubes 1000 10000 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services import serializer
+from app.services.geometry import CubeArray
+from app.services.optimizer import cull_hidden_faces, merge_cubes
+
+
+def voxel_terrain(count: int, seed: int = 0) -> CubeArray:
+    """Heightmap columns of unit cubes totalling roughly `count` cubes"""
+    rng = np.random.default_rng(seed)
+    mean_height = 6
+    side = max(int(np.sqrt(count / mean_height)), 1)
+    heights = rng.integers(mean_height - 3, mean_height + 4, (side, side))
+    x, z = np.meshgrid(np.arange(side), np.arange(side), indexing="ij")
+    columns = np.repeat(np.stack([x.ravel(), z.ravel()], axis=1), heights.ravel(), axis=0)
+    y = np.concatenate([np.arange(h) for h in heights.ravel()])
+    positions = np.stack([columns[:, 0], y, columns[:, 1]], axis=1).astype(np.float64)
+
+    cubes = CubeArray.empty(len(positions))
+    cubes.data["from"] = positions
+    cubes.data["to"] = positions + 1
+    cubes.data["uv"] = [0, 0, 16, 16]
+    # Stone below, dirt in the middle, grass on top of each column
+    top = np.repeat(heights.ravel(), heights.ravel()) - 1
+    cubes.data["texture"] = np.where(y == top, 2, np.where(y >= top - 2, 1, 0))[:, None]
+    cubes.names = ["voxel"] * len(positions)
+    cubes.uuids = [str(index) for index in range(len(positions))]
+    return cubes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    for count in args.cubes:
+        cubes = voxel_terrain(count)
+        faces_before = int(cubes.data["has_face"].sum())
+        bytes_before = len(serializer.dumps(cubes.to_elements()))
+
+        start = time.perf_counter()
+        merged = merge_cubes(cubes)
+        merge_time = time.perf_counter() - start
+        start = time.perf_counter()
+        cull_hidden_faces(merged)
+        cull_time = time.perf_counter() - start
+
+        bytes_after = len(serializer.dumps(merged.to_elements()))
+        print(
+            f"{len(cubes):6d} cubes: merge={merge_time * 1000:7.1f}ms  cull={cull_time * 1000:7.1f}ms  "
+            f"cubes {len(cubes)} -> {len(merged)}  faces {faces_before} -> {int(merged.data['has_face'].sum())}  "
+            f"bytes {bytes_before} -> {bytes_after}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Time prompt analysis over a stream of prompts.
+
+Builds prompts from the analyzer vocabulary plus filler words, then times
+analysis with every prompt unique (cold memo) and with a small set of
+prompts repeated throughout the stream (warm memo). Run from the backend
+directory:
+
+    python -m benchmarks.bench_prompt_analyzer --prompts 100000
+"""
+import argparse
+import random
+import time
+
+from app.services.prompt_analyzer import (
+    ANIMATION_WORDS, ARCHETYPE_WORDS, COLOR_WORDS, SIZE_WORDS, _analyze, analyze_prompt
+)
+
+FILLER = ["a", "the", "with", "very", "shiny", "old", "of", "and", "in", "style", "blocky", "cute"]
+
+
+def make_prompt(rng: random.Random, index: int) -> str:
+    words = [rng.choice(FILLER) for _ in range(rng.randint(3, 12))]
+    words.append(rng.choice(list(SIZE_WORDS)))
+    words.append(rng.choice(list(COLOR_WORDS)))
+    words.append(rng.choice(rng.choice(list(ARCHETYPE_WORDS.values()))))
+    words.append(rng.choice(rng.choice(list(ANIMATION_WORDS.values()))))
+    rng.shuffle(words)
+    # The index keeps every prompt distinct
+    return f"{' '.join(words)} number {index}"
+
+
+def run(prompts):
+    start = time.perf_counter()
+    for prompt in prompts:
+        analyze_prompt(prompt)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prompts", type=int, default=100000)
+    parser.add_argument("--distinct", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    unique = [make_prompt(rng, index) for index in range(args.prompts)]
+    repeated = [unique[rng.randrange(args.distinct)] for _ in range(args.prompts)]
+
+    _analyze.cache_clear()
+    cold = run(unique)
+    _analyze.cache_clear()
+    warm = run(repeated)
+
+    print(f"{'stream':<10} {'prompts':>8} {'total ms':>10} {'us/prompt':>10}")
+    for name, elapsed in (("unique", cold), ("repeated", warm)):
+        print(f"{name:<10} {args.prompts:>8} {elapsed * 1000:>10.1f} {elapsed / args.prompts * 1e6:>10.2f}")
+    print(_analyze.cache_info())
+
+
+if __name__ == "__main__":
+    main()
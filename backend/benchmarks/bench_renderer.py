@@ -0,0 +1,57 @@
+"""Time preview rendering of generated models and large voxel scenes.
+
+Renders each archetype (with its procedural texture) and synthetic cube
+models, reporting the rasterization time alone and with PNG encoding.
+Run from the backend directory:
+
+    python -m benchmarks.bench_renderer --size 256 --cubes 1000 10000
+"""
+import argparse
+import tempfile
+import time
+
+from app.services.model_generator import ModelGenerator
+from app.services.renderer import render_image
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator, encode_png
+from benchmarks.bench_geometry import synthetic_cubes
+
+
+def best_of(repeat, fn, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(64 * 1024 * 1024), directory))
+        models = [
+            (model_type, generator._generate_mock_bbmodel("a red and gold knight", model_type, "walk", "bench", seed=1))
+            for model_type in ("character", "animal", "vehicle")
+        ]
+        models += [
+            (f"{count} cubes", {"elements": synthetic_cubes(count).to_elements()})
+            for count in args.cubes
+        ]
+
+        for name, bbmodel in models:
+            raster, image = best_of(args.repeat, render_image, bbmodel, args.size)
+            encode, _ = best_of(args.repeat, encode_png, image)
+            print(
+                f"{name:>12s} {args.size}x{args.size}: render={raster * 1000:7.1f}ms  "
+                f"with png={(raster + encode) * 1000:7.1f}ms  coverage={(image[..., 3] > 0).mean():.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
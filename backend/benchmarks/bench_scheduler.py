@@ -0,0 +1,77 @@
+"""Compare job waits under a flood from one user: FIFO executor vs fair-share scheduler.
+
+One free-tier user submits a burst of jobs, then several other users of
+each tier submit one job each. Reports how long the other users wait for
+their job to start, per tier, and the scheduler's dispatch overhead per job.
+Run from the backend directory:
+
+    python -m benchmarks.bench_scheduler --flood 500 --job-ms 2
+"""
+import argparse
+import threading
+import time
+
+from app.services.executor import GenerationExecutor
+from app.services.scheduler import FairShareScheduler
+
+TIERS = ["enterprise", "pro", "basic", "free"]
+
+
+def run(pool, flood: int, users: int, job_seconds: float) -> dict:
+    waits = {tier: [] for tier in TIERS}
+    lock = threading.Lock()
+
+    def job(tier, submitted):
+        if tier:
+            with lock:
+                waits[tier].append(time.perf_counter() - submitted)
+        time.sleep(job_seconds)
+
+    def submit(user_id, tier, *args):
+        if isinstance(pool, FairShareScheduler):
+            return pool.submit_as(user_id, tier, job, *args)
+        return pool.submit(job, *args)
+
+    futures = [submit("flood", "free", None, 0.0) for _ in range(flood)]
+    for index in range(users):
+        for tier in TIERS:
+            futures.append(submit(f"{tier}{index}", tier, tier, time.perf_counter()))
+    for future in futures:
+        future.result()
+    pool.shutdown(wait=True)
+    return {tier: (sum(values) / len(values), max(values)) for tier, values in waits.items()}
+
+
+def dispatch_overhead(jobs: int) -> float:
+    scheduler = FairShareScheduler(max_workers=1, queue_limit=jobs + 1, user_queue_limit=jobs + 1)
+    start = time.perf_counter()
+    futures = [scheduler.submit_as(f"user{index % 50}", TIERS[index % 4], int) for index in range(jobs)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown(wait=True)
+    return elapsed / jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--flood", type=int, default=500)
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--job-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    limit = args.flood + args.users * len(TIERS) + 1
+    pools = {
+        "fifo": GenerationExecutor(args.workers, limit),
+        "fair": FairShareScheduler(args.workers, limit, user_queue_limit=limit)
+    }
+    for name, pool in pools.items():
+        results = run(pool, args.flood, args.users, args.job_ms / 1000)
+        for tier, (mean, worst) in results.items():
+            print(f"{name:5s} {tier:10s} mean wait {mean * 1000:8.1f} ms  max {worst * 1000:8.1f} ms")
+    print(f"dispatch overhead {dispatch_overhead(20000) * 1e6:.1f} us/job")
+
+
+if __name__ == "__main__":
+    main()
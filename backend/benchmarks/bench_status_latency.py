@@ -0,0 +1,101 @@
+"""Measure /status latency while N generations are in flight.
+
+Compares the legacy behaviour (the blocking pipeline running on the event
+loop, which is what an ``async def`` background task did) against the
+generation executor. Run from the backend directory:
+
+    python -m benchmarks.bench_status_latency --jobs 8 --delay 0.05
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.endpoints import models
+from app.core.config import settings
+from app.models.user import User
+from app.services.auth import get_current_user
+from app.services.executor import GenerationExecutor
+
+
+def _fake_user() -> User:
+    return User(id="bench", username="bench", created_at=datetime.now())
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(models.router, prefix="/api/models")
+    app.dependency_overrides[get_current_user] = _fake_user
+    return app
+
+
+async def _poll_status(client: httpx.AsyncClient, model_id: str, duration: float):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(f"/api/models/status/{model_id}")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def _run(mode: str, jobs: int, workers: int, duration: float):
+    app = _build_app()
+    generator = models.model_generator
+    executor = GenerationExecutor(max_workers=workers)
+    model_ids = [str(uuid.uuid4()) for _ in range(jobs)]
+
+    async def submit_inline():
+        # Legacy path: the blocking pipeline runs on the event loop itself
+        for model_id in model_ids:
+            await asyncio.sleep(0)
+            generator.generate_model("bench robot", model_id, "character", "walk")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        poller = asyncio.create_task(_poll_status(client, model_ids[0], duration))
+        if mode == "inline":
+            await submit_inline()
+        else:
+            for model_id in model_ids:
+                executor.submit(generator.generate_model, "bench robot", model_id, "character", "walk")
+        latencies = await poller
+
+    executor.shutdown(wait=True)
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(latencies),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "max_ms": latencies[-1] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=settings.GENERATION_WORKERS)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds per simulated stage unit")
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    settings.GENERATION_STAGE_DELAY = args.delay
+    settings.MODELS_DIR = tempfile.mkdtemp(prefix="bench-models-")
+    for mode in ("inline", "executor"):
+        result = asyncio.run(_run(mode, args.jobs, args.workers, args.duration))
+        print(
+            f"{result['mode']:>8}: {result['requests']:5d} status calls  "
+            f"p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms  max={result['max_ms']:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
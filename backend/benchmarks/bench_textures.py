@@ -0,0 +1,57 @@
+"""Time procedural atlas textures from 64x64 up to 1024x1024.
+
+Packs an archetype at increasing texel densities so its atlas doubles in
+size each step, then times rendering plus PNG encoding on a cold cache and
+the lookup of the same texture on a warm one. Run from the backend
+directory:
+
+    python -m benchmarks.bench_textures --sizes 64 128 256 512 1024
+"""
+import argparse
+import tempfile
+import time
+
+from app.services.archetypes import archetype_registry
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator, palette_from_prompt
+from app.services.uv_packer import pack_uvs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256, 512, 1024])
+    parser.add_argument("--model-type", default="character")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    palette = palette_from_prompt("a red and gold knight", args.model_type)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            # Find the density whose packed atlas reaches the requested edge
+            density = 1.0
+            cubes = archetype_registry.instantiate(args.model_type)
+            resolution = pack_uvs(cubes, density)
+            while max(resolution) < size:
+                density *= 2
+                resolution = pack_uvs(cubes, density)
+
+            cold = []
+            for _ in range(args.repeat):
+                textures = TextureGenerator(ResultCache(256 * 1024 * 1024), directory)
+                start = time.perf_counter()
+                key, png = textures.generate(cubes, palette, resolution)
+                cold.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                textures.generate(cubes, palette, resolution)
+            warm = (time.perf_counter() - start) / args.repeat
+
+            print(
+                f"{resolution[0]:5d}x{resolution[1]:<5d} cold={min(cold) * 1000:8.1f}ms  "
+                f"cached={warm * 1000:6.2f}ms  png={len(png) / 1024:7.1f}KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
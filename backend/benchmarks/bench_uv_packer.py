@@ -0,0 +1,35 @@
+"""Time UV atlas packing for models with thousands of faces.
+
+Packs the faces of synthetic cube models and reports the atlas chosen and
+how much of it the faces fill. Run from the backend directory:
+
+    python -m benchmarks.bench_uv_packer --cubes 100 1000 5000
+"""
+import argparse
+import time
+
+from app.services.uv_packer import face_sizes, pack_uvs
+from benchmarks.bench_geometry import synthetic_cubes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--density", type=float, default=1.0, help="texels per model unit")
+    args = parser.parse_args()
+
+    for count in args.cubes:
+        cubes = synthetic_cubes(count)
+        _, _, widths, heights = face_sizes(cubes, args.density)
+        start = time.perf_counter()
+        atlas_width, atlas_height = pack_uvs(cubes, args.density)
+        elapsed = time.perf_counter() - start
+        fill = (widths * heights).sum() / (atlas_width * atlas_height)
+        print(
+            f"{count:6d} cubes / {len(widths):6d} faces: {elapsed * 1000:7.1f}ms  "
+            f"atlas={atlas_width}x{atlas_height}  fill={fill:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.animated_preview import (
+    AnimatedPreviewRenderer, animation_times, encode_animation, find_animation, preview_fps, render_frames
+)
+from app.services.executor import GenerationExecutor
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+def swinging_bar():
+    faces = {name: {"uv": [0, 0, 4, 4], "texture": None} for name in ("north", "east", "south", "west", "up", "down")}
+    return {
+        "resolution": {"width": 16, "height": 16},
+        "elements": [
+            {"name": "base", "uuid": "base", "from": [-8, 0, -8], "to": [8, 2, 8], "faces": faces},
+            {"name": "bar", "uuid": "bar", "from": [-1, 2, -1], "to": [1, 18, 1], "origin": [0, 2, 0], "faces": faces}
+        ],
+        "animations": [{
+            "name": "swing",
+            "loop": "loop",
+            "length": 1,
+            "animators": {"bar": {"rotation": {"0": [0, 0, 0], "0.5": [0, 0, 60], "1": [0, 0, 0]}}}
+        }]
+    }
+
+class TestRenderFrames(unittest.TestCase):
+    def test_frames_move_only_animated_cubes(self):
+        bbmodel = swinging_bar()
+        frames = render_frames(bbmodel, find_animation(bbmodel), 64, 4)
+        
+        # A looping one second animation at 4 fps has 4 distinct frames
+        self.assertEqual(len(frames), 4)
+        self.assertEqual(frames[0].shape, (64, 64, 4))
+        self.assertFalse(np.array_equal(frames[0], frames[2]))
+        # The base is drawn in the same place in every frame
+        bottom = slice(44, 64)
+        np.testing.assert_array_equal(frames[0][bottom, :, 3], frames[2][bottom, :, 3])
+    
+    def test_animation_times(self):
+        np.testing.assert_allclose(animation_times({"length": 1, "loop": "loop"}, 4), [0, 0.25, 0.5, 0.75])
+        np.testing.assert_allclose(animation_times({"length": 0.5, "loop": "once"}, 4), [0, 0.25, 0.5])
+        np.testing.assert_allclose(animation_times({}, 4), [0])
+    
+    def test_long_animations_are_capped(self):
+        animation = {"length": 1e7, "loop": "loop"}
+        fps = preview_fps(animation, 12)
+        self.assertEqual(len(animation_times(animation, fps)), settings.ANIMATED_PREVIEW_MAX_FRAMES)
+        self.assertEqual(preview_fps({"length": 1}, 12), 12)
+        with self.assertRaises(ValueError):
+            preview_fps({"length": float("inf")}, 12)
+    
+    def test_find_animation(self):
+        bbmodel = swinging_bar()
+        self.assertEqual(find_animation(bbmodel, "swing")["name"], "swing")
+        with self.assertRaises(ValueError):
+            find_animation(bbmodel, "dance")
+        with self.assertRaises(ValueError):
+            find_animation({"animations": []})
+    
+    def test_encode_gif_and_apng(self):
+        bbmodel = swinging_bar()
+        frames = render_frames(bbmodel, find_animation(bbmodel), 32, 4)
+        for image_format, pillow_format in (("gif", "GIF"), ("apng", "PNG")):
+            image = Image.open(io.BytesIO(encode_animation(frames, 4, image_format)))
+            self.assertEqual(image.format, pillow_format)
+            self.assertEqual(image.n_frames, 4)
+
+class TestAnimatedPreviewRenderer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.renderer = AnimatedPreviewRenderer(self.tmpdir.name)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_cached_on_disk_by_content(self):
+        bbmodel = swinging_bar()
+        path = self.renderer.render(bbmodel, size=32, fps=4)
+        self.assertTrue(path.startswith(self.tmpdir.name) and path.endswith(".gif"))
+        self.assertEqual(Image.open(path).n_frames, 4)
+        
+        # Metadata does not matter, the animation does
+        bbmodel["metadata"] = {"created_at": "now"}
+        self.assertEqual(self.renderer.path_for(bbmodel, size=32, fps=4), path)
+        bbmodel["animations"][0]["animators"]["bar"]["rotation"]["0.5"] = [0, 0, 30]
+        self.assertNotEqual(self.renderer.path_for(bbmodel, size=32, fps=4), path)
+        self.assertTrue(self.renderer.render(bbmodel, size=32, fps=4, image_format="apng").endswith(".png"))
+    
+    def test_requested_sizes_and_rates_snap_to_steps(self):
+        bbmodel = swinging_bar()
+        path = self.renderer.path_for(bbmodel, size=32, fps=4)
+        self.assertEqual(self.renderer.path_for(bbmodel, size=33, fps=4.0001), path)
+        self.assertEqual(self.renderer.path_for(bbmodel, size=30, fps=3.5), path)
+        self.assertNotEqual(self.renderer.path_for(bbmodel, size=64, fps=4), path)
+    
+    def test_least_recently_used_previews_are_evicted(self):
+        bbmodel = swinging_bar()
+        first = self.renderer.render(bbmodel, size=32, fps=4)
+        self.renderer.max_bytes = os.path.getsize(first) * 5 // 2
+        bbmodel["animations"][0]["animators"]["bar"]["rotation"]["0.5"] = [0, 0, 30]
+        second = self.renderer.render(bbmodel, size=32, fps=4)
+        os.utime(first, (0, 0))
+        os.utime(second, (0, 0))
+        
+        # A cache hit marks the preview as used, so the other one goes first
+        self.assertTrue(self.renderer.cached(first))
+        bbmodel["animations"][0]["animators"]["bar"]["rotation"]["0.5"] = [0, 0, 45]
+        third = self.renderer.render(bbmodel, size=32, fps=4)
+        self.assertTrue(os.path.exists(first) and os.path.exists(third))
+        self.assertFalse(os.path.exists(second))
+    
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.renderer.path_for(swinging_bar(), image_format="webm")
+
+class TestGeneratedAnimatedPreviews(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 0
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            animated_renderer=AnimatedPreviewRenderer(self.tmpdir.name),
+            render_pool=GenerationExecutor(1, 100, name="render")
+        )
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.generator.render_pool.shutdown(wait=True)
+        self.tmpdir.cleanup()
+    
+    def test_generation_queues_animated_preview(self):
+        self.generator.generate_model("a knight", "m1", "character", "walk", seed=1)
+        
+        status = self.generator.get_model_status("m1", None)
+        self.assertEqual(status["animated_preview_url"], "/api/models/m1/preview/animated")
+        self.generator.render_pool.shutdown(wait=True)
+        self.assertEqual(self.generator.render_pool.stats()["completed"], 1)
+        bbmodel = self.generator.storage.load("m1")
+        path = self.generator.animated_renderer.path_for(bbmodel)
+        self.assertGreater(Image.open(path).n_frames, 1)
+    
+    def test_no_animated_preview_without_animations(self):
+        self.generator.generate_model("a knight", "m1", "character", seed=1)
+        self.assertIsNone(self.generator.get_model_status("m1", None)["animated_preview_url"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.animation import (
+    ChannelSet, bake_animation, format_time, frame_times, sample, simplify_animation
+)
+from app.services.model_generator import ModelGenerator
+from app.services.textures import TextureGenerator
+
+def _animation(keys, length=1, interpolation=None):
+    animator = {"rotation": keys}
+    if interpolation:
+        animator = {"keyframes": [
+            {"channel": "rotation", "time": float(time), "interpolation": interpolation,
+             "data_points": [{"x": value[0], "y": value[1], "z": value[2]}]}
+            for time, value in keys.items()
+        ]}
+    return {"name": "test", "length": length, "snapping": 24, "animators": {"bone": animator}}
+
+class TestAnimationEngine(unittest.TestCase):
+    def test_linear_holds_outside_keys(self):
+        animation = _animation({"0.25": [10, 0, 0], "0.75": [30, 0, 0]})
+        values = sample(animation, [0, 0.25, 0.5, 0.75, 1])["bone"]["rotation"][:, 0]
+        np.testing.assert_allclose(values, [10, 10, 20, 30, 30])
+    
+    def test_catmullrom_passes_through_keys_and_overshoots(self):
+        animation = _animation({"0": [0, 0, 0], "0.5": [10, 0, 0], "1": [0, 0, 0]}, interpolation="catmullrom")
+        values = sample(animation, [0, 0.25, 0.5, 1])["bone"]["rotation"][:, 0]
+        np.testing.assert_allclose(values[[0, 2, 3]], [0, 10, 0])
+        # Uniform Catmull-Rom with the end key as its own neighbour
+        self.assertAlmostEqual(values[1], 5.625)
+    
+    def test_step_holds_previous_key(self):
+        animation = _animation({"0": [0, 0, 0], "0.5": [10, 0, 0]}, interpolation="step")
+        values = sample(animation, [0.1, 0.49, 0.5])["bone"]["rotation"][:, 0]
+        np.testing.assert_allclose(values, [0, 0, 10])
+    
+    def test_channels_of_different_lengths_evaluate_together(self):
+        animation = {"length": 1, "animators": {
+            "a": {"rotation": {"0": [0, 0, 0], "1": [10, 0, 0]}},
+            "b": {"position": {"0": [0, 0, 0], "0.5": [0, 4, 0], "0.75": [0, 0, 0], "1": [0, 2, 0]}}
+        }}
+        channels = ChannelSet.from_animation(animation)
+        values = channels.evaluate([0.5, 0.875])
+        self.assertEqual(values.shape, (2, 2, 3))
+        np.testing.assert_allclose(values[0, :, 0], [5, 8.75])
+        np.testing.assert_allclose(values[1, :, 1], [4, 1])
+        self.assertEqual(channels.to_animators(), {
+            "a": animation["animators"]["a"],
+            "b": animation["animators"]["b"]
+        })
+    
+    def test_bake_writes_key_per_frame(self):
+        baked = bake_animation(_animation({"0": [0, 0, 0], "1": [24, 0, 0]}), fps=24)
+        keys = baked["animators"]["bone"]["rotation"]
+        self.assertEqual(len(keys), 25)
+        self.assertEqual(keys["0.5"], [12, 0, 0])
+        self.assertEqual(keys["0.0417"], [1, 0, 0])
+        self.assertEqual(len(frame_times(0.5, 24)), 13)
+        self.assertEqual(len(frame_times(1e7, 24, max_frames=100)), 101)
+        with self.assertRaises(ValueError):
+            frame_times(float("inf"), 24)
+        self.assertEqual(format_time(0.25), "0.25")
+        self.assertEqual(format_time(1.0), "1")
+    
+    def test_generator_bakes_when_configured(self):
+        fps, simplify = settings.ANIMATION_BAKE_FPS, settings.ANIMATION_SIMPLIFY
+        settings.ANIMATION_BAKE_FPS, settings.ANIMATION_SIMPLIFY = 10, False
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+                model = generator._generate_model_content("character", "attack", seed=1)
+        finally:
+            settings.ANIMATION_BAKE_FPS, settings.ANIMATION_SIMPLIFY = fps, simplify
+        for animator in model["animations"][0]["animators"].values():
+            self.assertEqual(len(animator["rotation"]), 6)
+
+class TestKeyframeReduction(unittest.TestCase):
+    def test_baked_linear_animation_reduces_to_its_corners(self):
+        original = _animation({"0": [0, 0, 0], "0.5": [30, 0, 0], "1.5": [-30, 0, 0], "2": [0, 0, 0]}, length=2)
+        baked = bake_animation(original, fps=60)
+        simplified, report = simplify_animation(baked, {"rotation": 0.01})
+        
+        self.assertEqual(simplified["animators"]["bone"]["rotation"], original["animators"]["bone"]["rotation"])
+        self.assertEqual((report["keys_before"], report["keys_after"]), (121, 4))
+        self.assertGreater(report["bytes_saved"], 0)
+        self.assertLessEqual(report["max_error"]["rotation"], 0.01)
+    
+    def test_error_stays_within_tolerance(self):
+        rng = np.random.default_rng(0)
+        times = np.linspace(0, 2, 200)
+        curve = np.cumsum(rng.normal(0, 1, (200, 3)), axis=0)
+        animation = {"length": 2, "animators": {
+            "bone": {"rotation": {format_time(t): v.tolist() for t, v in zip(times, curve)}}
+        }}
+        for tolerance in (0.5, 2.0, 8.0):
+            simplified, report = simplify_animation(animation, {"rotation": tolerance})
+            resampled = sample(simplified, times)["bone"]["rotation"]
+            
+            self.assertLess(report["keys_after"], report["keys_before"])
+            self.assertLessEqual(np.abs(resampled - curve).max(), tolerance + 1e-3)
+            self.assertAlmostEqual(report["max_error"]["rotation"], np.abs(resampled - curve).max(), places=2)
+    
+    def test_non_linear_channels_are_kept(self):
+        animation = _animation({"0": [0, 0, 0], "0.5": [5, 0, 0], "1": [10, 0, 0]}, interpolation="catmullrom")
+        simplified, report = simplify_animation(animation, {"rotation": 1})
+        self.assertEqual(report["keys_after"], 3)
+        self.assertEqual(len(simplified["animators"]["bone"]["rotation"]), 3)
+    
+    def test_generator_reports_reduction(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+            model = generator._generate_mock_bbmodel("robot", "character", "walk", "u1", seed=1)
+        report = model["metadata"]["animation_reduction"][0]
+        self.assertEqual(report["animation"], "walk")
+        self.assertEqual(report["max_error"]["rotation"], 0)
+        self.assertLess(report["keys_after"], report["keys_before"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import uuid
+
+from app.services.archetypes import ArchetypeRegistry, batch_uuid4
+
+class TestArchetypeRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ArchetypeRegistry()
+    
+    def test_batch_uuid4(self):
+        uuids = batch_uuid4(100)
+        
+        self.assertEqual(len(set(uuids)), 100)
+        for value in uuids:
+            parsed = uuid.UUID(value)
+            self.assertEqual(parsed.version, 4)
+            self.assertEqual(parsed.variant, uuid.RFC_4122)
+    
+    def test_instantiate_remaps_outliner(self):
+        cubes = self.registry.instantiate("character")
+        elements, outliner = cubes.to_elements(), cubes.outliner()
+        
+        self.assertEqual(len(elements), 6)
+        self.assertEqual(
+            [(e["uuid"], e["name"]) for e in elements],
+            [(o["uuid"], o["name"]) for o in outliner]
+        )
+        self.assertEqual(list(elements[0])[:3], ["name", "uuid", "type"])
+    
+    def test_instances_do_not_share_state(self):
+        first = self.registry.instantiate("animal")
+        elements = first.to_elements()
+        elements[0]["from"][0] = 999
+        elements[0]["faces"]["north"]["uv"][0] = 999
+        first.data["to"][0] = 999
+        second = self.registry.instantiate("animal").to_elements()
+        
+        self.assertNotEqual(second[0]["from"][0], 999)
+        self.assertNotEqual(second[0]["to"][0], 999)
+        self.assertNotEqual(second[0]["faces"]["north"]["uv"][0], 999)
+        self.assertNotEqual(elements[0]["uuid"], second[0]["uuid"])
+    
+    def test_unknown_type_falls_back_to_basic(self):
+        cubes = self.registry.instantiate("environment")
+        self.assertEqual(cubes.names, ["cube"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from app.services.backends import BackendPool, GeneratorBackend, backend_class
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class SlowBackend(GeneratorBackend):
+    name = "slow"
+    loads = 0
+    
+    def load(self):
+        SlowBackend.loads += 1
+        time.sleep(0.01)
+    
+    def infer(self, prompt, model_type, seed=None):
+        time.sleep(0.01)
+        return {"proportions": [1, 2, 1]}
+
+class TestBackendPool(unittest.TestCase):
+    def setUp(self):
+        SlowBackend.loads = 0
+    
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backend_class("nonexistent")
+    
+    def test_lazy_loading_stays_within_pool_size(self):
+        pool = BackendPool(f"{__name__}:SlowBackend", size=2)
+        self.assertEqual(pool.stats()["loaded"], 0)
+        
+        threads = [threading.Thread(target=pool.infer, args=("p", "character")) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = pool.stats()
+        self.assertEqual(SlowBackend.loads, 2)
+        self.assertEqual((stats["loaded"], stats["idle"], stats["inferences"]), (2, 2, 6))
+        self.assertIsNone(stats["startup_seconds"])
+        # The first request paid for loading an instance
+        self.assertGreaterEqual(stats["first_inference_seconds"], 0.02)
+    
+    def test_warm_loads_everything_up_front(self):
+        pool = BackendPool(f"{__name__}:SlowBackend", size=3)
+        pool.warm()
+        pool.infer("p", "character")
+        
+        stats = pool.stats()
+        self.assertEqual((SlowBackend.loads, len(stats["load_seconds"])), (3, 3))
+        self.assertLess(stats["first_inference_seconds"], stats["startup_seconds"])
+        pool.shutdown()
+        self.assertEqual(pool.stats()["loaded"], 0)
+    
+    def test_local_backend_is_deterministic(self):
+        pool = BackendPool("local", size=1)
+        single = pool.infer("a tall red knight", "character")
+        batch = pool.infer_batch(["a tall red knight", "a dog"], "character")
+        
+        self.assertEqual(batch[0], single)
+        self.assertNotEqual(batch[1], single)
+        for value in single["proportions"]:
+            self.assertTrue(0.85 <= value <= 1.15)
+    
+    def test_api_import_path_skips_backend_modules(self):
+        script = "import sys, app.main; print(sorted(m for m in sys.modules if m.startswith('app.services.backends')))"
+        # app.main creates ./static, so run it outside the source tree
+        with tempfile.TemporaryDirectory() as directory:
+            output = subprocess.run(
+                [sys.executable, "-c", script], cwd=directory, capture_output=True, check=True, text=True,
+                env={**os.environ, "PYTHONPATH": BACKEND_DIR}
+            ).stdout
+        self.assertEqual(output.strip(), "['app.services.backends']")
+
+class TestGeneratorBackends(unittest.TestCase):
+    def test_backend_hints_shape_the_model(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        textures = TextureGenerator(directory=tmpdir.name)
+        mock = ModelGenerator(cache=ResultCache(1024 * 1024), textures=textures, backend=BackendPool("mock", 1))
+        slow = ModelGenerator(
+            cache=ResultCache(1024 * 1024), textures=textures, backend=BackendPool(f"{__name__}:SlowBackend", 1)
+        )
+        
+        hints = slow.backend.infer("robot", "character")
+        plain = mock._generate_model_content("character", None, seed=1, prompt="robot")
+        shaped = slow._generate_model_content("character", None, seed=1, prompt="robot", hints=hints)
+        height = lambda model: max(element["to"][1] for element in model["elements"])
+        self.assertEqual(height(shaped), 2 * height(plain))
+        
+        # Only backends that change output take part in cache keys
+        self.assertNotIn("backend", mock._output_options())
+        self.assertEqual(slow._output_options()["backend"], "slow")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import crud
+from app.db.base import Base
+from app.db.models import Tag, TokenTransaction, User
+from app.services.animated_preview import AnimatedPreviewRenderer
+from app.services.executor import GenerationExecutor
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+class TestBatchGeneration(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 0
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            animated_renderer=AnimatedPreviewRenderer(self.tmpdir.name),
+            render_pool=GenerationExecutor(1, 100, name="render")
+        )
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+        db = self.session_factory()
+        db.add(User(id="u1", email="u1@example.com", username="u1", token_balance=100))
+        db.commit()
+        db.close()
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.generator.render_pool.shutdown(wait=True)
+        self.tmpdir.cleanup()
+    
+    def _variants(self, prompt, count):
+        return [{"model_id": f"m{index}", "prompt": prompt, "variant": index} for index in range(count)]
+    
+    def test_batch_generates_distinct_variants(self):
+        variants = self._variants("red robot", 4)
+        self.generator.generate_batch(
+            "b1", variants, "character", "walk",
+            user_id="u1", db_session_factory=self.session_factory, token_cost=2, seed=5
+        )
+        
+        batch = self.generator.get_model_status("b1", "u1")
+        self.assertEqual(batch["status"], "completed")
+        self.assertEqual((batch["completed"], batch["failed"]), (4, 0))
+        
+        models = [self.generator.storage.load(variant["model_id"]) for variant in variants]
+        layouts = {str([(e["from"], e["to"]) for e in model["elements"]]) for model in models}
+        self.assertEqual(len(layouts), 4)
+        uuids = [e["uuid"] for model in models for e in model["elements"]]
+        self.assertEqual(len(uuids), len(set(uuids)))
+        for model in models:
+            for element in model["elements"]:
+                self.assertTrue(all(low < high for low, high in zip(element["from"], element["to"])))
+        
+        # The whole batch is charged in one transaction
+        db = self.session_factory()
+        transactions = db.query(TokenTransaction).all()
+        self.assertEqual([t.amount for t in transactions], [-8])
+        self.assertEqual(db.query(User).first().token_balance, 92)
+        db.close()
+    
+    def test_first_variant_matches_single_generation(self):
+        self.generator.generate_batch("b1", self._variants("red robot", 2), "animal", seed=3)
+        self.generator.generate_model("Red robot", "single", "animal", seed=3)
+        
+        self.assertTrue(self.generator.get_model_status("single", None)["cache_hit"])
+        self.assertEqual(
+            self.generator.storage.load("m0")["elements"],
+            self.generator.storage.load("single")["elements"]
+        )
+    
+    def test_variants_use_their_resolved_types(self):
+        variants = [
+            {"model_id": "dog", "prompt": "a dog", "variant": 0, "model_type": "animal", "animation_type": "walk"},
+            {"model_id": "car", "prompt": "a car", "variant": 0, "model_type": "vehicle", "animation_type": None}
+        ]
+        self.generator.generate_batch("b1", variants, "auto", "auto", seed=2)
+        
+        self.assertEqual(self.generator.get_model_status("b1", "u1")["completed"], 2)
+        dog, car = (self.generator.storage.load(model_id)["metadata"] for model_id in ("dog", "car"))
+        self.assertEqual((dog["model_type"], dog["animation_type"]), ("animal", "walk"))
+        self.assertEqual((car["model_type"], car["animation_type"]), ("vehicle", None))
+        self.assertEqual(self.generator.storage.load("car")["animations"], [])
+    
+    def test_insufficient_tokens_fails_every_variant(self):
+        variants = self._variants("tank", 3)
+        self.generator.generate_batch(
+            "b1", variants, "vehicle",
+            user_id="u1", db_session_factory=self.session_factory, token_cost=40
+        )
+        
+        self.assertEqual(self.generator.get_model_status("b1", "u1")["status"], "failed")
+        for variant in variants:
+            self.assertEqual(self.generator.get_model_status(variant["model_id"], "u1")["status"], "failed")
+            self.assertFalse(self.generator.storage.exists(variant["model_id"]))
+    
+    def test_create_models_in_bulk(self):
+        db = self.session_factory()
+        models = crud.create_models(db, [
+            {"id": f"m{index}", "prompt": "p", "user_id": "u1", "tags": ["robot", "red"]}
+            for index in range(3)
+        ])
+        
+        self.assertEqual([model.id for model in models], ["m0", "m1", "m2"])
+        self.assertEqual(db.query(Tag).count(), 2)
+        self.assertEqual(sorted(tag.name for tag in crud.get_model(db, "m2").tags), ["red", "robot"])
+        db.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import io
+import json
+import tempfile
+import unittest
+import zipfile
+
+from app.services.bedrock import identifier_slug, iter_bedrock_archive, to_bedrock, to_bedrock_geometry
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+
+FACES = ("north", "east", "south", "west", "up", "down")
+
+def cube(cube_uuid, low, high, origin=(0, 0, 0), rotation=None, texture=0):
+    element = {
+        "uuid": cube_uuid, "name": cube_uuid, "from": list(low), "to": list(high), "origin": list(origin),
+        "faces": {face: {"uv": [0, 0, 4, 2], "texture": texture} for face in FACES}
+    }
+    if rotation:
+        element["rotation"] = rotation
+    return element
+
+class TestBedrockGeometry(unittest.TestCase):
+    def test_cubes_are_mirrored_and_top_uvs_flipped(self):
+        bbmodel = {
+            "resolution": {"width": 64, "height": 32},
+            "elements": [cube("a", (1, 0, 2), (3, 4, 5), origin=(2, 0, 2), rotation=[10, 20, 30])]
+        }
+        geometry, _ = to_bedrock_geometry(bbmodel, "test")
+        description = geometry["minecraft:geometry"][0]["description"]
+        self.assertEqual((description["identifier"], description["texture_width"]), ("geometry.test", 64))
+    
+        bone = geometry["minecraft:geometry"][0]["bones"][0]
+        self.assertEqual(bone["name"], "root")
+        converted = bone["cubes"][0]
+        self.assertEqual(converted["origin"], [-3, 0, 2])
+        self.assertEqual(converted["size"], [2, 4, 3])
+        self.assertEqual((converted["pivot"], converted["rotation"]), ([-2, 0, 2], [-10, -20, 30]))
+        self.assertEqual(converted["uv"]["north"], {"uv": [0, 0], "uv_size": [4, 2]})
+        self.assertEqual(converted["uv"]["up"], {"uv": [4, 2], "uv_size": [-4, -2]})
+    
+    def test_untextured_faces_are_dropped(self):
+        geometry, _ = to_bedrock_geometry({"elements": [cube("a", (0, 0, 0), (1, 1, 1), texture=None)]}, "test")
+        self.assertEqual(geometry["minecraft:geometry"][0]["bones"][0]["cubes"][0]["uv"], {})
+    
+    def test_groups_and_animated_cubes_become_bones(self):
+        bbmodel = {
+            "elements": [
+                cube("static", (0, 0, 0), (1, 1, 1)),
+                cube("moving", (0, 4, 0), (1, 5, 1), origin=(0, 4, 0)),
+                cube("loose", (5, 0, 0), (6, 1, 1))
+            ],
+            "outliner": [{
+                "uuid": "g1", "name": "arm", "origin": [1, 2, 3], "rotation": [0, 0, 10],
+                "children": ["static", "moving", {"uuid": "g2", "name": "arm", "children": []}]
+            }],
+            "animations": [{"name": "wave", "animators": {"moving": {"rotation": {"0": [0, 0, 0]}}}}]
+        }
+        geometry, bone_names = to_bedrock_geometry(bbmodel, "test")
+        bones = {bone["name"]: bone for bone in geometry["minecraft:geometry"][0]["bones"]}
+        self.assertEqual(list(bones), ["arm", "arm_2", "moving", "root"])
+        self.assertEqual((bones["arm"]["pivot"], bones["arm"]["rotation"]), ([-1, 2, 3], [0, 0, 10]))
+        self.assertEqual(len(bones["arm"]["cubes"]), 1)
+        self.assertEqual((bones["moving"]["parent"], bones["moving"]["pivot"]), ("arm", [0, 4, 0]))
+        self.assertEqual(bones["arm_2"]["parent"], "arm")
+        self.assertNotIn("parent", bones["root"])
+        self.assertEqual(bone_names, {"g1": "arm", "g2": "arm_2", "moving": "moving"})
+    
+    def test_renamed_bones_skip_taken_names(self):
+        bbmodel = {"outliner": [
+            {"uuid": "g1", "name": "arm", "children": []},
+            {"uuid": "g2", "name": "arm", "children": []},
+            {"uuid": "g3", "name": "arm_2", "children": []}
+        ]}
+        _, bone_names = to_bedrock_geometry(bbmodel, "test")
+        self.assertEqual(bone_names, {"g1": "arm", "g2": "arm_3", "g3": "arm_2"})
+
+class TestBedrockAnimations(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        generator = ModelGenerator(textures=TextureGenerator(ResultCache(1024 * 1024), self.tmpdir.name))
+        self.bbmodel = generator._generate_mock_bbmodel("a red knight", "character", "walk", "m1", seed=1)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_generated_animation_keys_are_kept(self):
+        _, animations = to_bedrock(self.bbmodel, "knight")
+        animation = animations["animations"]["animation.knight.walk"]
+        self.assertEqual((animation["loop"], animation["animation_length"]), (True, 1))
+        source = self.bbmodel["animations"][0]["animators"]
+        names = {element["uuid"]: element["name"] for element in self.bbmodel["elements"]}
+        for target, animator in source.items():
+            for channel, keys in animator.items():
+                self.assertEqual(animation["bones"][names[target]][channel], keys)
+    
+    def test_interpolation_modes_and_molang(self):
+        bbmodel = {
+            "elements": [cube("a", (0, 0, 0), (1, 1, 1))],
+            "animations": [{"name": "Spin Fast", "loop": "hold", "animators": {"a": {"keyframes": [
+                {"channel": "rotation", "time": 0.5, "interpolation": "step", "data_points": [{"x": "90", "y": 0, "z": 0}]},
+                {"channel": "rotation", "time": 0, "data_points": [{"x": 0, "y": "math.sin(q.anim_time * 90)", "z": 0}]},
+                {"channel": "position", "time": 0, "interpolation": "catmullrom", "data_points": [{"x": 1, "y": 2, "z": 3}]}
+            ]}}}]
+        }
+        _, animations = to_bedrock(bbmodel, "test")
+        animation = animations["animations"]["animation.test.spin_fast"]
+        self.assertEqual(animation["loop"], "hold_on_last_frame")
+        self.assertEqual(animation["bones"]["a"]["rotation"], {
+            "0": [0, "math.sin(q.anim_time * 90)", 0],
+            "0.5": {"pre": [0, "math.sin(q.anim_time * 90)", 0], "post": [90.0, 0, 0]}
+        })
+        self.assertEqual(animation["bones"]["a"]["position"], {"0": {"post": [1, 2, 3], "lerp_mode": "catmullrom"}})
+    
+    def test_animations_with_the_same_slug_are_kept(self):
+        bbmodel = {
+            "elements": [cube("a", (0, 0, 0), (1, 1, 1))],
+            "animations": [
+                {"name": name, "animators": {"a": {"rotation": {"0": [0, 0, index]}}}}
+                for index, name in enumerate(("Walk", "walk", "walk_2"))
+            ]
+        }
+        _, animations = to_bedrock(bbmodel, "test")
+        self.assertEqual(
+            {key: entry["bones"]["a"]["rotation"]["0"][2] for key, entry in animations["animations"].items()},
+            {"animation.test.walk": 0, "animation.test.walk_3": 1, "animation.test.walk_2": 2}
+        )
+    
+    def test_unreadable_keyframes_are_skipped_and_reported(self):
+        bbmodel = {
+            "elements": [cube("a", (0, 0, 0), (1, 1, 1))],
+            "animations": [{"name": "wave", "animators": {"a": {
+                "rotation": {"0": [0, 0, 0], "soon": [0, 0, 90]},
+                "keyframes": [{"channel": "position", "time": None, "data_points": [{"x": 1, "y": 0, "z": 0}]}]
+            }}}]
+        }
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_bedrock_archive([("m1", lambda: bbmodel)]))))
+        entry = json.loads(archive.read("manifest.json"))["models"][0]
+        self.assertEqual(entry["skipped_keyframes"], [
+            "animation.m1.wave a rotation key at 'soon'", "animation.m1.wave a position keyframe at None"
+        ])
+        animation = json.loads(archive.read(entry["animations"]))["animations"]["animation.m1.wave"]
+        self.assertEqual(animation["bones"]["a"], {"rotation": {"0": [0, 0, 0]}})
+    
+    def test_archive(self):
+        imported = dict(self.bbmodel, geometry_name="Knight")
+        models = [("m1", lambda: imported), ("m2", lambda: None), ("m3", lambda: imported)]
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(iter_bedrock_archive(models))))
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(manifest["missing"], ["m2"])
+        self.assertEqual([entry["geometry"] for entry in manifest["models"]], [
+            "models/entity/knight.geo.json", "models/entity/knight_m3.geo.json"
+        ])
+        geometry = json.loads(archive.read("models/entity/knight_m3.geo.json"))
+        self.assertEqual(geometry["minecraft:geometry"][0]["description"]["identifier"], "geometry.knight_m3")
+        self.assertIn("animation.knight.walk", json.loads(archive.read("animations/knight.animation.json"))["animations"])
+        self.assertTrue(archive.read("textures/entity/knight.png").startswith(b"\x89PNG"))
+        self.assertEqual(identifier_slug("Red Knight-2"), "red_knight_2")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.db import crud
+from app.db.base import Base
+from app.db.models import User
+from app.services.backends import BackendPool
+from app.services.cancellation import JobCancelled, JobHandle, JobRegistry
+from app.services.executor import GenerationExecutor
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.scheduler import FairShareScheduler
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+class TestJobHandle(unittest.TestCase):
+    def test_sleep_wakes_up_on_cancel(self):
+        handle = JobHandle("job", timeout=0)
+        threading.Timer(0.05, handle.cancel).start()
+        start = time.monotonic()
+        with self.assertRaises(JobCancelled) as raised:
+            handle.sleep(5)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(raised.exception.reason, "cancelled")
+    
+    def test_deadline_starts_with_the_job(self):
+        handle = JobHandle("job", timeout=0.05)
+        time.sleep(0.1)
+        handle.check()
+    
+        handle.start()
+        with self.assertRaises(JobCancelled) as raised:
+            handle.sleep(5)
+        self.assertEqual(raised.exception.reason, "timed_out")
+
+class TestGenerationCancellation(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 5
+        self.jobs = JobRegistry()
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            render_pool=GenerationExecutor(1, 100, name="render"),
+            # The mock backend sleeps through its stage, which cannot be interrupted
+            backend=BackendPool("local", 1),
+            jobs=self.jobs
+        )
+        self.scheduler = FairShareScheduler(max_workers=1, queue_limit=10)
+    
+        # Worker threads open their own sessions on the same in-memory database
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+        db = self.session_factory()
+        db.add(User(id="u1", email="u1@example.com", username="u1", token_balance=10))
+        db.commit()
+        db.close()
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.scheduler.shutdown(wait=True)
+        self.generator.render_pool.shutdown(wait=True)
+        self.generator.backend.shutdown()
+        self.tmpdir.cleanup()
+    
+    def _submit(self, model_id, timeout=None):
+        job = self.jobs.register(model_id, timeout)
+        job.future = self.scheduler.submit_as(
+            "u1", "pro", self.generator.generate_model,
+            "a red knight", model_id, "character", "walk",
+            user_id="u1", db_session_factory=self.session_factory, token_cost=2
+        )
+        return job.future
+    
+    def _submit_batch(self, batch_id, model_ids):
+        job = self.jobs.register(batch_id, owner="u1", members=model_ids)
+        job.future = self.scheduler.submit_as(
+            "u1", "pro", self.generator.generate_batch,
+            batch_id, [{"model_id": model_id, "prompt": "a red knight", "variant": index} for index, model_id in enumerate(model_ids)],
+            "character", "walk", user_id="u1", db_session_factory=self.session_factory, token_cost=2
+        )
+        return job.future
+    
+    def _wait_for_message(self, model_id, message):
+        for _ in range(500):
+            status = self.generator.get_model_status(model_id, "u1")
+            if status is not None and status["message"] == message:
+                return
+            time.sleep(0.01)
+        self.fail(f"{model_id} never reached {message!r}")
+    
+    def _balance(self):
+        db = self.session_factory()
+        try:
+            return crud.get_user(db, "u1").token_balance
+        finally:
+            db.close()
+    
+    def test_cancel_running_job_refunds_tokens(self):
+        future = self._submit("m1")
+        self._wait_for_message("m1", "Creating textures...")
+        self.assertEqual(self._balance(), 8)
+    
+        start = time.monotonic()
+        self.assertEqual(self.generator.cancel("m1")["message"], "Cancelling...")
+        future.result(timeout=5)
+        self.assertLess(time.monotonic() - start, 1)
+    
+        status = self.generator.get_model_status("m1", "u1")
+        self.assertEqual((status["status"], status["refunded"]), ("cancelled", 2))
+        self.assertEqual(self._balance(), 10)
+        self.assertIsNone(self.generator.storage.load("m1"))
+        self.assertIsNone(self.jobs.get("m1"))
+        self.assertEqual(self.scheduler.stats()["running"], 0)
+    
+    def test_timeout_stops_job_at_next_stage(self):
+        self._submit("m1", timeout=0.2).result(timeout=5)
+    
+        status = self.generator.get_model_status("m1", "u1")
+        self.assertEqual(status["status"], "timed_out")
+        self.assertIn("timed out after 0.2s", status["message"])
+        self.assertEqual(self._balance(), 10)
+    
+    def test_cancel_queued_job_frees_its_slot(self):
+        gate = threading.Event()
+        started = threading.Event()
+        self.scheduler.submit_as("u2", "pro", lambda: started.set() or gate.wait(5))
+        started.wait(5)
+        future = self._submit("m1")
+        self.assertEqual(self.scheduler.stats()["queued"], 1)
+    
+        status = self.generator.cancel("m1")
+        self.assertEqual((status["status"], status["token_cost"]), ("cancelled", 0))
+        self.assertTrue(future.cancelled())
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["queued"], stats["cancelled"]), (0, 1))
+        gate.set()
+        self.assertEqual(self._balance(), 10)
+    
+    def test_cancel_running_batch_refunds_tokens(self):
+        future = self._submit_batch("b1", ["m1", "m2"])
+        self._wait_for_message("b1", "Creating textures...")
+        self.assertEqual(self._balance(), 6)
+    
+        # A variant id cancels the batch it belongs to
+        self.assertEqual(self.generator.cancel("m2")["message"], "Queued in batch...")
+        future.result(timeout=5)
+    
+        batch = self.generator.get_model_status("b1", "u1")
+        self.assertEqual((batch["status"], batch["refunded"]), ("cancelled", 4))
+        for model_id in ("m1", "m2"):
+            self.assertEqual(self.generator.get_model_status(model_id, "u1")["status"], "cancelled")
+        self.assertEqual(self._balance(), 10)
+        self.assertIsNone(self.jobs.find("m1"))
+    
+    def test_cancel_queued_batch(self):
+        gate = threading.Event()
+        started = threading.Event()
+        self.scheduler.submit_as("u2", "pro", lambda: started.set() or gate.wait(5))
+        started.wait(5)
+        future = self._submit_batch("b1", ["m1", "m2"])
+    
+        batch = self.generator.cancel("b1")
+        self.assertEqual((batch["status"], batch["model_ids"], batch["token_cost"]), ("cancelled", ["m1", "m2"], 0))
+        self.assertTrue(future.cancelled())
+        for model_id in ("m1", "m2"):
+            status = self.generator.get_model_status(model_id, "u1")
+            self.assertEqual((status["status"], status["batch_id"]), ("cancelled", "b1"))
+        self.assertIsNone(self.jobs.find("m2"))
+        gate.set()
+        self.assertEqual(self._balance(), 10)
+    
+    def test_shutdown_marks_dropped_jobs_cancelled(self):
+        running = self._submit("m1")
+        self._wait_for_message("m1", "Creating textures...")
+        self._submit("m2")
+        self._submit_batch("b1", ["m3", "m4"])
+    
+        # The running job was charged and is left to stop on its own
+        self.scheduler.shutdown(wait=False, cancel_futures=True)
+        self.assertEqual(self.generator.cancel_dropped(), 2)
+        for model_id in ("m2", "b1", "m3", "m4"):
+            self.assertEqual(self.generator.get_model_status(model_id, "u1")["status"], "cancelled")
+        self.assertFalse(running.cancelled())
+        self.assertEqual(self.generator.get_model_status("m1", "u1")["status"], "processing")
+        self.generator.cancel("m1")
+        running.result(timeout=5)
+    
+    def test_cancel_unknown_job(self):
+        self.assertIsNone(self.generator.cancel("missing"))
+
+if __name__ == "__main__":
+    unittest.main()
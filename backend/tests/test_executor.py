@@ -0,0 +1,43 @@
+import os
+import threading
+import unittest
+
+from app.services.executor import GenerationExecutor, QueueFullError
+
+class TestGenerationExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = GenerationExecutor(max_workers=2, queue_limit=2)
+    
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+    
+    def test_submit_runs_job_off_caller_thread(self):
+        future = self.executor.submit(threading.current_thread)
+        self.assertIsNot(future.result(timeout=5), threading.current_thread())
+        self.assertEqual(self.executor.stats()["completed"], 1)
+    
+    def test_queue_limit(self):
+        release = threading.Event()
+        futures = [self.executor.submit(release.wait, 5) for _ in range(2)]
+        
+        with self.assertRaises(QueueFullError):
+            self.executor.submit(release.wait, 5)
+        
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(self.executor.stats()["running"], 0)
+    
+    def test_process_pool_runs_job_in_another_process(self):
+        executor = GenerationExecutor(max_workers=1, queue_limit=2, name="render", processes=True)
+        try:
+            self.assertNotEqual(executor.submit(os.getpid).result(timeout=60), os.getpid())
+            with self.assertRaises(ValueError):
+                executor.submit(int, "not a number").result(timeout=60)
+        finally:
+            executor.shutdown(wait=True)
+        stats = executor.stats()
+        self.assertEqual((stats["queued"], stats["completed"], stats["failed"]), (0, 1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+
+import numpy as np
+
+from app.services.archetypes import archetype_registry
+from app.services.geometry import CubeArray
+
+class TestCubeArray(unittest.TestCase):
+    def setUp(self):
+        self.cubes = archetype_registry.instantiate("character")
+    
+    def test_round_trip_is_exact(self):
+        elements = self.cubes.to_elements()
+        restored = CubeArray.from_elements(elements).to_elements()
+        self.assertEqual(json.dumps(restored), json.dumps(elements))
+    
+    def test_round_trip_optional_fields(self):
+        elements = self.cubes.to_elements()
+        elements[0]["from"] = [-4.5, 24, -4]
+        elements[0]["rotation"] = [0, 22.5, 0]
+        elements[1]["faces"]["up"]["texture"] = None
+        del elements[1]["faces"]["down"]
+        elements[2]["locked"] = True
+        elements[3]["faces"]["north"].update(rotation=90, cullface="north", tint=0)
+        
+        restored = CubeArray.from_elements(elements).to_elements()
+        
+        self.assertEqual(restored, elements)
+        self.assertEqual(restored[0]["from"], [-4.5, 24, -4])
+        self.assertIsInstance(restored[0]["from"][1], int)
+    
+    def test_translate_scale_bounds(self):
+        self.cubes.translate((0, -16, 0)).scale(2)
+        low, high = self.cubes.bounds()
+        
+        np.testing.assert_array_equal(low, [-16, -32, -8])
+        np.testing.assert_array_equal(high, [16, 32, 8])
+        self.assertEqual(self.cubes.to_elements()[0]["from"], [-8, 16, -8])
+    
+    def test_translate_mask(self):
+        mask = np.array([name.endswith("arm") for name in self.cubes.names])
+        self.cubes.translate((0, 1, 0), mask=mask)
+        
+        elements = {e["name"]: e for e in self.cubes.to_elements()}
+        self.assertEqual(elements["left_arm"]["from"], [4, 13, -2])
+        self.assertEqual(elements["head"]["from"], [-4, 24, -4])
+    
+    def test_mirror(self):
+        elements = self.cubes.to_elements()
+        self.cubes.data["rotation"][2] = [10, 20, 30]
+        self.cubes.mirror("x")
+        mirrored = self.cubes.to_elements()
+        
+        # The left arm lands where the right arm was, with east/west swapped
+        self.assertEqual(mirrored[2]["from"], elements[3]["from"])
+        self.assertEqual(mirrored[2]["to"], elements[3]["to"])
+        self.assertEqual(mirrored[2]["origin"], [-4, 22, 0])
+        self.assertEqual(mirrored[2]["rotation"], [10, -20, -30])
+        self.assertEqual(mirrored[2]["faces"]["east"], elements[2]["faces"]["west"])
+    
+    def test_face_extras_follow_mirrored_faces(self):
+        elements = self.cubes.to_elements()
+        elements[0]["faces"]["west"]["cullface"] = "west"
+        cubes = CubeArray.from_elements(elements).mirror("x")
+        
+        faces = cubes.select([0]).copy().to_elements()[0]["faces"]
+        self.assertEqual(faces["east"]["cullface"], "east")
+        self.assertNotIn("cullface", faces["west"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import json
+import os
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.gltf import GLB_MAGIC, UNITS_PER_METER, GLBExporter, iter_glb, quaternions
+from app.services.model_generator import ModelGenerator
+from app.services.renderer import Scene, rotation_matrices
+from app.services.result_cache import ResultCache
+from app.services.textures import TextureGenerator
+
+COMPONENTS = {5126: np.float32, 5123: np.uint16, 5125: np.uint32}
+WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4}
+
+def parse_glb(data):
+    magic, version, length = struct.unpack_from("<III", data)
+    assert (magic, version, length) == (GLB_MAGIC, 2, len(data))
+    json_length, _ = struct.unpack_from("<II", data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    binary_length, _ = struct.unpack_from("<II", data, 20 + json_length)
+    return gltf, data[28 + json_length:28 + json_length + binary_length]
+
+def read_accessor(gltf, binary, index):
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    width = WIDTHS[accessor["type"]]
+    offset = view["byteOffset"] + accessor.get("byteOffset", 0)
+    values = np.frombuffer(binary, COMPONENTS[accessor["componentType"]], accessor["count"] * width, offset)
+    assert offset + values.nbytes <= view["byteOffset"] + view["byteLength"]
+    return values.reshape(accessor["count"], width)
+
+def quaternion_matrix(q):
+    x, y, z, w = q
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    ])
+
+def world_vertices(gltf, binary):
+    """Vertices of every mesh in model units, with node transforms applied"""
+    parents = {child: index for index, node in enumerate(gltf["nodes"]) for child in node.get("children", [])}
+    
+    def transform(index):
+        node = gltf["nodes"][index]
+        matrix = np.eye(4)
+        matrix[:3, :3] = quaternion_matrix(node.get("rotation", [0, 0, 0, 1]))
+        matrix[:3, 3] = node.get("translation", [0, 0, 0])
+        return transform(parents[index]) @ matrix if index in parents else matrix
+    
+    vertices = []
+    for index, node in enumerate(gltf["nodes"]):
+        if "mesh" in node:
+            matrix = transform(index)
+            for primitive in gltf["meshes"][node["mesh"]]["primitives"]:
+                positions = read_accessor(gltf, binary, primitive["attributes"]["POSITION"])
+                indices = read_accessor(gltf, binary, primitive["indices"])
+                assert indices.max() < len(positions)
+                vertices.append(positions @ matrix[:3, :3].T + matrix[:3, 3])
+    return np.concatenate(vertices) * UNITS_PER_METER
+
+def same_points(a, b):
+    a = np.unique(np.round(a, 3), axis=0)
+    b = np.unique(np.round(b, 3), axis=0)
+    return a.shape == b.shape and np.allclose(a, b, atol=1e-3)
+
+class TestGLBExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.interpolation = settings.ANIMATION_INTERPOLATION
+        self.generator = ModelGenerator(textures=TextureGenerator(ResultCache(1024 * 1024), self.tmpdir.name))
+        self.bbmodel = self.generator._generate_mock_bbmodel("a red knight", "character", "walk", "m1", seed=1)
+    
+    def tearDown(self):
+        settings.ANIMATION_INTERPOLATION = self.interpolation
+        self.tmpdir.cleanup()
+    
+    def test_quaternions_match_rotation_matrices(self):
+        matrices = rotation_matrices(np.random.default_rng(0).uniform(-180, 180, (200, 3)))
+        rebuilt = np.stack([quaternion_matrix(q) for q in quaternions(matrices)])
+        np.testing.assert_allclose(rebuilt, matrices, atol=1e-9)
+    
+    def test_geometry_matches_the_renderer(self):
+        gltf, binary = parse_glb(b"".join(iter_glb(self.bbmodel)))
+        self.assertEqual(gltf["asset"]["version"], "2.0")
+        self.assertEqual(len(gltf["images"]), 1)
+        for view in gltf["bufferViews"]:
+            self.assertEqual(view["byteOffset"] % 4, 0)
+        self.assertTrue(same_points(world_vertices(gltf, binary), Scene(self.bbmodel).corners.reshape(-1, 3)))
+    
+    def test_animated_cubes_get_nodes_and_channels(self):
+        gltf, binary = parse_glb(b"".join(iter_glb(self.bbmodel)))
+        animators = self.bbmodel["animations"][0]["animators"]
+        animation = gltf["animations"][0]
+        self.assertEqual(animation["name"], "walk")
+        self.assertEqual(len(animation["channels"]), sum(len(animator) for animator in animators.values()))
+        sampler = animation["samplers"][0]
+        self.assertEqual(sampler["interpolation"], "LINEAR")
+        self.assertEqual(read_accessor(gltf, binary, sampler["output"]).shape[1], 4)
+    
+        # Smooth keys are sampled at a fixed frame rate
+        settings.ANIMATION_INTERPOLATION = "catmullrom"
+        gltf, binary = parse_glb(b"".join(iter_glb(self.bbmodel)))
+        sampler = gltf["animations"][0]["samplers"][0]
+        self.assertEqual(gltf["accessors"][sampler["input"]]["count"], int(settings.GLTF_ANIMATION_FPS) + 1)
+    
+    def test_groups_keep_hierarchy_and_rest_rotation(self):
+        bbmodel = {
+            "elements": [{
+                "uuid": "c1", "name": "blade", "from": [0, 8, 0], "to": [2, 16, 2], "origin": [0, 8, 0],
+                "faces": {face: {"uv": [0, 0, 2, 8], "texture": None} for face in ("north", "east", "south", "west", "up", "down")}
+            }],
+            "outliner": [{
+                "uuid": "g1", "name": "arm", "origin": [0, 8, 0], "rotation": [0, 0, 45],
+                "children": [{"uuid": "g2", "name": "hand", "origin": [1, 8, 1], "children": ["c1"]}]
+            }],
+            "animations": [{"name": "swing", "length": 1, "animators": {"g2": {"rotation": {"0": [0, 0, 0], "1": [0, 0, 90]}}}}]
+        }
+        gltf, binary = parse_glb(b"".join(iter_glb(bbmodel)))
+        self.assertEqual([node["name"] for node in gltf["nodes"]], ["arm", "hand"])
+        self.assertEqual(gltf["scenes"][0]["nodes"], [0])
+        self.assertEqual(gltf["nodes"][0]["children"], [1])
+        self.assertEqual(gltf["animations"][0]["channels"][0]["target"], {"node": 1, "path": "rotation"})
+    
+        # Children turn about the group's origin
+        corners = Scene(bbmodel).corners.reshape(-1, 3)
+        expected = (corners - [0, 8, 0]) @ rotation_matrices(np.array([[0.0, 0, 45]]))[0].T + [0, 8, 0]
+        self.assertTrue(same_points(world_vertices(gltf, binary), expected))
+    
+    def test_exporter_caches_complete_files_only(self):
+        exporter = GLBExporter(os.path.join(self.tmpdir.name, "exports"))
+        path = exporter.path_for("hash")
+    
+        stream = exporter.stream(self.bbmodel, "hash")
+        next(stream)
+        stream.close()
+        self.assertEqual(os.listdir(exporter.directory), [])
+    
+        data = b"".join(exporter.stream(self.bbmodel, "hash"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(exporter.export(self.bbmodel, "hash"), path)
+        self.assertNotEqual(exporter.path_for("other"), path)
+    
+    def test_exporter_evicts_least_recently_used(self):
+        exporter = GLBExporter(os.path.join(self.tmpdir.name, "exports"))
+        first = exporter.export(self.bbmodel, "first")
+        exporter.max_bytes = os.path.getsize(first) * 2
+        second = exporter.export(self.bbmodel, "second")
+        os.utime(first, (0, 0))
+        os.utime(second, (0, 0))
+    
+        # A cache hit marks the export as used, so the other one goes first
+        self.assertEqual(exporter.cached("first"), first)
+        third = exporter.export(self.bbmodel, "third")
+        self.assertEqual(sorted(os.listdir(exporter.directory)), sorted(os.path.basename(p) for p in (first, third)))
+        self.assertIsNone(exporter.cached("second"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from app.services.importer import BBModelImporter, BBModelImportError, ImportLimitError, ImportLimits
+from app.services.model_generator import ModelGenerator
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class ReadCounter(io.BytesIO):
+    """BytesIO that remembers how much of it was read"""
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed = self.tell()
+        return data
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = ModelStorage(self.tmpdir.name)
+        self.importer = BBModelImporter(self.storage, ImportLimits(10 ** 8, 1000, 10, 10 ** 6))
+        generator = ModelGenerator(textures=TextureGenerator(directory=self.tmpdir.name))
+        self.bbmodel = generator._generate_model_content("animal", "walk", seed=1, prompt="a brown dog")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def _import(self, data, chunk_size=None):
+        return self.importer.import_file("m1", io.BytesIO(data), "u1", "dog.bbmodel", chunk_size)
+    
+    def test_round_trip_across_chunk_boundaries(self):
+        self.bbmodel["metadata"] = {"user_id": "someone else"}
+        for indent in (None, 2):
+            # Tiny chunks split keys, strings and numbers between reads
+            summary = self._import(json.dumps(self.bbmodel, indent=indent).encode("utf-8"), chunk_size=7)
+            
+            self.assertEqual((summary["elements"], summary["animations"], summary["textures"]), (7, 1, 1))
+            stored = self.storage.load("m1")
+            metadata = stored.pop("metadata")
+            self.assertEqual(metadata["user_id"], "u1")
+            self.assertEqual(metadata["imported_from"], "dog.bbmodel")
+            self.assertEqual(stored, {key: value for key, value in self.bbmodel.items() if key != "metadata"})
+    
+    def test_invalid_files_are_not_stored(self):
+        del self.bbmodel["elements"][3]["from"]
+        cases = [
+            (b'{"meta": {}, "elements": [', "Invalid JSON"),
+            (b'{"meta": {}, "elements": []} trailing', "unexpected data"),
+            (b'{"elements": []}', "Missing meta"),
+            (b'{"meta": {}, "elements": {}}', "elements must be an array"),
+            (b'{"meta": {}, "meta": {}, "elements": []}', "Duplicate member"),
+            (json.dumps(self.bbmodel).encode("utf-8"), "Invalid element 3"),
+            (b'{"meta": {}, "elements": [], "animations": [{"name": "a"}]}', "Invalid animation 0"),
+            (b'{"meta": {}, "elements": [], "animations": [{"name": "a", "uuid": "a", "length": Infinity}]}', "Invalid animation 0"),
+            (b'{"meta": {}, "elements": ["\xff"]}', "not UTF-8")
+        ]
+        for data, message in cases:
+            with self.assertRaises(BBModelImportError) as raised:
+                self._import(data, chunk_size=16)
+            self.assertIn(message, str(raised.exception))
+            self.assertFalse(self.storage.exists("m1"))
+    
+    def test_limits_stop_reading_early(self):
+        element = json.dumps(self.bbmodel["elements"][0])
+        elements = ",".join(element.replace(self.bbmodel["elements"][0]["uuid"], str(index)) for index in range(5000))
+        stream = ReadCounter(f'{{"meta": {{}}, "elements": [{elements}]}}'.encode("utf-8"))
+        
+        with self.assertRaises(ImportLimitError):
+            self.importer.import_file("m1", stream, "u1", chunk_size=4096)
+        # Rejected at element 1000 of 5000, without reading the rest
+        self.assertLess(stream.consumed, len(stream.getvalue()) // 4)
+        
+        with self.assertRaises(ImportLimitError):
+            self._import(b'{"meta": {}, "name": "' + b"x" * (2 * 10 ** 6) + b'", "elements": []}')
+        self.importer = BBModelImporter(self.storage, ImportLimits(1000, 1000, 10, 10 ** 6))
+        with self.assertRaises(ImportLimitError):
+            self._import(json.dumps(self.bbmodel).encode("utf-8"))
+    
+    def test_large_file_in_bounded_memory(self):
+        # 256 embedded 1 MB textures plus 100k cubes, imported in a fresh process
+        # so its peak RSS is not shared with the rest of the suite
+        path = os.path.join(self.tmpdir.name, "large.bbmodel")
+        element = json.dumps(self.bbmodel["elements"][0])
+        with open(path, "w") as f:
+            f.write('{"meta": {"format_version": "4.5"}, "name": "large", "elements": [')
+            f.write(",".join(element.replace(self.bbmodel["elements"][0]["uuid"], str(index)) for index in range(100000)))
+            f.write('], "textures": [')
+            source = "data:image/png;base64," + "A" * (1024 * 1024)
+            for index in range(256):
+                f.write(("," if index else "") + json.dumps({"name": f"t{index}", "source": source}))
+            f.write("]}")
+        size = os.path.getsize(path)
+        self.assertGreater(size, 256 * 1024 * 1024)
+        
+        script = textwrap.dedent("""
+            import json, resource, sys
+            from app.services.importer import BBModelImporter, ImportLimits
+            from app.services.storage import ModelStorage
+            importer = BBModelImporter(ModelStorage(sys.argv[2]), ImportLimits(2 ** 30, 100000, 10, 2 ** 24))
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            with open(sys.argv[1], "rb") as f:
+                summary = importer.import_file("large", f, "u1")
+            after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print(json.dumps({"summary": summary, "growth_kb": after - before}))
+        """)
+        output = subprocess.run(
+            [sys.executable, "-c", script, path, self.tmpdir.name],
+            cwd=BACKEND_DIR, capture_output=True, check=True, text=True
+        ).stdout
+        result = json.loads(output)
+        
+        self.assertEqual(result["summary"]["elements"], 100000)
+        self.assertEqual(result["summary"]["textures"], 256)
+        self.assertGreater(result["summary"]["size"], 256 * 1024 * 1024)
+        # A handful of chunks and textures in flight, nowhere near the file size
+        self.assertLess(result["growth_kb"] * 1024, 64 * 1024 * 1024)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.animated_preview import AnimatedPreviewRenderer
+from app.services.executor import GenerationExecutor
+from app.services.geometry import CubeArray
+from app.services.lod import build_lod, element_budget, ensure_lod, parse_lod_levels, simplify_cubes
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage, lod_key
+from app.services.textures import TextureGenerator
+
+def cubes_from_boxes(boxes):
+    cubes = CubeArray.empty(len(boxes))
+    cubes.data["from"] = [box[0] for box in boxes]
+    cubes.data["to"] = [box[1] for box in boxes]
+    # Distinct textures keep the lossless merge from fusing the cubes
+    cubes.data["texture"] = np.arange(len(boxes))[:, None]
+    cubes.uuids = [f"cube-{index}" for index in range(len(boxes))]
+    cubes.names = [f"cube-{index}" for index in range(len(boxes))]
+    return cubes
+
+class TestSimplifyCubes(unittest.TestCase):
+    def test_parse_levels_and_budget(self):
+        self.assertEqual(parse_lod_levels("0.5, 0.2"), [0.5, 0.2])
+        with self.assertRaises(ValueError):
+            parse_lod_levels("0.5,1.5")
+        self.assertEqual(element_budget(10, 0.2), 2)
+        self.assertEqual(element_budget(3, 0.1), 1)
+    
+    def test_small_neighbour_is_absorbed_and_far_one_dropped(self):
+        cubes = cubes_from_boxes([
+            ([0, 0, 0], [4, 4, 4]),
+            ([4, 0, 0], [5, 1, 1]),
+            ([20, 20, 20], [21, 21, 21])
+        ])
+        reduced = simplify_cubes(cubes, 1)
+        self.assertEqual(reduced.uuids, ["cube-0"])
+        np.testing.assert_array_equal(reduced.data["from"][0], [0, 0, 0])
+        np.testing.assert_array_equal(reduced.data["to"][0], [5, 4, 4])
+        # The input is left untouched
+        np.testing.assert_array_equal(cubes.data["to"][0], [4, 4, 4])
+    
+    def test_locked_cubes_are_kept_first_and_never_stretched(self):
+        cubes = cubes_from_boxes([
+            ([0, 0, 0], [4, 4, 4]),
+            ([4, 0, 0], [5, 1, 1]),
+            ([4, 1, 0], [5, 2, 1])
+        ])
+        reduced = simplify_cubes(cubes, 2, locked={"cube-2"})
+        self.assertEqual(reduced.uuids, ["cube-0", "cube-2"])
+        np.testing.assert_array_equal(reduced.data["to"][1], [5, 2, 1])
+    
+    def test_budget_above_count_keeps_everything(self):
+        cubes = cubes_from_boxes([([0, 0, 0], [1, 1, 1]), ([3, 0, 0], [4, 1, 1])])
+        self.assertEqual(len(simplify_cubes(cubes, 5)), 2)
+
+class TestBuildLod(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.settings = (settings.GENERATION_STAGE_DELAY, settings.LOD_GENERATION, settings.LOD_LEVELS)
+        settings.GENERATION_STAGE_DELAY = 0
+        settings.LOD_LEVELS = "0.5,0.2"
+        self.storage = ModelStorage(self.tmpdir.name)
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=self.storage,
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            animated_renderer=AnimatedPreviewRenderer(self.tmpdir.name),
+            render_pool=GenerationExecutor(1, 100, name="render")
+        )
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY, settings.LOD_GENERATION, settings.LOD_LEVELS = self.settings
+        self.generator.render_pool.shutdown(wait=True)
+        self.tmpdir.cleanup()
+    
+    def test_lod_prunes_outliner_and_animations(self):
+        self.generator.generate_model("a knight", "m1", "character", "walk", seed=1)
+        bbmodel = self.storage.load("m1")
+        lod = build_lod(bbmodel, 0.2, 2)
+    
+        uuids = {element["uuid"] for element in lod["elements"]}
+        self.assertLess(len(lod["elements"]), len(bbmodel["elements"]))
+        self.assertEqual(lod["metadata"]["lod"]["elements_after"], len(lod["elements"]))
+        self.assertNotIn("lod", bbmodel["metadata"])
+    
+        def outliner_uuids(entries):
+            for entry in entries:
+                if isinstance(entry, str):
+                    yield entry
+                else:
+                    yield from outliner_uuids(entry.get("children", []))
+        self.assertLessEqual(set(outliner_uuids(lod["outliner"])), uuids)
+        for animation in lod["animations"]:
+            self.assertLessEqual(set(animation["animators"]), uuids)
+        # Kept cubes keep their animation
+        animated = set(bbmodel["animations"][0]["animators"])
+        self.assertEqual(set(lod["animations"][0]["animators"]), animated & uuids)
+    
+    def test_generation_stores_lods(self):
+        settings.LOD_GENERATION = True
+        self.generator.generate_model("a brown dog", "m1", "animal", "walk", seed=2)
+    
+        self.assertEqual(sorted(self.storage.lod_levels("m1")), [1, 2])
+        self.assertIn("lod", self.generator.get_model_status("m1", "u1")["timings"])
+        counts = [len(self.storage.load(key)["elements"]) for key in ("m1", lod_key("m1", 1), lod_key("m1", 2))]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(list(self.storage.iter_model_ids()), ["m1"])
+    
+        self.storage.delete("m1")
+        self.assertEqual(list(self.storage.lod_levels("m1")), [])
+    
+    def test_lod_built_on_demand_and_dropped_on_save(self):
+        self.generator.generate_model("a brown dog", "m1", "animal", "walk", seed=2)
+        levels = parse_lod_levels(settings.LOD_LEVELS)
+        self.assertEqual(list(self.storage.lod_levels("m1")), [])
+    
+        self.assertEqual(ensure_lod(self.storage, "m1", 2, levels), lod_key("m1", 2))
+        self.assertEqual(self.storage.load(lod_key("m1", 2))["metadata"]["lod"]["level"], 2)
+        self.assertIsNone(ensure_lod(self.storage, "m1", 3, levels))
+        self.assertIsNone(ensure_lod(self.storage, "missing", 1, levels))
+    
+        # Saving a new version of the model invalidates LODs built from the old one
+        self.generator.edit_model("m1", "animations", animation_type="idle")
+        self.assertEqual(list(self.storage.lod_levels("m1")), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+
+from app.core.config import settings
+from app.services.animated_preview import AnimatedPreviewRenderer
+from app.services.executor import GenerationExecutor
+from app.services.metrics import MetricsRegistry, StageTimer
+from app.services.model_generator import JOB_SECONDS, STAGE_SECONDS, ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+    
+    def test_histogram_exposition(self):
+        histogram = self.registry.histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="analyze")
+        histogram.observe(0.5, stage="analyze")
+        histogram.observe(5, stage="analyze")
+    
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP stage_seconds Stage time", "# TYPE stage_seconds histogram"])
+        self.assertIn('stage_seconds_bucket{stage="analyze",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="analyze",le="1"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="analyze",le="+Inf"} 3', lines)
+        self.assertIn('stage_seconds_sum{stage="analyze"} 5.55', lines)
+        self.assertIn('stage_seconds_count{stage="analyze"} 3', lines)
+    
+    def test_counter_and_gauge_callback(self):
+        counter = self.registry.counter("jobs", "Jobs", ("status",))
+        counter.inc(status="completed")
+        counter.inc(2, status="completed")
+        self.registry.gauge_callback("queue", "Queue", ("tier",), lambda: {("pro",): 3})
+    
+        text = self.registry.render()
+        self.assertIn('jobs_total{status="completed"} 3', text)
+        self.assertIn("# TYPE queue gauge", text)
+        self.assertIn('queue{tier="pro"} 3', text)
+    
+    def test_labels(self):
+        histogram = self.registry.histogram("seconds", "Time", ("model_type", "animation_type"))
+        histogram.observe(1, model_type='say "hi"', animation_type=None)
+        self.assertIn('seconds_count{model_type="say \\"hi\\"",animation_type=""} 1', self.registry.render())
+        with self.assertRaises(ValueError):
+            histogram.observe(1, model_type="character")
+    
+    def test_registering_twice_returns_the_same_family(self):
+        first = self.registry.counter("jobs", "Jobs")
+        self.assertIs(self.registry.counter("jobs", "Jobs"), first)
+        with self.assertRaises(ValueError):
+            self.registry.histogram("jobs", "Jobs")
+    
+    def test_stage_timer_accumulates(self):
+        timer = StageTimer()
+        with timer.stage("structure"):
+            pass
+        with timer.stage("textures"):
+            pass
+        with timer.stage("structure"):
+            pass
+        self.assertEqual(list(timer.timings), ["structure", "textures"])
+        self.assertGreaterEqual(timer.elapsed, sum(timer.timings.values()))
+
+class TestGenerationTimings(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 0
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            animated_renderer=AnimatedPreviewRenderer(self.tmpdir.name),
+            render_pool=GenerationExecutor(1, 100, name="render")
+        )
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.generator.render_pool.shutdown(wait=True)
+        self.tmpdir.cleanup()
+    
+    def test_status_and_histograms_get_stage_timings(self):
+        labels = {"job": "generate", "model_type": "animal", "animation_type": "walk"}
+        before = STAGE_SECONDS.count(stage="write", **labels)
+        jobs_before = JOB_SECONDS.count(status="completed", **labels)
+    
+        self.generator.generate_model("a brown dog", "m1", "animal", "walk", seed=3)
+    
+        timings = self.generator.get_model_status("m1", "u1")["timings"]
+        for stage in ("cache", "analyze", "structure", "inference", "textures", "animations", "serialize", "write"):
+            self.assertIn(stage, timings)
+        self.assertEqual(STAGE_SECONDS.count(stage="write", **labels), before + 1)
+        self.assertEqual(JOB_SECONDS.count(status="completed", **labels), jobs_before + 1)
+    
+        # A cache hit skips the generation stages
+        self.generator.generate_model("a brown dog", "m2", "animal", "walk", seed=3)
+        self.assertNotIn("structure", self.generator.get_model_status("m2", "u1")["timings"])
+    
+    def test_free_text_types_are_labelled_other(self):
+        labels = {"job": "generate", "model_type": "other", "animation_type": "other"}
+        before = JOB_SECONDS.count(status="completed", **labels)
+    
+        self.generator.generate_model("a brown dog", "m1", "dog with a hat", "wag its tail", seed=3)
+        self.assertEqual(JOB_SECONDS.count(status="completed", **labels), before + 1)
+        self.assertEqual(JOB_SECONDS.count(status="completed", **{**labels, "model_type": "dog with a hat"}), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.endpoints import models
+from app.core.config import settings
+from app.db import crud
+from app.db.base import Base, get_db
+from app.models.user import User
+from app.services.auth import get_current_user
+from app.services.storage import model_storage
+
+FACES = ("north", "east", "south", "west", "up", "down")
+
+def bbmodel():
+    element = {
+        "name": "cube", "uuid": "c", "from": [0, 0, 0], "to": [16, 16, 16],
+        "faces": {face: {"uv": [0, 0, 16, 16], "texture": None} for face in FACES}
+    }
+    animation = {"name": "spin", "length": 1, "loop": "loop", "animators": {"c": {"rotation": {"0": [0, 0, 0], "1": [0, 90, 0]}}}}
+    return {"meta": {}, "elements": [element], "textures": [], "animations": [animation]}
+
+class TestModelAccess(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dirs = (settings.MODELS_DIR, settings.PREVIEWS_DIR)
+        settings.MODELS_DIR = f"{self.tmpdir.name}/models"
+        settings.PREVIEWS_DIR = f"{self.tmpdir.name}/previews"
+    
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        # Database enum columns look members up by name, not by value
+        for model_id, owner, visibility in (("private", "owner", "PRIVATE"), ("public", "owner", "PUBLIC")):
+            crud.create_model(db, {
+                "id": model_id, "name": model_id, "prompt": "", "user_id": owner, "status": "COMPLETED",
+                "model_type": "CUSTOM", "visibility": visibility, "tags": [], "token_cost": 0
+            })
+            model_storage.save(model_id, bbmodel())
+        db.close()
+    
+        def get_test_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+    
+        self.user_id = "owner"
+        app = FastAPI()
+        app.include_router(models.router, prefix="/api/models")
+        app.dependency_overrides[get_db] = get_test_db
+        app.dependency_overrides[get_current_user] = lambda: User(
+            id=self.user_id, username=self.user_id, created_at=datetime.now(), token_balance=10
+        )
+        self.client = TestClient(app)
+    
+    def tearDown(self):
+        settings.MODELS_DIR, settings.PREVIEWS_DIR = self.dirs
+        self.tmpdir.cleanup()
+    
+    def test_preview_of_private_model_is_hidden_from_others(self):
+        self.assertEqual(self.client.get("/api/models/private/preview?size=32").status_code, 200)
+    
+        self.user_id = "other"
+        self.assertEqual(self.client.get("/api/models/private/preview?size=32").status_code, 404)
+        self.assertEqual(self.client.get("/api/models/public/preview?size=32").status_code, 200)
+    
+    def test_animated_preview_of_private_model_is_hidden_from_others(self):
+        self.user_id = "other"
+        self.assertEqual(self.client.get("/api/models/private/preview/animated?size=16").status_code, 404)
+        self.assertEqual(self.client.get("/api/models/public/preview/animated?size=16").status_code, 200)
+
+    def test_texture_edit_is_rejected_without_texture_generation(self):
+        enabled = settings.TEXTURE_GENERATION
+        settings.TEXTURE_GENERATION = False
+        try:
+            response = self.client.post("/api/models/private/edit", data={"aspect": "textures"})
+        finally:
+            settings.TEXTURE_GENERATION = enabled
+        self.assertEqual(response.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.models import TokenTransaction, User
+from app.services.animated_preview import AnimatedPreviewRenderer
+from app.services.executor import GenerationExecutor
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+class TestModelEditing(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 0
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            animated_renderer=AnimatedPreviewRenderer(self.tmpdir.name),
+            render_pool=GenerationExecutor(1, 100, name="render")
+        )
+        self.generator.generate_model("a red knight", "m1", "character", "walk", user_id="u1", seed=1)
+        self.original = self.generator.storage.load("m1")
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.generator.render_pool.shutdown(wait=True)
+        self.tmpdir.cleanup()
+    
+    def _edit(self, aspect, **options):
+        self.generator.edit_model("m1", aspect, **options)
+        return self.generator.get_model_status("m1", "u1"), self.generator.storage.load("m1")
+    
+    def test_edit_animations_keeps_geometry_and_textures(self):
+        status, edited = self._edit("animations", animation_type="idle")
+        
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["changed"], ["animations"])
+        self.assertEqual([animation["name"] for animation in edited["animations"]], ["idle"])
+        self.assertEqual(edited["metadata"]["animation_type"], "idle")
+        self.assertEqual(edited["elements"], self.original["elements"])
+        self.assertEqual(edited["textures"], self.original["textures"])
+        
+        _, removed = self._edit("animations")
+        self.assertEqual(removed["animations"], [])
+    
+    def test_edits_keep_the_urls_of_untouched_previews(self):
+        original = self.generator.get_model_status("m1", "u1")
+        self.assertIsNotNone(original["preview_url"])
+        self.assertIsNotNone(original["animated_preview_url"])
+        
+        for aspect, options in (("animations", {"animation_type": "idle"}), ("textures", {"prompt": "a blue knight"})):
+            status, _ = self._edit(aspect, **options)
+            self.assertEqual(status["changed"], [aspect])
+            self.assertEqual(status["preview_url"], original["preview_url"])
+            self.assertEqual(status["animated_preview_url"], original["animated_preview_url"])
+    
+    def test_edit_textures_only_rewrites_when_palette_changes(self):
+        status, edited = self._edit("textures", prompt="a blue knight")
+        
+        self.assertEqual(status["changed"], ["textures"])
+        self.assertNotEqual(edited["textures"][0]["source"], self.original["textures"][0]["source"])
+        self.assertEqual(edited["textures"][0]["uuid"], self.original["textures"][0]["uuid"])
+        self.assertEqual(edited["elements"], self.original["elements"])
+        self.assertEqual(edited["animations"], self.original["animations"])
+        
+        status, _ = self._edit("textures", prompt="a blue knight")
+        self.assertEqual(status["changed"], [])
+    
+    def test_edit_element_group(self):
+        status, edited = self._edit("elements", prompt="giant legs", group="leg")
+        
+        self.assertEqual(status["changed"], ["elements", "textures"])
+        before = {element["name"]: element for element in self.original["elements"]}
+        after = {element["name"]: element for element in edited["elements"]}
+        self.assertEqual(list(after), list(before))
+        for name in after:
+            self.assertEqual(after[name]["uuid"], before[name]["uuid"])
+            height = after[name]["to"][1] - after[name]["from"][1]
+            original_height = before[name]["to"][1] - before[name]["from"][1]
+            if "leg" in name:
+                self.assertGreater(height, original_height)
+            else:
+                self.assertEqual((after[name]["from"], after[name]["to"]), (before[name]["from"], before[name]["to"]))
+        # Legs stay on the ground and keep their walk cycle
+        self.assertEqual(min(after[name]["from"][1] for name in after if "leg" in name), 0)
+        self.assertEqual(edited["animations"][0]["animators"], self.original["animations"][0]["animators"])
+    
+    def test_unknown_group_fails_without_rewriting(self):
+        status, edited = self._edit("elements", group="wing")
+        
+        self.assertEqual(status["status"], "failed")
+        self.assertEqual(edited, self.original)
+    
+    def test_edit_charges_tokens(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        db.add(User(id="u1", email="u1@example.com", username="u1", token_balance=10))
+        db.commit()
+        
+        self._edit("animations", animation_type="attack", user_id="u1", db_session_factory=session_factory)
+        self.assertEqual([t.amount for t in db.query(TokenTransaction).all()], [-1])
+        db.close()
+
+if __name__ == "__main__":
+    unittest.main()
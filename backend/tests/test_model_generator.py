@@ -1,11 +1,15 @@
 import unittest
 import json
 import os
+import tempfile
 from app.services.model_generator import ModelGenerator
+from app.services.textures import TextureGenerator
 
 class TestModelGenerator(unittest.TestCase):
     def setUp(self):
-        self.model_generator = ModelGenerator()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.model_generator = ModelGenerator(textures=TextureGenerator(directory=self.tmpdir.name))
         self.test_prompt = "A blocky robot character with red armor"
         self.test_model_id = "test_model_id"
         self.test_user_id = "test_user_id"
@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.services.archetypes import archetype_registry
+from app.services.geometry import FACE_INDEX, CubeArray
+from app.services.model_generator import ModelGenerator
+from app.services.optimizer import cull_hidden_faces, merge_cubes, optimize_geometry
+from app.services.textures import TextureGenerator
+
+def voxels(positions):
+    positions = np.asarray(positions, dtype=np.float64)
+    cubes = CubeArray.empty(len(positions))
+    cubes.data["from"] = positions
+    cubes.data["to"] = positions + 1
+    cubes.uuids = [f"cube-{index}" for index in range(len(positions))]
+    cubes.names = ["cube"] * len(positions)
+    return cubes
+
+def grid(x, y, z):
+    return np.stack(np.meshgrid(range(x), range(y), range(z), indexing="ij"), axis=-1).reshape(-1, 3)
+
+class TestMergeCubes(unittest.TestCase):
+    def test_block_of_voxels_merges_to_one_cube(self):
+        merged = merge_cubes(voxels(grid(4, 3, 5)))
+        self.assertEqual(len(merged), 1)
+        np.testing.assert_array_equal(merged.data["from"][0], [0, 0, 0])
+        np.testing.assert_array_equal(merged.data["to"][0], [4, 3, 5])
+        self.assertEqual(merged.uuids, ["cube-0"])
+    
+    def test_different_faces_and_locked_cubes_stay_apart(self):
+        cubes = voxels([[0, 0, 0], [1, 0, 0], [2, 0, 0], [3, 0, 0]])
+        cubes.data["texture"][1] = 1
+        merged = merge_cubes(cubes)
+        self.assertEqual(len(merged), 3)
+        
+        merged = merge_cubes(voxels([[0, 0, 0], [1, 0, 0], [2, 0, 0]]), locked={"cube-1"})
+        self.assertEqual(merged.uuids, ["cube-0", "cube-1", "cube-2"])
+    
+    def test_names_extras_and_uvs_must_match(self):
+        cubes = voxels(grid(6, 1, 1))
+        cubes.names[1] = "arm"
+        cubes.extras[3] = {"inflate": 0.5}
+        cubes.face_extras[4] = {"up": {"tint": 0}}
+        cubes.data["uv"][5, FACE_INDEX["up"]] = [4, 4, 5, 5]
+        self.assertEqual(len(merge_cubes(cubes)), 6)
+        
+        # UVs laid out after merging don't need to match
+        cubes = voxels(grid(2, 1, 1))
+        cubes.data["uv"][1, FACE_INDEX["up"]] = [4, 4, 5, 5]
+        self.assertEqual(len(merge_cubes(cubes)), 2)
+        self.assertEqual(len(merge_cubes(cubes, uvs_repacked=True)), 1)
+    
+    def test_gaps_and_rotations_prevent_merging(self):
+        cubes = voxels([[0, 0, 0], [2, 0, 0], [3, 0, 0]])
+        cubes.data["rotation"][2] = [0, 45, 0]
+        self.assertEqual(len(merge_cubes(cubes)), 3)
+
+class TestCullHiddenFaces(unittest.TestCase):
+    def test_touching_faces_are_culled(self):
+        cubes = voxels(grid(3, 3, 3))
+        culled = cull_hidden_faces(cubes)
+        # Every face between two voxels is hidden on both sides
+        self.assertEqual(culled, 2 * 3 * 3 * 3 * 2)
+        visible = cubes.data["has_face"].sum()
+        self.assertEqual(visible, 6 * 9)
+    
+    def test_partial_cover_keeps_face(self):
+        cubes = voxels([[0, 0, 0]])
+        big = CubeArray.empty(1)
+        big.data["from"] = [[-1, 1, -1]]
+        big.data["to"] = [[2, 2, 2]]
+        small = CubeArray.empty(1)
+        small.data["from"] = [[0.5, -1, 0]]
+        small.data["to"] = [[1.5, 0, 1]]
+        cubes = CubeArray.concat([cubes, big, small])
+        
+        self.assertEqual(cull_hidden_faces(cubes), 1)
+        self.assertFalse(cubes.data["has_face"][0, FACE_INDEX["up"]])
+        self.assertTrue(cubes.data["has_face"][0, FACE_INDEX["down"]])
+        self.assertTrue(cubes.data["has_face"][1, FACE_INDEX["down"]])
+        
+        # A neighbour whose touching face was removed leaves a gap, not a cover
+        cubes = voxels([[0, 0, 0], [1, 0, 0]])
+        cubes.data["has_face"][1, FACE_INDEX["west"]] = False
+        self.assertEqual(cull_hidden_faces(cubes), 0)
+        self.assertTrue(cubes.data["has_face"][0, FACE_INDEX["east"]])
+    
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        cubes = voxels(np.unique(rng.integers(0, 8, (300, 3)), axis=0))
+        occupied = {tuple(p) for p in cubes.data["from"].astype(int)}
+        expected = 0
+        for p in occupied:
+            for axis in range(3):
+                for step in (-1, 1):
+                    neighbour = list(p)
+                    neighbour[axis] += step
+                    expected += tuple(neighbour) in occupied
+        self.assertEqual(cull_hidden_faces(cubes), expected)
+
+class TestOptimizedGeneration(unittest.TestCase):
+    def test_character_without_animation_loses_hidden_faces(self):
+        cubes, report = optimize_geometry(archetype_registry.instantiate("character"))
+        self.assertEqual(report["cubes_after"], 6)
+        self.assertLess(report["faces_after"], report["faces_before"])
+    
+    def test_animated_cubes_are_left_alone(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+            animated = generator._generate_model_content("character", "walk", seed=1, optimize=True)
+            model = generator._generate_model_content("character", None, seed=1, optimize=True)
+        
+        report = animated["metadata"]["geometry_optimization"]
+        self.assertEqual(report["faces_after"], report["faces_before"])
+        self.assertEqual(len(model["elements"][1]["faces"]), 3)
+        self.assertEqual(len(model["outliner"]), len(model["elements"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import threading
+import unittest
+
+from app.services.progress import ProgressBroker, stream_status_events
+
+class TestProgressBroker(unittest.IsolatedAsyncioTestCase):
+    async def test_publish_from_worker_thread(self):
+        broker = ProgressBroker()
+        subscriptions = [broker.subscribe("m1") for _ in range(3)]
+        
+        thread = threading.Thread(target=broker.publish, args=("m1", {"status": "processing"}))
+        thread.start()
+        thread.join()
+        
+        for subscription in subscriptions:
+            event = await asyncio.wait_for(subscription.get(), timeout=1)
+            self.assertEqual(event["status"], "processing")
+            broker.unsubscribe(subscription)
+        self.assertEqual(broker.subscriber_count(), 0)
+    
+    async def test_stream_until_terminal(self):
+        broker = ProgressBroker()
+        current = {"model_id": "m1", "status": "processing", "message": "Starting"}
+        
+        async def collect():
+            return [frame async for frame in stream_status_events(broker, "m1", lambda: current, 5)]
+        
+        task = asyncio.create_task(collect())
+        while broker.subscriber_count("m1") == 0:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        broker.publish("m1", {"model_id": "m1", "status": "processing", "message": "Analyzing prompt..."})
+        broker.publish("m1", {"model_id": "m1", "status": "completed", "message": "Done"})
+        frames = await asyncio.wait_for(task, timeout=1)
+        
+        statuses = [json.loads(frame.split("data: ", 1)[1])["status"] for frame in frames]
+        self.assertEqual(statuses, ["processing", "processing", "completed"])
+        self.assertEqual(broker.subscriber_count(), 0)
+    
+    async def test_falls_back_to_store_on_heartbeat(self):
+        broker = ProgressBroker()
+        states = iter([{"status": "processing"}, {"status": "completed"}])
+        
+        frames = [frame async for frame in stream_status_events(broker, "m1", lambda: next(states), 0.01)]
+        
+        self.assertEqual(len(frames), 2)
+        self.assertIn('"completed"', frames[-1])
+
+if __name__ == "__main__":
+    unittest.main()
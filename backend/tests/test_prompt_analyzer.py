@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+
+from app.services.model_generator import ModelGenerator
+from app.services.prompt_analyzer import (
+    PhraseMatcher, analyze_prompt, normalize, resolve_animation, resolve_archetype
+)
+from app.services.textures import TextureGenerator
+
+class TestPhraseMatcher(unittest.TestCase):
+    def test_overlapping_phrases_on_word_boundaries(self):
+        matcher = PhraseMatcher({"he": 1, "she": 2, "hers": 3, "fire truck": 4, "truck": 5})
+        text = normalize("She said: HERS is the fire-truck, not the sheep")
+        found = sorted(value for _, value in matcher.find(text))
+        # "he" inside "she"/"sheep" and "hers" are not whole words
+        self.assertEqual(found, [2, 3, 4, 5])
+    
+    def test_no_match(self):
+        self.assertEqual(list(PhraseMatcher({"cat": 1}).find(normalize("concatenate"))), [])
+
+class TestAnalyzePrompt(unittest.TestCase):
+    def test_features(self):
+        features = analyze_prompt("A giant RED and gold robot dog, walking with a tail and wings")
+        self.assertEqual(features.archetype, "animal")
+        self.assertEqual(features.colors, ("red", "gold"))
+        self.assertEqual(features.size, 1.5)
+        self.assertEqual(features.animation, "walk")
+        self.assertEqual(features.parts, ("tail", "wing"))
+    
+    def test_multi_word_and_plural_phrases(self):
+        self.assertEqual(analyze_prompt("two fire trucks").archetype, "vehicle")
+        self.assertEqual(analyze_prompt("knights attacking").animation, "attack")
+        self.assertEqual(analyze_prompt("something").archetype, None)
+    
+    def test_memoized_per_normalized_prompt(self):
+        self.assertIs(analyze_prompt("Tiny green cat!"), analyze_prompt("tiny  green cat"))
+    
+    def test_resolution(self):
+        templates = {"character": None, "animal": None}
+        features = analyze_prompt("a sleeping cat")
+        self.assertEqual(resolve_archetype("character", features, templates), "character")
+        self.assertEqual(resolve_archetype("auto", features, templates), "animal")
+        self.assertEqual(resolve_archetype("prop", features, templates), "animal")
+        self.assertEqual(resolve_archetype("auto", analyze_prompt("thing"), templates), "character")
+        self.assertEqual(resolve_animation("auto", features), "idle")
+        self.assertEqual(resolve_animation("walk", features), "walk")
+        self.assertIsNone(resolve_animation(None, features))
+
+class TestPromptSteering(unittest.TestCase):
+    def test_prompt_steers_generation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+            model = generator._generate_model_content("auto", "auto", seed=1, prompt="a huge horse trotting")
+            regular = generator._generate_model_content("animal", None, seed=1, prompt="a horse")
+        
+        self.assertEqual(model["metadata"]["archetype"], "animal")
+        self.assertEqual([animation["name"] for animation in model["animations"]], ["walk"])
+        self.assertGreater(model["elements"][0]["to"][1], regular["elements"][0]["to"][1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import base64
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.model_generator import ModelGenerator
+from app.services.renderer import PreviewRenderer, render_image, rotation_matrices
+from app.services.result_cache import ResultCache
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+def cube(low, high, **extra):
+    faces = {name: {"uv": [0, 0, 16, 16], "texture": None} for name in ("north", "east", "south", "west", "up", "down")}
+    return {"name": "cube", "uuid": "c", "from": low, "to": high, "faces": faces, **extra}
+
+class TestRenderImage(unittest.TestCase):
+    def test_single_cube_shows_three_shaded_faces(self):
+        image = render_image({"elements": [cube([0, 0, 0], [16, 16, 16])]}, size=64)
+        
+        self.assertEqual(image.shape, (64, 64, 4))
+        opaque = image[..., 3] == 255
+        self.assertTrue(opaque[32, 32])
+        self.assertFalse(opaque[0, 0])
+        # Top, left and right faces are lit differently
+        self.assertEqual(len({tuple(pixel) for pixel in image[opaque][:, :3]}), 3)
+    
+    def test_nearer_cube_hides_farther_one(self):
+        # The camera looks from the -x/-z side, so the cube at -24 z is in front
+        near = cube([0, 0, -24], [16, 16, -8])
+        near["faces"] = {name: dict(face, texture=0) for name, face in near["faces"].items()}
+        far = cube([0, 0, 0], [16, 16, 16])
+        red = np.zeros((16, 16, 4), dtype=np.uint8)
+        red[...] = (255, 0, 0, 255)
+        buffer = io.BytesIO()
+        Image.fromarray(red, "RGBA").save(buffer, format="PNG")
+        bbmodel = {
+            "resolution": {"width": 16, "height": 16},
+            "textures": [{"source": "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()}],
+            "elements": [far, near]
+        }
+        
+        image = render_image(bbmodel, size=64)
+        center = image[32, 32]
+        self.assertGreater(center[0], 0)
+        self.assertEqual((center[1], center[2]), (0, 0))
+    
+    def test_rotation_matrices(self):
+        matrix = rotation_matrices(np.array([[0.0, 90.0, 0.0]]))[0]
+        np.testing.assert_allclose(matrix @ [1, 0, 0], [0, 0, -1], atol=1e-12)
+        matrix = rotation_matrices(np.array([[90.0, 0.0, 90.0]]))[0]
+        # X first: y -> z, then Z leaves z alone
+        np.testing.assert_allclose(matrix @ [0, 1, 0], [0, 0, 1], atol=1e-12)
+    
+    def test_empty_model_is_transparent(self):
+        self.assertFalse(render_image({"elements": []}, size=16)[..., 3].any())
+
+class TestPreviewRenderer(unittest.TestCase):
+    def test_cache_ignores_metadata(self):
+        renderer = PreviewRenderer(ResultCache(max_bytes=1024 * 1024))
+        bbmodel = {"elements": [cube([0, 0, 0], [8, 8, 8])], "metadata": {"created_at": "a"}}
+        png = renderer.render(bbmodel, 32)
+        
+        bbmodel["metadata"]["created_at"] = "b"
+        self.assertEqual(renderer.render(bbmodel, 32), png)
+        self.assertEqual(renderer.cache.stats()["hits"], 1)
+        self.assertEqual(Image.open(io.BytesIO(png)).size, (32, 32))
+
+class TestGeneratedPreviews(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 0
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name),
+            renderer=PreviewRenderer(ResultCache(max_bytes=1024 * 1024))
+        )
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.tmpdir.cleanup()
+    
+    def test_generation_writes_preview(self):
+        self.generator.generate_model("a green frog", "m1", "animal", seed=1)
+        
+        status = self.generator.get_model_status("m1", None)
+        self.assertEqual(status["preview_url"], "/static/models/m1_preview.png")
+        image = Image.open(self.generator.storage.preview_path("m1"))
+        self.assertEqual(image.size, (settings.PREVIEW_SIZE, settings.PREVIEW_SIZE))
+        # The green palette shows up in the render
+        pixels = np.asarray(image.convert("RGBA"))
+        opaque = pixels[pixels[..., 3] == 255]
+        self.assertGreater(opaque[:, 1].mean(), opaque[:, 0].mean())
+        
+        self.generator.storage.delete("m1")
+        self.assertFalse(self.generator.storage.exists("m1"))
+        self.assertFalse(os.path.exists(self.generator.storage.preview_path("m1")))
+
+if __name__ == "__main__":
+    unittest.main()
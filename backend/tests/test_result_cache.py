@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+
+from app.core.config import settings
+from app.services.animated_preview import AnimatedPreviewRenderer
+from app.services.model_generator import ModelGenerator
+from app.services.result_cache import ResultCache, SeededUUIDs, generation_key
+from app.services.status_store import MemoryStatusStore
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+class TestResultCache(unittest.TestCase):
+    def test_key_normalizes_prompt(self):
+        self.assertEqual(
+            generation_key("red robot", "character", None, "1"),
+            generation_key("  Red   ROBOT ", "character", None, "1")
+        )
+        self.assertNotEqual(
+            generation_key("red robot", "character", None, "1"),
+            generation_key("red robot", "character", "walk", "1")
+        )
+        self.assertNotEqual(
+            generation_key("red robot", "character", None, "1"),
+            generation_key("red robot", "character", None, "2")
+        )
+    
+    def test_size_bounded_eviction(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", b"12345")
+        cache.put("b", b"12345")
+        cache.get("a")
+        cache.put("c", b"12345")
+        
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), b"12345")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1))
+        self.assertEqual(stats["bytes"], 10)
+    
+    def test_seeded_uuids_are_deterministic(self):
+        first = SeededUUIDs(42)
+        second = SeededUUIDs(42)
+        
+        self.assertEqual(first(3) + first(2), second(5))
+        self.assertNotEqual(SeededUUIDs(43)(5), second(5))
+
+class TestCachedGeneration(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.delay = settings.GENERATION_STAGE_DELAY
+        settings.GENERATION_STAGE_DELAY = 0
+        self.generator = ModelGenerator(
+            status_store=MemoryStatusStore(),
+            storage=ModelStorage(self.tmpdir.name),
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(directory=self.tmpdir.name),
+            animated_renderer=AnimatedPreviewRenderer(self.tmpdir.name)
+        )
+    
+    def tearDown(self):
+        settings.GENERATION_STAGE_DELAY = self.delay
+        self.tmpdir.cleanup()
+    
+    def test_same_seed_same_content(self):
+        first = self.generator._generate_model_content("animal", "walk", seed=7)
+        second = self.generator._generate_model_content("animal", "walk", seed=7)
+        self.assertEqual(first, second)
+    
+    def test_repeat_request_hits_cache(self):
+        self.generator.generate_model("Red robot ", "m1", "character", "walk", user_id="u1")
+        self.generator.generate_model("red robot", "m2", "character", "walk", user_id="u2")
+        
+        self.assertFalse(self.generator.get_model_status("m1", "u1")["cache_hit"])
+        self.assertTrue(self.generator.get_model_status("m2", "u2")["cache_hit"])
+        first = self.generator.storage.load("m1")
+        second = self.generator.storage.load("m2")
+        self.assertEqual(first["elements"], second["elements"])
+        self.assertEqual(first["animations"], second["animations"])
+        self.assertEqual(second["metadata"]["user_id"], "u2")
+        self.assertEqual(second["metadata"]["prompt"], "red robot")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import threading
+import unittest
+
+from app.services.executor import QueueFullError
+from app.services.scheduler import FairShareScheduler, parse_tier_weights
+
+WEIGHTS = {"enterprise": 8.0, "pro": 4.0, "basic": 2.0, "free": 1.0}
+
+class TestFairShareScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = FairShareScheduler(
+            max_workers=1,
+            queue_limit=2000,
+            tier_weights=WEIGHTS,
+            user_concurrency=1,
+            user_queue_limit=1000
+        )
+        self.order = []
+        self.gate = threading.Event()
+        started = threading.Event()
+        # Occupy the only worker so everything submitted next is queued
+        self.blocker = self.scheduler.submit_as("blocker", "free", lambda: started.set() or self.gate.wait(5))
+        started.wait(5)
+    
+    def tearDown(self):
+        self.gate.set()
+        self.scheduler.shutdown(wait=True)
+    
+    def record(self, label):
+        self.order.append(label)
+    
+    def drain(self, futures):
+        self.gate.set()
+        for future in futures:
+            future.result(timeout=10)
+    
+    def test_parse_tier_weights(self):
+        self.assertEqual(parse_tier_weights("enterprise:8, pro:4"), {"enterprise": 8.0, "pro": 4.0, "free": 1.0})
+    
+    def test_tiers_share_workers_by_weight(self):
+        futures = []
+        for index in range(40):
+            futures.append(self.scheduler.submit_as(f"free{index}", "free", self.record, "free"))
+            futures.append(self.scheduler.submit_as(f"pro{index}", "pro", self.record, "pro"))
+        self.drain(futures)
+    
+        first = self.order[:20]
+        self.assertIn(first.count("pro"), (15, 16, 17))
+        # The lower tier still makes progress while the higher one is backlogged
+        self.assertGreaterEqual(first.count("free"), 3)
+    
+    def test_flooding_user_does_not_starve_others(self):
+        futures = [self.scheduler.submit_as("flood", "pro", self.record, "flood") for _ in range(500)]
+        futures += [self.scheduler.submit_as(f"user{index}", "pro", self.record, f"user{index}") for index in range(5)]
+        self.drain(futures)
+    
+        # Every other user runs within the first round of the rotation
+        self.assertEqual(sorted(self.order[:6]), ["flood"] + [f"user{index}" for index in range(5)])
+    
+    def test_user_concurrency_limit(self):
+        scheduler = FairShareScheduler(max_workers=3, queue_limit=10, tier_weights=WEIGHTS, user_concurrency=1)
+        lock = threading.Lock()
+        active = [0, 0]
+    
+        def job():
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            self.gate.wait(0.05)
+            with lock:
+                active[0] -= 1
+    
+        try:
+            futures = [scheduler.submit_as("alice", "enterprise", job) for _ in range(4)]
+            for future in futures:
+                future.result(timeout=10)
+        finally:
+            scheduler.shutdown(wait=True)
+        self.assertEqual(active[1], 1)
+    
+    def test_parallel_jobs_of_one_user(self):
+        scheduler = FairShareScheduler(max_workers=2, queue_limit=10, tier_weights=WEIGHTS, user_concurrency=2)
+        try:
+            futures = [scheduler.submit_as("alice", "pro", self.gate.wait, 0.05) for _ in range(4)]
+            for future in futures:
+                future.result(timeout=10)
+            stats = scheduler.stats()
+        finally:
+            scheduler.shutdown(wait=True)
+        self.assertEqual((stats["completed"], stats["users"]), (4, {}))
+    
+    def test_job_keyword_arguments_pass_through(self):
+        future = self.scheduler.submit_as("alice", "pro", dict, user_id="bob", tier="x", fn=None)
+        self.gate.set()
+        self.assertEqual(future.result(timeout=5), {"user_id": "bob", "tier": "x", "fn": None})
+    
+    def test_queue_limits(self):
+        scheduler = FairShareScheduler(max_workers=1, queue_limit=3, tier_weights=WEIGHTS, user_queue_limit=1)
+        try:
+            futures = [scheduler.submit_as("alice", "pro", self.gate.wait, 5)]
+            futures.append(scheduler.submit_as("bob", "pro", self.gate.wait, 5))
+            with self.assertRaises(QueueFullError):
+                scheduler.submit_as("bob", "pro", self.gate.wait, 5)
+            futures.append(scheduler.submit_as("carol", "pro", self.gate.wait, 5))
+            with self.assertRaises(QueueFullError):
+                scheduler.submit_as("dave", "pro", self.gate.wait, 5)
+            self.drain(futures)
+        finally:
+            scheduler.shutdown(wait=True)
+    
+    def test_shutdown_drops_queued_jobs_and_waits_for_running_ones(self):
+        futures = [self.scheduler.submit_as("alice", "pro", self.record, "a") for _ in range(3)]
+        threading.Timer(0.05, self.gate.set).start()
+        self.scheduler.shutdown(wait=True, cancel_futures=True)
+    
+        self.assertTrue(self.blocker.done() and not self.blocker.cancelled())
+        self.assertTrue(all(future.cancelled() for future in futures))
+        self.assertEqual(self.order, [])
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["queued"], stats["running"], stats["cancelled"], stats["users"]), (0, 0, 3, {}))
+    
+    def test_stats(self):
+        futures = [self.scheduler.submit_as("alice", "enterprise", self.record, "a") for _ in range(3)]
+        futures.append(self.scheduler.submit_as("bob", "unknown", self.record, "b"))
+    
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["queued"], stats["running"]), (4, 1))
+        self.assertEqual(stats["tiers"]["enterprise"]["queued"], 3)
+        self.assertEqual(stats["users"]["alice"], {"tier": "enterprise", "queued": 3, "in_flight": 0})
+        self.assertEqual(stats["users"]["bob"]["tier"], "free")
+        self.assertEqual(list(self.scheduler.stats(user_id="bob", all_users=False)["users"]), ["bob"])
+    
+        futures.append(self.scheduler.submit(self.record, "anonymous"))
+        self.drain(futures + [self.blocker])
+        stats = self.scheduler.stats()
+        self.assertEqual((stats["completed"], stats["queued"], stats["users"]), (6, 0, {}))
+        self.assertEqual(stats["tiers"]["enterprise"]["started"], 3)
+        self.assertGreaterEqual(stats["tiers"]["free"]["max_wait_seconds"], stats["tiers"]["free"]["mean_wait_seconds"])
+
+if __name__ == "__main__":
+    unittest.main()
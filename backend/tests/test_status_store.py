@@ -0,0 +1,74 @@
+import os
+import tempfile
+import time
+import unittest
+
+from app.services.status_store import MemoryStatusStore, SQLiteStatusStore
+
+class StatusStoreTests:
+    def test_set_get_update(self):
+        self.store.set("m1", {"model_id": "m1", "status": "processing", "message": "Starting"})
+        status = self.store.update("m1", message="Analyzing prompt...")
+        
+        self.assertEqual(status["message"], "Analyzing prompt...")
+        self.assertEqual(self.store.get("m1")["status"], "processing")
+        self.assertIsNone(self.store.update("missing", message="x"))
+        self.assertIsNone(self.store.get("missing"))
+    
+    def test_terminal_states_expire(self):
+        self.store.set("done", {"model_id": "done", "status": "completed"})
+        self.store.set("running", {"model_id": "running", "status": "processing"})
+        time.sleep(0.15)
+        
+        self.assertIsNone(self.store.get("done"))
+        self.assertIsNotNone(self.store.get("running"))
+        self.assertEqual(len(self.store), 1)
+
+class TestMemoryStatusStore(StatusStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.store = MemoryStatusStore(max_entries=3, retention_seconds=0.1)
+    
+    def test_lru_bound(self):
+        for i in range(5):
+            self.store.set(f"m{i}", {"model_id": f"m{i}", "status": "processing"})
+        
+        self.assertEqual(len(self.store), 3)
+        self.assertIsNone(self.store.get("m0"))
+        self.assertIsNotNone(self.store.get("m4"))
+    
+    def test_polling_keeps_an_entry(self):
+        for i in range(3):
+            self.store.set(f"m{i}", {"model_id": f"m{i}", "status": "processing"})
+        self.store.get("m0")
+        self.store.set("m3", {"model_id": "m3", "status": "processing"})
+        
+        self.assertIsNotNone(self.store.get("m0"))
+        self.assertIsNone(self.store.get("m1"))
+
+class TestSQLiteStatusStore(StatusStoreTests, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "status.db")
+        self.store = SQLiteStatusStore(path=self.path, retention_seconds=0.1)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_visible_to_other_instances(self):
+        self.store.set("m1", {"model_id": "m1", "status": "processing"})
+        other = SQLiteStatusStore(path=self.path, retention_seconds=0.1)
+        
+        self.assertEqual(other.get("m1")["status"], "processing")
+    
+    def test_entry_bound(self):
+        store = SQLiteStatusStore(path=self.path, retention_seconds=0.1, max_entries=3)
+        store.PURGE_INTERVAL = 1
+        for i in range(5):
+            store.set(f"m{i}", {"model_id": f"m{i}", "status": "processing"})
+        
+        self.assertEqual(len(store), 3)
+        self.assertIsNone(store.get("m1"))
+        self.assertIsNotNone(store.get("m4"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from app.services import serializer
+from app.services.model_generator import ModelGenerator
+from app.services.storage import ModelStorage
+from app.services.textures import TextureGenerator
+
+class TestSerializer(unittest.TestCase):
+    def test_compact_by_default(self):
+        data = serializer.dumps({"a": [1, 2], "b": "x"})
+        
+        self.assertEqual(serializer.loads(data), {"a": [1, 2], "b": "x"})
+        self.assertNotIn(b" ", data)
+        self.assertIn(b"\n", serializer.dumps({"a": 1}, pretty=True))
+    
+    def test_accepts_encoding(self):
+        self.assertTrue(serializer.accepts_encoding("gzip, deflate, br", "gzip"))
+        self.assertTrue(serializer.accepts_encoding("*", "gzip"))
+        self.assertTrue(serializer.accepts_encoding(None, "identity"))
+        self.assertFalse(serializer.accepts_encoding("gzip;q=0, br", "gzip"))
+        self.assertFalse(serializer.accepts_encoding(None, "gzip"))
+
+class TestModelStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.storage = ModelStorage(self.tmpdir.name)
+        with tempfile.TemporaryDirectory() as directory:
+            generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+            self.bbmodel = generator._generate_mock_bbmodel("red robot", "character", "walk", "u1")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_round_trip_each_encoding(self):
+        for encoding, available in serializer.available_encodings().items():
+            if not available:
+                continue
+            meta = self.storage.save("m1", self.bbmodel, encoding=encoding)
+            
+            self.assertEqual(meta["encoding"], encoding)
+            self.assertEqual(self.storage.load("m1"), self.bbmodel)
+            self.assertEqual(list(self.storage.iter_model_ids()), ["m1"])
+    
+    def test_gzip_is_smaller(self):
+        plain = self.storage.save("m1", self.bbmodel, encoding="identity")
+        compressed = self.storage.save("m1", self.bbmodel, encoding="gzip")
+        
+        self.assertLess(compressed["stored_size"], plain["stored_size"])
+        self.assertEqual(compressed["content_hash"], plain["content_hash"])
+        self.assertTrue(self.storage.path("m1").endswith(".bbmodel.gz"))
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "m1.bbmodel")))
+    
+    def test_save_stream_matches_save(self):
+        data = serializer.dumps(self.bbmodel)
+        for encoding, available in serializer.available_encodings().items():
+            if not available:
+                continue
+            saved = self.storage.save("m1", self.bbmodel, encoding=encoding)
+            streamed = self.storage.save_stream("m2", (data[i:i + 100] for i in range(0, len(data), 100)), encoding)
+            
+            self.assertEqual(streamed["content_hash"], saved["content_hash"])
+            self.assertEqual(self.storage.load("m2"), self.bbmodel)
+    
+    def test_failed_stream_keeps_nothing(self):
+        def chunks():
+            yield b'{"elements": ['
+            raise ValueError("broken upload")
+        
+        with self.assertRaises(ValueError):
+            self.storage.save_stream("m1", chunks())
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import base64
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+from app.services.archetypes import archetype_registry
+from app.services.model_generator import ModelGenerator
+from app.services.renderer import load_texture_bytes
+from app.services.result_cache import ResultCache
+from app.services.textures import COLOR_WORDS, TextureGenerator, palette_from_prompt, render_atlas
+from app.services.uv_packer import pack_uvs
+
+def decode(png):
+    return np.asarray(Image.open(io.BytesIO(png)).convert("RGBA"))
+
+class TestPalette(unittest.TestCase):
+    def test_prompt_colours_come_first(self):
+        palette = palette_from_prompt("A BLUE knight with red, blue trim", "character")
+        self.assertEqual(palette[0], COLOR_WORDS["blue"])
+        self.assertEqual(palette[1], COLOR_WORDS["red"])
+        self.assertEqual(len(palette), 4)
+    
+    def test_defaults_without_colours(self):
+        self.assertEqual(palette_from_prompt("a knight", "character"), palette_from_prompt("a squire", "character"))
+        self.assertNotEqual(palette_from_prompt("a knight", "character"), palette_from_prompt("a dog", "animal"))
+
+class TestRenderAtlas(unittest.TestCase):
+    def test_faces_are_filled_and_rest_is_transparent(self):
+        rects = np.array([[0, 0, 4, 4], [4, 0, 8, 2]])
+        colors = np.array([[200.0, 0, 0], [0, 0, 200.0]])
+        image = render_atlas(16, 8, rects, colors, np.array([1.0, 1.0]), seed=1)
+        
+        self.assertEqual(image.shape, (8, 16, 4))
+        self.assertTrue((image[:4, :4, 3] == 255).all())
+        self.assertTrue((image[4:, :, 3] == 0).all())
+        self.assertTrue((image[:4, :4, 0] > image[:4, :4, 2]).all())
+        self.assertTrue((image[:2, 4:8, 2] > image[:2, 4:8, 0]).all())
+    
+    def test_same_seed_renders_the_same(self):
+        rects = np.array([[0, 0, 16, 16]])
+        colors = np.array([[128.0, 128, 128]])
+        first = render_atlas(16, 16, rects, colors, np.array([1.0]), seed=3)
+        np.testing.assert_array_equal(first, render_atlas(16, 16, rects, colors, np.array([1.0]), seed=3))
+        self.assertFalse((first == render_atlas(16, 16, rects, colors, np.array([1.0]), seed=4)).all())
+
+class TestTextureGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.textures = TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name)
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_atlas_matches_packed_resolution(self):
+        cubes = archetype_registry.instantiate("character")
+        resolution = pack_uvs(cubes)
+        key, png = self.textures.generate(cubes, palette_from_prompt("green", "character"), resolution)
+        
+        image = decode(png)
+        self.assertEqual(image.shape[:2], (resolution[1], resolution[0]))
+        # Every face rectangle is opaque
+        for x1, y1, x2, y2 in cubes.data["uv"][cubes.data["has_face"]].astype(int):
+            self.assertTrue((image[y1:y2, x1:x2, 3] == 255).all())
+        
+        path = self.textures.save(key, png)
+        self.assertEqual(path, os.path.join(self.tmpdir.name, f"{key}.png"))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), png)
+    
+    def test_cache_is_keyed_by_palette_and_layout(self):
+        cubes = archetype_registry.instantiate("animal")
+        resolution = pack_uvs(cubes)
+        key, png = self.textures.generate(cubes, palette_from_prompt("red", "animal"), resolution)
+        
+        # New UUIDs do not change the texture, a new palette does
+        again = archetype_registry.instantiate("animal")
+        pack_uvs(again)
+        self.assertEqual(self.textures.generate(again, palette_from_prompt("red", "animal"), resolution), (key, png))
+        self.assertEqual(self.textures.cache.stats()["hits"], 1)
+        other, _ = self.textures.generate(cubes, palette_from_prompt("blue", "animal"), resolution)
+        self.assertNotEqual(other, key)
+
+class TestGeneratedTextures(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.generator = ModelGenerator(
+            cache=ResultCache(max_bytes=1024 * 1024),
+            textures=TextureGenerator(ResultCache(max_bytes=1024 * 1024), self.tmpdir.name)
+        )
+        self.embed = settings.TEXTURE_EMBED
+    
+    def tearDown(self):
+        settings.TEXTURE_EMBED = self.embed
+        self.tmpdir.cleanup()
+    
+    def test_texture_is_embedded_and_linked(self):
+        bbmodel = self.generator._generate_mock_bbmodel("a yellow robot", "character", None, "u1", seed=1)
+        
+        self.assertEqual(len(bbmodel["textures"]), 1)
+        source = bbmodel["textures"][0]["source"]
+        self.assertTrue(source.startswith("data:image/png;base64,"))
+        image = decode(base64.b64decode(source.split(",", 1)[1]))
+        self.assertEqual(image.shape[:2], (bbmodel["resolution"]["height"], bbmodel["resolution"]["width"]))
+        
+        url = bbmodel["metadata"]["texture_url"]
+        self.assertTrue(url.startswith("/static/textures/"))
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, os.path.basename(url))))
+    
+    def test_linked_only(self):
+        settings.TEXTURE_EMBED = False
+        bbmodel = self.generator._generate_mock_bbmodel("a yellow robot", "character", None, "u1", seed=1)
+        texture = bbmodel["textures"][0]
+        self.assertNotIn("source", texture)
+        self.assertIn("texture_url", bbmodel["metadata"])
+        
+        # The entry itself points at the stored atlas, so it loads without the metadata link
+        path = os.path.join(self.tmpdir.name, os.path.basename(texture["relative_path"]))
+        self.assertTrue(os.path.exists(path))
+        del bbmodel["metadata"]["texture_url"]
+        textures_dir = settings.TEXTURES_DIR
+        settings.TEXTURES_DIR = self.tmpdir.name
+        try:
+            data = load_texture_bytes(bbmodel)
+        finally:
+            settings.TEXTURES_DIR = textures_dir
+        with open(path, "rb") as f:
+            self.assertEqual(data, [f.read()])
+
+if __name__ == "__main__":
+    unittest.main()
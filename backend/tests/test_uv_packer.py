@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.services.archetypes import archetype_registry
+from app.services.model_generator import ModelGenerator
+from app.services.textures import TextureGenerator
+from app.services.uv_packer import face_sizes, next_power_of_two, pack_model_uvs, pack_rectangles, pack_uvs
+
+def assert_disjoint(test, x, y, widths, heights):
+    # Paint every rectangle and check that no texel is painted twice
+    canvas = np.zeros((int((y + heights).max()), int((x + widths).max())), dtype=np.int64)
+    for left, top, width, height in zip(x, y, widths, heights):
+        canvas[top:top + height, left:left + width] += 1
+    test.assertLessEqual(canvas.max(), 1)
+
+class TestPackRectangles(unittest.TestCase):
+    def test_power_of_two(self):
+        self.assertEqual([next_power_of_two(v) for v in (1, 2, 3, 16, 17, 100.5)], [1, 2, 4, 16, 32, 128])
+    
+    def test_random_rectangles_do_not_overlap(self):
+        rng = np.random.default_rng(0)
+        widths = rng.integers(1, 20, 2000)
+        heights = rng.integers(1, 20, 2000)
+        x, y, atlas_width, atlas_height = pack_rectangles(widths, heights)
+        
+        assert_disjoint(self, x, y, widths, heights)
+        self.assertTrue(((x + widths) <= atlas_width).all())
+        self.assertTrue(((y + heights) <= atlas_height).all())
+        self.assertEqual(atlas_width & (atlas_width - 1), 0)
+        self.assertEqual(atlas_height & (atlas_height - 1), 0)
+        # Within a factor of the ideal area after power-of-two rounding
+        self.assertGreater((widths * heights).sum() / (atlas_width * atlas_height), 0.4)
+    
+    def test_padding_separates_rectangles(self):
+        widths = np.full(10, 4)
+        heights = np.full(10, 4)
+        x, y, _, _ = pack_rectangles(widths, heights, padding=1)
+        assert_disjoint(self, x, y, widths + 1, heights + 1)
+
+class TestPackUVs(unittest.TestCase):
+    def test_character_faces_get_their_own_rectangles(self):
+        cubes = archetype_registry.instantiate("character")
+        width, height = pack_uvs(cubes)
+        
+        cube_index, face_index, widths, heights = face_sizes(cubes)
+        uv = cubes.data["uv"][cube_index, face_index]
+        np.testing.assert_array_equal(uv[:, 2] - uv[:, 0], widths)
+        np.testing.assert_array_equal(uv[:, 3] - uv[:, 1], heights)
+        assert_disjoint(self, uv[:, 0].astype(int), uv[:, 1].astype(int), widths, heights)
+        self.assertLessEqual(width * height, 64 * 64)
+    
+    def test_pack_model_uvs_leaves_other_elements(self):
+        mesh = {"type": "mesh", "uuid": "m", "name": "mesh", "faces": {"a": {"uv": {"v": [0, 0]}}}}
+        bbmodel = {
+            "resolution": {"width": 16, "height": 16},
+            "elements": [
+                {"type": "cube", "uuid": "c", "name": "cube", "from": [0, 0, 0], "to": [32, 8, 8],
+                 "faces": {"north": {"uv": [0, 0, 1, 1], "texture": 0}, "up": {"uv": [0, 0, 1, 1], "texture": 0}}},
+                mesh
+            ]
+        }
+        width, height = pack_model_uvs(bbmodel)
+        
+        self.assertEqual(bbmodel["resolution"], {"width": width, "height": height})
+        faces = bbmodel["elements"][0]["faces"]
+        self.assertEqual(sorted(faces), ["north", "up"])
+        self.assertEqual(faces["north"]["uv"][2] - faces["north"]["uv"][0], 32)
+        self.assertEqual(bbmodel["elements"][1], {"type": "mesh", "uuid": "m", "name": "mesh", "faces": {"a": {"uv": {"v": [0, 0]}}}})
+    
+    def test_generator_writes_packed_resolution(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = ModelGenerator(textures=TextureGenerator(directory=directory))
+            model = generator._generate_model_content("vehicle", None, seed=1)
+        resolution = model["resolution"]
+        for element in model["elements"]:
+            for face in element["faces"].values():
+                self.assertLessEqual(face["uv"][2], resolution["width"])
+                self.assertLessEqual(face["uv"][3], resolution["height"])
+
+if __name__ == "__main__":
+    unittest.main()